@@ -23,9 +23,11 @@ from gofer.messaging import Topic
 from gofer.messaging.producer import Producer
 from gofer.pmon import PathMonitor
 from pulp.common.bundle import Bundle as BundleImpl
+from pulp.common import profiles
 from pulp.agent.lib.dispatcher import Dispatcher
 from pulp.bindings.server import PulpConnection
 from pulp.bindings.bindings import Bindings
+from pulp.bindings.exceptions import ConflictException
 from logging import getLogger
 
 log = getLogger(__name__)
@@ -327,6 +329,14 @@ class Profile:
     Profile Management
     """
 
+    # The last profile of each content type accepted by the server:
+    #   {typeid:(profile_hash, profile)}
+    # An unchanged profile is reported by its hash and a changed one
+    # as the delta from the last one.  When the server does not have the
+    # last profile (agent restarted, or the profile was reported by other
+    # means) it rejects the report and the full profile is sent.
+    reported = {}
+
     @remote(secret=secret)
     def send(self):
         """
@@ -344,6 +354,43 @@ class Profile:
             if not report['status']:
                 continue
             details = report['details']
-            http = bindings.profile.send(myid, typeid, details)
+            http = self.__send(bindings, myid, typeid, details)
             log.info('profile (%s), reported: %d', typeid, http.response_code)
         return report
+
+    def __send(self, bindings, myid, typeid, profile):
+        """
+        Send a content profile to the server; as a hash or a delta
+        when the server has the last profile reported.
+        @param bindings: The pulp bindings.
+        @type bindings: L{PulpBindings}
+        @param myid: The consumer ID.
+        @type myid: str
+        @param typeid: The profile (content) type ID.
+        @type typeid: str
+        @param profile: The content profile.
+        @type profile: object
+        @return: The http response.
+        """
+        profile_hash = profiles.profile_hash(profile)
+        last = self.reported.get(typeid)
+        http = None
+        try:
+            if last is not None:
+                last_hash, last_profile = last
+                if last_hash == profile_hash:
+                    http = bindings.profile.send_hash(myid, typeid, profile_hash)
+                else:
+                    delta = profiles.profile_delta(last_profile, profile)
+                    if delta is not None:
+                        added, removed = delta
+                        log.info('profile (%s), %d added, %d removed',
+                                 typeid, len(added), len(removed))
+                        http = bindings.profile.send_delta(
+                            myid, typeid, last_hash, added, removed, profile_hash)
+        except ConflictException:
+            log.info('profile (%s), not current on the server', typeid)
+        if http is None:
+            http = bindings.profile.send(myid, typeid, profile)
+        self.reported[typeid] = (profile_hash, profile)
+        return http
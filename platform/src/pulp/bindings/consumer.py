@@ -124,6 +124,17 @@ class ProfilesAPI(PulpAPI):
         data = { 'content_type':content_type, 'profile':profile }
         return self.server.POST(path, data)
 
+    def send_hash(self, id, content_type, profile_hash):
+        path = self.BASE_PATH % id
+        data = { 'content_type':content_type, 'profile_hash':profile_hash }
+        return self.server.POST(path, data)
+
+    def send_delta(self, id, content_type, base_hash, added, removed, profile_hash):
+        path = self.BASE_PATH % id
+        delta = { 'base_hash':base_hash, 'added':added, 'removed':removed }
+        data = { 'content_type':content_type, 'delta':delta, 'profile_hash':profile_hash }
+        return self.server.POST(path, data)
+
 
 class ConsumerHistoryAPI(PulpAPI):
     """
@@ -12,8 +12,12 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import base64
+import httplib
 import locale
 import logging
+import os
+import socket
+import threading
 from M2Crypto import SSL, httpslib
 import urllib
 from pulp.bindings.responses import Response, Task
@@ -86,8 +90,8 @@ class PulpConnection(object):
     def POST(self, path, body=None):
         return self._request('POST', path, body=body)
 
-    def PUT(self, path, body):
-        return self._request('PUT', path, body=body)
+    def PUT(self, path, body, queries=()):
+        return self._request('PUT', path, queries, body=body)
 
     # protected request utilities ---------------------------------------------
 
@@ -194,56 +198,256 @@ class PulpConnection(object):
 
 # -- wrapper classes ----------------------------------------------------------
 
+# Methods whose requests can safely be sent to the server more than once
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+
 class HTTPSServerWrapper(object):
     """
     Used by the PulpConnection class to make an invocation against the server.
     This abstraction is used to simplify mocking. In this implementation, the
     intricacies (read: ugliness) of invoking and getting the response from
     the HTTPConnection class are hidden in favor of a simpler API to mock.
+
+    Connections are taken from the pool shared by all wrappers for the same
+    server, so they are reused by subsequent requests (HTTP/1.1 keep-alive)
+    rather than opened, with a full SSL handshake, for each one.
     """
 
     def __init__(self, pulp_connection):
         self.pulp_connection = pulp_connection
+        self.pool = connection_pool(pulp_connection.host, pulp_connection.port)
 
     def request(self, method, url, body):
 
         headers = dict(self.pulp_connection.headers) # copy so we don't affect the calling method
 
-        # Create a new connection each time since HTTPSConnection has problems
-        # reusing a connection for multiple calls (lame).
-        ssl_context = None
+        cert_filename = None
         if self.pulp_connection.username and self.pulp_connection.password:
             raw = ':'.join((self.pulp_connection.username, self.pulp_connection.password))
             encoded = base64.encodestring(raw)[:-1]
             headers['Authorization'] = 'Basic ' + encoded
         elif self.pulp_connection.cert_filename:
-            ssl_context = SSL.Context('sslv3')
-            ssl_context.set_session_timeout(self.pulp_connection.timeout)
-            ssl_context.load_cert(self.pulp_connection.cert_filename)
-
-        # Can't pass in None, so need to decide between two signatures (also lame)
-        if ssl_context is not None:
-            connection = httpslib.HTTPSConnection(self.pulp_connection.host, self.pulp_connection.port, ssl_context=ssl_context)
-        else:
-            connection = httpslib.HTTPSConnection(self.pulp_connection.host, self.pulp_connection.port)
+            cert_filename = self.pulp_connection.cert_filename
 
-        # Request against the server
-        connection.request(method, url, body=body, headers=headers)
+        connection = self.pool.idle_connection(cert_filename)
+        reused = connection is not None
+        if not reused:
+            connection = self.pool.new_connection(cert_filename, self.pulp_connection.timeout)
 
         try:
-            response = connection.getresponse()
+            result = self._exchange(connection, method, url, body, headers, reused)
+            if result is None:
+                # The server closed the idle connection; retry on a new one
+                connection = self.pool.new_connection(cert_filename, self.pulp_connection.timeout)
+                result = self._exchange(connection, method, url, body, headers)
         except SSL.SSLError, err:
+            connection.close()
             # Translate stale login certificate to an auth exception
             if 'sslv3 alert certificate expired' == str(err):
                 raise exceptions.PermissionsException()
             else:
                 raise exceptions.ConnectionException(None, str(err), None)
 
-        # Attempt to deserialize the body (should pass unless the server is busted)
-        response_body = response.read()
+        response, response_body = result
+        self.pool.release(cert_filename, connection, response.will_close)
 
+        # Attempt to deserialize the body (should pass unless the server is busted)
         try:
             response_body = json.loads(response_body)
         except:
             pass
         return response.status, response_body
+
+    def _exchange(self, connection, method, url, body, headers, reused=False):
+        """
+        Sends the request and reads the complete response, which is required
+        before the connection can be used again. The connection is closed if
+        either fails.
+
+        A reused connection may have been closed by the server while it was
+        idle. The request is only sent again if the server cannot have acted
+        on it: it was not completely sent, or the server closed the connection
+        without responding. Requests with idempotent methods are sent again
+        after any error.
+
+        :return: tuple of the response and its body; None if the request
+                 failed on a reused connection and should be sent again on a
+                 new one
+        :rtype:  tuple or None
+        """
+        try:
+            connection.request(method, url, body=body, headers=headers)
+        except (httplib.HTTPException, socket.error, SSL.SSLError):
+            connection.close()
+            if reused:
+                return None
+            raise
+        try:
+            response = connection.getresponse()
+            return response, response.read()
+        except (httplib.HTTPException, socket.error, SSL.SSLError), e:
+            connection.close()
+            if reused and (isinstance(e, httplib.BadStatusLine) or method.upper() in IDEMPOTENT_METHODS):
+                return None
+            raise
+
+# -- connection pool ----------------------------------------------------------
+
+class ConnectionPool(object):
+    """
+    Idle HTTPS connections to a single server, along with the SSL context
+    and the last SSL session for each client certificate so that new
+    connections resume the session rather than performing a full handshake.
+    Connections authenticated with basic auth are pooled under a certificate
+    of None. The pool may be used by multiple threads; a connection is only
+    handed to one of them at a time.
+    """
+
+    # Maximum number of idle connections kept open to the server
+    MAX_IDLE_CONNECTIONS = 4
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+        self._lock = threading.Lock()
+        self._idle_connections = [] # list of (cert filename, connection)
+        self._ssl_contexts = {} # cert filename -> (stat signature, context)
+        self._ssl_sessions = {} # cert filename -> SSL session of the last connection
+
+    def idle_connection(self, cert_filename):
+        """
+        :param cert_filename: client certificate; None for basic auth
+        :type  cert_filename: str or None
+
+        :return: the most recently used idle connection for the certificate,
+                 or None if there is none
+        :rtype:  M2Crypto.httpslib.HTTPSConnection or None
+        """
+        self._lock.acquire()
+        try:
+            for i in range(len(self._idle_connections) - 1, -1, -1):
+                if self._idle_connections[i][0] == cert_filename:
+                    return self._idle_connections.pop(i)[1]
+            return None
+        finally:
+            self._lock.release()
+
+    def new_connection(self, cert_filename, timeout):
+        """
+        :param cert_filename: client certificate; None for basic auth
+        :type  cert_filename: str or None
+
+        :param timeout: SSL session timeout in seconds
+        :type  timeout: int
+
+        :return: unconnected connection to the server
+        :rtype:  M2Crypto.httpslib.HTTPSConnection
+        """
+        # Can't pass in None, so need to decide between two signatures (also lame)
+        if cert_filename is None:
+            return httpslib.HTTPSConnection(self.host, self.port)
+
+        ssl_context = self._ssl_context(cert_filename, timeout)
+        connection = httpslib.HTTPSConnection(self.host, self.port, ssl_context=ssl_context)
+
+        self._lock.acquire()
+        try:
+            session = self._ssl_sessions.get(cert_filename)
+        finally:
+            self._lock.release()
+        if session is not None:
+            connection.set_session(session)
+        return connection
+
+    def release(self, cert_filename, connection, will_close):
+        """
+        Returns a connection whose response has been read to the pool, unless
+        the server indicated it will close it or the pool is full.
+
+        :param will_close: True if the server will close the connection
+        :type  will_close: bool
+        """
+        self._lock.acquire()
+        try:
+            # httplib has already closed the socket if the response said so
+            if cert_filename is not None and connection.sock is not None:
+                self._ssl_sessions[cert_filename] = connection.get_session()
+            if not will_close and len(self._idle_connections) < self.MAX_IDLE_CONNECTIONS:
+                self._idle_connections.append((cert_filename, connection))
+                connection = None
+        finally:
+            self._lock.release()
+
+        if connection is not None:
+            connection.close()
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        self._lock.acquire()
+        try:
+            idle = self._idle_connections
+            self._idle_connections = []
+        finally:
+            self._lock.release()
+        for cert_filename, connection in idle:
+            connection.close()
+
+    def _ssl_context(self, cert_filename, timeout):
+        """
+        Returns the SSL context for the certificate, creating a new one (and
+        discarding the connections and session of the previous one) when the
+        certificate file has been replaced, such as by a new login.
+        """
+        try:
+            stat = os.stat(cert_filename)
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime)
+        except OSError:
+            signature = None
+
+        self._lock.acquire()
+        try:
+            entry = self._ssl_contexts.get(cert_filename)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+
+            stale = [c for f, c in self._idle_connections if f == cert_filename]
+            self._idle_connections = [(f, c) for f, c in self._idle_connections if f != cert_filename]
+            self._ssl_sessions.pop(cert_filename, None)
+        finally:
+            self._lock.release()
+
+        for connection in stale:
+            connection.close()
+
+        ssl_context = SSL.Context('sslv3')
+        ssl_context.set_session_timeout(timeout)
+        ssl_context.load_cert(cert_filename)
+
+        self._lock.acquire()
+        try:
+            self._ssl_contexts[cert_filename] = (signature, ssl_context)
+        finally:
+            self._lock.release()
+        return ssl_context
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def connection_pool(host, port):
+    """
+    :return: the connection pool shared by all connections to the server
+    :rtype:  ConnectionPool
+    """
+    _POOLS_LOCK.acquire()
+    try:
+        pool = _POOLS.get((host, port))
+        if pool is None:
+            pool = _POOLS[(host, port)] = ConnectionPool(host, port)
+        return pool
+    finally:
+        _POOLS_LOCK.release()
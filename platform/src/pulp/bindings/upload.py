@@ -25,9 +25,12 @@ class UploadAPI(PulpAPI):
         url = '/v2/content/uploads/'
         return self.server.POST(url)
 
-    def upload_segment(self, upload_id, offset, data):
+    def upload_segment(self, upload_id, offset, data, checksum=None):
         url = '/v2/content/uploads/%s/%s/' % (upload_id, offset)
-        return self.server.PUT(url, data)
+        queries = ()
+        if checksum is not None:
+            queries = {'checksum' : checksum}
+        return self.server.PUT(url, data, queries)
 
     def list_all_uploads(self):
         url = '/v2/content/uploads/'
@@ -15,6 +15,13 @@
 Functionality related to loading extensions from a set location. The client
 context is constructed ahead of time and provided to this module, which
 then uses it to instantiate the extension components.
+
+Loading every extension pack is expensive relative to running a single CLI
+command. When given a manifest file, the loader records there which top-level
+sections and commands each pack contributes to. Subsequent invocations only
+import and initialize the packs that contribute to the section or command
+being run (along with the packs that create the sections those packs add
+to). The manifest is rebuilt whenever the extension packs change on disk.
 """
 
 from ConfigParser import SafeConfigParser
@@ -24,6 +31,11 @@ import logging
 import os
 import sys
 
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
 # -- constants ----------------------------------------------------------------
 
 _LOG = logging.getLogger(__name__)
@@ -35,6 +47,9 @@ _MODULE_SHELL = 'pulp_shell'
 _PRIORITY_VAR = 'PRIORITY'
 _DEFAULT_PRIORITY = 5
 
+# Incremented when the manifest file format changes
+_MANIFEST_VERSION = 1
+
 # -- exceptions ---------------------------------------------------------------
 
 class ExtensionLoaderException(Exception):
@@ -75,7 +90,7 @@ class InvalidExtensionConfig(ExtensionLoaderException): pass
 
 # -- loading ------------------------------------------------------------------
 
-def load_extensions(extensions_dir, context):
+def load_extensions(extensions_dir, context, manifest_filename=None, args=None):
     """
     @param extensions_dir: directory in which to find extension packs
     @type  extensions_dir: str
@@ -83,20 +98,47 @@ def load_extensions(extensions_dir, context):
     @param context: pre-populated context the extensions should be given to
                     interact with the client
     @type  context: ClientContext
+
+    @param manifest_filename: file in which to cache which sections and
+                    commands each pack contributes; if None, all packs are
+                    always loaded
+    @type  manifest_filename: str
+
+    @param args: arguments the CLI is being run with; used with the manifest
+                 to determine which packs must be loaded
+    @type  args: list
     """
 
     # Validation
     if not os.access(extensions_dir, os.F_OK | os.R_OK):
         raise InvalidExtensionsDirectory(extensions_dir)
 
+    # Only CLI extensions are described by the manifest
+    if context.cli is None:
+        manifest_filename = None
+
+    signature = None
+    if manifest_filename is not None:
+        signature = _extensions_signature(extensions_dir)
+        if args:
+            manifest = _read_manifest(manifest_filename, extensions_dir, signature)
+            pack_names = _packs_for_name(manifest, args[0])
+            if pack_names is not None:
+                _load_packs(extensions_dir, context, pack_names)
+                return
+
     try:
         unsorted_modules = _load_pack_modules(extensions_dir)
         sorted_modules = _resolve_order(unsorted_modules)
     except ImportFailed, e:
         raise LoadFailed([e.pack_name]), None, sys.exc_info()[2]
 
+    manifest_packs = []
     error_packs = []
     for m in sorted_modules:
+        before = None
+        if manifest_filename is not None:
+            before = _cli_structure(context.cli)
         try:
             _load_pack(extensions_dir, m, context)
         except ExtensionLoaderException, e:
@@ -104,15 +146,47 @@ def load_extensions(extensions_dir, context):
             # the cause will be logged by _load_pack. This method should
             # continue to load extensions so all of the errors are logged.
             error_packs.append(m.__name__)
+            continue
+
+        if before is not None:
+            changed = before.symmetric_difference(_cli_structure(context.cli))
+            names = sorted(set([path[0] for path, node_id in changed]))
+            manifest_packs.append({'name' : m.__name__, 'names' : names})
+
+    if len(error_packs) > 0:
+        raise LoadFailed(error_packs)
+
+    if manifest_filename is not None:
+        _write_manifest(manifest_filename, extensions_dir, signature, manifest_packs)
+
+def _load_packs(extensions_dir, context, pack_names):
+    """
+    Loads the named packs, in the given order, as found in the manifest.
+    """
+    try:
+        modules = _load_pack_modules(extensions_dir, pack_names)
+    except ImportFailed, e:
+        raise LoadFailed([e.pack_name]), None, sys.exc_info()[2]
+
+    error_packs = []
+    for m in modules:
+        try:
+            _load_pack(extensions_dir, m, context)
+        except ExtensionLoaderException, e:
+            error_packs.append(m.__name__)
 
     if len(error_packs) > 0:
         raise LoadFailed(error_packs)
 
-def _load_pack_modules(extensions_dir):
+def _load_pack_modules(extensions_dir, pack_names=None):
     """
     Loads the modules for each pack in the extensions directory, taking care
     to update the system path as appropriate.
 
+    @param pack_names: names of the packs to load; defaults to all of the
+           packs in the extensions directory
+    @type  pack_names: list
+
     @return: list of module instances loaded from the call
     @rtype:  list
 
@@ -127,7 +201,8 @@ def _load_pack_modules(extensions_dir):
 
     modules = []
 
-    pack_names = sorted(os.listdir(extensions_dir))
+    if pack_names is None:
+        pack_names = sorted(os.listdir(extensions_dir))
     for pack in pack_names:
         try:
             mod = __import__(pack)
@@ -219,3 +294,129 @@ def _load_pack(extensions_dir, pack_module, context):
     except Exception, e:
         _LOG.exception(_('Module [%(m)s] could not be initialized' % {'m' : init_mod_name}))
         raise InitError(), None, sys.exc_info()[2]
+
+# -- manifest -----------------------------------------------------------------
+
+def _extensions_signature(extensions_dir):
+    """
+    Returns a value that changes whenever a pack is added to or removed from
+    the extensions directory or any of the files in a pack are modified.
+
+    @return: list of [pack name, latest modification time of its files]
+    @rtype:  list
+    """
+    signature = []
+    for pack in sorted(os.listdir(extensions_dir)):
+        latest = 0
+        for dirpath, dirnames, filenames in os.walk(os.path.join(extensions_dir, pack)):
+            for name in [dirpath] + [os.path.join(dirpath, f) for f in filenames]:
+                try:
+                    latest = max(latest, os.stat(name).st_mtime)
+                except OSError:
+                    pass
+        signature.append([pack, latest])
+    return signature
+
+def _cli_structure(cli):
+    """
+    @return: set of (path, node ID) for every section and command in the CLI,
+             where path is the tuple of names leading to the node
+    @rtype:  set
+    """
+    structure = set()
+    sections = [((), cli.root_section)]
+    while sections:
+        path, section = sections.pop()
+        for name, command in section.commands.items():
+            structure.add((path + (name,), id(command)))
+        for name, subsection in section.subsections.items():
+            structure.add((path + (name,), id(subsection)))
+            sections.append((path + (name,), subsection))
+    return structure
+
+def _read_manifest(manifest_filename, extensions_dir, signature):
+    """
+    @return: manifest contents if the file exists and describes the current
+             extension packs; None otherwise
+    @rtype:  dict or None
+    """
+    try:
+        f = open(manifest_filename, 'r')
+        try:
+            manifest = json.load(f)
+        finally:
+            f.close()
+    except Exception:
+        return None
+
+    if not isinstance(manifest, dict) or \
+       manifest.get('version') != _MANIFEST_VERSION or \
+       manifest.get('extensions_dir') != extensions_dir or \
+       manifest.get('signature') != signature:
+        return None
+
+    return manifest
+
+def _write_manifest(manifest_filename, extensions_dir, signature, packs):
+    """
+    Saves the manifest; failures are logged but otherwise ignored since the
+    manifest only serves to speed up later invocations.
+
+    @param packs: list of pack name and contributed names, in load order
+    @type  packs: list of dict
+    """
+    manifest = {'version' : _MANIFEST_VERSION,
+                'extensions_dir' : extensions_dir,
+                'signature' : signature,
+                'packs' : packs}
+
+    temp_filename = '%s.%d' % (manifest_filename, os.getpid())
+    try:
+        dirname = os.path.dirname(manifest_filename)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        f = open(temp_filename, 'w')
+        try:
+            json.dump(manifest, f)
+        finally:
+            f.close()
+        os.rename(temp_filename, manifest_filename)
+    except Exception:
+        _LOG.exception(_('Could not write extensions manifest [%(m)s]' % {'m' : manifest_filename}))
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+def _packs_for_name(manifest, name):
+    """
+    Determines which packs need to be loaded to run the top-level section or
+    command with the given name: every pack contributing to it, plus, for
+    each of those, the first pack to contribute to each of the other names it
+    contributes to, as that pack is the one creating the section.
+
+    @return: names of the packs to load, in load order; None if the manifest
+             is missing or no pack contributes the name
+    @rtype:  list or None
+    """
+    if manifest is None:
+        return None
+
+    packs = manifest['packs']
+    owners = {}
+    for pack in packs:
+        for n in pack['names']:
+            owners.setdefault(n, pack['name'])
+
+    if name not in owners:
+        return None
+
+    selected = set([p['name'] for p in packs if name in p['names']])
+    pending = list(selected)
+    names_by_pack = dict([(p['name'], p['names']) for p in packs])
+    while pending:
+        for n in names_by_pack[pending.pop()]:
+            owner = owners[n]
+            if owner not in selected:
+                selected.add(owner)
+                pending.append(owner)
+
+    return [str(p['name']) for p in packs if p['name'] in selected]
@@ -93,8 +93,11 @@ def main(config_filenames):
     # Load extensions into the UI in the context
     extensions_dir = config['filesystem']['extensions_dir']
     extensions_dir = os.path.expanduser(extensions_dir)
+    manifest_filename = config['filesystem'].get('extensions_manifest', None)
+    if manifest_filename:
+        manifest_filename = os.path.expanduser(manifest_filename)
     try:
-        extensions_loader.load_extensions(extensions_dir, context)
+        extensions_loader.load_extensions(extensions_dir, context, manifest_filename, args)
     except extensions_loader.LoadFailed, e:
         prompt.write(_('The following extensions failed to load: %(f)s' % {'f' : ', '.join(e.failed_packs)}))
         prompt.write(_('More information on the failures can be found in %(l)s' % {'l' : config['logging']['filename']}))
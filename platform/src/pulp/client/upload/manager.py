@@ -19,9 +19,12 @@ client-side tracking of upload requests on the server.
 """
 
 import copy
+import hashlib
 import os
 import pickle
 import sys
+import threading
+import time
 
 from pulp.client.lock import LockFile
 
@@ -29,6 +32,12 @@ from pulp.client.lock import LockFile
 
 DEFAULT_CHUNKSIZE = 1048576 # 1 MB per upload call
 
+DEFAULT_CONCURRENCY = 1 # number of upload calls in flight at once
+
+# Minimum number of seconds between saves of a tracker file while uploading;
+# segments uploaded since the last save are uploaded again on resume
+TRACKER_SAVE_INTERVAL = 2
+
 # -- exceptions ---------------------------------------------------------------
 
 class ManagerUninitializedException(Exception):
@@ -84,7 +93,8 @@ class UploadManager(object):
     on disk state files.
     """
 
-    def __init__(self, upload_working_dir, bindings, chunk_size=DEFAULT_CHUNKSIZE):
+    def __init__(self, upload_working_dir, bindings, chunk_size=DEFAULT_CHUNKSIZE,
+                 concurrency=DEFAULT_CONCURRENCY):
         """
         @param upload_working_dir: directory in which to store client-side files
                to track upload requests; if it doesn't exist it will be created
@@ -97,10 +107,15 @@ class UploadManager(object):
         @param chunk_size: size in bytes of data to upload on each call to the
                server
         @type  chunk_size: int
+
+        @param concurrency: number of upload calls to the server to have in
+               progress at once; each runs in its own thread
+        @type  concurrency: int
         """
         self.upload_working_dir = upload_working_dir
         self.bindings = bindings
         self.chunk_size = chunk_size
+        self.concurrency = max(1, concurrency)
 
         # Internal state
         self.tracker_files = {}
@@ -186,15 +201,20 @@ class UploadManager(object):
         Begins or resumes the upload process for the given upload request.
         This call will not return until the upload is complete. The other
         expected exit point is a KeyboardError to kill the process. The
-        client-side on disk tracker files will store the current offset and
-        resume the upload from where it left off on the next call to this method.
+        client-side on disk tracker files will store the ranges of the file
+        that have been uploaded and resume the upload with the remaining ones
+        on the next call to this method.
+
+        Up to the manager's concurrency number of segments are uploaded at
+        once, so segments may complete out of order. Each segment is sent
+        along with its checksum so that the server can verify it.
 
         The callback_func is used to get feedback on the upload process. After
         each successful upload segment call to the server, this function
-        will be invoked with the new offset in the file and the file size
-        (intended to be fed into a progress indicator). As this is called
-        after each upload segment call, the granularity at which it is called
-        depends on the chunk_size value for this instance.
+        will be invoked with the number of bytes of the file uploaded so far
+        and the file size (intended to be fed into a progress indicator). As
+        this is called after each upload segment call, the granularity at
+        which it is called depends on the chunk_size value for this instance.
 
         The callback_func should have a signature of (int, int).
 
@@ -238,23 +258,11 @@ class UploadManager(object):
             tracker_file.save()
 
             source_file_size = os.path.getsize(tracker_file.source_filename)
+            segments = tracker_file.missing_ranges(source_file_size, self.chunk_size)
 
-            f = open(tracker_file.source_filename, 'r')
-            while True:
-                # Load the chunk to upload
-                f.seek(tracker_file.offset)
-                data = f.read(self.chunk_size)
-                if not data:
-                    break
-
-                # Server request
-                self.bindings.uploads.upload_segment(upload_id, tracker_file.offset, data)
-
-                # Status update and callback notification
-                tracker_file.offset = min(tracker_file.offset + self.chunk_size, source_file_size)
-                tracker_file.save()
-
-                callback_func(tracker_file.offset, source_file_size)
+            uploader = _SegmentUploader(self.bindings, tracker_file, segments,
+                                        source_file_size, callback_func)
+            uploader.run(self.concurrency)
 
             tracker_file.is_finished_uploading = True
         finally:
@@ -381,6 +389,114 @@ class UploadManager(object):
         if not self.is_initialized:
             raise ManagerUninitializedException()
 
+class _SegmentUploader(object):
+    """
+    Uploads the given segments of a file, each in a single call to the server,
+    with up to a given number of calls in progress at once. The tracker is
+    updated as each segment completes and saved at most every
+    TRACKER_SAVE_INTERVAL seconds.
+    """
+
+    def __init__(self, bindings, tracker_file, segments, source_file_size, callback_func):
+        self.bindings = bindings
+        self.tracker_file = tracker_file
+        self.source_file_size = source_file_size
+        self.callback_func = callback_func
+
+        self.lock = threading.Lock()
+        self.segments = list(segments) # remaining (offset, length) to upload, in order
+        self.segments.reverse()
+        self.error = None # exc_info of the first failed segment
+        self.last_save = time.time()
+
+    def run(self, concurrency):
+        """
+        Uploads all of the segments, returning once they have all completed.
+        If any segment fails to upload, no further segments are started and
+        the first failure is raised once the ones in progress have finished.
+        """
+        if concurrency == 1:
+            self._work()
+        else:
+            workers = []
+            for i in range(min(concurrency, len(self.segments))):
+                worker = threading.Thread(target=self._work, name='upload-%d' % i)
+                worker.setDaemon(True)
+                workers.append(worker)
+                worker.start()
+            try:
+                for worker in workers:
+                    # Join with a timeout so a KeyboardInterrupt is delivered
+                    while worker.isAlive():
+                        worker.join(0.5)
+            except KeyboardInterrupt:
+                self._stop()
+                raise
+
+        if self.error is not None:
+            raise self.error[0], self.error[1], self.error[2]
+
+    def _next_segment(self):
+        self.lock.acquire()
+        try:
+            if self.error is not None or not self.segments:
+                return None
+            return self.segments.pop()
+        finally:
+            self.lock.release()
+
+    def _stop(self):
+        self.lock.acquire()
+        try:
+            self.segments = []
+        finally:
+            self.lock.release()
+
+    def _work(self):
+        f = open(self.tracker_file.source_filename, 'r')
+        try:
+            while True:
+                segment = self._next_segment()
+                if segment is None:
+                    break
+
+                offset, length = segment
+                f.seek(offset)
+                data = f.read(length)
+                checksum = hashlib.sha256(data).hexdigest()
+
+                try:
+                    self.bindings.uploads.upload_segment(self.tracker_file.upload_id,
+                                                         offset, data, checksum)
+                except Exception:
+                    self.lock.acquire()
+                    try:
+                        if self.error is None:
+                            self.error = sys.exc_info()
+                    finally:
+                        self.lock.release()
+                    break
+
+                self._completed(offset, offset + len(data))
+        finally:
+            f.close()
+
+    def _completed(self, start, end):
+        self.lock.acquire()
+        try:
+            self.tracker_file.add_completed_range(start, end)
+
+            now = time.time()
+            if now - self.last_save >= TRACKER_SAVE_INTERVAL:
+                self.tracker_file.save()
+                self.last_save = now
+
+            if self.callback_func:
+                self.callback_func(self.tracker_file.completed_bytes(), self.source_file_size)
+        finally:
+            self.lock.release()
+
+
 class UploadTracker(object):
     """
     Client-side file to carry all information related to a single upload
@@ -393,7 +509,8 @@ class UploadTracker(object):
         # Upload call information
         self.upload_id = None
         self.location = None # URL to the upload request on the server
-        self.offset = None # start of next chunk to upload
+        self.offset = None # all data before this offset has been uploaded
+        self.completed_ranges = [] # sorted, disjoint [start, end) ranges uploaded
         self.source_filename = None # path on disk to the file to upload
 
         # Import call information
@@ -432,6 +549,56 @@ class UploadTracker(object):
     def delete(self):
         os.remove(self.filename)
 
+    def add_completed_range(self, start, end):
+        """
+        Records that the data between start (inclusive) and end (exclusive)
+        has been uploaded, merging it with any adjacent or overlapping ranges.
+        """
+        ranges = []
+        for r_start, r_end in self.completed_ranges:
+            if r_end < start or r_start > end:
+                ranges.append([r_start, r_end])
+            else:
+                start = min(start, r_start)
+                end = max(end, r_end)
+        ranges.append([start, end])
+        ranges.sort()
+        self.completed_ranges = ranges
+
+        if ranges[0][0] == 0:
+            self.offset = ranges[0][1]
+
+    def completed_bytes(self):
+        """
+        @return: number of bytes of the file uploaded so far
+        @rtype:  int
+        """
+        return sum([end - start for start, end in self.completed_ranges])
+
+    def missing_ranges(self, size, chunk_size):
+        """
+        Returns the segments of the file that have yet to be uploaded, split so
+        that none is larger than chunk_size.
+
+        @param size: size of the file being uploaded
+        @type  size: int
+
+        @param chunk_size: maximum size of a segment
+        @type  chunk_size: int
+
+        @return: list of (offset, length), in order of offset
+        @rtype:  list
+        """
+        segments = []
+        position = 0
+        for start, end in self.completed_ranges + [[size, size]]:
+            while position < min(start, size):
+                length = min(chunk_size, start - position)
+                segments.append((position, length))
+                position += length
+            position = max(position, end)
+        return segments
+
     @classmethod
     def load(cls, filename):
         """
@@ -445,4 +612,10 @@ class UploadTracker(object):
         status_file = pickle.load(f)
         f.close()
 
+        # Trackers written before ranges were tracked only have the offset
+        if not hasattr(status_file, 'completed_ranges'):
+            status_file.completed_ranges = []
+            if status_file.offset:
+                status_file.completed_ranges = [[0, status_file.offset]]
+
         return status_file
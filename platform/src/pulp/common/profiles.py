@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Hashing and deltas of consumer unit profiles, shared by the server and the
+agent so both compute the same hash for the same profile.
+
+A profile that is a list, such as the rpm profile, is treated as a set of
+entries: its hash does not depend on the order of the entries, and it can be
+updated with a delta of the entries added and removed. Other profiles are
+hashed as a whole and can only be replaced.
+"""
+
+import hashlib
+
+from pulp.common.json_compat import json
+
+
+def _entry_key(entry):
+    return json.dumps(entry, sort_keys=True)
+
+
+def _is_set(profile):
+    return isinstance(profile, (list, tuple))
+
+
+def profile_hash(profile):
+    """
+    @param profile: A unit profile.
+    @type profile: object
+    @return: The hex digest of the profile's content.
+    @rtype: str
+    """
+    if _is_set(profile):
+        canonical = json.dumps(sorted(set(_entry_key(e) for e in profile)))
+    else:
+        canonical = json.dumps(profile, sort_keys=True)
+    return hashlib.sha256(canonical).hexdigest()
+
+
+def profile_delta(old_profile, new_profile):
+    """
+    Get the entries added to and removed from a profile.
+    @param old_profile: The profile previously reported.
+    @type old_profile: object
+    @param new_profile: The current profile.
+    @type new_profile: object
+    @return: A tuple of (added, removed) lists of entries;
+        None when the profiles cannot be expressed as a delta.
+    @rtype: tuple
+    """
+    if not (_is_set(old_profile) and _is_set(new_profile)):
+        return None
+    old_keys = set(_entry_key(e) for e in old_profile)
+    new_keys = set(_entry_key(e) for e in new_profile)
+    added = [e for e in new_profile if _entry_key(e) not in old_keys]
+    removed = [e for e in old_profile if _entry_key(e) not in new_keys]
+    return added, removed
+
+
+def apply_delta(profile, added, removed):
+    """
+    Apply a delta, as returned by profile_delta(), to a profile.
+    @param profile: A unit profile.
+    @type profile: list
+    @param added: The entries to add.
+    @type added: list
+    @param removed: The entries to remove.
+    @type removed: list
+    @return: The updated profile.
+    @rtype: list
+    @raise ValueError: When the profile is not a list.
+    """
+    if not _is_set(profile):
+        raise ValueError('profile is not a list of entries')
+    removed_keys = set(_entry_key(e) for e in removed)
+    keys = set()
+    updated = []
+    for entry in list(profile) + list(added):
+        key = _entry_key(entry)
+        if key in removed_keys or key in keys:
+            continue
+        keys.add(key)
+        updated.append(entry)
+    return updated
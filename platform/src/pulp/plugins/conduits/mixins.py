@@ -30,6 +30,14 @@ from   pulp.server.db.model.criteria import UnitAssociationCriteria, Criteria
 
 _LOG = logging.getLogger(__name__)
 
+# Maximum number of units of a single type resolved and saved together by
+# AddUnitMixin.save_units
+SAVE_UNITS_BATCH_SIZE = 1000
+
+# Default number of associations read from the database at a time by the
+# get_units_iter calls
+GET_UNITS_BATCH_SIZE = 1000
+
 # -- exceptions ---------------------------------------------------------------
 
 class ImporterConduitException(Exception):
@@ -120,6 +128,29 @@ class SingleRepoUnitsMixin(object):
         """
         return do_get_repo_units(self.repo_id, criteria, self.exception_class)
 
+    def get_units_iter(self, criteria=None, batch_size=GET_UNITS_BATCH_SIZE):
+        """
+        Generator version of get_units. Rather than loading every unit in the
+        repository into memory, the units are read from the database in
+        batches as the generator is consumed. Plugins processing large
+        repositories should prefer this call, scoping it to the types they
+        are interested in through the criteria.
+
+        Sorting is limited to association fields; see
+        RepoUnitAssociationQueryManager.get_units_iter for details.
+
+        @param criteria: used to scope the returned results or the data within;
+               the Criteria class can be imported from this module
+        @type  criteria: L{UnitAssociationCriteria}
+
+        @param batch_size: number of units to read from the database at a time
+        @type  batch_size: int
+
+        @return: generator of unit instances
+        @rtype:  generator of L{AssociatedUnit}
+        """
+        return do_get_repo_units_iter(self.repo_id, criteria, batch_size, self.exception_class)
+
 class MultipleRepoUnitsMixin(object):
 
     def __init__(self, exception_class):
@@ -142,6 +173,27 @@ class MultipleRepoUnitsMixin(object):
         """
         return do_get_repo_units(repo_id, criteria, self.exception_class)
 
+    def get_units_iter(self, repo_id, criteria=None, batch_size=GET_UNITS_BATCH_SIZE):
+        """
+        Generator version of get_units. Rather than loading every unit in the
+        repository into memory, the units are read from the database in
+        batches as the generator is consumed.
+
+        Sorting is limited to association fields; see
+        RepoUnitAssociationQueryManager.get_units_iter for details.
+
+        @param criteria: used to scope the returned results or the data within;
+               the Criteria class can be imported from this module
+        @type  criteria: L{UnitAssociationCriteria}
+
+        @param batch_size: number of units to read from the database at a time
+        @type  batch_size: int
+
+        @return: generator of unit instances
+        @rtype:  generator of L{AssociatedUnit}
+        """
+        return do_get_repo_units_iter(repo_id, criteria, batch_size, self.exception_class)
+
 class ImporterScratchPadMixin(object):
 
     def __init__(self, repo_id, importer_id):
@@ -413,6 +465,94 @@ class AddUnitMixin(object):
             _LOG.exception(_('Content unit association failed [%s]' % str(unit)))
             raise ImporterConduitException(e), None, sys.exc_info()[2]
 
+    def save_units(self, units):
+        """
+        Bulk version of save_unit. Creates or updates Pulp's knowledge of each
+        of the given content units and associates them to the repository being
+        synchronized.
+
+        Units are processed in batches per type. For each batch, the units
+        that already exist in Pulp are resolved in a single query and the new
+        units are inserted together. The repository associations for the batch
+        are then created at once, updating the repository's unit count a
+        single time.
+
+        As with save_unit, this call is idempotent and will populate the id
+        field of each of the provided units.
+
+        @param units: list of unit objects returned from the init_unit call
+        @type  units: list of L{Unit}
+
+        @return: object reference to the provided list of units, their state
+                 updated from the call
+        @rtype:  list of L{Unit}
+        """
+        try:
+            units_by_type = {}
+            for u in units:
+                units_by_type.setdefault(u.type_id, []).append(u)
+
+            for type_id, type_units in units_by_type.items():
+                for i in range(0, len(type_units), SAVE_UNITS_BATCH_SIZE):
+                    self._save_unit_batch(type_id, type_units[i:i + SAVE_UNITS_BATCH_SIZE])
+
+            return units
+        except Exception, e:
+            _LOG.exception(_('Content unit association failed for [%d] units' % len(units)))
+            raise ImporterConduitException(e), None, sys.exc_info()[2]
+
+    def _save_unit_batch(self, type_id, units):
+        """
+        Saves and associates a batch of units of the same type. See save_units
+        for more information.
+
+        @param type_id: type of all of the given units
+        @type  type_id: str
+
+        @param units: units to save
+        @type  units: list of L{Unit}
+        """
+        content_query_manager = manager_factory.content_query_manager()
+        content_manager = manager_factory.content_manager()
+        association_manager = manager_factory.repo_unit_association_manager()
+
+        def _key(unit_key):
+            return tuple(sorted(unit_key.items()))
+
+        # Resolve the units that already exist in a single query; the query
+        # may return more units than were asked for, so match on the full key
+        existing_ids, existing_keys = content_query_manager.get_content_unit_ids(
+            type_id, [u.unit_key for u in units])
+        existing_ids_by_key = dict(zip([_key(k) for k in existing_keys], existing_ids))
+
+        new_units_by_key = {}
+        for u in units:
+            unit_id = existing_ids_by_key.get(_key(u.unit_key))
+            if unit_id is None:
+                # The same unit may appear more than once in the batch; it
+                # is only created once and all occurrences share its id
+                new_units_by_key.setdefault(_key(u.unit_key), []).append(u)
+                continue
+
+            u.id = unit_id
+            content_manager.update_content_unit(type_id, u.id, common_utils.to_pulp_unit(u))
+            self._updated_count += 1
+
+        # Batch insert the new units
+        new_unit_keys = new_units_by_key.keys()
+        new_pulp_units = [common_utils.to_pulp_unit(new_units_by_key[k][0]) for k in new_unit_keys]
+        new_ids = content_manager.add_content_units(type_id, new_pulp_units)
+        for key, unit_id in zip(new_unit_keys, new_ids):
+            for u in new_units_by_key[key]:
+                u.id = unit_id
+        self._added_count += len(new_ids)
+
+        # Associate the whole batch with the repo
+        unit_ids = list(set([u.id for u in units]))
+        association_manager.associate_all_by_ids(self.repo_id, type_id, unit_ids,
+                                                 self.association_owner_type,
+                                                 self.association_owner_id)
+
     def link_unit(self, from_unit, to_unit, bidirectional=False):
         """
         Creates a reference between two content units. The semantics of what
@@ -538,3 +678,23 @@ def do_get_repo_units(repo_id, criteria, exception_class):
         _LOG.exception('Exception from server requesting all content units for repository [%s]' % repo_id)
         raise exception_class(e), None, sys.exc_info()[2]
 
+def do_get_repo_units_iter(repo_id, criteria, batch_size, exception_class):
+    """
+    Generator counterpart to do_get_repo_units; converts each unit streamed
+    from the association query manager into its plugin transfer object.
+    """
+    try:
+        association_query_manager = manager_factory.repo_unit_association_query_manager()
+        units = association_query_manager.get_units_iter(repo_id, criteria=criteria,
+                                                         batch_size=batch_size)
+
+        type_defs = {}
+        for unit in units:
+            type_id = unit['unit_type_id']
+            if type_id not in type_defs:
+                type_defs[type_id] = types_db.type_definition(type_id)
+            yield common_utils.to_plugin_unit(unit, type_defs[type_id])
+
+    except Exception, e:
+        _LOG.exception('Exception from server requesting all content units for repository [%s]' % repo_id)
+        raise exception_class(e), None, sys.exc_info()[2]
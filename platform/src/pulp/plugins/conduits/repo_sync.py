@@ -31,8 +31,11 @@ its calls into this conduit:
    c. Calls save_unit which creates/updates Pulp's knowledge of the content unit
       and creates an association between the unit and the repository
    d. If necessary, calls link_unit to establish any relationships between units.
+   When adding a large number of units, step c can be deferred and the units
+   passed together to save_units, which saves and associates them in batches.
 3. For units previously associated with the repository (known from get_units)
-   that should no longer be, calls remove_unit to remove that association.
+   that should no longer be, calls remove_unit (or remove_units for many
+   units at once) to remove that association.
 
 Throughout the sync process, the set_progress call can be used to update the
 Pulp server on the status of the sync. Pulp will make this information available
@@ -111,6 +114,32 @@ class RepoSyncConduit(RepoScratchPadMixin, ImporterScratchPadMixin, AddUnitMixin
             _LOG.exception(_('Content unit unassociation failed'))
             raise ImporterConduitException(e), None, sys.exc_info()[2]
 
+    def remove_units(self, units):
+        """
+        Bulk version of remove_unit. Removes the associations owned by this
+        importer between the repository and each of the given units. The
+        database operations are batched per unit type and the importer is
+        notified of the removals in a single call per type rather than once
+        per unit.
+
+        Units passed to this call must have their id fields set by the Pulp server.
+
+        @param units: list of unit objects (must have their id values set)
+        @type  units: list of L{Unit}
+        """
+
+        try:
+            unit_ids_by_type = {}
+            for u in units:
+                unit_ids_by_type.setdefault(u.type_id, []).append(u.id)
+
+            for type_id, unit_ids in unit_ids_by_type.items():
+                self._association_manager.unassociate_all_by_ids(self.repo_id, type_id, unit_ids, OWNER_TYPE_IMPORTER, self.association_owner_id)
+                self._removed_count += len(unit_ids)
+        except Exception, e:
+            _LOG.exception(_('Content unit unassociation failed'))
+            raise ImporterConduitException(e), None, sys.exc_info()[2]
+
     def build_success_report(self, summary, details):
         """
         Creates the SyncReport instance that needs to be returned to the Pulp
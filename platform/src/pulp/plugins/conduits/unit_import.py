@@ -96,6 +96,34 @@ class ImportUnitConduit(ImporterScratchPadMixin, RepoScratchPadMixin, SingleRepo
             _LOG.exception(_('Content unit association failed [%s]' % str(unit)))
             raise UnitImportConduitException(e), None, sys.exc_info()[2]
 
+    def associate_units(self, units):
+        """
+        Bulk version of associate_unit. Associates all of the given units with
+        the destination repository for the import, batching the database
+        operations for each unit type.
+
+        This call is idempotent. Associations that already exist are not
+        affected.
+
+        @param units: list of unit objects (must have their id values set)
+        @type  units: list of L{Unit}
+
+        @return: object reference to the provided list of units
+        @rtype:  list of L{Unit}
+        """
+
+        try:
+            unit_ids_by_type = {}
+            for u in units:
+                unit_ids_by_type.setdefault(u.type_id, []).append(u.id)
+
+            for type_id, unit_ids in unit_ids_by_type.items():
+                self.__association_manager.associate_all_by_ids(self.dest_repo_id, type_id, unit_ids, RepoContentUnit.OWNER_TYPE_IMPORTER, self.dest_importer_id)
+            return units
+        except Exception, e:
+            _LOG.exception(_('Content unit association failed for [%d] units' % len(units)))
+            raise UnitImportConduitException(e), None, sys.exc_info()[2]
+
     def get_source_units(self, criteria=None):
         """
         Returns the collection of content units associated with the source
@@ -267,3 +267,34 @@ class Profiler(object):
         """
         raise Exception, \
             'Applicability for: %s, not supported' % unit
+
+    def units_applicable(self, consumers, units, config, conduit):
+        """
+        Determine which of the content units are applicable to each of the
+        specified consumers. This is the batch form of L{unit_applicable}
+        and is used by Pulp when checking many units against many consumers.
+        Profilers that can share work across consumers and units (such as
+        resolving a unit's metadata once) should override it; the default
+        implementation calls L{unit_applicable} for every consumer and unit.
+
+        @param consumers: A list of consumers.
+        @type consumers: list of L{pulp.server.plugins.model.Consumer}
+
+        @param units: A list of content units: { type_id:<str>, unit_key:<dict> }
+        @type units: list
+
+        @param config: plugin configuration
+        @type config: L{pulp.server.plugins.config.PluginCallConfiguration}
+
+        @param conduit: provides access to relevant Pulp functionality
+        @type conduit: L{pulp.plugins.conduits.profiler.ProfilerConduit}
+
+        @return: A dict of consumer ID to a list of applicability reports,
+            in the same order as the units.
+        @rtype: dict of: {consumer_id:[L{pulp.plugins.model.ApplicabilityReport}]}
+        """
+        result = {}
+        for consumer in consumers:
+            result[consumer.id] = \
+                [self.unit_applicable(consumer, unit, config, conduit) for unit in units]
+        return result
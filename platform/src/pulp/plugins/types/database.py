@@ -17,17 +17,25 @@ This module covers both the ContentType collection itself as well as any
 type-specific collections that exist to suit the type needs.
 """
 
+import copy
 import logging
+import threading
+import time
 
 from pymongo import ASCENDING
 
 import pulp.server.db.connection as pulp_db
-from pulp.server.db.model.content import ContentType
+from pulp.server.db.model.content import ContentType, ContentTypesGeneration
 
 # -- constants ----------------------------------------------------------------
 
 TYPE_COLLECTION_PREFIX = 'units_'
 
+# Number of seconds between checks of the generation stored in the database;
+# changes to the type definitions made by other processes will be picked up
+# within this interval
+CACHE_GENERATION_CHECK_INTERVAL = 5
+
 LOG = logging.getLogger(__name__)
 
 # -- database exceptions ------------------------------------------------------
@@ -62,6 +70,108 @@ class MissingDefinitions(Exception):
     def __str__(self):
         return 'MissingDefinitions [%s]' % ', '.join(self.missing_type_ids)
 
+# -- type definition cache ----------------------------------------------------
+
+class TypeDefinitionCache(object):
+    """
+    In memory cache of the type definitions, their unit keys and the unit
+    collections. The type definitions only change when update_database or
+    clean are run, both of which invalidate the cache in the process running
+    them and increment a generation counter in the database. Other processes
+    compare the counter against the generation they loaded at most every
+    CACHE_GENERATION_CHECK_INTERVAL seconds and reload on a mismatch.
+
+    The cached type definitions are shared; the public functions in this
+    module hand out copies of them.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._definitions = None # type id -> type definition SON
+        self._collections = {} # type id -> units collection
+        self._database = None
+        self._generation = None
+        self._last_check = 0
+
+    def invalidate(self):
+        """
+        Discards the cached definitions; they will be reloaded on next use.
+        """
+        with self._lock:
+            self._definitions = None
+            self._collections = {}
+            self._generation = None
+
+    def definitions(self, force_check=False):
+        """
+        @param force_check: if True, the database generation is checked
+               regardless of when it was last checked
+        @type  force_check: bool
+
+        @return: dict of type ID to type definition
+        @rtype:  dict
+        """
+        with self._lock:
+            now = time.time()
+            stale = self._definitions is None or self._database is not pulp_db.database()
+            if not stale and (force_check or now - self._last_check > CACHE_GENERATION_CHECK_INTERVAL):
+                stale = _get_generation() != self._generation
+                self._last_check = now
+            if stale:
+                self._load()
+                self._last_check = now
+            return self._definitions
+
+    def collection(self, type_id):
+        """
+        @return: units collection for the given type
+        @rtype:  L{pymongo.collection.Collection}
+        """
+        with self._lock:
+            if self._database is not pulp_db.database():
+                self.invalidate()
+            collection = self._collections.get(type_id)
+            if collection is None:
+                collection_name = unit_collection_name(type_id)
+                collection = pulp_db.get_collection(collection_name, create=False)
+                self._collections[type_id] = collection
+            return collection
+
+    def _load(self):
+        # the generation is read first so a concurrent update results in a
+        # reload on the next check rather than stale definitions
+        self._generation = _get_generation()
+        self._database = pulp_db.database()
+        self._collections = {}
+        collection = ContentType.get_collection()
+        self._definitions = dict([(t['id'], t) for t in collection.find()])
+
+
+_CACHE = TypeDefinitionCache()
+
+
+def _get_generation():
+    """
+    @return: generation of the type definitions stored in the database
+    @rtype:  int
+    """
+    collection = ContentTypesGeneration.get_collection()
+    doc = collection.find_one({'_id' : ContentTypesGeneration.DOCUMENT_ID})
+    if doc is None:
+        return 0
+    return doc['generation']
+
+
+def _increment_generation():
+    """
+    Invalidates the local cache and increments the generation stored in the
+    database so other processes reload their caches.
+    """
+    collection = ContentTypesGeneration.get_collection()
+    collection.update({'_id' : ContentTypesGeneration.DOCUMENT_ID},
+                      {'$inc' : {'generation' : 1}}, upsert=True, safe=True)
+    _CACHE.invalidate()
+
 # -- public -------------------------------------------------------------------
 
 def update_database(definitions, error_on_missing_definitions=False):
@@ -97,35 +207,10 @@ def update_database(definitions, error_on_missing_definitions=False):
     # For each type definition, update the corresponding collection in the database
     error_defs = []
 
-    for type_def in definitions:
-        try:
-            _create_or_update_type(type_def)
-        except Exception:
-            LOG.exception('Exception creating/updating collection for type [%s]' % type_def.id)
-            error_defs.append(type_def)
-            continue
-
-        try:
-            # May need to revisit if the recreation takes too long with large content sets
-            _drop_indexes(type_def)
-        except Exception:
-            LOG.exception('Exception dropping indexes for type [%s]' % type_def.id)
-            error_defs.append(type_def)
-            continue
-
-        try:
-            _update_unit_key(type_def)
-        except Exception:
-            LOG.exception('Exception updating unit key for type [%s]' % type_def.id)
-            error_defs.append(type_def)
-            continue
-
-        try:
-            _update_search_indexes(type_def)
-        except Exception:
-            LOG.exception('Exception updating search indexes for type [%s]' % type_def.id)
-            error_defs.append(type_def)
-            continue
+    try:
+        _update_definitions(definitions, error_defs)
+    finally:
+        _increment_generation()
 
     if len(error_defs) > 0:
         raise UpdateFailed(error_defs)
@@ -152,6 +237,8 @@ def clean():
     type_collection = ContentType.get_collection()
     type_collection.remove(safe=True)
 
+    _increment_generation()
+
 
 def type_units_collection(type_id):
     """
@@ -163,9 +250,7 @@ def type_units_collection(type_id):
     @return: database collection holding units of the given type
     @rtype:  L{pymongo.collection.Collection}
     """
-    collection_name = unit_collection_name(type_id)
-    collection = pulp_db.get_collection(collection_name, create=False)
-    return collection
+    return _CACHE.collection(type_id)
 
 
 def all_type_ids():
@@ -175,11 +260,7 @@ def all_type_ids():
     @rtype:  list of str
     """
 
-    collection = ContentType.get_collection()
-    type_id_son = list(collection.find(fields={'id' : 1}))
-    type_ids = [t['id'] for t in type_id_son]
-
-    return type_ids
+    return _CACHE.definitions().keys()
 
 
 def all_type_collection_names():
@@ -188,14 +269,7 @@ def all_type_collection_names():
     @rtype:  list of str
     """
 
-    collection = ContentType.get_collection()
-    type_ids = list(collection.find(fields={'id' : 1}))
-
-    type_collection_names = []
-    for id in type_ids:
-        type_collection_names.append(unit_collection_name(id['id']))
-
-    return type_collection_names
+    return [unit_collection_name(t) for t in _CACHE.definitions().keys()]
 
 
 def all_type_definitions():
@@ -203,10 +277,7 @@ def all_type_definitions():
     @return: list of all type definitions in the database (mongo SON objects)
     @rtype:  list of dict
     """
-
-    coll = ContentType.get_collection()
-    types = list(coll.find())
-    return types
+    return [copy.deepcopy(t) for t in _CACHE.definitions().values()]
 
 
 def type_definition(type_id):
@@ -217,9 +288,8 @@ def type_definition(type_id):
     @return: corresponding type definition, None if not found
     @rtype: SON or None
     """
-    collection = ContentType.get_collection()
-    type_ = collection.find_one({'id': type_id})
-    return type_
+    type_def = _cached_type_definition(type_id)
+    return copy.deepcopy(type_def)
 
 
 def unit_collection_name(type_id):
@@ -246,14 +316,59 @@ def type_units_unit_key(type_id):
              content type collection
     @rtype: list of str or None
     """
-    collection = ContentType.get_collection()
-    type_def = collection.find_one({'id': type_id})
+    type_def = _cached_type_definition(type_id)
     if type_def is None:
         return None
-    return type_def['unit_key']
+    return list(type_def['unit_key'])
 
 # -- private -----------------------------------------------------------------
 
+def _cached_type_definition(type_id):
+    """
+    Looks up a type definition in the cache. If the type is not found, the
+    database generation is checked in case the type was added by another
+    process since it was last checked.
+    """
+    type_def = _CACHE.definitions().get(type_id)
+    if type_def is None:
+        type_def = _CACHE.definitions(force_check=True).get(type_id)
+    return type_def
+
+def _update_definitions(definitions, error_defs):
+    """
+    Creates or updates the collection and indexes for each of the given
+    definitions, adding those that fail to the error_defs list.
+    """
+    for type_def in definitions:
+        try:
+            _create_or_update_type(type_def)
+        except Exception:
+            LOG.exception('Exception creating/updating collection for type [%s]' % type_def.id)
+            error_defs.append(type_def)
+            continue
+
+        try:
+            # May need to revisit if the recreation takes too long with large content sets
+            _drop_indexes(type_def)
+        except Exception:
+            LOG.exception('Exception dropping indexes for type [%s]' % type_def.id)
+            error_defs.append(type_def)
+            continue
+
+        try:
+            _update_unit_key(type_def)
+        except Exception:
+            LOG.exception('Exception updating unit key for type [%s]' % type_def.id)
+            error_defs.append(type_def)
+            continue
+
+        try:
+            _update_search_indexes(type_def)
+        except Exception:
+            LOG.exception('Exception updating search indexes for type [%s]' % type_def.id)
+            error_defs.append(type_def)
+            continue
+
 def _create_or_update_type(type_def):
 
     # Make sure a collection exists for the type
@@ -274,6 +389,10 @@ def _create_or_update_type(type_def):
     # XXX this still causes a potential race condition when 2 users are updating the same type
     content_type_collection.save(content_type, safe=True)
 
+    # Other processes are notified through the generation when the update is
+    # complete, but this process should see the change immediately
+    _CACHE.invalidate()
+
 def _update_indexes(type_def, unique):
 
     collection_name = unit_collection_name(type_def.id)
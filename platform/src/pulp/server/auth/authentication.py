@@ -100,7 +100,7 @@ def _check_username_password_local(username, password=None):
         _log.error('This is an ldap user %s' % user)
         return None
     if password is not None:
-        if not factory.password_manager().check_password(user['password'], password):
+        if not factory.password_manager().check_password(user['password'], password, username):
             _log.error('Password for user [%s] was incorrect' % username)
             return None
     return user
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+In-memory copy of the user permissions used to answer authorization checks
+without querying the database. Permissions are held in a tree keyed by the
+components of their resource paths, so that the operations granted to a user
+on a resource and all of its parents are found with a walk down the tree.
+
+Changes made through the permission, role and user managers are applied to
+the cache incrementally. Changes made by other processes are detected through
+a generation counter stored in the database, in which case the cache is
+rebuilt.
+"""
+
+import logging
+import threading
+import time
+
+import pulp.server.db.connection as pulp_db
+from pulp.server.db.model.auth import Permission, PermissionsGeneration, User
+from pulp.server.managers import factory
+
+# -- constants ----------------------------------------------------------------
+
+# Number of seconds between checks of the generation stored in the database;
+# permission changes made by other processes will be picked up within this
+# interval
+CACHE_GENERATION_CHECK_INTERVAL = 1
+
+# Key in a tree node under which the node's user operations are stored; path
+# components are always non-empty strings so this cannot collide with them
+_USERS = None
+
+_LOG = logging.getLogger(__name__)
+
+# -- permission cache ---------------------------------------------------------
+
+def resource_path(resource):
+    """
+    @param resource: pulp resource path
+    @type  resource: str
+
+    @return: non-empty components of the resource path
+    @rtype:  list of str
+    """
+    return [p for p in resource.split('/') if p]
+
+
+def _is_tree_resource(resource, parts):
+    """
+    Only permissions on '/' and on normalized paths of the form '/a/b/' are
+    ever consulted when authorizing a request.
+    """
+    if not parts:
+        return resource == '/'
+    return resource == '/%s/' % '/'.join(parts)
+
+
+class PermissionCache(object):
+    """
+    Per-process cache of the permissions tree and of which users are super
+    users. The cache is loaded on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tree = None
+        self._superusers = None # mapping of login to True/False for all users
+        self._database = None
+        self._generation = None
+        self._last_check = 0
+
+    def invalidate(self):
+        """
+        Discards the cached permissions; they will be reloaded on next use.
+        """
+        with self._lock:
+            self._tree = None
+            self._superusers = None
+            self._generation = None
+
+    def is_superuser(self, login):
+        """
+        @param login: login of the user
+        @type  login: str
+
+        @return: True if the user is a super user, False if not, None if the
+                 user does not exist
+        @rtype:  bool or None
+        """
+        with self._lock:
+            self._check()
+            if login not in self._superusers:
+                # the user may have just been created by another process
+                self._check(force_check=True)
+            return self._superusers.get(login)
+
+    def operations(self, resource, login):
+        """
+        Returns the operations granted to the user on the resource, including
+        those granted on any of the resource's parents.
+
+        @param resource: pulp resource path
+        @type  resource: str
+
+        @param login: login of the user
+        @type  login: str
+
+        @return: granted operations
+        @rtype:  set of int
+        """
+        with self._lock:
+            self._check()
+            node = self._tree
+            operations = set(node.get(_USERS, {}).get(login, ()))
+            for part in resource_path(resource):
+                node = node.get(part)
+                if node is None:
+                    break
+                operations.update(node.get(_USERS, {}).get(login, ()))
+            return operations
+
+    def resource_changed(self, resource):
+        """
+        Refreshes the cached permission for a resource after it was changed
+        and informs the other processes of the change.
+
+        @param resource: pulp resource path
+        @type  resource: str
+        """
+        permission = Permission.get_collection().find_one({'resource' : resource})
+        with self._lock:
+            if self._tree is not None:
+                users = {}
+                if permission is not None:
+                    users = permission['users']
+                self._set_users(resource, users)
+            self._increment_generation()
+
+    def user_changed(self, login):
+        """
+        Refreshes the cached super user status of a user after it was created,
+        changed or deleted and informs the other processes of the change.
+
+        @param login: login of the user
+        @type  login: str
+        """
+        user = User.get_collection().find_one({'login' : login})
+        with self._lock:
+            if self._superusers is not None:
+                if user is None:
+                    self._superusers.pop(login, None)
+                else:
+                    self._superusers[login] = self._has_superuser_role(user)
+            self._increment_generation()
+
+    def _check(self, force_check=False):
+        now = time.time()
+        stale = self._tree is None or self._database is not pulp_db.database()
+        if not stale and (force_check or now - self._last_check > CACHE_GENERATION_CHECK_INTERVAL):
+            stale = _get_generation() != self._generation
+            self._last_check = now
+        if stale:
+            self._load()
+            self._last_check = now
+
+    def _load(self):
+        _LOG.debug('Loading permissions into the permission cache')
+        self._generation = _get_generation()
+        self._database = pulp_db.database()
+        self._tree = {}
+        for permission in Permission.get_collection().find():
+            self._set_users(permission['resource'], permission['users'])
+        self._superusers = {}
+        for user in User.get_collection().find(fields=['login', 'roles']):
+            self._superusers[user['login']] = self._has_superuser_role(user)
+
+    def _set_users(self, resource, users):
+        parts = resource_path(resource)
+        if not _is_tree_resource(resource, parts):
+            return
+        node = self._tree
+        for part in parts:
+            node = node.setdefault(part, {})
+        if users:
+            node[_USERS] = dict((login, frozenset(ops)) for login, ops in users.items())
+        else:
+            node.pop(_USERS, None)
+
+    def _has_superuser_role(self, user):
+        return factory.role_manager().super_user_role in user['roles']
+
+    def _increment_generation(self):
+        """
+        Increments the generation stored in the database. The cache is kept if
+        no other process changed the permissions since it was last checked and
+        reloaded on next use otherwise.
+        """
+        collection = PermissionsGeneration.get_collection()
+        collection.update({'_id' : PermissionsGeneration.DOCUMENT_ID},
+                          {'$inc' : {'generation' : 1}}, upsert=True, safe=True)
+        generation = _get_generation()
+        if self._generation is not None and generation == self._generation + 1:
+            self._generation = generation
+        else:
+            self.invalidate()
+
+
+_CACHE = PermissionCache()
+
+
+def _get_generation():
+    """
+    @return: generation of the permissions stored in the database
+    @rtype:  int
+    """
+    collection = PermissionsGeneration.get_collection()
+    doc = collection.find_one({'_id' : PermissionsGeneration.DOCUMENT_ID})
+    if doc is None:
+        return 0
+    return doc['generation']
+
+# -- public -------------------------------------------------------------------
+
+def is_superuser(login):
+    """
+    @see: L{PermissionCache.is_superuser}
+    """
+    return _CACHE.is_superuser(login)
+
+
+def operations(resource, login):
+    """
+    @see: L{PermissionCache.operations}
+    """
+    return _CACHE.operations(resource, login)
+
+
+def resource_changed(resource):
+    """
+    @see: L{PermissionCache.resource_changed}
+    """
+    _CACHE.resource_changed(resource)
+
+
+def user_changed(login):
+    """
+    @see: L{PermissionCache.user_changed}
+    """
+    _CACHE.user_changed(login)
+
+
+def invalidate():
+    """
+    @see: L{PermissionCache.invalidate}
+    """
+    _CACHE.invalidate()
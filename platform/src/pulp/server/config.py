@@ -26,9 +26,6 @@ _default_values = {
     'consumer_history': {
         'lifetime': '180', # in days
     },
-    'coordinator': {
-        'task_state_poll_interval': '0.1',
-    },
     'database': {
         'auto_migrate': 'false',
         'name': 'pulp_database',
@@ -55,6 +52,11 @@ _default_values = {
         'pulp_file': '/var/log/pulp/pulp.log',
         'grinder_file': '/var/log/pulp/grinder.log',
     },
+    'notifications': {
+        'delivery_workers': '4',
+        'max_attempts': '5',
+        'retry_delay': '5',
+    },
     'messaging': {
         'url': 'tcp://localhost:5672',
         'cacert': '/etc/pki/qpid/ca/ca.crt',
@@ -87,9 +89,12 @@ _default_values = {
     'tasks': {
         'concurrency_threshold': '9',
         'dispatch_interval': '0.5',
+        'long_running_workers': '4',
+        'short_running_workers': '8',
         'create_weight': '0',
         'publish_weight': '1',
         'sync_weight': '2',
+        'auto_publish_concurrency': '2',
     },
 }
 
@@ -28,6 +28,8 @@ _log = logging.getLogger('pulp')
 
 from pulp.server.db.migrate.validate import validate
 from pulp.server.db.migrate.versions import get_migration_modules
+from pulp.server.db.model import (
+    auth, base, consumer, content, dispatch, event, repo_group, repository)
 from pulp.server.db.version import (
     VERSION, get_version_in_use, set_version, is_validated, set_validated, 
     revert_to_version, clean_db)
@@ -110,6 +112,21 @@ def datamodel_validation(options):
     return os.EX_OK
 
 
+def datamodel_indices(options):
+    # all of the data model modules are imported above, so this ensures the
+    # indices on every model collection
+    try:
+        base.provision_collections()
+    except Exception, e:
+        _log.critical(str(e))
+        _log.critical(''.join(traceback.format_exception(*sys.exc_info())))
+        print >> sys.stderr, \
+                'database index creation failed, see %s for details' % \
+                options.log_file
+        return os.EX_SOFTWARE
+    return os.EX_OK
+
+
 def main():
     options = parse_args()
     start_logging(options)
@@ -124,6 +141,9 @@ def main():
     if ret != os.EX_OK:
         return ret
     ret = datamodel_validation(options)
+    if ret != os.EX_OK:
+        return ret
+    ret = datamodel_indices(options)
     if ret != os.EX_OK:
         return ret
     print 'database migration to version %d complete' % VERSION
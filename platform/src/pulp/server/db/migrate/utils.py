@@ -11,6 +11,145 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import datetime
+from logging import getLogger
+
+from pulp.server.compat import ObjectId
+from pulp.server.db import connection
+
+_log = getLogger('pulp')
+
+# number of documents read, and updated, per round trip by the migrations that
+# cannot be expressed as a single update
+MIGRATION_BATCH_SIZE = 1000
+
+# number of documents between progress messages
+PROGRESS_INTERVAL = 100000
+
+# collection storing the position reached by interrupted migrations
+CHECKPOINT_COLLECTION = 'migration_checkpoints'
+
+# python types whose instances are exactly the values matching a mongo $type
+# query; strings come out of the database as unicode so str matches nothing,
+# int is missing as isinstance(True, int) and long values are stored with
+# their own bson type, and list as $type matches the elements of arrays
+_BSON_TYPES = {
+    float: 1,
+    unicode: 2,
+    basestring: 2,
+    dict: 3,
+    ObjectId: 7,
+    bool: 8,
+    datetime.datetime: 9,
+}
+
+# type queries ----------------------------------------------------------------
+
+def type_query(python_type):
+    """
+    Returns the query matching the values that are not instances of the type,
+    if it can be expressed with the mongo $type operator.
+    @type python_type: type
+    @param python_type: type values are expected to be instances of
+    @rtype: dict or None
+    @return: query operator for the field; None if the type cannot be
+             checked by the database
+    """
+    bson_type = _BSON_TYPES.get(python_type)
+    if bson_type is None:
+        return None
+    return {'$exists': True, '$not': {'$type': bson_type}}
+
+# checkpoints -----------------------------------------------------------------
+
+def _checkpoint_id(objectdb, field):
+    return '%s.%s' % (objectdb.name, field)
+
+
+def get_checkpoint(objectdb, field):
+    """
+    @return: _id of the last document processed by an interrupted migration
+             of the field; None if there is none
+    """
+    collection = connection.get_collection(CHECKPOINT_COLLECTION)
+    checkpoint = collection.find_one({'_id': _checkpoint_id(objectdb, field)})
+    if checkpoint is None:
+        return None
+    return checkpoint['last_id']
+
+
+def set_checkpoint(objectdb, field, last_id):
+    collection = connection.get_collection(CHECKPOINT_COLLECTION)
+    collection.save({'_id': _checkpoint_id(objectdb, field), 'last_id': last_id}, safe=True)
+
+
+def clear_checkpoint(objectdb, field):
+    collection = connection.get_collection(CHECKPOINT_COLLECTION)
+    collection.remove({'_id': _checkpoint_id(objectdb, field)}, safe=True)
+
+# batched iteration -----------------------------------------------------------
+
+def iterate_batches(objectdb, spec, fields=None, start_after=None,
+                    batch_size=None):
+    """
+    Iterate over the documents matching the spec in batches, in _id order.
+    Each batch is read with a new query starting after the last _id of the
+    previous one, so documents updated between batches are not skipped or
+    returned twice and no cursor is held open across updates.
+    @type objectdb: pymongo.collection.Collection instance
+    @param objectdb: collection to iterate
+    @type spec: dict
+    @param spec: query for the documents
+    @type fields: list or None
+    @param fields: fields to retrieve; the _id is always included
+    @type start_after: any
+    @param start_after: only documents with an _id greater than this are returned
+    @type batch_size: int
+    @param batch_size: number of documents per batch
+    @rtype: generator of lists of dict
+    """
+    batch_size = batch_size or MIGRATION_BATCH_SIZE
+    last_id = start_after
+    while True:
+        query = dict(spec)
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        cursor = objectdb.find(query, fields=fields).sort('_id', 1).limit(batch_size)
+        batch = list(cursor)
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]['_id']
+
+
+def log_progress(objectdb, action, previous_count, count):
+    """
+    Log the progress of a migration or validation each time the number of
+    documents processed crosses a multiple of PROGRESS_INTERVAL.
+    """
+    if count / PROGRESS_INTERVAL > previous_count / PROGRESS_INTERVAL:
+        _log.info('%s: %s %d documents' % (objectdb.name, action, count))
+
+
+def _set_values(objectdb, field, values):
+    """
+    Set the field of each document to its value, with one multi-update for
+    each distinct value.
+    @type values: list of (_id, value) tuples
+    """
+    ids_by_value = []
+    for _id, value in values:
+        for v, ids in ids_by_value:
+            if v == value and type(v) is type(value):
+                ids.append(_id)
+                break
+        else:
+            ids_by_value.append((value, [_id]))
+    for value, ids in ids_by_value:
+        objectdb.update({'_id': {'$in': ids}}, {'$set': {field: value}},
+                        multi=True, safe=True)
+
+# migration utilities ---------------------------------------------------------
 
 def add_field_with_default_value(objectdb, field, default=None):
     """
@@ -23,10 +162,8 @@ def add_field_with_default_value(objectdb, field, default=None):
     @type default: any
     @param default: default value to set new field to
     """
-    for model in objectdb.find():
-        if field not in model:
-            model[field] = default
-            objectdb.save(model, safe=True)
+    objectdb.update({field: {'$exists': False}}, {'$set': {field: default}},
+                    multi=True, safe=True)
 
 
 def change_field_type_with_default_value(objectdb, field, new_type, default_value):
@@ -42,18 +179,31 @@ def change_field_type_with_default_value(objectdb, field, new_type, default_valu
     @type default_value: any
     @param default_value: default value to set the field to
     """
-    for model in objectdb.find():
-            if not isinstance(model[field], new_type):
-                model[field] = default_value
-                objectdb.save(model, safe=True)
-
+    query = type_query(new_type)
+    if query is not None:
+        objectdb.update({field: query}, {'$set': {field: default_value}},
+                        multi=True, safe=True)
+        return
+    # the type cannot be checked by the database, only the field is read
+    count = 0
+    for batch in iterate_batches(objectdb, {field: {'$exists': True}}, fields=[field]):
+        ids = [m['_id'] for m in batch if not isinstance(m[field], new_type)]
+        if ids:
+            objectdb.update({'_id': {'$in': ids}}, {'$set': {field: default_value}},
+                            multi=True, safe=True)
+        log_progress(objectdb, 'checked %s in' % field, count, count + len(batch))
+        count += len(batch)
 
 
-def add_field_with_calculated_value(objectdb, field, callback=lambda m: None):
+def add_field_with_calculated_value(objectdb, field, callback=lambda m: None,
+                                    batch_size=None):
     """
     Add a new field to all instances of a model in the passed in collection and
     set the value of the field to the return value of the callback that takes
     the model as an argument.
+    Documents are processed in batches, in _id order, and the last _id of
+    each batch is recorded so that an interrupted migration resumes where it
+    stopped.
     @type objectdb: pymongo.collection.Collection instance
     @param objectdb: collection of models to add field to
     @type field: str
@@ -61,11 +211,20 @@ def add_field_with_calculated_value(objectdb, field, callback=lambda m: None):
     @type callback: python callable
     @param callback: callable that takes the model as an argument and returns
                      the value for the new field
+    @type batch_size: int
+    @param batch_size: number of documents updated per batch
     """
-    for model in objectdb.find():
-        if field not in model:
-            model[field] = callback(model)
-            objectdb.save(model, safe=True)
+    start_after = get_checkpoint(objectdb, field)
+    if start_after is not None:
+        _log.info('%s: resuming addition of %s after %s' % (objectdb.name, field, start_after))
+    count = 0
+    spec = {field: {'$exists': False}}
+    for batch in iterate_batches(objectdb, spec, start_after=start_after, batch_size=batch_size):
+        _set_values(objectdb, field, [(m['_id'], callback(m)) for m in batch])
+        set_checkpoint(objectdb, field, batch[-1]['_id'])
+        log_progress(objectdb, 'added %s to' % field, count, count + len(batch))
+        count += len(batch)
+    clear_checkpoint(objectdb, field)
 
 
 def delete_field(objectdb, field):
@@ -76,11 +235,8 @@ def delete_field(objectdb, field):
     @type field: str
     @param field: name of the field to delete
     """
-    for model in objectdb.find():
-        if field not in model:
-            continue
-        del model[field]
-        objectdb.save(model, safe=True)
+    objectdb.update({field: {'$exists': True}}, {'$unset': {field: 1}},
+                    multi=True, safe=True)
 
 
 def migrate_field(objectdb,
@@ -21,9 +21,13 @@ from pulp.server.db.model.repository import Repo, RepoContentUnit, RepoDistribut
 from pulp.server.db.model.base import Model
 
 from pulp.server.db import version
+from pulp.server.db.migrate import utils
 
 _log = getLogger('pulp')
 
+# number of invalid documents logged for each failed check
+MAX_LOGGED_FAILURES = 10
+
 # reference utilities ---------------------------------------------------------
 
 def _base_id(reference):
@@ -42,10 +46,31 @@ def _unicodify_reference(reference):
 
 # general model validation ----------------------------------------------------
 
+def _count_failures(model_name, objectdb, query, error):
+    """
+    Count the documents matching a query for invalid documents and log the
+    ids of the first few of them.
+    @rtype: int
+    @return: number of documents matching the query
+    """
+    num_errors = objectdb.find(query).count()
+    if num_errors:
+        error_prefix = 'model validation failure in %s for model %s:'
+        for model in objectdb.find(query, fields=['_id']).limit(MAX_LOGGED_FAILURES):
+            _log.error(error_prefix % (model_name, str(model['_id'])) + ' ' + error)
+        if num_errors > MAX_LOGGED_FAILURES:
+            _log.error('model validation failure in %s: %s in %d models' %
+                       (model_name, error, num_errors))
+    return num_errors
+
+
 def _validate_model(model_name, objectdb, reference, values={}):
     """
     Perform a general validation of field presence and field value type for a
     given collection, and model reference
+    Each check is run as a query by the database where possible; fields whose
+    type cannot be checked that way are checked by scanning the collection
+    for those fields only.
     @type model_name: str
     @param model_name: name of the model being validated
     @type objectdb: pymongo.collection.Collection instance
@@ -62,28 +87,61 @@ def _validate_model(model_name, objectdb, reference, values={}):
     # convert all the str fields to unicode as all strings coming out of our
     # database have been converted to unicode
     reference = _unicodify_reference(reference)
-    for model in objectdb.find():
-        for field, value in reference.items():
-            vtype = type(value)
-            # a default value of None really can't be automatically validated,
-            # and should be validated in the individual validation method
-            if field in model and (value is None or
-                                   isinstance(model[field], vtype)):
-                if field not in values:
-                    continue
-                elif value in values[field]:
-                    continue
-            num_errors += 1
+    scanned_fields = {}
+    for field, value in reference.items():
+        vtype = type(value)
+        num_errors += _count_failures(model_name, objectdb,
+                                      {field: {'$exists': False}},
+                                      'field %s is not present' % field)
+        # a default value of None really can't be automatically validated,
+        # and should be validated in the individual validation method
+        if value is not None:
+            query = utils.type_query(vtype)
+            if query is None:
+                scanned_fields[field] = vtype
+                continue
+            num_errors += _count_failures(model_name, objectdb, {field: query},
+                                          'field %s is not %s' % (field, vtype))
+        if field in values:
+            query = {'$exists': True, '$nin': values[field]}
+            if value is not None:
+                query['$type'] = utils.type_query(vtype)['$not']['$type']
+            num_errors += _count_failures(model_name, objectdb, {field: query},
+                                          'field %s value is not: %s' % (field, ','.join(values[field])))
+    if scanned_fields:
+        num_errors += _scan_model(model_name, objectdb, scanned_fields, values)
+    return num_errors
+
+
+def _scan_model(model_name, objectdb, field_types, values={}):
+    """
+    Check the type of the given fields, when present, by reading them from
+    every document of the collection in batches.
+    @type field_types: dict
+    @param field_types: mapping of field name to expected type
+    @rtype: int
+    @return: number of errors found during validation
+    """
+    num_errors = 0
+    count = 0
+    for batch in utils.iterate_batches(objectdb, {}, fields=field_types.keys()):
+        for model in batch:
             error_prefix = 'model validation failure in %s for model %s:' % \
                     (model_name, str(model['_id']))
-            if field not in model:
-                _log.error(error_prefix + ' field %s is not present' % field)
-            elif not isinstance(model[field], vtype):
-                error_msg = error_prefix + ' field %s is %s not %s'
-                _log.error(error_msg % (field, type(model[field]), vtype))
-            else:
-                error_msg = error_prefix + ' field %s value is not: %s'
-                _log.error(error_msg % (field, ','.join(values[field])))
+            for field, vtype in field_types.items():
+                if field not in model:
+                    # counted by the presence check
+                    continue
+                if not isinstance(model[field], vtype):
+                    num_errors += 1
+                    error_msg = error_prefix + ' field %s is %s not %s'
+                    _log.error(error_msg % (field, type(model[field]), vtype))
+                elif field in values and model[field] not in values[field]:
+                    num_errors += 1
+                    error_msg = error_prefix + ' field %s value is not: %s'
+                    _log.error(error_msg % (field, ','.join(values[field])))
+        utils.log_progress(objectdb, 'validated', count, count + len(batch))
+        count += len(batch)
     return num_errors
 
 # individual model validation -------------------------------------------------
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+# Adds the timing of the automatic publishes run after a sync to the sync
+# history entries.
+
+import logging
+
+from pulp.server.db.migrate.utils import add_field_with_default_value
+from pulp.server.db.model.repository import RepoSyncResult
+
+_log = logging.getLogger('pulp')
+
+
+version = 2
+
+def migrate():
+    _log.info('migration to data model version %d started' % version)
+    add_field_with_default_value(RepoSyncResult.get_collection(), 'auto_publish', {})
+    _log.info('migration to data model version %d complete' % version)
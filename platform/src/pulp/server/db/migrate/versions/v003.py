@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+# Adds the hash of each consumer unit profile, against which the agents
+# report unchanged profiles and profile deltas.
+
+import logging
+
+from pulp.common.profiles import profile_hash
+from pulp.server.db.migrate.utils import add_field_with_calculated_value
+from pulp.server.db.model.consumer import UnitProfile
+
+_log = logging.getLogger('pulp')
+
+
+version = 3
+
+def migrate():
+    _log.info('migration to data model version %d started' % version)
+    add_field_with_calculated_value(UnitProfile.get_collection(), 'profile_hash',
+                                    lambda m: profile_hash(m['profile']))
+    _log.info('migration to data model version %d complete' % version)
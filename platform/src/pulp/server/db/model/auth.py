@@ -96,3 +96,28 @@ class Permission(Model):
 
         self.resource = resource
         self.users = users or {}
+
+
+class PermissionsGeneration(Model):
+    """
+    Single document that tracks changes to users' permissions and roles. The
+    generation is incremented each time they are changed so that processes
+    caching the permissions know to reload them.
+
+    @ivar generation: incremented on each change to the permissions
+    @type generation: int
+    """
+
+    collection_name = 'permissions_generation'
+    unique_indices = ()
+
+    # _id of the single document in the collection
+    DOCUMENT_ID = 'permissions'
+
+    def __init__(self, generation=0):
+        super(PermissionsGeneration, self).__init__()
+
+        self._id = self.DOCUMENT_ID
+        self.id = self.DOCUMENT_ID
+
+        self.generation = generation
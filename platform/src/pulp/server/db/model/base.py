@@ -11,11 +11,33 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import logging
+import threading
+import time
+
 from pymongo import DESCENDING
 
 from pulp.server.compat import ObjectId
+from pulp.server.db import connection
 from pulp.server.db.connection import get_collection
 
+# -- collection registry --------------------------------------------------------
+
+_LOG = logging.getLogger(__name__)
+
+# Process-wide registry of provisioned collections, keyed by model class. Each
+# entry is a tuple of the database the collection was created against and the
+# collection itself, so a re-initialized database connection invalidates it.
+# The PulpCollection wrapper retries on AutoReconnect, so the shared instances
+# remain usable across database reconnects.
+_COLLECTIONS = {}
+_COLLECTIONS_LOCK = threading.RLock()
+
+# Bookkeeping for the registry: the time spent provisioning each model's
+# collection and the number of get_collection calls answered from the registry
+_PROVISION_TIMES = {}
+_CACHE_HITS = {}
+
 
 class Model(dict):
     """
@@ -94,10 +116,42 @@ class Model(dict):
 
     @classmethod
     def _get_cached_collection(cls):
-        try:
-            return cls.__collection
-        except AttributeError:
+        """
+        @return: the registered collection for this model if it has already
+                 been provisioned against the current database, None otherwise
+        @rtype:  pymongo.collection.Collection instance or None
+        """
+        entry = _COLLECTIONS.get(cls)
+        if entry is None or entry[0] is not connection.database():
             return None
+        return entry[1]
+
+    @classmethod
+    def _provision_collection(cls):
+        """
+        Ensures the indices for this model's collection and stores the
+        collection in the registry, replacing any existing entry.
+        @rtype: pymongo.collection.Collection instance
+        """
+        with _COLLECTIONS_LOCK:
+            start = time.time()
+            collection = cls._get_collection_from_db()
+            _PROVISION_TIMES[cls] = time.time() - start
+            _COLLECTIONS[cls] = (connection.database(), collection)
+        return collection
+
+    @classmethod
+    def ensure_indices(cls):
+        """
+        Re-verifies the indices on this model's document collection and
+        refreshes the shared collection instance. The indices are otherwise
+        only ensured the first time the collection is requested.
+        @rtype: pymongo.collection.Collection instance or None
+        @return: the document collection if associated with one, None otherwise
+        """
+        if cls.collection_name is None:
+            return None
+        return cls._provision_collection()
 
     @classmethod
     def get_collection(cls):
@@ -111,5 +165,72 @@ class Model(dict):
         # collection_name
         if cls.collection_name is None:
             return None
-        # removed cached connections to handle AutoReconnect exception
-        return cls._get_collection_from_db()
+        collection = cls._get_cached_collection()
+        if collection is not None:
+            _CACHE_HITS[cls] = _CACHE_HITS.get(cls, 0) + 1
+            return collection
+        with _COLLECTIONS_LOCK:
+            # another thread may have provisioned it while we were waiting
+            collection = cls._get_cached_collection()
+            if collection is None:
+                collection = cls._provision_collection()
+        return collection
+
+# -- collection registry api ----------------------------------------------------
+
+def _model_classes(base=Model):
+    """
+    @return: all of the (currently imported) subclasses of the given model class
+    @rtype:  list of class
+    """
+    classes = []
+    for subclass in base.__subclasses__():
+        classes.append(subclass)
+        classes.extend(_model_classes(subclass))
+    return classes
+
+
+def provision_collections():
+    """
+    Ensures the indices on the collections of all imported model classes and
+    registers the collections for shared use. Intended to be called at server
+    start up and after database migrations. It is safe to call this again to
+    re-verify the indices.
+    """
+    for model_class in _model_classes():
+        if model_class.collection_name is not None:
+            model_class.ensure_indices()
+    _LOG.info('Provisioned %d model collections in %.3f seconds' %
+              (len(_PROVISION_TIMES), sum(_PROVISION_TIMES.values())))
+
+
+def reset_collections():
+    """
+    Clears the collection registry and its statistics. Collections will be
+    provisioned again the next time they are requested.
+    """
+    with _COLLECTIONS_LOCK:
+        _COLLECTIONS.clear()
+        _PROVISION_TIMES.clear()
+        _CACHE_HITS.clear()
+
+
+def collection_statistics():
+    """
+    Reports on the use of the collection registry. For each model class, the
+    time it took to provision it and the number of requests answered from
+    the registry are listed, along with the estimated time saved by not
+    provisioning the collection on each of those requests.
+    @return: dict of model class name to a dict of statistics
+    @rtype:  dict
+    """
+    stats = {}
+    for model_class, provision_time in _PROVISION_TIMES.items():
+        hits = _CACHE_HITS.get(model_class, 0)
+        stats[model_class.__name__] = {
+            'collection' : model_class.collection_name,
+            'provision_time' : provision_time,
+            'hits' : hits,
+            'time_saved' : hits * provision_time,
+        }
+    return stats
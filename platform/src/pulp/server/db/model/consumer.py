@@ -101,6 +101,8 @@ class UnitProfile(Model):
     @type content_type: str
     @ivar profile: The stored profile.
     @type profile: dict
+    @ivar profile_hash: The hash of the stored profile.
+    @type profile_hash: str
     """
 
     collection_name = 'consumer_unit_profiles'
@@ -108,7 +110,7 @@ class UnitProfile(Model):
         ('consumer_id', 'content_type'),
     )
 
-    def __init__(self, consumer_id, content_type, profile):
+    def __init__(self, consumer_id, content_type, profile, profile_hash=None):
         """
         @param consumer_id: A consumer ID.
         @type consumer_id: str
@@ -116,11 +118,15 @@ class UnitProfile(Model):
         @type content_type: str
         @param profile: The stored profile.
         @type profile: dict
+        @param profile_hash: The hash of the stored profile.
+            See: L{pulp.common.profiles.profile_hash}
+        @type profile_hash: str
         """
         super(UnitProfile, self).__init__()
         self.consumer_id = consumer_id
         self.content_type = content_type
         self.profile = profile
+        self.profile_hash = profile_hash
 
 
 class ConsumerHistoryEvent(Model):
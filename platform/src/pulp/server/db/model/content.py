@@ -56,4 +56,28 @@ class ContentType(Model):
         self.unit_key = unit_key
         self.search_indexes = search_indexes
 
-        self.referenced_types = referenced_types
\ No newline at end of file
+        self.referenced_types = referenced_types
+
+class ContentTypesGeneration(Model):
+    """
+    Single document that tracks changes to the content type definitions. The
+    generation is incremented each time the type definitions are updated so
+    that processes caching the definitions know to reload them.
+
+    @ivar generation: incremented on each change to the type definitions
+    @type generation: int
+    """
+
+    collection_name = 'content_types_generation'
+    unique_indices = ()
+
+    # _id of the single document in the collection
+    DOCUMENT_ID = 'content_types'
+
+    def __init__(self, generation=0):
+        super(ContentTypesGeneration, self).__init__()
+
+        self._id = self.DOCUMENT_ID
+        self.id = self.DOCUMENT_ID
+
+        self.generation = generation
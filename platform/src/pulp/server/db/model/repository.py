@@ -217,7 +217,8 @@ class RepoContentUnit(Model):
     # modifying the following index
     unique_indices = ( ('repo_id', 'unit_type_id', 'unit_id', 'owner_type', 'owner_id'), )
     search_indices = ( ('repo_id', 'unit_type_id', 'owner_type'),
-                       ('unit_type_id', 'created') # default sort order on get_units query, do not remove
+                       ('unit_type_id', 'created'), # default sort order on get_units query, do not remove
+                       ('unit_type_id', 'unit_id'), # association lookups for orphaned units, do not remove
                      )
 
     OWNER_TYPE_IMPORTER = 'importer'
@@ -360,6 +361,10 @@ class RepoSyncResult(Model):
         self.summary = None
         self.details = None
 
+        # Timing of the automatic publishes run after the sync, keyed by
+        # distributor ID; filled in as each of them completes
+        self.auto_publish = {}
+
 
 class RepoPublishResult(Model):
     """
@@ -96,6 +96,14 @@ CALL_INCOMPLETE_STATES = (CALL_WAITING_STATE, CALL_RUNNING_STATE, CALL_SUSPENDED
 CALL_COMPLETE_STATES = (CALL_SKIPPED_STATE, CALL_FINISHED_STATE, CALL_ERROR_STATE,
                         CALL_CANCELED_STATE, CALL_TIMED_OUT_STATE)
 
+# worker lanes -----------------------------------------------------------------
+
+WORKER_LANE_LONG_RUNNING = 'long_running'
+WORKER_LANE_SHORT_RUNNING = 'short_running'
+
+WORKER_LANES = (WORKER_LANE_LONG_RUNNING,
+                WORKER_LANE_SHORT_RUNNING)
+
 # resource types ---------------------------------------------------------------
 
 RESOURCE_CDS_TYPE = 'cds'
@@ -14,7 +14,7 @@
 import copy
 import datetime
 import sys
-import time
+import threading
 import types
 import uuid
 
@@ -36,13 +36,12 @@ class Coordinator(object):
     """
     Coordinator class that runs call requests in the task queue and detects and
     resolves conflicting operations on resources.
-    @ivar task_state_poll_interval: sleep interval to use while polling a "synchronous" task
-    @type task_state_poll_interval: float
+    @ivar resource_locks: resources in use by queued tasks
+    @type resource_locks: L{ResourceLockTable}
     """
 
-    def __init__(self, task_state_poll_interval=0.5):
-
-        self.task_state_poll_interval = task_state_poll_interval
+    def __init__(self):
+        self.resource_locks = _RESOURCE_LOCKS
 
     # explicit initialization --------------------------------------------------
 
@@ -52,8 +51,7 @@ class Coordinator(object):
         interrupted tasks.
         """
         # drop all previous knowledge of running tasks
-        task_resource_collection = TaskResource.get_collection()
-        task_resource_collection.remove(safe=True)
+        self.resource_locks.clear()
         # re-start interrupted tasks
         queued_call_collection = QueuedCall.get_collection()
         queued_call_list = list(queued_call_collection.find().sort('timestamp'))
@@ -181,7 +179,6 @@ class Coordinator(object):
         # interdependencies
         task_queue = dispatch_factory._task_queue()
         task_queue.lock()
-        task_resource_collection = TaskResource.get_collection()
         try:
             response, blocking, reasons, task_resources = self._find_conflicts(task.call_request.resources)
             task.call_report.response = response
@@ -194,7 +191,7 @@ class Coordinator(object):
             task.call_request.add_life_cycle_callback(dispatch_constants.CALL_DEQUEUE_LIFE_CYCLE_CALLBACK, coordinator_dequeue_callback)
             if task_resources:
                 set_task_id_on_task_resources(task.id, task_resources)
-                task_resource_collection.insert(task_resources, safe=True)
+                self.resource_locks.acquire(task.id, task_resources)
             task_queue.enqueue(task)
         finally:
             task_queue.unlock()
@@ -203,16 +200,15 @@ class Coordinator(object):
         # synchronously executed, do so
         if synchronous or (synchronous is None and response is dispatch_constants.CALL_ACCEPTED_RESPONSE):
             try:
-                # it's perfectly legitimate for the call to complete before the fist poll
+                # it's perfectly legitimate for the call to complete before we start waiting
                 running_states = [dispatch_constants.CALL_RUNNING_STATE]
                 running_states.extend(dispatch_constants.CALL_COMPLETE_STATES)
-                wait_for_task(task, running_states, poll_interval=self.task_state_poll_interval, timeout=timeout)
+                wait_for_task(task, running_states, timeout=timeout)
             except OperationTimedOut:
                 task_queue.dequeue(task)
                 raise
             else:
-                wait_for_task(task, dispatch_constants.CALL_COMPLETE_STATES,
-                              poll_interval=self.task_state_poll_interval)
+                wait_for_task(task, dispatch_constants.CALL_COMPLETE_STATES)
 
     def _generate_task_group_id(self):
         """
@@ -269,29 +265,39 @@ class Coordinator(object):
         postponing_reasons = []
         rejecting_tasks = set()
         rejecting_reasons = []
+        seen_reasons = set()
 
-        task_resource_collection = TaskResource.get_collection()
         task_resources = resource_dict_to_task_resources(resources)
-        or_query = filter_dicts(task_resources, ('resource_type', 'resource_id'))
-        cursor = task_resource_collection.find({'$or': or_query})
-
-        for task_resource in cursor:
-            proposed_operation = resources[task_resource['resource_type']][task_resource['resource_id']]
-            postponing_operations = get_postponing_operations(proposed_operation)
-            rejecting_operations = get_rejecting_operations(proposed_operation)
-            current_operation = task_resource['operation']
-            if current_operation in postponing_operations:
-                postponing_tasks.add(task_resource['task_id'])
-                reason = filter_dicts([task_resource], ('resource_type', 'resource_id'))[0]
-                reason['operation'] = current_operation
-                if reason not in postponing_reasons:
-                    postponing_reasons.append(reason)
-            if current_operation in rejecting_operations:
-                rejecting_tasks.add(task_resource['task_id'])
-                reason = filter_dicts([task_resource], ('resource_type', 'resource_id'))[0]
-                reason['operation'] = current_operation
-                if reason not in rejecting_reasons:
-                    rejecting_reasons.append(reason)
+
+        for task_resource in task_resources:
+            resource_type = task_resource['resource_type']
+            resource_id = task_resource['resource_id']
+            postponing_operations = set()
+            rejecting_operations = set()
+            for proposed_operation in operation_list(task_resource['operation']):
+                postponing_operations.update(_POSTPONING_OPERATIONS[proposed_operation])
+                rejecting_operations.update(_REJECTING_OPERATIONS[proposed_operation])
+            for task_id, current_operation in self.resource_locks.find(resource_type, resource_id):
+                current_operations = operation_list(current_operation)
+                postpones = not postponing_operations.isdisjoint(current_operations)
+                rejects = not rejecting_operations.isdisjoint(current_operations)
+                if not (postpones or rejects):
+                    continue
+                reason_key = (resource_type, resource_id, tuple(current_operations), rejects)
+                reason = None
+                if reason_key not in seen_reasons:
+                    seen_reasons.add(reason_key)
+                    reason = {'resource_type': resource_type,
+                              'resource_id': resource_id,
+                              'operation': current_operation}
+                if postpones:
+                    postponing_tasks.add(task_id)
+                    if reason is not None:
+                        postponing_reasons.append(reason)
+                if rejects:
+                    rejecting_tasks.add(task_id)
+                    if reason is not None:
+                        rejecting_reasons.append(reason)
 
         if rejecting_tasks:
             return dispatch_constants.CALL_REJECTED_RESPONSE, rejecting_tasks, rejecting_reasons, task_resources
@@ -399,6 +405,93 @@ class Coordinator(object):
             cancel_returns[task.id] = task_queue.cancel(task)
         return cancel_returns
 
+# resource lock table ----------------------------------------------------------
+
+class ResourceLockTable(object):
+    """
+    In-memory table of the resources held by queued and running tasks, keyed
+    by resource type and id, used by the coordinator's conflict detection.
+    The table is the authoritative copy: the task resource collection is only
+    kept as a best-effort mirror for inspecting the state of a running server
+    and is cleared when the coordinator starts.
+    """
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__locks = {} # (resource type, resource id) -> {task id: operation}
+        self.__task_locks = {} # task id -> [(resource type, resource id), ...]
+
+    def acquire(self, task_id, task_resources):
+        """
+        Record the resources held by a task.
+        @param task_id: id of the task holding the resources
+        @type  task_id: str
+        @param task_resources: resources held by the task
+        @type  task_resources: list of L{TaskResource} instances
+        """
+        self.__lock.acquire()
+        try:
+            keys = self.__task_locks.setdefault(task_id, [])
+            for task_resource in task_resources:
+                key = (task_resource['resource_type'], task_resource['resource_id'])
+                self.__locks.setdefault(key, {})[task_id] = task_resource['operation']
+                keys.append(key)
+        finally:
+            self.__lock.release()
+        if task_resources:
+            TaskResource.get_collection().insert(task_resources, safe=False)
+
+    def release(self, task_id):
+        """
+        Remove all of the resources held by a task.
+        @param task_id: id of the task holding the resources
+        @type  task_id: str
+        """
+        self.__lock.acquire()
+        try:
+            for key in self.__task_locks.pop(task_id, []):
+                holders = self.__locks.get(key)
+                if holders is None:
+                    continue
+                holders.pop(task_id, None)
+                if not holders:
+                    self.__locks.pop(key)
+        finally:
+            self.__lock.release()
+        TaskResource.get_collection().remove({'task_id': task_id}, safe=False)
+
+    def find(self, resource_type, resource_id):
+        """
+        Find the tasks currently holding a resource.
+        @param resource_type: type of the resource
+        @type  resource_type: str
+        @param resource_id: id of the resource
+        @type  resource_id: str
+        @return: (possibly empty) list of (task id, operation) tuples
+        @rtype:  list
+        """
+        self.__lock.acquire()
+        try:
+            return self.__locks.get((resource_type, resource_id), {}).items()
+        finally:
+            self.__lock.release()
+
+    def clear(self):
+        """
+        Drop all knowledge of held resources.
+        """
+        self.__lock.acquire()
+        try:
+            self.__locks.clear()
+            self.__task_locks.clear()
+        finally:
+            self.__lock.release()
+        TaskResource.get_collection().remove(safe=True)
+
+# the resource lock table is shared across the process, as are the tasks that
+# hold the resources
+_RESOURCE_LOCKS = ResourceLockTable()
+
 # conflict detection utility functions -----------------------------------------
 
 def filter_dicts(dicts, fields):
@@ -453,6 +546,27 @@ def get_rejecting_operations(operation):
     return rejecting
 
 
+# proposed operation -> set of operations that postpone or reject it
+_POSTPONING_OPERATIONS = dict((op, set(get_postponing_operations(op)))
+                              for op in dispatch_constants.RESOURCE_OPERATIONS_MATRIX)
+_REJECTING_OPERATIONS = dict((op, set(get_rejecting_operations(op)))
+                             for op in dispatch_constants.RESOURCE_OPERATIONS_MATRIX)
+
+
+def operation_list(operation):
+    """
+    Normalize a resource operation, which may be given as either a single
+    operation or a list of operations, to a list of operations
+    @param operation: operation or list of operations
+    @type  operation: str or list
+    @return: list of operations
+    @rtype:  list
+    """
+    if isinstance(operation, (list, tuple)):
+        return operation
+    return [operation]
+
+
 def resource_dict_to_task_resources(resource_dict):
     """
     Convert a resources dictionary to a list of task resource instances
@@ -481,31 +595,26 @@ def set_task_id_on_task_resources(task_id, task_resources):
         task_resource['task_id'] = task_id
 
 
-def wait_for_task(task, states, poll_interval=0.5, timeout=None):
+def wait_for_task(task, states, timeout=None):
     """
-    Wait for a task to be in a certain set of states
+    Wait for a task to be in a certain set of states.
+    The calling thread blocks until the task reports a state change, so there
+    is no polling delay between the task changing state and the caller waking.
     @param task: task to wait for
     @type  task: L{Task}
     @param states: set of valid states
     @type  states: list, set, or tuple
-    @param poll_interval: time, in seconds, to wait in between polling the task
-    @type  poll_interval: float or int
-    @param timeout: maximum amount of time to poll task, None means indefinitely
+    @param timeout: maximum amount of time to wait for the task, None means indefinitely
     @type  timeout: None or datetime.timedelta
     """
     assert isinstance(task, Task)
     assert isinstance(states, (list, set, tuple))
-    assert isinstance(poll_interval, (float, int))
     assert isinstance(timeout, (datetime.timedelta, types.NoneType))
 
-    start = datetime.datetime.now()
-    while task.call_report.state not in states:
-        time.sleep(poll_interval)
-        if timeout is None:
-            continue
-        now = datetime.datetime.now()
-        if now - start < timeout:
-            continue
+    timeout_seconds = None
+    if timeout is not None:
+        timeout_seconds = timeout.days * 86400 + timeout.seconds + timeout.microseconds / 1000000.0
+    if not task.wait_for_state(states, timeout_seconds):
         raise OperationTimedOut(timeout)
 
 # query utility functions ------------------------------------------------------
@@ -551,7 +660,5 @@ def coordinator_dequeue_callback(call_request, call_report):
     @type  call_report: L{call.CallReport} instance
     """
     # yes, I know that the call_request is not being used
-    task_id = call_report.task_id
-    collection = TaskResource.get_collection()
-    collection.remove({'task_id': task_id}, safe=True)
+    _RESOURCE_LOCKS.release(call_report.task_id)
 
@@ -26,8 +26,7 @@ def _initialize_coordinator():
     global _COORDINATOR
     assert _COORDINATOR is None
     from pulp.server.dispatch.coordinator import Coordinator
-    task_state_poll_interval = pulp_config.config.getfloat('coordinator', 'task_state_poll_interval')
-    _COORDINATOR = Coordinator(task_state_poll_interval)
+    _COORDINATOR = Coordinator()
     _COORDINATOR.start()
 
 
@@ -43,10 +42,14 @@ def _initialize_scheduler():
 def _initialize_task_queue():
     global _TASK_QUEUE
     assert _TASK_QUEUE is None
+    from pulp.server.dispatch.pool import WorkerPool
     from pulp.server.dispatch.taskqueue import TaskQueue
     concurrency_threshold = pulp_config.config.getint('tasks', 'concurrency_threshold')
     dispatch_interval = pulp_config.config.getfloat('tasks', 'dispatch_interval')
-    _TASK_QUEUE = TaskQueue(concurrency_threshold, dispatch_interval)
+    long_running_workers = pulp_config.config.getint('tasks', 'long_running_workers')
+    short_running_workers = pulp_config.config.getint('tasks', 'short_running_workers')
+    worker_pool = WorkerPool(long_running_workers, short_running_workers)
+    _TASK_QUEUE = TaskQueue(concurrency_threshold, dispatch_interval, worker_pool=worker_pool)
     _TASK_QUEUE.start()
 
 
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import logging
+import threading
+import time
+from collections import deque
+
+from pulp.common.tags import (
+    action_tag, ACTION_AUTO_PUBLISH_TYPE, ACTION_PUBLISH_TYPE, ACTION_SYNC_TYPE)
+from pulp.server.dispatch import constants as dispatch_constants
+
+
+_LOG = logging.getLogger(__name__)
+
+# tasks carrying any of these tags are run in the long running lane
+LONG_RUNNING_ACTION_TAGS = (action_tag(ACTION_SYNC_TYPE),
+                            action_tag(ACTION_PUBLISH_TYPE),
+                            action_tag(ACTION_AUTO_PUBLISH_TYPE))
+
+# worker lane class ------------------------------------------------------------
+
+class WorkerLane(object):
+    """
+    Bounded set of reusable worker threads that execute the callables submitted
+    to the lane in the order in which they were submitted.
+    Worker threads are started on demand, up to num_workers, and are kept
+    around to execute subsequent submissions.
+    @ivar name: name of the lane
+    @type name: str
+    @ivar num_workers: maximum number of worker threads
+    @type num_workers: int
+    """
+
+    def __init__(self, name, num_workers):
+        assert num_workers > 0
+
+        self.name = name
+        self.num_workers = num_workers
+
+        self.__queue = deque()
+        self.__workers = []
+        self.__idle_workers = 0
+        self.__busy_workers = 0
+        self.__exit = False
+        self.__lock = threading.Lock()
+        self.__condition = threading.Condition(self.__lock)
+
+        self.__submitted = 0
+        self.__completed = 0
+        self.__total_wait_time = 0.0
+        self.__max_wait_time = 0.0
+        self.__total_execution_time = 0.0
+        self.__max_execution_time = 0.0
+
+    # lane control methods -----------------------------------------------------
+
+    def start(self):
+        """
+        Allow the lane to run submitted callables (again) after a shutdown.
+        """
+        self.__lock.acquire()
+        try:
+            self.__exit = False
+        finally:
+            self.__lock.release()
+
+    def shutdown(self):
+        """
+        Signal the worker threads to exit once all of the callables already
+        submitted have been executed.
+        """
+        self.__lock.acquire()
+        try:
+            self.__exit = True
+            self.__condition.notifyAll()
+        finally:
+            self.__lock.release()
+
+    def submit(self, target):
+        """
+        Submit a callable for execution by one of the lane's workers.
+        @param target: callable to execute, called with no arguments
+        @type  target: callable
+        """
+        self.__lock.acquire()
+        try:
+            self.__queue.append((target, time.time()))
+            self.__submitted += 1
+            if len(self.__queue) > self.__idle_workers and len(self.__workers) < self.num_workers:
+                self._start_worker()
+            self.__condition.notify()
+        finally:
+            self.__lock.release()
+
+    def _start_worker(self):
+        worker = threading.Thread(target=self.__work, name='%s-worker-%d' % (self.name, len(self.__workers)))
+        worker.setDaemon(True)
+        self.__workers.append(worker)
+        worker.start()
+
+    def __work(self):
+        """
+        Worker thread loop
+        """
+        self.__lock.acquire()
+        try:
+            while True:
+                while not self.__queue and not self.__exit:
+                    self.__idle_workers += 1
+                    self.__condition.wait()
+                    self.__idle_workers -= 1
+                if not self.__queue:
+                    self.__workers.remove(threading.currentThread())
+                    return
+                target, submit_time = self.__queue.popleft()
+                self.__busy_workers += 1
+                self.__lock.release()
+                start_time = time.time()
+                try:
+                    try:
+                        target()
+                    except Exception:
+                        _LOG.exception('Exception in worker lane [%s]' % self.name)
+                finally:
+                    finish_time = time.time()
+                    self.__lock.acquire()
+                self.__busy_workers -= 1
+                self._record(start_time - submit_time, finish_time - start_time)
+        finally:
+            self.__lock.release()
+
+    def _record(self, wait_time, execution_time):
+        self.__completed += 1
+        self.__total_wait_time += wait_time
+        self.__max_wait_time = max(self.__max_wait_time, wait_time)
+        self.__total_execution_time += execution_time
+        self.__max_execution_time = max(self.__max_execution_time, execution_time)
+
+    # lane statistics ----------------------------------------------------------
+
+    def statistics(self):
+        """
+        Report on the lane's current queue depth and historical wait (time
+        between submission and start) and execution times, in seconds.
+        @return: lane statistics
+        @rtype:  dict
+        """
+        self.__lock.acquire()
+        try:
+            completed = self.__completed
+            return {'name': self.name,
+                    'max_workers': self.num_workers,
+                    'workers': len(self.__workers),
+                    'busy_workers': self.__busy_workers,
+                    'queue_depth': len(self.__queue),
+                    'submitted': self.__submitted,
+                    'completed': completed,
+                    'average_wait_time': completed and self.__total_wait_time / completed or 0.0,
+                    'max_wait_time': self.__max_wait_time,
+                    'average_execution_time': completed and self.__total_execution_time / completed or 0.0,
+                    'max_execution_time': self.__max_execution_time}
+        finally:
+            self.__lock.release()
+
+# worker pool class ------------------------------------------------------------
+
+class WorkerPool(object):
+    """
+    Worker threads used to execute tasks, split into separate lanes so that
+    long running work (repository syncs and publishes) cannot starve short
+    calls of workers.
+    @ivar lanes: map of lane name to lane
+    @type lanes: dict
+    """
+
+    def __init__(self, long_running_workers, short_running_workers):
+        self.lanes = {
+            dispatch_constants.WORKER_LANE_LONG_RUNNING:
+                WorkerLane(dispatch_constants.WORKER_LANE_LONG_RUNNING, long_running_workers),
+            dispatch_constants.WORKER_LANE_SHORT_RUNNING:
+                WorkerLane(dispatch_constants.WORKER_LANE_SHORT_RUNNING, short_running_workers),
+        }
+
+    def start(self):
+        for lane in self.lanes.values():
+            lane.start()
+
+    def shutdown(self):
+        for lane in self.lanes.values():
+            lane.shutdown()
+
+    def lane_name(self, task):
+        """
+        Determine which lane a task is executed in based on its tags.
+        @param task: task to be executed
+        @type  task: pulp.server.dispatch.task.Task
+        @return: lane name
+        @rtype:  str
+        """
+        for tag in task.call_request.tags:
+            if tag in LONG_RUNNING_ACTION_TAGS:
+                return dispatch_constants.WORKER_LANE_LONG_RUNNING
+        return dispatch_constants.WORKER_LANE_SHORT_RUNNING
+
+    def submit(self, task, target):
+        """
+        Submit a task's run method for execution in the appropriate lane.
+        @param task: task being executed
+        @type  task: pulp.server.dispatch.task.Task
+        @param target: callable that executes the task
+        @type  target: callable
+        """
+        self.lanes[self.lane_name(task)].submit(target)
+
+    def statistics(self):
+        """
+        @return: statistics for each lane, see L{WorkerLane.statistics}
+        @rtype:  list of dict
+        """
+        return [self.lanes[name].statistics() for name in sorted(self.lanes)]
@@ -51,6 +51,8 @@ class Task(object):
     @type progress_callback: callable or None
     @ivar blocking_tasks: set of task ids that block the execution of this task
     @type blocking_tasks: set
+    @ivar state_condition: condition notified whenever the call report state changes
+    @type state_condition: threading.Condition
     """
 
     def __init__(self, call_request, call_report=None):
@@ -71,6 +73,10 @@ class Task(object):
 
         self.complete_callback = None
         self.blocking_tasks = set()
+        self.state_condition = threading.Condition(threading.Lock())
+        # set when a ready task is canceled, so that a worker picking it up
+        # afterwards does not run it
+        self._canceled = False
 
     def __str__(self):
         return 'Task %s: %s' % (self.id, str(self.call_request))
@@ -80,6 +86,69 @@ class Task(object):
             raise TypeError('No comparison defined between task and %s' % type(other))
         return self.id == other.id
 
+    # state transitions --------------------------------------------------------
+
+    def _set_state(self, state):
+        """
+        Set the state of the call report and wake up any threads waiting on
+        a state change.
+        @param state: new call state
+        @type  state: str
+        """
+        self.state_condition.acquire()
+        try:
+            self.call_report.state = state
+            self.state_condition.notifyAll()
+        finally:
+            self.state_condition.release()
+
+    def _start(self):
+        """
+        Move the task to the running state when a thread starts to execute it.
+        @return: True if the task is to be run, False if it was canceled while
+                 waiting for a worker
+        @rtype:  bool
+        """
+        self.state_condition.acquire()
+        try:
+            if self._canceled:
+                return False
+            if self.call_report.state in dispatch_constants.CALL_READY_STATES:
+                self.call_report.state = dispatch_constants.CALL_RUNNING_STATE
+                self.state_condition.notifyAll()
+            return True
+        finally:
+            self.state_condition.release()
+
+    def wait_for_state(self, states, timeout=None):
+        """
+        Block the calling thread until the task's call report is in one of the
+        given states.
+        @param states: set of states to wait for
+        @type  states: list, set, or tuple
+        @param timeout: maximum time, in seconds, to wait, None means indefinitely
+        @type  timeout: None or float
+        @return: True if the task reached one of the states, False if the
+                 timeout expired first
+        @rtype:  bool
+        """
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        self.state_condition.acquire()
+        try:
+            while self.call_report.state not in states:
+                if deadline is None:
+                    self.state_condition.wait()
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.state_condition.wait(remaining)
+            return True
+        finally:
+            self.state_condition.release()
+
     # progress information -----------------------------------------------------
 
     def _report_progress(self, progress):
@@ -99,28 +168,47 @@ class Task(object):
             self.call_report.reasons = reasons
         self._complete(dispatch_constants.CALL_SKIPPED_STATE)
 
-    def run(self):
+    def run(self, worker_pool=None):
         """
-        Public wrapper to kick off the call in the call_request in a new thread.
+        Public wrapper to kick off the call in the call_request in another
+        thread: a worker from the given pool or, if no pool is given, a new
+        thread.
+        @param worker_pool: pool of worker threads to run the call in
+        @type  worker_pool: None or L{pulp.server.dispatch.pool.WorkerPool}
         """
         assert self.call_report.state in dispatch_constants.CALL_READY_STATES
+        if worker_pool is not None:
+            # the lane may not have a free worker, so the task is left waiting
+            # (and can still be canceled as such) until a worker starts it
+            worker_pool.submit(self, self._run_in_worker)
+            return
         # NOTE using run wrapper so that state transition is protected by the
         # task queue lock and doesn't occur in another thread
-        self.call_report.state = dispatch_constants.CALL_RUNNING_STATE
+        self._set_state(dispatch_constants.CALL_RUNNING_STATE)
         task_thread = threading.Thread(target=self._run)
         task_thread.start()
         # I'm fairly certain these will always be called *before* the context
         # switch to the task_thread
         self.call_life_cycle_callbacks(dispatch_constants.CALL_RUN_LIFE_CYCLE_CALLBACK)
 
+    def _run_in_worker(self):
+        """
+        Run the task in a worker of the worker pool, unless it was canceled
+        while waiting for the worker.
+        """
+        if not self._start():
+            return
+        self.call_life_cycle_callbacks(dispatch_constants.CALL_RUN_LIFE_CYCLE_CALLBACK)
+        self._run()
+
     def _run(self):
         """
         Run the call in the call request.
         Generally the target of a new thread.
         """
         # used for calling _run directly during testing
-        if self.call_report.state in dispatch_constants.CALL_READY_STATES:
-            self.call_report.state = dispatch_constants.CALL_RUNNING_STATE
+        if not self._start():
+            return
         self.call_report.start_time = datetime.datetime.now(dateutils.utc_tz())
         dispatch_context.CONTEXT.set_task_attributes(self)
         call = self.call_request.call
@@ -177,7 +265,7 @@ class Task(object):
         # with that task queue
         self._call_complete_callback()
         # don't set the state to complete until the task is actually complete
-        self.call_report.state = state
+        self._set_state(state)
         self.call_life_cycle_callbacks(dispatch_constants.CALL_COMPLETE_LIFE_CYCLE_CALLBACK)
         if not self.call_request.archive:
             return
@@ -231,6 +319,14 @@ class Task(object):
         # a complete task cannot be cancelled
         if self.call_report.state in dispatch_constants.CALL_COMPLETE_STATES:
             return None
+        # a ready task, including one waiting for a worker, is prevented from
+        # starting; if a worker started it in the meantime it is now running
+        self.state_condition.acquire()
+        try:
+            if self.call_report.state in dispatch_constants.CALL_READY_STATES:
+                self._canceled = True
+        finally:
+            self.state_condition.release()
         # to cancel a running task, the cancel control hook *must* be called
         if self.call_report.state is dispatch_constants.CALL_RUNNING_STATE:
             try:
@@ -271,8 +367,8 @@ class AsyncTask(Task):
         Generally the target of a new thread.
         """
         # used for calling _run directly during testing
-        if self.call_report.state in dispatch_constants.CALL_READY_STATES:
-            self.call_report.state = dispatch_constants.CALL_RUNNING_STATE
+        if not self._start():
+            return
         self.call_report.start_time = datetime.datetime.now(dateutils.utc_tz())
         dispatch_context.CONTEXT.set_task_attributes(self)
         call = self.call_request.call
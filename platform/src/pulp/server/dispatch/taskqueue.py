@@ -11,6 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import heapq
 import itertools
 import logging
 import sys
@@ -22,6 +23,7 @@ from gettext import gettext as _
 from pulp.common import dateutils
 from pulp.server.db.model.dispatch import QueuedCall
 from pulp.server.dispatch import constants as dispatch_constants
+from pulp.server.dispatch.pool import WorkerPool
 
 
 _LOG = logging.getLogger(__name__)
@@ -32,22 +34,29 @@ class TaskQueue(object):
     """
     TaskQueue class
     Manager and dispatcher of concurrent, asynchronous task execution
+    The dispatcher thread is woken up whenever a task is enqueued, completes,
+    or is otherwise removed from the queue (potentially unblocking others),
+    rather than periodically checking for ready tasks.
     @ivar concurrency_threshold: measurement of total allowed concurrency
     @type concurrency_threshold: int
-    @ivar dispatch_interval: time, in seconds, between checks for ready tasks
+    @ivar dispatch_interval: time, in seconds, between purges of the completed task cache
     @type dispatch_interval: float
     @ivar completed_task_cache_life: time, in seconds, to cache completed tasks
     @type completed_task_cache_life: float
+    @ivar worker_pool: worker threads the tasks are run in
+    @type worker_pool: L{WorkerPool}
     """
 
     def __init__(self,
                  concurrency_threshold,
                  dispatch_interval=0.5,
-                 completed_task_cache_life=20.0):
+                 completed_task_cache_life=20.0,
+                 worker_pool=None):
 
         self.concurrency_threshold = concurrency_threshold
         self.dispatch_interval = dispatch_interval
         self.completed_task_cache_life = timedelta(seconds=completed_task_cache_life)
+        self.worker_pool = worker_pool or WorkerPool(concurrency_threshold, concurrency_threshold)
         self.queued_call_collection = QueuedCall.get_collection()
 
         self.__waiting_tasks = []
@@ -55,6 +64,16 @@ class TaskQueue(object):
         self.__canceled_tasks = []
         self.__completed_tasks = []
 
+        # task id -> task, for all waiting and running tasks
+        self.__queued_tasks = {}
+        # task id -> enqueue order, for all waiting tasks
+        self.__waiting_order = {}
+        # weight -> list of unblocked waiting tasks, in enqueue order
+        self.__ready_tasks = {}
+        # blocking task id -> list of tasks it blocks
+        self.__blocked_tasks = {}
+        self.__enqueue_counter = itertools.count()
+
         self.__running_weight = 0
         self.__exit = False
         self.__lock = threading.RLock()
@@ -70,7 +89,6 @@ class TaskQueue(object):
         self.__lock.acquire()
         while True:
             try:
-                self.__condition.wait(timeout=self.dispatch_interval)
                 if self.__exit:
                     if self.__lock is not None:
                         self.__lock.release()
@@ -83,21 +101,30 @@ class TaskQueue(object):
             except Exception, e:
                 msg = _('Exception in task queue dispatcher thread:\n%(e)s')
                 _LOG.critical(msg % {'e': traceback.format_exception(*sys.exc_info())})
+            # only wake up periodically if there is housekeeping to do,
+            # otherwise sleep until the queue changes
+            if self.__completed_tasks or self.__canceled_tasks:
+                self.__condition.wait(timeout=self.dispatch_interval)
+            else:
+                self.__condition.wait()
 
     def _get_ready_tasks(self):
         """
         Algorithm at the heart of the task scheduler. Gets the tasks that are
         ready to run (i.e. not blocked) within the limits of the available
-        concurrency threshold and returns them. Note that this algorithm checks
-        all the tasks as some may have a weight of 0.
+        concurrency threshold and returns them in the order in which they were
+        enqueued. Only the unblocked tasks whose weight fits in the available
+        concurrency are considered; note that tasks with a weight of 0 are
+        always ready when unblocked.
         """
         self.__lock.acquire()
         try:
             tasks = []
             available_weight = self.concurrency_threshold - self.__running_weight
-            for task in self.__waiting_tasks:
-                if task.blocking_tasks:
-                    continue
+            candidates = [[(self.__waiting_order[t.id], t) for t in weight_tasks]
+                          for weight, weight_tasks in self.__ready_tasks.items()
+                          if weight <= available_weight]
+            for order, task in heapq.merge(*candidates):
                 if task.call_request.weight > available_weight:
                     continue
                 available_weight -= task.call_request.weight
@@ -108,17 +135,39 @@ class TaskQueue(object):
 
     def _run_ready_task(self, task):
         """
-        Run a ready task in a new thread
+        Run a ready task in the worker pool
         """
         self.__lock.acquire()
         try:
             self.__waiting_tasks.remove(task)
+            self.__waiting_order.pop(task.id, None)
+            self._remove_ready_task(task)
+            # a task waiting for a free worker in its lane still counts
+            # against the concurrency threshold, so that the lanes' backlogs
+            # stay bounded; it stays in a waiting state until it is started
             self.__running_tasks.append(task)
             self.__running_weight += task.call_request.weight
-            task.run()
+            task.run(self.worker_pool)
         finally:
             self.__lock.release()
 
+    def _add_ready_task(self, task):
+        """
+        Add an unblocked waiting task to the ready tasks index
+        """
+        self.__ready_tasks.setdefault(task.call_request.weight, []).append(task)
+
+    def _remove_ready_task(self, task):
+        """
+        Remove a task from the ready tasks index, if present
+        """
+        weight_tasks = self.__ready_tasks.get(task.call_request.weight)
+        if not weight_tasks or task not in weight_tasks:
+            return
+        weight_tasks.remove(task)
+        if not weight_tasks:
+            del self.__ready_tasks[task.call_request.weight]
+
     def _cancel_tasks(self):
         """
         Asynchronously cancel tasks that have been marked for cancellation
@@ -138,7 +187,7 @@ class TaskQueue(object):
         Purge expired tasks from the completed tasks cache.
         """
         expired_cutoff = datetime.now(dateutils.utc_tz()) - self.completed_task_cache_life
-        index = 0 # index of the first non-expired cached task
+        index = len(self.__completed_tasks) # index of the first non-expired cached task
         # the tasks stored in the cache are in ascending order of finish time
         for i, task in enumerate(self.__completed_tasks):
             if task.call_report.finish_time > expired_cutoff:
@@ -156,6 +205,7 @@ class TaskQueue(object):
         self.__lock.acquire()
         self.__exit = False # needed for re-start
         try:
+            self.worker_pool.start()
             self.__dispatcher = threading.Thread(target=self.__dispatch)
             self.__dispatcher.setDaemon(True)
             self.__dispatcher.start()
@@ -173,6 +223,7 @@ class TaskQueue(object):
         self.__lock.release()
         self.__dispatcher.join()
         self.__dispatcher = None
+        self.worker_pool.shutdown()
         if clear_queued_calls:
             self.queued_call_collection.remove(safe=True)
 
@@ -204,6 +255,13 @@ class TaskQueue(object):
             task.complete_callback = self._complete
             self._validate_blocking_tasks(task)
             self.__waiting_tasks.append(task)
+            self.__queued_tasks[task.id] = task
+            self.__waiting_order[task.id] = self.__enqueue_counter.next()
+            if task.blocking_tasks:
+                for blocking_task_id in task.blocking_tasks:
+                    self.__blocked_tasks.setdefault(blocking_task_id, []).append(task)
+            else:
+                self._add_ready_task(task)
             task.call_life_cycle_callbacks(dispatch_constants.CALL_ENQUEUE_LIFE_CYCLE_CALLBACK)
             self.__condition.notify()
         finally:
@@ -220,10 +278,10 @@ class TaskQueue(object):
         self.__lock.acquire()
         try:
             valid_blocking_tasks = set()
-            for potential_blocking_task in itertools.chain(self.__running_tasks, self.__waiting_tasks):
-                if potential_blocking_task.id not in task.blocking_tasks:
+            for blocking_task_id in task.blocking_tasks:
+                if blocking_task_id not in self.__queued_tasks:
                     continue
-                valid_blocking_tasks.add(potential_blocking_task.id)
+                valid_blocking_tasks.add(blocking_task_id)
             task.blocking_tasks = valid_blocking_tasks
         finally:
             self.__lock.release()
@@ -242,10 +300,15 @@ class TaskQueue(object):
             task.queued_call_id = None
             if task in self.__waiting_tasks:
                 self.__waiting_tasks.remove(task)
+                self.__waiting_order.pop(task.id, None)
+                self._remove_ready_task(task)
             if task in self.__running_tasks:
                 self.__running_tasks.remove(task)
+            self.__queued_tasks.pop(task.id, None)
             self._unblock_tasks(task)
             task.call_life_cycle_callbacks(dispatch_constants.CALL_DEQUEUE_LIFE_CYCLE_CALLBACK)
+            # let the dispatcher know it may have tasks to run
+            self.__condition.notify()
         finally:
             self.__lock.release()
 
@@ -257,8 +320,14 @@ class TaskQueue(object):
         """
         self.__lock.acquire()
         try:
-            for potentially_blocked_task in self.__waiting_tasks:
-                potentially_blocked_task.blocking_tasks.discard(task.id)
+            for blocked_task in self.__blocked_tasks.pop(task.id, []):
+                blocked_task.blocking_tasks.discard(task.id)
+                if blocked_task.blocking_tasks:
+                    continue
+                # the blocked task may have been dequeued in the meantime
+                if blocked_task.id not in self.__waiting_order:
+                    continue
+                self._add_ready_task(blocked_task)
         finally:
             self.__lock.release()
 
@@ -272,7 +341,10 @@ class TaskQueue(object):
         """
         self.__lock.acquire()
         try:
-            self.__running_weight -= task.call_request.weight
+            # tasks that are canceled or skipped before they run never
+            # contributed to the running weight
+            if task in self.__running_tasks:
+                self.__running_weight -= task.call_request.weight
             self.dequeue(task)
             self.__completed_tasks.append(task)
         finally:
@@ -302,9 +374,10 @@ class TaskQueue(object):
         """
         self.__lock.acquire()
         try:
-            for task in itertools.chain(self.__completed_tasks,
-                                        self.__running_tasks,
-                                        self.__waiting_tasks):
+            task = self.__queued_tasks.get(task_id)
+            if task is not None:
+                return task
+            for task in self.__completed_tasks:
                 if task.id != task_id:
                     continue
                 return task
@@ -349,7 +422,8 @@ class TaskQueue(object):
 
     def running_tasks(self):
         """
-        List of all the tasks currently being executed
+        List of all the tasks currently being executed, including the ones
+        handed to the worker pool that are waiting for a free worker
         @return: (potentially empty) list of tasks that are running
         @rtype:  list of pulp.server.dispatch.task.Task
         """
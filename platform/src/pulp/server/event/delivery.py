@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Delivers event notifications in the background. Notifiers queue a delivery
+for each notification instead of contacting the remote endpoint while the
+event is fired; a pool of worker threads sends them, retries failed
+deliveries with an exponential backoff and, for notifiers that allow it,
+sends the notifications queued for the same endpoint together. Connections
+to the endpoints are kept open between deliveries in a L{ConnectionPool}.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from pulp.server.config import config
+
+# -- constants ----------------------------------------------------------------
+
+_LOG = logging.getLogger(__name__)
+
+# seconds an idle connection is kept open for reuse; remote servers close
+# idle connections on their own, so this is kept short
+KEEP_ALIVE_TIMEOUT = 15
+
+# -- exceptions ---------------------------------------------------------------
+
+class DeliveryFailed(Exception):
+    """
+    Raised by a delivery's send function when the endpoint could not process
+    the notifications; they are retried.
+    """
+    pass
+
+
+class DeliveryRejected(Exception):
+    """
+    Raised by a delivery's send function when the endpoint refused the
+    notifications; they are dropped instead of being retried.
+    """
+    pass
+
+# -- classes ------------------------------------------------------------------
+
+class Delivery(object):
+    """
+    Notification waiting to be sent.
+    @ivar type_id: ID of the notifier type; statistics are kept per type
+    @type type_id: str
+    @ivar item: notification passed to the send function
+    @ivar send: function called with a list of items to send them; it returns
+                the items that could not be sent and should be retried, or
+                None if all of them were sent, and raises an exception if
+                none of them could be
+    @type send: callable
+    @ivar batch_key: deliveries with equal keys, and the same send function,
+                     are sent together; None if the delivery is sent on its own
+    @ivar batch_size: maximum number of items sent together
+    @type batch_size: int
+    """
+
+    def __init__(self, type_id, item, send, batch_key=None, batch_size=1):
+        self.type_id = type_id
+        self.item = item
+        self.send = send
+        self.batch_key = batch_key
+        self.batch_size = batch_size
+        self.attempts = 0
+        self.queued = time.time()
+
+    def batches_with(self, delivery):
+        return self.batch_key is not None and \
+               self.batch_key == delivery.batch_key and \
+               self.send == delivery.send
+
+
+class DeliveryQueue(object):
+    """
+    Deliveries ordered by the time they are due, sent by a pool of worker
+    threads that are started when the first delivery is queued.
+    """
+
+    def __init__(self, num_workers, max_attempts, retry_delay):
+        self.num_workers = num_workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._condition = threading.Condition()
+        # heap of (due time, sequence number, delivery)
+        self._queue = []
+        self._sequence = itertools.count()
+        self._workers = []
+        self._busy = 0
+        self._statistics = {}
+
+    def put(self, delivery, delay=0):
+        """
+        Queue a delivery.
+        @param delivery: delivery to send
+        @type  delivery: L{Delivery}
+        @param delay: seconds to wait before sending it
+        @type  delay: int or float
+        """
+        self._condition.acquire()
+        try:
+            entry = (time.time() + delay, self._sequence.next(), delivery)
+            heapq.heappush(self._queue, entry)
+            self._start_workers()
+            self._condition.notifyAll()
+        finally:
+            self._condition.release()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the queued deliveries, including their retries, to be done.
+        @param timeout: maximum number of seconds to wait
+        @type  timeout: int or float
+        @return: True if all of the deliveries are done
+        @rtype:  bool
+        """
+        deadline = timeout is not None and time.time() + timeout or None
+        self._condition.acquire()
+        try:
+            while self._queue or self._busy:
+                remaining = deadline and deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+        finally:
+            self._condition.release()
+
+    def statistics(self):
+        """
+        @return: number of deliveries waiting or being sent, and for each
+                 notifier type, the number of notifications delivered, retried
+                 and failed along with the latency, in seconds, between the
+                 event being fired and its notification being delivered:
+                 {queued:<int>, in_progress:<int>,
+                  notifiers:{type_id:{delivered:<int>, retried:<int>,
+                  failed:<int>, latency:{last:<float>, average:<float>,
+                  max:<float>}}}}
+        @rtype:  dict
+        """
+        self._condition.acquire()
+        try:
+            notifiers = {}
+            for type_id, stats in self._statistics.items():
+                stats = dict(stats)
+                total = stats.pop('latency_total')
+                stats['latency'] = {
+                    'last': stats.pop('latency_last'),
+                    'average': stats['delivered'] and total / stats['delivered'] or 0.0,
+                    'max': stats.pop('latency_max'),
+                }
+                notifiers[type_id] = stats
+            return {'queued': len(self._queue),
+                    'in_progress': self._busy,
+                    'notifiers': notifiers}
+        finally:
+            self._condition.release()
+
+    # -- workers --------------------------------------------------------------
+
+    def _start_workers(self):
+        # called with the lock held
+        while len(self._workers) < self.num_workers:
+            name = 'event-delivery-%d' % len(self._workers)
+            worker = threading.Thread(target=self._run, name=name)
+            worker.setDaemon(True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._send(batch)
+            except Exception:
+                # keep the worker running
+                _LOG.exception('Error delivering event notifications')
+            finally:
+                self._condition.acquire()
+                try:
+                    self._busy -= 1
+                    self._condition.notifyAll()
+                finally:
+                    self._condition.release()
+
+    def _next_batch(self):
+        """
+        Wait for the next delivery to be due and remove it from the queue,
+        along with the due deliveries it can be sent with.
+        """
+        self._condition.acquire()
+        try:
+            while True:
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                now = time.time()
+                due = self._queue[0][0]
+                if due > now:
+                    self._condition.wait(due - now)
+                    continue
+                delivery = heapq.heappop(self._queue)[2]
+                batch = [delivery]
+                if delivery.batch_size > 1:
+                    entries = [e for e in self._queue if e[0] <= now and delivery.batches_with(e[2])]
+                    entries.sort()
+                    entries = entries[:delivery.batch_size - 1]
+                    if entries:
+                        self._queue = [e for e in self._queue if e not in entries]
+                        heapq.heapify(self._queue)
+                        batch.extend(e[2] for e in entries)
+                self._busy += 1
+                return batch
+        finally:
+            self._condition.release()
+
+    def _send(self, batch):
+        for delivery in batch:
+            delivery.attempts += 1
+        try:
+            undelivered = batch[0].send([d.item for d in batch]) or []
+        except DeliveryRejected, e:
+            _LOG.warn('Event notification rejected by %s notifier: %s' % (batch[0].type_id, e))
+            self._record([], [], batch)
+            return
+        except DeliveryFailed, e:
+            _LOG.warn('Event notification failed for %s notifier: %s' % (batch[0].type_id, e))
+            undelivered = [d.item for d in batch]
+        except Exception, e:
+            _LOG.exception('Event notification failed for %s notifier' % batch[0].type_id)
+            undelivered = [d.item for d in batch]
+
+        # items are told apart by identity as equal notifications may be batched
+        undelivered = set(id(i) for i in undelivered)
+        delivered = []
+        retried = []
+        failed = []
+        for delivery in batch:
+            if id(delivery.item) not in undelivered:
+                delivered.append(delivery)
+            elif delivery.attempts < self.max_attempts:
+                retried.append(delivery)
+            else:
+                failed.append(delivery)
+        for delivery in retried:
+            self.put(delivery, self.retry_delay * 2 ** (delivery.attempts - 1))
+        for delivery in failed:
+            _LOG.error('Giving up on %s notification after %d attempts' %
+                       (delivery.type_id, delivery.attempts))
+        self._record(delivered, retried, failed)
+
+    def _record(self, delivered, retried, failed):
+        now = time.time()
+        self._condition.acquire()
+        try:
+            for key, deliveries in (('delivered', delivered), ('retried', retried), ('failed', failed)):
+                for delivery in deliveries:
+                    stats = self._statistics.setdefault(delivery.type_id, {
+                        'delivered': 0, 'retried': 0, 'failed': 0, 'latency_last': 0.0,
+                        'latency_total': 0.0, 'latency_max': 0.0})
+                    stats[key] += 1
+                    if key == 'delivered':
+                        latency = now - delivery.queued
+                        stats['latency_last'] = latency
+                        stats['latency_total'] += latency
+                        stats['latency_max'] = max(stats['latency_max'], latency)
+        finally:
+            self._condition.release()
+
+
+class ConnectionPool(object):
+    """
+    Idle connections kept open for reuse, by endpoint.
+    """
+
+    def __init__(self, connect, close, keep_alive=KEEP_ALIVE_TIMEOUT):
+        """
+        @param connect: function called with an endpoint to open a connection to it
+        @type  connect: callable
+        @param close: function called with a connection to close it
+        @type  close: callable
+        @param keep_alive: seconds an idle connection is kept open
+        @type  keep_alive: int
+        """
+        self._connect = connect
+        self._close = close
+        self.keep_alive = keep_alive
+        self._lock = threading.Lock()
+        # endpoint: list of (time released, connection)
+        self._idle = {}
+
+    def get(self, endpoint):
+        """
+        @return: tuple of an open connection to the endpoint and whether it
+                 was reused; a reused connection may have been closed by the
+                 remote end since it was last used
+        @rtype:  tuple
+        """
+        expired = []
+        connection = None
+        self._lock.acquire()
+        try:
+            idle = self._idle.get(endpoint, [])
+            while idle:
+                released, c = idle.pop()
+                if time.time() - released < self.keep_alive:
+                    connection = c
+                    break
+                expired.append(c)
+        finally:
+            self._lock.release()
+        for c in expired:
+            self.discard(c)
+        if connection is not None:
+            return connection, True
+        return self._connect(endpoint), False
+
+    def release(self, endpoint, connection):
+        """
+        Return a connection to the pool once done using it.
+        """
+        self._lock.acquire()
+        try:
+            self._idle.setdefault(endpoint, []).append((time.time(), connection))
+        finally:
+            self._lock.release()
+
+    def discard(self, connection):
+        """
+        Close a connection instead of returning it to the pool.
+        """
+        try:
+            self._close(connection)
+        except Exception:
+            _LOG.debug('Error closing notifier connection', exc_info=True)
+
+    def clear(self):
+        """
+        Close all of the idle connections.
+        """
+        self._lock.acquire()
+        try:
+            idle = self._idle
+            self._idle = {}
+        finally:
+            self._lock.release()
+        for connections in idle.values():
+            for released, connection in connections:
+                self.discard(connection)
+
+# -- public -------------------------------------------------------------------
+
+_QUEUE = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_queue():
+    """
+    @return: queue of the notifications being delivered, configured from the
+             [notifications] section of the server configuration
+    @rtype:  L{DeliveryQueue}
+    """
+    global _QUEUE
+    _QUEUE_LOCK.acquire()
+    try:
+        if _QUEUE is None:
+            _QUEUE = DeliveryQueue(config.getint('notifications', 'delivery_workers'),
+                                   config.getint('notifications', 'max_attempts'),
+                                   config.getint('notifications', 'retry_delay'))
+        return _QUEUE
+    finally:
+        _QUEUE_LOCK.release()
+
+
+def enqueue(delivery):
+    """
+    Queue a notification to be sent by the delivery workers.
+    @type delivery: L{Delivery}
+    """
+    get_queue().put(delivery)
+
+
+def statistics():
+    """
+    @return: delivery statistics; see L{DeliveryQueue.statistics}
+    @rtype:  dict
+    """
+    return get_queue().statistics()
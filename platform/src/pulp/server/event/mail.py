@@ -13,7 +13,7 @@
 
 import logging
 import smtplib
-import threading
+import socket
 
 try:
     from email.mime.text import MIMEText
@@ -23,14 +23,17 @@ except ImportError:
 
 from pulp.server.compat import json
 from pulp.server.config import config
+from pulp.server.event import delivery
 
 TYPE_ID = 'email'
 logger = logging.getLogger(__name__)
 
 def handle_event(notifier_config, event):
     """
-    If email is enabled in the server settings, sends an email to each recipient
-    listed in the notifier_config.
+    If email is enabled in the server settings, queues an email to each
+    recipient listed in the notifier_config. The emails are sent by the
+    delivery workers, over one connection to the SMTP server for the emails
+    waiting to be sent.
 
     :param notifier_config: dictionary with keys 'subject', which defines the
                             subject of each email message, and 'addresses',
@@ -48,40 +51,54 @@ def handle_event(notifier_config, event):
     addresses = notifier_config['addresses']
 
     for address in addresses:
-        thread = threading.Thread(target=_send_email, args=(subject, body, address))
-        thread.daemon = True
-        thread.start()
+        d = delivery.Delivery(TYPE_ID, (subject, body, address), _send_emails,
+                              batch_key=TYPE_ID, batch_size=len(addresses))
+        delivery.enqueue(d)
 
-def _send_email(subject, body, to_address):
+def _send_emails(messages):
     """
-    Send a text email to one recipient
+    Send text emails over a single connection to the SMTP server; used as the
+    send function of the notifier's deliveries. Emails refused by the server
+    are logged and not retried.
 
-    :param subject: email subject
-    :type  subject: basestring
-    :param body:    text body of the email
-    :type  body:    basestring
-    :param to_address:  email address to send to
-    :type  to_address:  basestring
-
-    :return: None
+    :param messages: list of (subject, body, to_address) tuples, one for each
+                     email to send
+    :type  messages: list
+    :return: messages that could not be sent because the connection failed
+    :rtype:  list
     """
     host = config.get('email', 'host')
     port = config.getint('email', 'port')
     from_address = config.get('email', 'from')
-
-    message = MIMEText(body)
-    message['Subject'] = subject
-    message['From'] = from_address
-    message['To'] = to_address
+    endpoint = (host, port)
 
     try:
-        connection = smtplib.SMTP(host=host, port=port)
-    except smtplib.SMTPConnectError:
+        connection, reused = _CONNECTIONS.get(endpoint)
+    except (smtplib.SMTPException, socket.error):
         logger.error('SMTP connection failed to %s on %s' % (host, port))
-        return
+        return messages
 
-    try:
-        connection.sendmail(from_address, to_address, message.as_string())
-    except smtplib.SMTPException, e:
-        logger.error('Error sending mail: %s' % e.message)
-    connection.quit()
+    for index, (subject, body, to_address) in enumerate(messages):
+        message = MIMEText(body)
+        message['Subject'] = subject
+        message['From'] = from_address
+        message['To'] = to_address
+
+        try:
+            connection.sendmail(from_address, to_address, message.as_string())
+        except (smtplib.SMTPServerDisconnected, socket.error):
+            _CONNECTIONS.discard(connection)
+            # the server may have closed the connection while it was idle
+            if reused and index == 0:
+                return _send_emails(messages)
+            logger.error('SMTP connection lost to %s on %s' % (host, port))
+            return messages[index:]
+        except smtplib.SMTPException, e:
+            logger.error('Error sending mail: %s' % e.message)
+
+    _CONNECTIONS.release(endpoint, connection)
+    return []
+
+# connections to the SMTP server, kept open by (host, port)
+_CONNECTIONS = delivery.ConnectionPool(lambda endpoint: smtplib.SMTP(host=endpoint[0], port=endpoint[1]),
+                                       lambda connection: connection.quit())
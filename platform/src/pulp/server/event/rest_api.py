@@ -19,27 +19,42 @@ url
   Full URL to contact with the event data. A POST request will be made to this
   URL with the contents of the events in the body.
 
-Eventually this should be enhanced to support authentication credentials as well.
+username, password
+  Optional credentials sent to the URL using HTTP basic authentication.
+
+batch_size
+  Optional maximum number of events sent in a single request. When greater
+  than 1, the body of each request is a list of the events waiting to be sent
+  to the URL instead of a single event.
+
+Requests are made in the background by the event delivery workers (see
+pulp.server.event.delivery) over connections kept open between requests, and
+are retried if the server cannot be reached or responds with a server error.
 """
 
 import base64
 import httplib
 import logging
-import threading
+import socket
 
 from pulp.server.compat import json
+from pulp.server.event import delivery
 
 # -- constants ----------------------------------------------------------------
 
 TYPE_ID = 'rest-api'
 
+# seconds to wait for the server to accept a connection or respond, so that a
+# hung server does not hold up a delivery worker
+CONNECTION_TIMEOUT = 30
+
 LOG = logging.getLogger(__name__)
 
 # -- framework hook -----------------------------------------------------------
 
 def handle_event(notifier_config, event):
-    # fire the actual http push function off in a separate thread to keep
-    # pulp from blocking or deadlocking due to the tasking subsystem
+    # the request is made by the delivery workers to keep pulp from blocking
+    # or deadlocking due to the tasking subsystem
 
     data = {
         'event_type' : event.event_type,
@@ -48,24 +63,26 @@ def handle_event(notifier_config, event):
 
     LOG.info(data)
 
-    body = json.dumps(data)
+    # Parse the URL for the pieces we need
+    if _parse_url(notifier_config) is None:
+        return
 
-    thread = threading.Thread(target=_send_post, args=[notifier_config, body])
-    thread.setDaemon(True)
-    thread.start()
+    # events for the same listener configuration are batched together
+    batch_key = json.dumps(notifier_config, sort_keys=True)
+    d = delivery.Delivery(TYPE_ID, (notifier_config, data), _send_events,
+                          batch_key=batch_key, batch_size=_batch_size(notifier_config))
+    delivery.enqueue(d)
 
 # -- private ------------------------------------------------------------------
 
-def _send_post(notifier_config, body):
-
-    # Basic headers
-    headers = {'Accept': 'application/json',
-               'Content-Type': 'application/json'}
-
-    # Parse the URL for the pieces we need
+def _parse_url(notifier_config):
+    """
+    @return: tuple of the scheme, server and path of the configured URL; None
+             if it is missing or cannot be parsed
+    """
     if 'url' not in notifier_config or not notifier_config['url']:
         LOG.warn('REST API notifier configured without a URL; cannot fire event')
-        return
+        return None
 
     url = notifier_config['url']
 
@@ -73,9 +90,44 @@ def _send_post(notifier_config, body):
         scheme, empty, server, path = url.split('/', 3)
     except ValueError:
         LOG.warn('Improperly configured post_sync_url: %(u)s' % {'u': url})
-        return
+        return None
 
-    connection = _create_connection(scheme, server)
+    return scheme, server, path
+
+
+def _batch_size(notifier_config):
+    try:
+        return max(1, int(notifier_config.get('batch_size', 1)))
+    except (TypeError, ValueError):
+        LOG.warn('Improperly configured REST API notifier batch_size: %(b)s' %
+                 {'b': notifier_config['batch_size']})
+        return 1
+
+
+def _send_events(items):
+    """
+    Send function of the notifier's deliveries. The items are batched by
+    listener configuration, so they all share the same configuration.
+    @param items: list of (notifier config, event data) tuples
+    @type  items: list
+    """
+    notifier_config = items[0][0]
+    _send_post(notifier_config, [data for config, data in items])
+
+
+def _send_post(notifier_config, events):
+    """
+    Post the events to the configured URL.
+    @param events: event data to send; a single request is made for all of them
+    @type  events: list of dict
+    @raise delivery.DeliveryFailed: if the server responded with a server error
+    @raise delivery.DeliveryRejected: if the server responded with a client error
+    """
+    scheme, server, path = _parse_url(notifier_config)
+
+    # Basic headers
+    headers = {'Accept': 'application/json',
+               'Content-Type': 'application/json'}
 
     # Process authentication
     if 'username' in notifier_config and 'password' in notifier_config:
@@ -83,16 +135,57 @@ def _send_post(notifier_config, body):
         encoded = base64.encodestring(raw)[:-1]
         headers['Authorization'] = 'Basic ' + encoded
 
-    connection.request('POST', '/' + path, body=body, headers=headers)
-    response = connection.getresponse()
-    if response.status != httplib.OK:
-        error_msg = response.read()
-        LOG.warn('Error response from REST API notifier: %(e)s' % {'e': error_msg})
-    connection.close()
+    if _batch_size(notifier_config) > 1:
+        body = json.dumps(events)
+    else:
+        body = json.dumps(events[0])
+
+    endpoint = (scheme, server)
+    while True:
+        connection, reused = _CONNECTIONS.get(endpoint)
+        try:
+            connection.request('POST', '/' + path, body=body, headers=headers)
+        except (httplib.HTTPException, socket.error):
+            _CONNECTIONS.discard(connection)
+            # the server may have closed the connection while it was idle; the
+            # request was not sent so it is safe to send it again
+            if reused:
+                continue
+            raise
+        try:
+            response = connection.getresponse()
+            # the response has to be read before the connection is reused
+            content = response.read()
+        except (httplib.HTTPException, socket.error), e:
+            _CONNECTIONS.discard(connection)
+            # the server closed the idle connection without responding; any
+            # other error means the events may have been received already
+            if reused and isinstance(e, httplib.BadStatusLine):
+                continue
+            raise
+        break
+
+    if response.will_close:
+        _CONNECTIONS.discard(connection)
+    else:
+        _CONNECTIONS.release(endpoint, connection)
+
+    if response.status >= httplib.INTERNAL_SERVER_ERROR:
+        raise delivery.DeliveryFailed('Error response from REST API notifier: %(s)s %(e)s' %
+                        {'s': response.status, 'e': content})
+    # any successful status, such as 201, 202 or 204, is a delivery
+    if not httplib.OK <= response.status < httplib.MULTIPLE_CHOICES:
+        raise delivery.DeliveryRejected('Error response from REST API notifier: %(e)s' % {'e': content})
+
 
 def _create_connection(scheme, server):
     if scheme.startswith('https'):
-        connection = httplib.HTTPSConnection(server)
+        connection = httplib.HTTPSConnection(server, timeout=CONNECTION_TIMEOUT)
     else:
-        connection = httplib.HTTPConnection(server)
+        connection = httplib.HTTPConnection(server, timeout=CONNECTION_TIMEOUT)
     return connection
+
+
+# connections kept open by (scheme, server)
+_CONNECTIONS = delivery.ConnectionPool(lambda endpoint: _create_connection(*endpoint),
+                                       lambda connection: connection.close())
@@ -17,7 +17,10 @@ Password Manager
 Functions taken from stackoverflow.com : http://tinyurl.com/2f6gx7s
 """
 
+import os
 import random
+import threading
+import time
 from hmac import HMAC
 
 from pulp.server.compat import digestmod
@@ -26,6 +29,20 @@ from pulp.server.compat import digestmod
 
 NUM_ITERATIONS = 5000
 
+# successful password checks are remembered for this many seconds so that
+# clients using basic auth on every call do not pay for the key derivation on
+# every request; 0 disables the cache
+VERIFIED_CACHE_TTL = 300
+VERIFIED_CACHE_MAX_ENTRIES = 1000
+
+# -- verified credentials cache -----------------------------------------------
+
+# per-process secret for the cache keys, so the plain text password is never
+# held in memory in a recoverable form
+_VERIFIED_CACHE_SECRET = os.urandom(32)
+_VERIFIED_CACHE_LOCK = threading.Lock()
+_VERIFIED_CACHE = {} # key -> (expiration time, login)
+
 # -- classes ------------------------------------------------------------------
 
 class PasswordManager(object):
@@ -48,12 +65,85 @@ class PasswordManager(object):
         # return the salt and hashed password, encoded in base64 and split with ","
         return salt.encode("base64").strip() + "," + hashed_password.encode("base64").strip()
 
-    def check_password(self, saved_password_entry, plain_password):
+    def check_password(self, saved_password_entry, plain_password, login=None):
+        """
+        Check a plain text password against a saved password entry. Successful
+        checks are cached for VERIFIED_CACHE_TTL seconds, keyed by a keyed hash
+        of the login, password and saved entry, so changing the password
+        (which changes the saved entry) never matches an old cache entry.
+        @param saved_password_entry: salt and hashed password, as returned by
+                                     hash_password
+        @type  saved_password_entry: str
+        @param plain_password: password to check
+        @type  plain_password: str
+        @param login: login of the user the password belongs to, used to
+                      invalidate the cached checks for the user
+        @type  login: str or None
+        @return: True if the password matches; False otherwise
+        @rtype:  bool
+        """
+        key = self._verified_cache_key(login, plain_password, saved_password_entry)
+        if self._is_verified(key):
+            return True
         salt, hashed_password = saved_password_entry.split(",")
         salt = salt.decode("base64")
         hashed_password = hashed_password.decode("base64")
         pbkdbf = self.pbkdf_sha256(plain_password, salt, NUM_ITERATIONS)
-        return hashed_password == pbkdbf
-    
+        if hashed_password != pbkdbf:
+            return False
+        self._add_verified(key, login)
+        return True
+
+    def invalidate_verified(self, login):
+        """
+        Forget all cached successful password checks for the given user.
+        @param login: login of the user
+        @type  login: str
+        """
+        _VERIFIED_CACHE_LOCK.acquire()
+        try:
+            for key, (expiration, cached_login) in _VERIFIED_CACHE.items():
+                if cached_login == login:
+                    del _VERIFIED_CACHE[key]
+        finally:
+            _VERIFIED_CACHE_LOCK.release()
+
+    def _verified_cache_key(self, login, plain_password, saved_password_entry):
+        parts = []
+        for part in (login or '', plain_password, saved_password_entry):
+            if isinstance(part, unicode):
+                part = part.encode('utf-8')
+            parts.append(part)
+        message = '\0'.join(parts)
+        return HMAC(_VERIFIED_CACHE_SECRET, message, digestmod).digest()
 
+    def _is_verified(self, key):
+        if VERIFIED_CACHE_TTL <= 0:
+            return False
+        _VERIFIED_CACHE_LOCK.acquire()
+        try:
+            entry = _VERIFIED_CACHE.get(key)
+            if entry is None:
+                return False
+            if entry[0] < time.time():
+                del _VERIFIED_CACHE[key]
+                return False
+            return True
+        finally:
+            _VERIFIED_CACHE_LOCK.release()
 
+    def _add_verified(self, key, login):
+        if VERIFIED_CACHE_TTL <= 0:
+            return
+        _VERIFIED_CACHE_LOCK.acquire()
+        try:
+            if len(_VERIFIED_CACHE) >= VERIFIED_CACHE_MAX_ENTRIES:
+                now = time.time()
+                for k, (expiration, cached_login) in _VERIFIED_CACHE.items():
+                    if expiration < now:
+                        del _VERIFIED_CACHE[k]
+                if len(_VERIFIED_CACHE) >= VERIFIED_CACHE_MAX_ENTRIES:
+                    _VERIFIED_CACHE.clear()
+            _VERIFIED_CACHE[key] = (time.time() + VERIFIED_CACHE_TTL, login)
+        finally:
+            _VERIFIED_CACHE_LOCK.release()
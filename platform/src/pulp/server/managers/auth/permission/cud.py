@@ -19,6 +19,7 @@ from gettext import gettext as _
 
 import logging
 
+from pulp.server.auth import permission_cache
 from pulp.server.db.model.auth import Permission, User
 from pulp.server.auth.authorization import _get_operations
 from pulp.server.exceptions import DuplicateResource, InvalidValue, MissingResource, PulpDataException, PulpExecutionException
@@ -60,6 +61,7 @@ class PermissionManager(object):
         # Creation
         create_me = Permission(resource=resource_uri)
         Permission.get_collection().save(create_me, safe=True)
+        permission_cache.resource_changed(resource_uri)
 
         # Retrieve the permission to return the SON object
         created = Permission.get_collection().find_one({'resource' : resource_uri})
@@ -97,6 +99,7 @@ class PermissionManager(object):
             raise PulpDataException(_("Update Keyword [%s] is not supported" % key))
                                             
         Permission.get_collection().save(found, safe=True)
+        permission_cache.resource_changed(resource_uri)
 
 
     def delete_permission(self, resource_uri):
@@ -121,6 +124,7 @@ class PermissionManager(object):
         # To do: Remove respective roles from users
       
         Permission.get_collection().remove({'resource' : resource_uri}, safe=True)
+        permission_cache.resource_changed(resource_uri)
 
 
     def grant(self, resource, login, operations):
@@ -152,6 +156,7 @@ class PermissionManager(object):
             current_ops.append(o)
 
         Permission.get_collection().save(permission, safe=True)
+        permission_cache.resource_changed(resource)
 
     def revoke(self, resource, login, operations):
         """
@@ -193,6 +198,7 @@ class PermissionManager(object):
             return
 
         Permission.get_collection().save(permission, safe=True)
+        permission_cache.resource_changed(resource)
 
 
     def grant_automatic_permissions_for_resource(self, resource):
@@ -268,6 +274,7 @@ class PermissionManager(object):
                 continue
             del permission['users'][login]
             Permission.get_collection().save(permission, safe=True)
+            permission_cache.resource_changed(permission['resource'])
             
         return True
 
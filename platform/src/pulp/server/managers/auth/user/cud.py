@@ -22,6 +22,7 @@ import logging
 import re
 
 from pulp.server import config
+from pulp.server.auth import permission_cache
 from pulp.server.db.model.auth import User
 from pulp.server.exceptions import PulpDataException, DuplicateResource, InvalidValue, MissingResource
 from pulp.server.managers import factory
@@ -87,6 +88,7 @@ class UserManager(object):
         # Creation
         create_me = User(login=login, password=hashed_password, name=name, roles=roles)
         User.get_collection().save(create_me, safe=True)
+        permission_cache.user_changed(login)
         
         # Grant permissions
         permission_manager = factory.permission_manager()
@@ -156,6 +158,11 @@ class UserManager(object):
 
         User.get_collection().save(user, safe=True)
 
+        if 'roles' in delta:
+            permission_cache.user_changed(login)
+        if 'password' in delta:
+            factory.password_manager().invalidate_verified(login)
+
         # Retrieve the user to return the SON object
         updated = User.get_collection().find_one({'login' : login})
         updated.pop('password')
@@ -192,6 +199,8 @@ class UserManager(object):
         permission_manager.revoke_all_permissions_from_user(login)
         
         User.get_collection().remove({'login' : login}, safe=True)
+        permission_cache.user_changed(login)
+        factory.password_manager().invalidate_verified(login)
 
 
     def ensure_admin(self):
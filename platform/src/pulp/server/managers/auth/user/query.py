@@ -17,7 +17,8 @@ Contains users query classes
 
 from gettext import gettext as _
 
-from pulp.server.db.model.auth import User, Permission, Role
+from pulp.server.auth import permission_cache
+from pulp.server.db.model.auth import User, Role
 from pulp.server.managers import factory
 from logging import getLogger
 
@@ -111,12 +112,10 @@ class UserQueryManager(object):
         @rtype: bool
         @return: True if the user is a super user, False otherwise
         """
-        user = User.get_collection().find_one({'login' : login})
-        if user is None:
+        superuser = permission_cache.is_superuser(login)
+        if superuser is None:
             raise MissingResource(login)
-        
-        role_manager = factory.role_manager()
-        return role_manager.super_user_role in user['roles']
+        return superuser
 
 
     def is_authorized(self, resource, login, operation):
@@ -139,20 +138,7 @@ class UserQueryManager(object):
         if self.is_superuser(login):
             return True
 
-        permission_query_manager = factory.permission_query_manager()
-
-        parts = [p for p in resource.split('/') if p]
-        while parts:
-            current_resource = '/%s/' % '/'.join(parts)
-            permission = permission_query_manager.find_by_resource(current_resource)
-            if permission is not None:
-                if operation in permission['users'].get(login, []):
-                    return True
-            parts = parts[:-1]
-        
-        permission = Permission.get_collection().find_one({'resource' : '/'})
-        return (permission is not None and
-                operation in permission['users'].get(login, []))
+        return operation in permission_cache.operations(resource, login)
         
         
     def is_last_super_user(self, login):
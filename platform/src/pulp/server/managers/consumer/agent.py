@@ -24,7 +24,9 @@ from pulp.plugins.loader import exceptions as plugin_exceptions
 from pulp.plugins.profiler import Profiler, InvalidUnitsRequested
 from pulp.plugins.conduits.profiler import ProfilerConduit
 from pulp.plugins.model import Consumer as ProfiledConsumer
-from pulp.server.exceptions import PulpExecutionException, PulpDataException
+from pulp.server.compat import json
+from pulp.server.db.model.consumer import Consumer
+from pulp.server.exceptions import MissingResource, PulpExecutionException, PulpDataException
 from pulp.server.agent import PulpAgent
 from logging import getLogger
 
@@ -85,14 +87,8 @@ class AgentManager(object):
         """
         manager = managers.consumer_manager()
         consumer = manager.get_consumer(id)
-        conduit = ProfilerConduit()
-        collated = Units(units)
-        for typeid, units in collated.items():
-            pc = self.__profiled_consumer(id)
-            profiler, cfg = self.__profiler(typeid)
-            units = self.__invoke_plugin(profiler.install_units, pc, units, options, cfg, conduit)
-            collated[typeid] = units
-        units = collated.join()
+        pc = self.__profiled_consumer(id)
+        units = self.__translate(ProfilerConduit(), pc, 'install', units, options)
         agent = PulpAgent(consumer)
         agent.content.install(units, options)
 
@@ -109,14 +105,8 @@ class AgentManager(object):
         """
         manager = managers.consumer_manager()
         consumer = manager.get_consumer(id)
-        conduit = ProfilerConduit()
-        collated = Units(units)
-        for typeid, units in collated.items():
-            pc = self.__profiled_consumer(id)
-            profiler, cfg = self.__profiler(typeid)
-            units = self.__invoke_plugin(profiler.update_units, pc, units, options, cfg, conduit)
-            collated[typeid] = units
-        units = collated.join()
+        pc = self.__profiled_consumer(id)
+        units = self.__translate(ProfilerConduit(), pc, 'update', units, options)
         agent = PulpAgent(consumer)
         agent.content.update(units, options)
 
@@ -133,17 +123,83 @@ class AgentManager(object):
         """
         manager = managers.consumer_manager()
         consumer = manager.get_consumer(id)
-        conduit = ProfilerConduit()
-        collated = Units(units)
-        for typeid, units in collated.items():
-            pc = self.__profiled_consumer(id)
-            profiler, cfg = self.__profiler(typeid)
-            units = self.__invoke_plugin(profiler.uninstall_units, pc, units, options, cfg, conduit)
-            collated[typeid] = units
-        units = collated.join()
+        pc = self.__profiled_consumer(id)
+        units = self.__translate(ProfilerConduit(), pc, 'uninstall', units, options)
         agent = PulpAgent(consumer)
         agent.content.uninstall(units, options)
 
+    def translate_units(self, action, ids, units, options):
+        """
+        Translate the content units to be installed, updated or uninstalled
+        on many consumers, as done by install_content, update_content and
+        uninstall_content for a single consumer. The profiles and bindings
+        of all of the consumers are read at once and the profilers are
+        called once for each distinct combination of profiles (of the
+        requested content types) and bound repositories, as their
+        translation only depends on those.
+        @param action: One of: install, update, uninstall.
+        @type action: str
+        @param ids: A list of consumer IDs.
+        @type ids: list
+        @param units: A list of content units.
+        @type units: list of:
+            { type_id:<str>, unit_key:<dict> }
+        @param options: Options; based on unit type.
+        @type options: dict
+        @return: A tuple of:
+            {consumer_id:(consumer, translated units)} for the consumers
+            whose units could be translated and {consumer_id:exception} for
+            the others.
+        @rtype: tuple
+        """
+        translated = {}
+        failed = {}
+        collection = Consumer.get_collection()
+        consumers = dict((c['id'], c) for c in collection.find({'id':{'$in':ids}}))
+        for id in ids:
+            if id not in consumers:
+                failed[id] = MissingResource(consumer=id)
+        typeids = Units(units).keys()
+        manager = managers.consumer_profile_manager()
+        all_profiles = manager.find_profiles(consumers.keys())
+        manager = managers.consumer_bind_manager()
+        all_bindings = manager.find_by_consumer_list(consumers.keys())
+        conduit = ProfilerConduit()
+        translations = {}
+        for id, consumer in consumers.items():
+            profiles = dict((t, p) for t, p in all_profiles[id].items() if t in typeids)
+            repo_ids = sorted(set(b['repo_id'] for b in all_bindings[id]))
+            key = json.dumps([profiles, repo_ids], sort_keys=True, default=str)
+            if key not in translations:
+                pc = ProfiledConsumer(id, profiles)
+                try:
+                    translations[key] = (self.__translate(conduit, pc, action, units, options), None)
+                except Exception, e:
+                    translations[key] = (None, e)
+            result, error = translations[key]
+            if error is None:
+                translated[id] = (consumer, result)
+            else:
+                failed[id] = error
+        return translated, failed
+
+    def send_content(self, consumer, action, units, options):
+        """
+        Send the (translated) content units to be installed, updated or
+        uninstalled to the consumer's agent.
+        @param consumer: A consumer.
+        @type consumer: dict
+        @param action: One of: install, update, uninstall.
+        @type action: str
+        @param units: A list of content units.
+        @type units: list
+        @param options: Options; based on unit type.
+        @type options: dict
+        """
+        agent = PulpAgent(consumer)
+        method = getattr(agent.content, action)
+        method(units, options)
+
     def send_profile(self, id):
         """
         Send the content profile(s).
@@ -152,6 +208,26 @@ class AgentManager(object):
         """
         _LOG.info(id)
 
+    def __translate(self, conduit, pc, action, units, options):
+        """
+        Translate content units using the profiler for each content type.
+        @param conduit: A profiler conduit.
+        @type conduit: L{ProfilerConduit}
+        @param pc: A profiled consumer.
+        @type pc: L{ProfiledConsumer}
+        @param action: One of: install, update, uninstall.
+        @type action: str
+        @return: The translated units.
+        @rtype: list
+        """
+        collated = Units(units)
+        for typeid, units in collated.items():
+            profiler, cfg = self.__profiler(typeid)
+            method = getattr(profiler, '%s_units' % action)
+            units = self.__invoke_plugin(method, pc, units, options, cfg, conduit)
+            collated[typeid] = units
+        return collated.join()
+
     def __invoke_plugin(self, call, *args, **kwargs):
         try:
             return call(*args, **kwargs)
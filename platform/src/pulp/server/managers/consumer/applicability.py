@@ -34,6 +34,11 @@ class ApplicabilityManager(object):
         """
         Detemine and report which of the specified content units
         is applicable to consumers specified by the I{criteria}.
+        The profiles of all selected consumers are loaded once and the
+        units are passed to each type's profiler as a single batch.
+        Applicability only depends on the consumer's profiles and bound
+        repositories, so consumers sharing the same profile hashes and
+        bindings are evaluated once.
         @param criteria: The consumer selection criteria.
         @type criteria: list
         @param units: A list of content units to be installed.
@@ -43,22 +48,60 @@ class ApplicabilityManager(object):
             {consumer_id:[<ApplicabilityReport>]}
         @rtype: list
         """
-        result = {}
+        if not units:
+            return {}
         conduit = ProfilerConduit()
         manager = managers.consumer_query_manager()
         ids = [c['id'] for c in manager.find_by_criteria(criteria)]
+        evaluated = self.__evaluated(ids)
+        unique_ids = [id for id in ids if evaluated[id] == id]
         manager = managers.consumer_profile_manager()
-        profiles = manager.find_profiles(ids)
+        profiles = manager.find_profiles(unique_ids)
+        consumers = [ProfiledConsumer(id, profiles[id]) for id in unique_ids]
+        # group the units by type, remembering their position in the request
+        typeids = []
+        typed_units = {}
+        for index, unit in enumerate(units):
+            typeid = unit['type_id']
+            if typeid not in typed_units:
+                typeids.append(typeid)
+            typed_units.setdefault(typeid, []).append((index, unit))
+        reports = dict([(id, [None] * len(units)) for id in ids])
+        for typeid in typeids:
+            profiler, cfg = self.__profiler(typeid)
+            indexed_units = typed_units[typeid]
+            applicability = profiler.units_applicable(
+                consumers, [u for i, u in indexed_units], cfg, conduit)
+            for id in ids:
+                reported = applicability[evaluated[id]]
+                for (index, unit), report in zip(indexed_units, reported):
+                    report.unit = unit
+                    reports[id][index] = report
+        return reports
+
+    def __evaluated(self, ids):
+        """
+        Find the consumer whose applicability is evaluated for each
+        consumer: the first one with the same profile hashes and bindings.
+        Consumers with a profile stored without a hash are evaluated on
+        their own.
+        @param ids: A list of consumer IDs.
+        @type ids: list
+        @return: A dict of: {consumer_id:<evaluated consumer_id>}
+        @rtype: dict
+        """
+        evaluated = {}
+        first = {}
+        hashes = managers.consumer_profile_manager().find_profile_hashes(ids)
+        bindings = managers.consumer_bind_manager().find_by_consumer_list(ids)
         for id in ids:
-            for unit in units:
-                typeid = unit['type_id']
-                profiler, cfg = self.__profiler(typeid)
-                pc = self.__profiled_consumer(id)
-                report = profiler.unit_applicable(pc, unit, cfg, conduit)
-                report.unit = unit
-                ulist = result.setdefault(id, [])
-                ulist.append(report)
-        return result
+            if None in hashes[id].values():
+                evaluated[id] = id
+                continue
+            repo_ids = sorted(set(b['repo_id'] for b in bindings[id]))
+            key = (tuple(sorted(hashes[id].items())), tuple(repo_ids))
+            evaluated[id] = first.setdefault(key, id)
+        return evaluated
 
     def __profiler(self, typeid):
         """
@@ -75,19 +118,3 @@ class ApplicabilityManager(object):
             plugin = Profiler()
             cfg = {}
         return PluginWrapper(plugin), cfg
-
-    def __profiled_consumer(self, id):
-        """
-        Get a profiler consumer model object.
-        @param id: A consumer ID.
-        @type id: str
-        @return: A populated profiler consumer model object.
-        @rtype: L{ProfiledConsumer}
-        """
-        profiles = {}
-        manager = managers.consumer_profile_manager()
-        for p in manager.get_profiles(id):
-            typeid = p['content_type']
-            profile = p['profile']
-            profiles[typeid] = profile
-        return ProfiledConsumer(id, profiles)
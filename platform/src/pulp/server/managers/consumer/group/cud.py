@@ -21,6 +21,7 @@ from pymongo.errors import DuplicateKeyError
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.db.model.consumer import Consumer, ConsumerGroup
 from pulp.server.managers import factory as manager_factory
+from pulp.server.managers.consumer.group import fanout
 
 
 _LOG = logging.getLogger(__name__)
@@ -217,29 +218,55 @@ class ConsumerGroupManager(object):
     # content ------------------------------------------------------------
 
     def install_content(self, consumer_group_id, units, options):
-        group_collection = validate_existing_consumer_group(consumer_group_id)
-        consumer_group = group_collection.find_one({'id': consumer_group_id})
-        agent_manager = manager_factory.consumer_agent_manager()
+        """
+        Install content units on the consumers of a group.
+        @return: the aggregated report of the operation on each consumer
+        @rtype:  dict
+        @see: L{fanout.GroupOperationReport}
+        """
+        return self._content_action(consumer_group_id, 'install', units, options)
 
-        for consumer_id in consumer_group['consumer_ids']:
-            agent_manager.install_content(consumer_id, units, options)
+    def update_content(self, consumer_group_id, units, options):
+        """
+        Update content units on the consumers of a group.
+        @return: the aggregated report of the operation on each consumer
+        @rtype:  dict
+        @see: L{fanout.GroupOperationReport}
+        """
+        return self._content_action(consumer_group_id, 'update', units, options)
 
+    def uninstall_content(self, consumer_group_id, units, options):
+        """
+        Uninstall content units from the consumers of a group.
+        @return: the aggregated report of the operation on each consumer
+        @rtype:  dict
+        @see: L{fanout.GroupOperationReport}
+        """
+        return self._content_action(consumer_group_id, 'uninstall', units, options)
 
-    def update_content(self, consumer_group_id, units, options):
+    def _content_action(self, consumer_group_id, action, units, options):
+        """
+        The units are translated for all of the consumers at once and the
+        requests are then sent to the consumers' agents concurrently. A
+        failure for one consumer does not prevent the others from being sent
+        their request.
+        """
         group_collection = validate_existing_consumer_group(consumer_group_id)
         consumer_group = group_collection.find_one({'id': consumer_group_id})
         agent_manager = manager_factory.consumer_agent_manager()
 
-        for consumer_id in consumer_group['consumer_ids']:
-            agent_manager.update_content(consumer_id, units, options)
+        consumer_ids = consumer_group['consumer_ids']
+        report = fanout.GroupOperationReport(consumer_ids)
+        translated, failed = agent_manager.translate_units(action, consumer_ids, units, options)
+        for consumer_id, error in failed.items():
+            report.failed(consumer_id, error)
 
-    def uninstall_content(self, consumer_group_id, units, options):
-        group_collection = validate_existing_consumer_group(consumer_group_id)
-        consumer_group = group_collection.find_one({'id': consumer_group_id})
-        agent_manager = manager_factory.consumer_agent_manager()
+        def send(consumer_id):
+            consumer, consumer_units = translated[consumer_id]
+            agent_manager.send_content(consumer, action, consumer_units, options)
 
-        for consumer_id in consumer_group['consumer_ids']:
-            agent_manager.uninstall_content(consumer_id, units, options)
+        fanout.fan_out(translated.keys(), send, report)
+        return report.report
 
     # bind ------------------------------------------------------------
 
@@ -248,24 +275,29 @@ class ConsumerGroupManager(object):
         consumer_group = group_collection.find_one({'id': consumer_group_id})
         bind_manager = manager_factory.consumer_bind_manager()
 
-        binds = []
-        for consumer_id in consumer_group['consumer_ids']:
-            bind = bind_manager.bind(consumer_id, repo_id, distributor_id)
-            binds.append(bind)
-
-        return binds
+        return self._bind_action(consumer_group['consumer_ids'], bind_manager.bind, repo_id, distributor_id)
 
     def unbind(self, consumer_group_id, repo_id, distributor_id):
         group_collection = validate_existing_consumer_group(consumer_group_id)
         consumer_group = group_collection.find_one({'id': consumer_group_id})
         bind_manager = manager_factory.consumer_bind_manager()
 
-        unbinds = []
-        for consumer_id in consumer_group['consumer_ids']:
-            unbind = bind_manager.unbind(consumer_id, repo_id, distributor_id)
-            unbinds.append(unbind)
+        return self._bind_action(consumer_group['consumer_ids'], bind_manager.unbind, repo_id, distributor_id)
 
-        return unbinds
+    def _bind_action(self, consumer_ids, method, repo_id, distributor_id):
+        """
+        Binds or unbinds the consumers concurrently. The first error raised
+        for any consumer is raised once all of them have been processed.
+        @return: the results of the bind manager for each consumer, in the
+                 order of the consumers in the group
+        @rtype:  list
+        """
+        report = fanout.GroupOperationReport(consumer_ids)
+        fanout.fan_out(consumer_ids, lambda c: method(c, repo_id, distributor_id), report)
+        for consumer_id in consumer_ids:
+            if consumer_id in report.errors:
+                raise report.errors[consumer_id]
+        return [report.results[c] for c in consumer_ids]
 
 
 # utility functions ------------------------------------------------------------
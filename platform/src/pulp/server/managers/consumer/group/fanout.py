@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the License
+# (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied, including the
+# implied warranties of MERCHANTABILITY, NON-INFRINGEMENT, or FITNESS FOR A
+# PARTICULAR PURPOSE.
+# You should have received a copy of GPLv2 along with this software; if not,
+# see http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt
+
+"""
+Runs an operation against every consumer of a group using a bounded pool of
+threads, and keeps a per-consumer report of the outcome that is published as
+the progress of the dispatch task running the operation.
+"""
+
+import logging
+import threading
+from Queue import Queue
+
+from pulp.server.auth import principal
+from pulp.server.dispatch import factory as dispatch_factory
+
+
+_LOG = logging.getLogger(__name__)
+
+# maximum number of consumers operated on at once
+GROUP_FAN_OUT_THREADS = 10
+
+CONSUMER_WAITING = 'waiting'
+CONSUMER_SUCCEEDED = 'succeeded'
+CONSUMER_FAILED = 'failed'
+
+
+class GroupOperationReport(object):
+    """
+    Aggregated status of an operation on the consumers of a group:
+    {total:<int>, succeeded:<int>, failed:<int>,
+     consumers:{consumer_id:{state:<str>, error:<str or None>}}}
+    The report is passed to the dispatch task's progress callback as it is
+    updated, so the status of each consumer can be polled while the
+    operation runs. Its keys are all present from the start and only their
+    values change, so it can be serialized while being updated.
+    """
+
+    def __init__(self, consumer_ids):
+        self._lock = threading.Lock()
+        # progress is only reported when running as a dispatch task
+        context = dispatch_factory.context()
+        self._report_progress = None
+        if context.task_id is not None:
+            self._report_progress = context.report_progress
+        self.results = {}
+        self.errors = {}
+        self.report = {
+            'total': len(consumer_ids),
+            'succeeded': 0,
+            'failed': 0,
+            'consumers': dict((c, {'state': CONSUMER_WAITING, 'error': None}) for c in consumer_ids),
+        }
+        self._progress()
+
+    def succeeded(self, consumer_id, result=None):
+        self._lock.acquire()
+        try:
+            self.results[consumer_id] = result
+            self.report['consumers'][consumer_id]['state'] = CONSUMER_SUCCEEDED
+            self.report['succeeded'] += 1
+            self._progress()
+        finally:
+            self._lock.release()
+
+    def failed(self, consumer_id, error):
+        self._lock.acquire()
+        try:
+            self.errors[consumer_id] = error
+            status = self.report['consumers'][consumer_id]
+            status['state'] = CONSUMER_FAILED
+            status['error'] = str(error)
+            self.report['failed'] += 1
+            self._progress()
+        finally:
+            self._lock.release()
+
+    def _progress(self):
+        if self._report_progress is not None:
+            self._report_progress(self.report)
+
+
+def fan_out(consumer_ids, call, report, num_threads=GROUP_FAN_OUT_THREADS):
+    """
+    Calls the function for each of the consumers, with at most num_threads
+    calls in flight at once, and records the outcome of each in the report.
+    Returns once all of the calls have completed. The calls are made as the
+    caller's principal, so that they are recorded as made by the same user.
+    @param consumer_ids: IDs of the consumers to call the function for
+    @type  consumer_ids: list
+    @param call: function called with a consumer ID; its return value is
+                 recorded as the consumer's result
+    @type  call: callable
+    @param report: report recording the outcome of each call
+    @type  report: L{GroupOperationReport}
+    @param num_threads: maximum number of concurrent calls
+    @type  num_threads: int
+    """
+    queue = Queue()
+    for consumer_id in consumer_ids:
+        queue.put(consumer_id)
+
+    # the principal is stored per thread
+    caller = principal.get_principal()
+
+    def work():
+        principal.set_principal(caller)
+        try:
+            while True:
+                consumer_id = queue.get()
+                if consumer_id is None:
+                    return
+                try:
+                    result = call(consumer_id)
+                except Exception, e:
+                    _LOG.exception('Group operation failed for consumer: %s' % consumer_id)
+                    report.failed(consumer_id, e)
+                else:
+                    report.succeeded(consumer_id, result)
+        finally:
+            principal.clear_principal()
+
+    threads = []
+    for i in range(min(num_threads, len(consumer_ids))):
+        queue.put(None)
+        thread = threading.Thread(target=work, name='consumer-group-fan-out-%d' % i)
+        thread.setDaemon(True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
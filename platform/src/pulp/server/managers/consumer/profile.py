@@ -15,8 +15,13 @@
 Contains profile management classes
 """
 
+import httplib
+from gettext import gettext as _
+
 from pymongo.errors import DuplicateKeyError
+from pulp.common import profiles as profile_utils
 from pulp.server.db.model.consumer import UnitProfile
+from pulp.server.exceptions import PulpDataException
 from pulp.server.managers import factory
 from logging import getLogger
 
@@ -24,6 +29,25 @@ from logging import getLogger
 _LOG = getLogger(__name__)
 
 
+class ProfileHashMismatch(PulpDataException):
+    """
+    Raised when an unchanged profile or a profile delta is reported against a
+    profile hash that does not match the stored profile. The reporter is
+    expected to send the full profile instead.
+    """
+    http_status_code = httplib.CONFLICT
+
+    def __init__(self, consumer_id, content_type):
+        PulpDataException.__init__(self, consumer_id, content_type)
+        self.consumer_id = consumer_id
+        self.content_type = content_type
+
+    def __str__(self):
+        msg = _('Profile hash does not match the %(t)s profile of consumer %(c)s') % \
+            {'t': self.content_type, 'c': self.consumer_id}
+        return msg.encode('utf-8')
+
+
 class ProfileManager(object):
     """
     Manage consumer installed content unit profiles.
@@ -55,15 +79,94 @@ class ProfileManager(object):
         """
         manager = factory.consumer_manager()
         manager.get_consumer(consumer_id)
+        profile_hash = profile_utils.profile_hash(profile)
         p = self.get_profile(consumer_id, content_type)
         if p is None:
-            p = UnitProfile(consumer_id, content_type, profile)
+            p = UnitProfile(consumer_id, content_type, profile, profile_hash)
+        elif p.get('profile_hash') == profile_hash:
+            # unchanged, nothing to write
+            return p
         else:
             p['profile'] = profile
+            p['profile_hash'] = profile_hash
         collection = UnitProfile.get_collection()
         collection.save(p, safe=True)
         return p
 
+    def verify(self, consumer_id, content_type, profile_hash):
+        """
+        Confirm that a reported profile is unchanged, by its hash,
+        without sending it again.
+        @param consumer_id: uniquely identifies the consumer.
+        @type consumer_id: str
+        @param content_type: The profile (content) type ID.
+        @type content_type: str
+        @param profile_hash: The hash of the consumer's current profile.
+        @type profile_hash: str
+        @return: The stored profile, without the profile content
+            which the consumer already has.
+        @rtype: dict
+        @raise ProfileHashMismatch: When the stored profile has another hash.
+        """
+        manager = factory.consumer_manager()
+        manager.get_consumer(consumer_id)
+        collection = UnitProfile.get_collection()
+        query = dict(consumer_id=consumer_id, content_type=content_type)
+        p = collection.find_one(query, fields={'profile':0})
+        if p is None or p.get('profile_hash') != profile_hash:
+            raise ProfileHashMismatch(consumer_id, content_type)
+        return p
+
+    def update_delta(self, consumer_id, content_type, base_hash, added, removed, profile_hash=None):
+        """
+        Update a unit profile with the entries added and removed since the
+        profile with the I{base_hash} was reported.
+        The update is only applied if the stored profile still has the
+        I{base_hash} when it is written, so concurrent reports cannot
+        interleave.
+        @param consumer_id: uniquely identifies the consumer.
+        @type consumer_id: str
+        @param content_type: The profile (content) type ID.
+        @type content_type: str
+        @param base_hash: The hash of the profile the delta applies to.
+        @type base_hash: str
+        @param added: The profile entries added.
+        @type added: list
+        @param removed: The profile entries removed.
+        @type removed: list
+        @param profile_hash: The (optional) hash of the consumer's current
+            profile, used to check the result of applying the delta.
+        @type profile_hash: str
+        @return: The updated profile, without the profile content
+            which the consumer already has.
+        @rtype: dict
+        @raise ProfileHashMismatch: When the stored profile does not have the
+            I{base_hash} or the result does not have the I{profile_hash}.
+        """
+        manager = factory.consumer_manager()
+        manager.get_consumer(consumer_id)
+        p = self.get_profile(consumer_id, content_type)
+        if p is None or p.get('profile_hash') != base_hash:
+            raise ProfileHashMismatch(consumer_id, content_type)
+        try:
+            profile = profile_utils.apply_delta(p['profile'], added, removed)
+        except ValueError:
+            raise ProfileHashMismatch(consumer_id, content_type)
+        updated_hash = profile_utils.profile_hash(profile)
+        if profile_hash is not None and updated_hash != profile_hash:
+            raise ProfileHashMismatch(consumer_id, content_type)
+        collection = UnitProfile.get_collection()
+        result = collection.update(
+            {'_id':p['_id'], 'profile_hash':base_hash},
+            {'$set':{'profile':profile, 'profile_hash':updated_hash}},
+            safe=True)
+        if not result['n']:
+            # replaced by another report since it was read
+            raise ProfileHashMismatch(consumer_id, content_type)
+        del p['profile']
+        p['profile_hash'] = updated_hash
+        return p
+
     def delete(self, consumer_id, content_type):
         """
         Delete a profile by consumer and content type.
@@ -127,10 +230,29 @@ class ProfileManager(object):
         """
         profiles = dict([(c, {}) for c in consumer_ids])
         collection = UnitProfile.get_collection()
-        for p in collection.find({'id':{'$in':profiles.keys()}}):
+        for p in collection.find({'consumer_id':{'$in':profiles.keys()}}):
             key = p['consumer_id']
             typeid = p['content_type']
             profile = p['profile']
             entry = profiles[key]
             entry[typeid] = profile
-        return profiles
\ No newline at end of file
+        return profiles
+
+    def find_profile_hashes(self, consumer_ids):
+        """
+        Get the hashes of all profiles associated with a list of consumers,
+        without reading the profiles.
+        @param consumer_ids: A list of consumer IDs.
+        @type consumer_ids: list
+        @return: A dict of:
+            {consumer_id:{content_type:<profile hash>}}
+        @rtype: dict
+        """
+        hashes = dict([(c, {}) for c in consumer_ids])
+        collection = UnitProfile.get_collection()
+        query = {'consumer_id':{'$in':hashes.keys()}}
+        fields = ['consumer_id', 'content_type', 'profile_hash']
+        for p in collection.find(query, fields=fields):
+            entry = hashes[p['consumer_id']]
+            entry[p['content_type']] = p.get('profile_hash')
+        return hashes
@@ -14,55 +14,106 @@
 import logging
 import os
 import re
+import threading
+from Queue import Queue
 from gettext import gettext as _
 
 from pulp.server import config as pulp_config
 from pulp.plugins.types import database as content_types_db
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.db.model.repository import RepoContentUnit
+from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.managers import factory as manager_factory
 
 
 _LOG = logging.getLogger(__name__)
 
+# Number of content units checked for associations, and removed, at a time;
+# bounds both the memory used and the size of the $in query documents
+ORPHAN_BATCH_SIZE = 1000
+
+# Number of threads used to delete the files of orphaned content units
+ORPHAN_FILE_DELETE_THREADS = 8
+
 
 class OrphanManager(object):
 
-    def list_all_orphans(self):
+    def generate_all_orphans(self, fields=None):
         """
-        List all content units that are not associated with a repository.
-        @return: list of content units
-        @rtype:  list
+        Generator of all content units that are not associated with a repository.
+        @param fields: optional list of unit fields to retrieve
+        @type  fields: list of str
+        @return: generator of content units
+        @rtype:  generator
         """
 
         # iterate through all types and get the orphaned units for each
-        orphaned_units = []
         content_query_manager = manager_factory.content_query_manager()
         content_types = content_query_manager.list_content_types()
         for content_type in content_types:
-            orphaned_units_of_type = self.list_orphans_by_type(content_type)
-            orphaned_units.extend(orphaned_units_of_type)
-        return orphaned_units
+            for orphan in self.generate_orphans_by_type(content_type, fields):
+                yield orphan
 
-    def list_orphans_by_type(self, content_type):
+    def generate_orphans_by_type(self, content_type, fields=None):
         """
-        List all content units of a given type that are not associated with a repository.
+        Generator of the content units of a given type that are not associated
+        with a repository. The units are read from the database in batches of
+        ORPHAN_BATCH_SIZE and each batch is checked for associations with a
+        single query, so memory use is bounded by the batch size rather than
+        the number of units or associations.
         @param content_type: content type of orphaned units
         @type  content_type: str
-        @return: list of content units of the given type
-        @rtype:  list
+        @param fields: optional list of unit fields to retrieve
+        @type  fields: list of str
+        @return: generator of content units of the given type
+        @rtype:  generator
         """
+        units_collection = content_types_db.type_units_collection(content_type)
+        cursor = units_collection.find({}, fields=fields)
+        cursor.batch_size(ORPHAN_BATCH_SIZE)
+
+        batch = []
+        for unit in cursor:
+            batch.append(unit)
+            if len(batch) >= ORPHAN_BATCH_SIZE:
+                for orphan in self._orphans_in_batch(content_type, batch):
+                    yield orphan
+                batch = []
+
+        for orphan in self._orphans_in_batch(content_type, batch):
+            yield orphan
 
-        # find units of this type that are associated with one or more repositories
+    def _orphans_in_batch(self, content_type, units):
+        """
+        @return: the units in the batch that are not associated with a repository
+        @rtype:  list
+        """
+        if not units:
+            return []
         associated_collection = RepoContentUnit.get_collection()
-        associated_units = associated_collection.find({'unit_type_id': content_type}, fields=['unit_id'])
+        spec = {'unit_type_id': content_type,
+                'unit_id': {'$in': [u['_id'] for u in units]}}
+        associated_units = associated_collection.find(spec, fields=['unit_id'])
         associated_unit_ids = set(d['unit_id'] for d in associated_units)
+        return [u for u in units if u['_id'] not in associated_unit_ids]
 
-        # find units that are not associated with any repositories
-        units_collection = content_types_db.type_units_collection(content_type)
-        spec = {'_id': {'$nin': list(associated_unit_ids)}}
-        orphaned_units = units_collection.find(spec)
-        return list(orphaned_units)
+    def list_all_orphans(self):
+        """
+        List all content units that are not associated with a repository.
+        @return: list of content units
+        @rtype:  list
+        """
+        return list(self.generate_all_orphans())
+
+    def list_orphans_by_type(self, content_type):
+        """
+        List all content units of a given type that are not associated with a repository.
+        @param content_type: content type of orphaned units
+        @type  content_type: str
+        @return: list of content units of the given type
+        @rtype:  list
+        """
+        return list(self.generate_orphans_by_type(content_type))
 
     def get_orphan(self, content_type, content_id):
         """
@@ -72,11 +123,12 @@ class OrphanManager(object):
         @param content_id: content id of the orphan
         @type  content_id: str
         """
-        orphans = self.list_orphans_by_type(content_type)
-        for orphan in orphans:
-            if content_id != orphan['_id']:
-                continue
-            return orphan
+        units_collection = content_types_db.type_units_collection(content_type)
+        orphan = units_collection.find_one({'_id': content_id})
+        if orphan is not None:
+            spec = {'unit_type_id': content_type, 'unit_id': content_id}
+            if RepoContentUnit.get_collection().find_one(spec, fields=['unit_id']) is None:
+                return orphan
         raise pulp_exceptions.MissingResource(content_type=content_type, content_id=content_id)
 
     def delete_all_orphans(self):
@@ -87,25 +139,58 @@ class OrphanManager(object):
         # iterate through the types and delete all orphans of each type
         content_query_manager = manager_factory.content_query_manager()
         content_types = content_query_manager.list_content_types()
+        progress = {}
         for content_type in content_types:
-            self.delete_orphans_by_type(content_type)
+            self.delete_orphans_by_type(content_type, progress)
 
-    def delete_orphans_by_type(self, content_type):
+    def delete_orphans_by_type(self, content_type, progress=None):
         """
         Delete all orphaned content units of the given content type.
+
+        The orphans are removed from the database in batches as they are
+        found, while their files are deleted by a pool of threads. Progress,
+        the number of units and files deleted for each content type, is
+        reported to the dispatch context after each batch.
         @param content_type: content type of the orphans to delete
         @type  content_type: str
+        @param progress: progress report to update; used to accumulate the
+                         progress of several content types
+        @type  progress: dict
         """
+        if progress is None:
+            progress = {}
+        type_progress = progress.setdefault(content_type, {'units_deleted': 0, 'files_deleted': 0})
 
-        orphaned_units = self.list_orphans_by_type(content_type)
-        if not orphaned_units:
-            return
         collection = content_types_db.type_units_collection(content_type)
-        spec = {'_id': {'$in': [o['_id'] for o in orphaned_units]}}
+        file_remover = OrphanedFileRemover(self.delete_orphaned_file)
+        try:
+            orphans = self.generate_orphans_by_type(content_type, fields=['_id', '_storage_path'])
+            batch = []
+            for orphan in orphans:
+                batch.append(orphan)
+                if len(batch) >= ORPHAN_BATCH_SIZE:
+                    self._delete_batch(collection, batch, file_remover)
+                    self._report_progress(progress, type_progress, len(batch), file_remover)
+                    batch = []
+            if batch:
+                self._delete_batch(collection, batch, file_remover)
+                self._report_progress(progress, type_progress, len(batch), file_remover)
+        finally:
+            file_remover.finish()
+        type_progress['files_deleted'] = file_remover.deleted
+        self._report_progress(progress, type_progress, 0, file_remover)
+
+    def _delete_batch(self, collection, orphans, file_remover):
+        spec = {'_id': {'$in': [o['_id'] for o in orphans]}}
         collection.remove(spec, safe=True)
-        orphaned_paths = [o['_storage_path'] for o in orphaned_units if o['_storage_path'] is not None]
-        for path in orphaned_paths:
-            self.delete_orphaned_file(path)
+        for o in orphans:
+            if o.get('_storage_path') is not None:
+                file_remover.add(o['_storage_path'])
+
+    def _report_progress(self, progress, type_progress, units_deleted, file_remover):
+        type_progress['units_deleted'] += units_deleted
+        type_progress['files_deleted'] = file_remover.deleted
+        dispatch_factory.context().report_progress(progress)
 
     def delete_orphans_by_id(self, orphans):
         """
@@ -124,24 +209,26 @@ class OrphanManager(object):
             id_list.append(o['unit_id'])
 
         # iterate through the types and ids
-        content_query_manager = manager_factory.content_query_manager()
-        for content_type, content_id_list in orphans_by_id.items():
+        file_remover = OrphanedFileRemover(self.delete_orphaned_file)
+        try:
+            for content_type, content_id_list in orphans_by_id.items():
+                collection = content_types_db.type_units_collection(content_type)
 
-            # build a list of the on-disk contents
-            orphaned_paths = []
-            for unit_id in content_id_list:
-                content_unit = content_query_manager.get_content_unit_by_id(content_type, unit_id, model_fields=['_storage_path'])
-                if content_unit['_storage_path'] is not None:
-                    orphaned_paths.append(content_unit['_storage_path'])
+                for i in range(0, len(content_id_list), ORPHAN_BATCH_SIZE):
+                    batch_ids = content_id_list[i:i + ORPHAN_BATCH_SIZE]
+                    spec = {'_id': {'$in': batch_ids}}
 
-            # remove the orphans from the db
-            collection = content_types_db.type_units_collection(content_type)
-            spec = {'_id': {'$in': content_id_list}}
-            collection.remove(spec, safe=True)
+                    # build a list of the on-disk contents
+                    orphaned_units = list(collection.find(spec, fields=['_storage_path']))
+                    found_ids = set(o['_id'] for o in orphaned_units)
+                    for unit_id in batch_ids:
+                        if unit_id not in found_ids:
+                            raise pulp_exceptions.MissingResource(content_type=content_type, content_id=unit_id)
 
-            # delete the on-disk contents
-            for path in orphaned_paths:
-                self.delete_orphaned_file(path)
+                    # remove the orphans from the db and delete the on-disk contents
+                    self._delete_batch(collection, orphaned_units, file_remover)
+        finally:
+            file_remover.finish()
 
     def delete_orphaned_file(self, path):
         """
@@ -170,10 +257,71 @@ class OrphanManager(object):
             path = os.path.dirname(path)
             if root_content_regex.match(path):
                 break
-            contents = os.listdir(path)
-            if contents:
-                break
-            if not os.access(path, os.W_OK):
+            # directories may be emptied, and removed, by other threads
+            # deleting orphaned files concurrently
+            try:
+                contents = os.listdir(path)
+                if contents:
+                    break
+                if not os.access(path, os.W_OK):
+                    break
+                os.rmdir(path)
+            except OSError:
                 break
-            os.rmdir(path)
+
+# orphaned file removal --------------------------------------------------------
+
+class OrphanedFileRemover(object):
+    """
+    Deletes orphaned files using a pool of threads, so that the file system
+    operations for many files can be in flight at once. Paths are queued
+    with add; finish must be called to wait for the deletions to complete
+    and to stop the threads.
+    @ivar deleted: number of files processed so far
+    @type deleted: int
+    """
+
+    def __init__(self, delete_file, num_threads=ORPHAN_FILE_DELETE_THREADS):
+        """
+        @param delete_file: function called with the path of each file to delete
+        @type  delete_file: callable
+        @param num_threads: number of deleting threads
+        @type  num_threads: int
+        """
+        self.deleted = 0
+        self._delete_file = delete_file
+        self._lock = threading.Lock()
+        # bounded so that the database batches cannot run too far ahead
+        self._queue = Queue(maxsize=ORPHAN_BATCH_SIZE)
+        self._threads = []
+        for i in range(num_threads):
+            thread = threading.Thread(target=self._work, name='orphaned-file-remover-%d' % i)
+            thread.setDaemon(True)
+            thread.start()
+            self._threads.append(thread)
+
+    def add(self, path):
+        self._queue.put(path)
+
+    def finish(self):
+        for thread in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _work(self):
+        while True:
+            path = self._queue.get()
+            if path is None:
+                return
+            try:
+                self._delete_file(path)
+            except Exception:
+                _LOG.exception(_('Error deleting orphaned file: %(p)s') % {'p': path})
+            self._lock.acquire()
+            try:
+                self.deleted += 1
+            finally:
+                self._lock.release()
 
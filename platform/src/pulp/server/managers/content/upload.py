@@ -11,6 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import hashlib
 import logging
 import os
 import sys
@@ -23,7 +24,7 @@ from   pulp.plugins.config import PluginCallConfiguration
 import pulp.server.auth.principal as pulp_principal
 from pulp.server import config as pulp_config
 from pulp.server.db.model.repository import RepoContentUnit
-from   pulp.server.exceptions import PulpDataException, MissingResource, PulpExecutionException
+from   pulp.server.exceptions import InvalidValue, PulpDataException, MissingResource, PulpExecutionException
 import pulp.server.managers.factory as manager_factory
 import pulp.server.managers.repo._common as repo_common_utils
 
@@ -65,13 +66,16 @@ class ContentUploadManager(object):
 
         return upload_id
 
-    def save_data(self, upload_id, offset, data):
+    def save_data(self, upload_id, offset, data, checksum=None):
         """
         Saves bits into the given upload request starting at an offset value.
         The initialize_upload method should be called prior to this method
         to retrieve the upload_id value and perform any steps necessary before
         bits can be saved.
 
+        Segments may be saved in any order and concurrently with each other;
+        each one is written only to its own area of the file.
+
         @param upload_id: upload request ID
         @type  upload_id: str
 
@@ -80,6 +84,12 @@ class ContentUploadManager(object):
 
         @param data: content to write to the file
         @type  data: str
+
+        @param checksum: optional hex SHA-256 digest of data; if specified, the
+               data is not written unless it matches
+        @type  checksum: str
+
+        @raise InvalidValue: if the data does not match the checksum
         """
 
         file_path = self._upload_file_path(upload_id)
@@ -88,6 +98,9 @@ class ContentUploadManager(object):
         if not os.path.exists(file_path):
             raise MissingResource(upload_request=upload_id)
 
+        if checksum is not None and hashlib.sha256(data).hexdigest() != checksum.lower():
+            raise InvalidValue(['checksum'])
+
         f = open(file_path, 'r+')
         f.seek(offset)
         f.write(data)
@@ -72,7 +72,9 @@ class EventFireManager(object):
         """
         Performs the actual act of firing an event to all appropriate
         listeners. This call will log but otherwise suppress any exception
-        that comes out of a notifier.
+        that comes out of a notifier. The notifiers shipped with pulp only
+        queue their notifications, which are sent in the background by
+        pulp.server.event.delivery.
 
         @param event: event object to fire
         @type  event: pulp.server.event.data.Event
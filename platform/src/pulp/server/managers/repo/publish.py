@@ -22,6 +22,7 @@ from gettext import gettext as _
 import logging
 import pymongo
 import sys
+import threading
 import traceback
 
 from pulp.common import dateutils
@@ -30,7 +31,8 @@ from pulp.plugins.loader import exceptions as plugin_exceptions
 from pulp.plugins.model import PublishReport
 from pulp.plugins.conduits.repo_publish import RepoPublishConduit
 from pulp.plugins.config import PluginCallConfiguration
-from pulp.server.db.model.repository import Repo, RepoDistributor, RepoPublishResult
+from pulp.server import config as pulp_config
+from pulp.server.db.model.repository import Repo, RepoDistributor, RepoPublishResult, RepoSyncResult
 from pulp.server.dispatch import constants as dispatch_constants
 import pulp.server.managers.repo._common as common_utils
 from pulp.server.managers import factory as manager_factory
@@ -97,6 +99,9 @@ class RepoPublishManager(object):
         @param publish_config_override: optional config values to use for this
                                         publish call only
         @type  publish_config_override: dict, None
+
+        @return: the publish history entry for the run
+        @rtype:  L{RepoPublishResult}
         """
 
         repo_coll = Repo.get_collection()
@@ -126,6 +131,49 @@ class RepoPublishManager(object):
         fire_manager.fire_repo_publish_started(repo_id, distributor_id)
         result = self._do_publish(repo, distributor_id, distributor_instance, transfer_repo, conduit, call_config)
         fire_manager.fire_repo_publish_finished(result)
+        return result
+
+    def auto_publish(self, repo_id, distributor_id, distributor_instance=None, distributor_config=None):
+        """
+        Publishes the repository with one of its automatic distributors after
+        a sync. The start and completion time and the result of the publish
+        are recorded under the distributor's ID in the auto_publish field of
+        the repository's most recent sync history entry.
+
+        @param repo_id: identifies the repo being published
+        @type  repo_id: str
+
+        @param distributor_id: identifies the repo's distributor to publish
+        @type  distributor_id: str
+
+        @param distributor_instance: the distributor instance for this repo and this publish
+        @type distributor_instance: pulp.plugins.distributor.Distributor
+
+        @param distributor_config: base configuration for the distributor
+        @type distributor_config: dict
+
+        @return: timing of the publish: started, completed and result
+        @rtype:  dict
+        """
+        timing = {'started' : _now_timestamp(), 'completed' : None,
+                  'result' : RepoPublishResult.RESULT_ERROR}
+        try:
+            result = self.publish(repo_id, distributor_id, distributor_instance, distributor_config)
+            timing['result'] = result['result']
+        finally:
+            timing['completed'] = _now_timestamp()
+            self._record_auto_publish(repo_id, distributor_id, timing)
+        return timing
+
+    def _record_auto_publish(self, repo_id, distributor_id, timing):
+        sync_result_coll = RepoSyncResult.get_collection()
+        sync_results = list(sync_result_coll.find({'repo_id' : repo_id}, fields=['_id']).sort('completed', pymongo.DESCENDING).limit(1))
+        if not sync_results:
+            return
+        # distributor IDs cannot contain dots, so they are safe to use as keys
+        sync_result_coll.update({'_id' : sync_results[0]['_id']},
+                                {'$set' : {'auto_publish.%s' % distributor_id : timing}},
+                                safe=True)
 
     def _do_publish(self, repo, distributor_id, distributor_instance, transfer_repo, conduit, call_config):
 
@@ -182,9 +230,13 @@ class RepoPublishManager(object):
     def auto_publish_for_repo(self, repo_id):
         """
         Calls publish on all distributors that are configured to be automatically
-        called for the given repo. Each distributor is called serially. The order
-        in which they are executed is determined simply by distributor ID (sorted
-        ascending alphabetically).
+        called for the given repo. The distributors are independent of each
+        other, so they publish concurrently; at most the number configured by
+        the auto_publish_concurrency setting of the tasks section run at once,
+        started in order of distributor ID (sorted ascending alphabetically).
+
+        When a sync is requested through the REST API, the automatic
+        publishes are instead queued as separate tasks that depend on the sync.
 
         All automatic distributors will be called, regardless of whether or not
         one raises an error. All failed publish calls will be collaborated into
@@ -196,6 +248,9 @@ class RepoPublishManager(object):
         @param repo_id: identifies the repo
         @type  repo_id: str
 
+        @return: timing of each publish, keyed by distributor ID
+        @rtype:  dict
+
         @raise OperationFailed: if one or more of the distributors errors
                 during publishing; the exception will contain information on all
                 failures
@@ -205,23 +260,52 @@ class RepoPublishManager(object):
         auto_distributors = self.auto_distributors(repo_id)
 
         if len(auto_distributors) is 0:
-            return
+            return {}
 
         # Call publish on each matching distributor, keeping a running track
         # of failed calls
+        lock = threading.Lock()
+        pending = sorted(d['id'] for d in auto_distributors)
+        timings = {}
         error_runs = [] # contains tuple of dist_id and error string
-        for dist in auto_distributors:
-            dist_id = dist['id']
-            try:
-                self.publish(repo_id, dist_id, None)
-            except Exception:
-                _LOG.exception('Exception on auto distribute call for repo [%s] distributor [%s]' % (repo_id, dist_id))
-                error_string = traceback.format_exc()
-                error_runs.append( (dist_id, error_string) )
+
+        def publish_next():
+            while True:
+                lock.acquire()
+                try:
+                    if not pending:
+                        return
+                    dist_id = pending.pop(0)
+                finally:
+                    lock.release()
+                try:
+                    distributor, config = self._get_distributor_instance_and_config(repo_id, dist_id)
+                    timing = self.auto_publish(repo_id, dist_id, distributor, config)
+                except Exception:
+                    _LOG.exception('Exception on auto distribute call for repo [%s] distributor [%s]' % (repo_id, dist_id))
+                    error_string = traceback.format_exc()
+                    lock.acquire()
+                    try:
+                        error_runs.append( (dist_id, error_string) )
+                    finally:
+                        lock.release()
+                else:
+                    timings[dist_id] = timing
+
+        threads = []
+        for i in range(min(auto_publish_concurrency(), len(pending))):
+            thread = threading.Thread(target=publish_next, name='auto-publish-%s-%d' % (repo_id, i))
+            thread.setDaemon(True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
 
         if len(error_runs) > 0:
             raise PulpExecutionException()
 
+        return timings
+
     def last_publish(self, repo_id, distributor_id):
         """
         Returns the timestamp of the last publish call, regardless of its
@@ -306,6 +390,14 @@ class RepoPublishManager(object):
 
 # -- utilities ----------------------------------------------------------------
 
+def auto_publish_concurrency():
+    """
+    @return: maximum number of automatic publishes of a repo run at once
+    @rtype:  int
+    """
+    return max(1, pulp_config.config.getint('tasks', 'auto_publish_concurrency'))
+
+
 def _now_timestamp():
     """
     @return: timestamp suitable for indicating when a publish completed
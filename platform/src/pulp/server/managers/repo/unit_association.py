@@ -56,6 +56,10 @@ SORT_DESCENDING = pymongo.DESCENDING
 
 _VALID_DIRECTIONS = (SORT_ASCENDING, SORT_DESCENDING)
 
+# Maximum number of unit IDs sent in a single $in clause or association
+# documents sent in a single batch insert by the bulk association calls
+ASSOCIATION_BATCH_SIZE = 1000
+
 # -- manager ------------------------------------------------------------------
 
 class RepoUnitAssociationManager(object):
@@ -159,17 +163,42 @@ class RepoUnitAssociationManager(object):
         @raise InvalidType: if the given owner type is not of the valid enumeration
         """
 
-        # There may be a way to batch this in mongo which would be ideal for a
-        # bulk operation like this. But for deadline purposes, this call will
-        # simply loop and call the single method.
+        if owner_type not in _OWNER_TYPES:
+            raise exceptions.InvalidValue(['owner_type'])
 
-        unique_count = 0
+        # Remove duplicates from the list while preserving the order
+        unit_ids = []
+        seen = set()
         for unit_id in unit_id_list:
-            if not self.association_exists(repo_id, unit_id, unit_type_id):
-                unique_count += 1
-            self.associate_unit_by_id(repo_id, unit_type_id, unit_id, owner_type, owner_id, False)
+            if unit_id not in seen:
+                seen.add(unit_id)
+                unit_ids.append(unit_id)
+
+        collection = RepoContentUnit.get_collection()
+
+        # Determine which units already have an association with the repo,
+        # as well as which already have this owner's association, with one
+        # query per batch of IDs
+        associated_ids = set()
+        owned_ids = set()
+        for batch in _batches(unit_ids):
+            spec = {'repo_id' : repo_id,
+                    'unit_type_id' : unit_type_id,
+                    'unit_id' : {'$in' : batch}}
+            fields = ['unit_id', 'owner_type', 'owner_id']
+            for association in collection.find(spec, fields=fields):
+                associated_ids.add(association['unit_id'])
+                if association['owner_type'] == owner_type and association['owner_id'] == owner_id:
+                    owned_ids.add(association['unit_id'])
+
+        # Insert the missing associations in chunks
+        new_associations = [RepoContentUnit(repo_id, unit_id, unit_type_id, owner_type, owner_id)
+                            for unit_id in unit_ids if unit_id not in owned_ids]
+        for batch in _batches(new_associations):
+            collection.insert(batch, safe=True)
 
         # update the count of associated units on the repo object
+        unique_count = len([u for u in unit_ids if u not in associated_ids])
         if unique_count:
             manager_factory.repo_manager().update_unit_count(
                 repo_id, unique_count)
@@ -359,22 +388,29 @@ class RepoUnitAssociationManager(object):
             id_list.append(unit['unit_id'])
 
         collection = RepoContentUnit.get_collection()
-        repo_manager = manager_factory.repo_manager()
 
+        removed_count = 0
         for unit_type_id, unit_ids in unit_map.items():
-            spec = {'repo_id': repo_id,
-                    'unit_type_id': unit_type_id,
-                    'unit_id': {'$in': unit_ids},
-                    'owner_type': owner_type,
-                    'owner_id': owner_id}
-            collection.remove(spec, safe=True)
-
-            unique_count = sum(1 for unit_id in unit_ids
-                               if not self.association_exists(repo_id, unit_id, unit_type_id))
-            if not unique_count:
-                continue
-
-            repo_manager.update_unit_count(repo_id, -unique_count)
+            unit_ids = list(set(unit_ids))
+
+            for batch in _batches(unit_ids):
+                spec = {'repo_id': repo_id,
+                        'unit_type_id': unit_type_id,
+                        'unit_id': {'$in': batch},
+                        'owner_type': owner_type,
+                        'owner_id': owner_id}
+                collection.remove(spec, safe=True)
+
+                # Units that still have an association (i.e. one made by a
+                # different owner) are still in the repository
+                spec = {'repo_id': repo_id,
+                        'unit_type_id': unit_type_id,
+                        'unit_id': {'$in': batch}}
+                remaining_ids = set(a['unit_id'] for a in collection.find(spec, fields=['unit_id']))
+                removed_count += len(batch) - len(remaining_ids)
+
+        if removed_count:
+            manager_factory.repo_manager().update_unit_count(repo_id, -removed_count)
 
         if notify_plugins:
             remove_from_importer(repo_id, unassociate_units)
@@ -412,6 +448,17 @@ class RepoUnitAssociationManager(object):
 
 # -- extracted for brevity above ----------------------------------------------
 
+def _batches(items):
+    """
+    Splits the given list into consecutive slices of at most
+    ASSOCIATION_BATCH_SIZE items.
+
+    @type items: list
+    @rtype: generator of list
+    """
+    for i in range(0, len(items), ASSOCIATION_BATCH_SIZE):
+        yield items[i:i + ASSOCIATION_BATCH_SIZE]
+
 def load_associated_units(source_repo_id, criteria):
     criteria.association_fields = None
     criteria.unit_fields = None
@@ -41,6 +41,15 @@ SORT_DESCENDING = pymongo.DESCENDING
 
 _VALID_DIRECTIONS = (SORT_ASCENDING, SORT_DESCENDING)
 
+# Maximum number of unit IDs sent in a single $in clause when merging unit
+# metadata into a page of associations; keeps the query document well under
+# the BSON size limit for large repositories
+UNIT_LOOKUP_BATCH_SIZE = 5000
+
+# Number of associations whose unit metadata is merged in at a time when the
+# units are returned through an iterator
+UNIT_MERGE_BATCH_SIZE = 5000
+
 # -- manager ------------------------------------------------------------------
 
 class RepoUnitAssociationQueryManager(object):
@@ -139,6 +148,21 @@ class RepoUnitAssociationQueryManager(object):
         @param criteria: if specified will drive the query
         @type  criteria: L{UnitAssociationCriteria}
         """
+        return list(self.get_units_across_types_iter(repo_id, criteria=criteria))
+
+    def get_units_across_types_iter(self, repo_id, criteria=None):
+        """
+        Iterator flavor of get_units_across_types. The associations are
+        retrieved up front, but the unit metadata is looked up and merged in
+        batches of UNIT_MERGE_BATCH_SIZE as the units are consumed, so only
+        one batch of unit metadata is held in memory at a time.
+
+        @see: L{get_units_across_types}
+
+        @return: generator of association documents with the unit metadata
+                 stored under the "metadata" key
+        @rtype:  generator
+        """
 
         # For simplicity, create a criteria if one is not provided and use its defaults
         if criteria is None:
@@ -194,12 +218,8 @@ class RepoUnitAssociationQueryManager(object):
         # We simply need to look up the unit metadata itself and merge it into the
         # combined association and unit metadata dictionary.
 
-        for u in units:
-            type_collection = types_db.type_units_collection(u['unit_type_id'])
-            metadata = type_collection.find_one({'_id' : u['unit_id']})
-            u['metadata'] = metadata
-
-        return units
+        for unit in self._merge_unit_metadata_iter(units):
+            yield unit
 
     def get_units_by_type(self, repo_id, type_id, criteria=None):
         """
@@ -223,6 +243,20 @@ class RepoUnitAssociationQueryManager(object):
         @param criteria: if specified will drive the query
         @type  criteria: L{UnitAssociationCriteria}
         """
+        return list(self.get_units_by_type_iter(repo_id, type_id, criteria=criteria))
+
+    def get_units_by_type_iter(self, repo_id, type_id, criteria=None):
+        """
+        Iterator flavor of get_units_by_type. The associations are retrieved
+        up front, but the unit metadata is read from the database as the
+        units are consumed rather than being loaded all at once.
+
+        @see: L{get_units_by_type}
+
+        @return: generator of association documents with the unit metadata
+                 stored under the "metadata" key
+        @rtype:  generator
+        """
 
         # For simplicity, create a criteria if one is not provided and use its defaults
         if criteria is None:
@@ -285,13 +319,9 @@ class RepoUnitAssociationQueryManager(object):
             # The units are already sorted, so we have to maintain the order in
             # the units list.
 
-            for u in unit_associations:
-                spec = copy.copy(unit_spec)
-                spec['_id'] = u['unit_id']
-                metadata = type_collection.find_one(spec, fields=criteria.unit_fields)
-                u['metadata'] = metadata
-
-            return unit_associations
+            for unit in self._merge_unit_metadata_iter(unit_associations, unit_spec=unit_spec,
+                                                       unit_fields=criteria.unit_fields):
+                yield unit
 
         else:
             # Sorting will be done in the units collection. Since the type is
@@ -326,18 +356,183 @@ class RepoUnitAssociationQueryManager(object):
             if criteria.skip is not None:
                 cursor.skip(criteria.skip)
 
-            # This will load all of the units and they will be filtered,
-            # limited, and sorted.
-            units = list(cursor)
-
-            # Now we just need to merge in the association data
-            merged_units = []
-            for u in units:
+            # The units are read from the cursor already filtered, limited, and
+            # sorted; we just need to merge in the association data
+            for u in cursor:
                 association = associations_by_id[u['_id']]
                 association['metadata'] = u
-                merged_units.append(association)
+                yield association
+
+    def get_units_iter(self, repo_id, criteria=None, batch_size=UNIT_LOOKUP_BATCH_SIZE):
+        """
+        Generator flavor of get_units that streams the associations from a
+        database cursor instead of loading them all into memory. Associations
+        are read in batches of batch_size; the unit metadata for each batch is
+        merged in with a single query per unit type before the batch's units
+        are yielded, so memory use is bounded by the batch size rather than
+        the size of the repository.
+
+        The type IDs and association filters in the criteria are applied in
+        the database. As with get_units, the unit filters and unit fields are
+        only used when a single type ID is specified; associations whose unit
+        does not match the unit filters are skipped, so the limit is applied
+        to the associations before the unit filters. Sorting is only supported
+        on association fields (defaulting to unit_type_id and created); the
+        criteria's unit sort is ignored. If remove_duplicates is set, the first association
+        found for each unit is returned; with the default sort, that is the
+        earliest created one.
+
+        @param repo_id: identifies the repository
+        @type  repo_id: str
+
+        @param criteria: if specified will drive the query
+        @type  criteria: L{UnitAssociationCriteria}
+
+        @param batch_size: number of associations to process at a time
+        @type  batch_size: int
+
+        @return: generator of association documents with the unit metadata
+                 stored under the "metadata" key
+        @rtype:  generator
+        """
+
+        # For simplicity, create a criteria if one is not provided and use its defaults
+        if criteria is None:
+            criteria = UnitAssociationCriteria()
+
+        spec = {'repo_id' : repo_id}
+
+        if criteria.type_ids is not None:
+            spec['unit_type_id'] = {'$in' : criteria.type_ids}
+
+        association_filters = criteria.association_filters
+        association_filters.pop('repo_id', None)
+        association_filters.pop('unit_type_id', None)
+        spec.update(association_filters)
+
+        cursor = RepoContentUnit.get_collection().find(spec, fields=criteria.association_fields)
+        cursor.batch_size(batch_size)
+
+        if criteria.association_sort is not None:
+            cursor.sort(criteria.association_sort)
+        else:
+            cursor.sort([('unit_type_id', SORT_ASCENDING), ('created', SORT_ASCENDING)])
+
+        if criteria.limit is not None:
+            cursor.limit(criteria.limit)
+
+        if criteria.skip is not None:
+            cursor.skip(criteria.skip)
+
+        unit_spec = unit_fields = None
+        if criteria.type_ids is not None and len(criteria.type_ids) == 1:
+            unit_spec = criteria.unit_filters
+            unit_fields = criteria.unit_fields
+
+        # Only the unit UUIDs are remembered, not the associations themselves
+        seen_units = set()
+
+        batch = []
+        for association in cursor:
+            if criteria.remove_duplicates:
+                unit_uuid = (association['unit_type_id'], association['unit_id'])
+                if unit_uuid in seen_units:
+                    continue
+                seen_units.add(unit_uuid)
+
+            batch.append(association)
+            if len(batch) >= batch_size:
+                for unit in self._merged_batch(batch, unit_spec, unit_fields):
+                    yield unit
+                batch = []
+
+        for unit in self._merged_batch(batch, unit_spec, unit_fields):
+            yield unit
+
+    def _merged_batch(self, associations, unit_spec, unit_fields):
+        """
+        Merges the unit metadata into a batch of associations for
+        get_units_iter, dropping those whose unit could not be found or did
+        not match the unit spec.
+        """
+        if not associations:
+            return []
+
+        self._merge_unit_metadata(associations, unit_spec=unit_spec,
+                                  unit_fields=unit_fields)
+        return [a for a in associations if a['metadata'] is not None]
+
+    def _merge_unit_metadata_iter(self, associations, unit_spec=None, unit_fields=None):
+        """
+        Generator that merges the unit metadata into the associations in
+        batches of UNIT_MERGE_BATCH_SIZE, yielding each batch's associations
+        before the next batch is looked up. The associations are removed from
+        the given list as they are batched, so that the list does not keep the
+        unit metadata of the batches already yielded in memory.
+
+        @see: L{_merge_unit_metadata}
+        """
+        while associations:
+            batch = associations[:UNIT_MERGE_BATCH_SIZE]
+            del associations[:UNIT_MERGE_BATCH_SIZE]
+            self._merge_unit_metadata(batch, unit_spec=unit_spec, unit_fields=unit_fields)
+            for association in batch:
+                yield association
+
+    def _merge_unit_metadata(self, associations, unit_spec=None, unit_fields=None):
+        """
+        Looks up the unit metadata for each of the given associations and
+        stores it in the association under the "metadata" key. The lookups are
+        batched: the associations are grouped by unit type and each type's
+        units are retrieved with a single $in query (split into chunks of
+        UNIT_LOOKUP_BATCH_SIZE), rather than issuing one query per association.
+
+        The order of the associations list is not affected. If a unit cannot
+        be found (or does not match the given unit spec), its metadata will be
+        set to None.
+
+        @param associations: list of association documents retrieved from the
+                             database; updated in place
+        @type  associations: list of dict
+
+        @param unit_spec: optional additional filters the units must match
+        @type  unit_spec: dict
+
+        @param unit_fields: optional list of unit fields to retrieve
+        @type  unit_fields: list of str
+        """
 
-            return merged_units
+        # Collect the distinct unit IDs per type, preserving the order in
+        # which they are first seen
+        unit_ids_by_type = {}
+        for a in associations:
+            unit_ids = unit_ids_by_type.setdefault(a['unit_type_id'], [])
+            unit_ids.append(a['unit_id'])
+
+        # One query per type (per chunk), indexed by unit ID for the merge
+        units_by_type = {}
+        for type_id, unit_ids in unit_ids_by_type.items():
+            type_collection = types_db.type_units_collection(type_id)
+            units_by_id = units_by_type.setdefault(type_id, {})
+
+            unique_ids = list(set(unit_ids))
+            for i in range(0, len(unique_ids), UNIT_LOOKUP_BATCH_SIZE):
+                spec = copy.copy(unit_spec or {})
+                spec['_id'] = {'$in' : unique_ids[i:i + UNIT_LOOKUP_BATCH_SIZE]}
+
+                for unit in type_collection.find(spec, fields=unit_fields):
+                    units_by_id[unit['_id']] = unit
+
+        # Associations that reference the same unit (i.e. duplicates) each get
+        # their own copy so callers can safely manipulate them independently
+        merged = set()
+        for a in associations:
+            metadata = units_by_type[a['unit_type_id']].get(a['unit_id'])
+            unit_uuid = (a['unit_type_id'], a['unit_id'])
+            if metadata is not None and unit_uuid in merged:
+                metadata = copy.copy(metadata)
+            merged.add(unit_uuid)
+            a['metadata'] = metadata
 
     def _remove_duplicate_associations(self, units):
         """
@@ -45,13 +45,14 @@ db_connection.initialize()
 from pulp.server.agent.direct.services import Services as AgentServices
 
 from pulp.plugins.loader import api as plugin_api
+from pulp.server.db.model.base import provision_collections
 from pulp.server.db.version import check_version
 from pulp.server.debugging import StacktraceDumper
 from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.managers import factory as manager_factory
 from pulp.server.webservices.controllers import (
-    agent, consumer_groups, consumers, contents, dispatch, events, permissions,
-    plugins, repo_groups, repositories, roles, root_actions, users)
+    agent, consumer_groups, consumers, contents, database, dispatch, events,
+    permissions, plugins, repo_groups, repositories, roles, root_actions, users)
 from pulp.server.webservices.middleware.exception import ExceptionHandlerMiddleware
 from pulp.server.webservices.middleware.postponed import PostponedOperationMiddleware
 
@@ -64,6 +65,7 @@ URLS = (
     '/v2/consumer_groups', consumer_groups.application,
     '/v2/consumers', consumers.application,
     '/v2/content', contents.application,
+    '/v2/database', database.application,
     '/v2/events', events.application,
     '/v2/permissions', permissions.application,
     '/v2/plugins', plugins.application,
@@ -72,6 +74,7 @@ URLS = (
     '/v2/repositories', repositories.application,
     '/v2/roles', roles.application,
     '/v2/task_groups', dispatch.task_group_application,
+    '/v2/task_workers', dispatch.task_worker_application,
     '/v2/tasks', dispatch.task_application,
     '/v2/users', users.application,
     )
@@ -100,6 +103,9 @@ def _initialize_pulp():
     manager_factory.initialize()
     plugin_api.initialize()
 
+    # ensure the database indices once, up front, rather than on each request
+    provision_collections()
+
     # new async dispatch initialization
     dispatch_factory.initialize()
 
@@ -11,6 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import itertools
 import logging
 from gettext import gettext as _
 
@@ -22,6 +23,9 @@ from pulp.server.webservices import http, serialization
 
 _log = logging.getLogger(__name__)
 
+# Number of documents encoded into each chunk of a streamed response body
+STREAM_CHUNK_SIZE = 100
+
 
 class JSONController(object):
     """
@@ -112,6 +116,27 @@ class JSONController(object):
         http.header('Content-Length', len(body))
         return body
 
+    def _output_stream(self, items, process=None):
+        """
+        JSON encode an iterable of documents as a list, returning a generator
+        of chunks of the response body so that neither the documents nor their
+        serialized form need to be held in memory all at once.
+
+        The first document is retrieved before returning so that errors in
+        running the underlying query are still raised from the controller
+        method and reported with the appropriate status code.
+        """
+        items = iter(items)
+        try:
+            first = [items.next()]
+        except StopIteration:
+            first = []
+        documents = itertools.chain(first, items)
+        if process is not None:
+            documents = itertools.imap(process, documents)
+        http.header('Content-Type', 'application/json')
+        return _json_list_chunks(documents)
+
     def _error_dict(self, msg, code=None):
         """
         Standardized error returns
@@ -134,6 +159,22 @@ class JSONController(object):
 
         return self._output(data)
 
+    def ok_stream(self, items, process=None):
+        """
+        Return an ok response whose body is the JSON encoded list of items,
+        streamed to the client as the items are read.
+        @type items: iterable
+        @param items: documents to be returned in the body of the response,
+                      such as a database cursor
+        @type process: callable
+        @param process: optional function applied to each document before it
+                        is encoded; its return value is encoded in its place
+        @return: generator of the JSON encoded response
+        """
+        http.status_ok()
+
+        return self._output_stream(items, process)
+
     def created(self, location, data):
         """
         Return a created response.
@@ -246,3 +287,26 @@ class JSONController(object):
         """
         http.status_not_implemented()
         return self._output(msg)
+
+# -- utilities -----------------------------------------------------------------
+
+def _json_list_chunks(documents, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Generator of the chunks of the JSON encoding of a list of documents.
+    @param documents: documents to encode
+    @type  documents: iterator
+    @param chunk_size: number of documents encoded into each chunk
+    @type  chunk_size: int
+    """
+    yield '['
+    separator = ''
+    buffer = []
+    for document in documents:
+        buffer.append(json.dumps(document, default=json_util.default))
+        if len(buffer) >= chunk_size:
+            yield separator + ', '.join(buffer)
+            separator = ', '
+            buffer = []
+    if buffer:
+        yield separator + ', '.join(buffer)
+    yield ']'
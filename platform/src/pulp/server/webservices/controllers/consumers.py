@@ -67,6 +67,49 @@ def expand_consumers(options, consumers):
     return consumers
 
 
+def profile_call(consumer_id, content_type, body):
+    """
+    Get the profile manager call and its arguments for a reported profile.
+    The body of the request contains one of:
+      - profile: the full profile, stored unless it is unchanged.
+      - delta: {base_hash:<str>, added:<list>, removed:<list>} the entries
+        added and removed since the profile with the base hash was reported,
+        along with the (optional) profile_hash of the resulting profile.
+      - profile_hash: the hash of an unchanged profile; nothing is stored.
+    A delta or hash that does not match the stored profile is rejected with
+    a 409, and the full profile must be reported instead.
+    @param consumer_id: A consumer ID.
+    @type consumer_id: str
+    @param content_type: A content unit type ID.
+    @type content_type: str
+    @param body: The request body.
+    @type body: dict
+    @return: tuple of (call, args)
+    @rtype: tuple
+    """
+    manager = managers.consumer_profile_manager()
+    profile = body.get('profile')
+    delta = body.get('delta')
+    profile_hash = body.get('profile_hash')
+    if profile is not None:
+        return manager.update, [consumer_id, content_type, profile]
+    if delta is not None:
+        missing = [k for k in ('base_hash', 'added', 'removed') if k not in delta]
+        if missing:
+            raise MissingValue(['delta.%s' % k for k in missing])
+        args = [
+            consumer_id,
+            content_type,
+            delta['base_hash'],
+            delta['added'],
+            delta['removed'],
+            profile_hash,
+        ]
+        return manager.update_delta, args
+    if profile_hash is not None:
+        return manager.verify, [consumer_id, content_type, profile_hash]
+    raise MissingValue(['profile'])
+
 # -- controllers --------------------------------------------------------------
 
 class Consumers(JSONController):
@@ -526,19 +569,13 @@ class Profiles(JSONController):
         """
         body = self.params()
         content_type = body.get('content_type')
-        profile = body.get('profile')
         resources = {
             dispatch_constants.RESOURCE_CONSUMER_TYPE:
                 {consumer_id:dispatch_constants.RESOURCE_READ_OPERATION},
         }
-        args = [
-            consumer_id,
-            content_type,
-            profile,
-        ]
-        manager = managers.consumer_profile_manager()
+        call, args = profile_call(consumer_id, content_type, body)
         call_request = CallRequest(
-            manager.create,
+            call,
             args,
             resources=resources,
             weight=0)
@@ -578,19 +615,13 @@ class Profile(JSONController):
         @rtype: dict
         """
         body = self.params()
-        profile = body.get('profile')
         resources = {
             dispatch_constants.RESOURCE_CONSUMER_TYPE:
                 {consumer_id:dispatch_constants.RESOURCE_READ_OPERATION},
         }
-        args = [
-            consumer_id,
-            content_type,
-            profile,
-        ]
-        manager = managers.consumer_profile_manager()
+        call, args = profile_call(consumer_id, content_type, body)
         call_request = CallRequest(
-            manager.update,
+            call,
             args,
             resources=resources,
             weight=0)
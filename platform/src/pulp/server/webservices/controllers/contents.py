@@ -82,7 +82,7 @@ class ContentUnitsCollection(JSONController):
         """
         cqm = factory.content_query_manager()
         units = cqm.find_by_criteria(type_id, Criteria())
-        return self.ok([self.process_unit(unit) for unit in units])
+        return self.ok_stream(units, self.process_unit)
 
 
 class ContentUnitsSearch(SearchController):
@@ -123,9 +123,8 @@ class ContentUnitsSearch(SearchController):
         @type  type_id: basestring
         """
         self._type_id = type_id
-        units = self._get_query_results_from_get()
-        return self.ok(
-            [ContentUnitsCollection.process_unit(unit) for unit in units])
+        units = self._get_query_cursor_from_get()
+        return self.ok_stream(units, ContentUnitsCollection.process_unit)
 
     @auth_required(READ)
     def POST(self, type_id):
@@ -137,9 +136,8 @@ class ContentUnitsSearch(SearchController):
         @type  type_id: basestring
         """
         self._type_id = type_id
-        units = self._get_query_results_from_post()
-        return self.ok(
-            [ContentUnitsCollection.process_unit(unit) for unit in units])
+        units = self._get_query_cursor_from_post()
+        return self.ok_stream(units, ContentUnitsCollection.process_unit)
 
 
 class ContentUnitResource(JSONController):
@@ -209,9 +207,12 @@ class UploadSegmentResource(JSONController):
         except ValueError:
             raise InvalidValue(['offset'])
 
+        # Only the query string is parsed; the body is the raw segment
+        checksum = web.input(_method='get').get('checksum', None)
+
         upload_manager = factory.content_upload_manager()
         data = self.data()
-        upload_manager.save_data(upload_id, offset, data)
+        upload_manager.save_data(upload_id, offset, data, checksum)
 
         return self.ok(None)
 
@@ -222,9 +223,13 @@ class OrphanCollection(JSONController):
     @auth_required(READ)
     def GET(self):
         orphan_manager = factory.content_orphan_manager()
-        orphans = orphan_manager.list_all_orphans()
-        map(lambda o: o.update(serialization.link.child_link_obj(o['_content_type_id'], o['_id'])), orphans)
-        return self.ok(orphans)
+        orphans = orphan_manager.generate_all_orphans()
+        return self.ok_stream(orphans, self._process_orphan)
+
+    @staticmethod
+    def _process_orphan(orphan):
+        orphan.update(serialization.link.child_link_obj(orphan['_content_type_id'], orphan['_id']))
+        return orphan
 
     @auth_required(DELETE)
     def DELETE(self):
@@ -239,9 +244,13 @@ class OrphanTypeSubCollection(JSONController):
     @auth_required(READ)
     def GET(self, content_type):
         orphan_manager = factory.content_orphan_manager()
-        orphans = orphan_manager.list_orphans_by_type(content_type)
-        map(lambda o: o.update(serialization.link.child_link_obj(o['_id'])), orphans)
-        return self.ok(orphans)
+        orphans = orphan_manager.generate_orphans_by_type(content_type)
+        return self.ok_stream(orphans, self._process_orphan)
+
+    @staticmethod
+    def _process_orphan(orphan):
+        orphan.update(serialization.link.child_link_obj(orphan['_id']))
+        return orphan
 
     @auth_required(DELETE)
     def DELETE(self, content_type):
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Contains controllers reporting on the server's use of the database.
+"""
+
+import web
+
+from pulp.server.auth.authorization import READ
+from pulp.server.db.model import base as model_base
+from pulp.server.webservices.controllers.base import JSONController
+from pulp.server.webservices.controllers.decorators import auth_required
+
+# -- controllers --------------------------------------------------------------
+
+class CollectionStatistics(JSONController):
+
+    # Scope:  Resource
+    # GET:    Retrieve the provisioning time and reuse counters of the
+    #         collections in the collection registry
+
+    @auth_required(READ)
+    def GET(self):
+        return self.ok(model_base.collection_statistics())
+
+# -- web.py application -------------------------------------------------------
+
+# These are defined under /v2/database/ (see application.py to double-check)
+URLS = (
+    '/collection_statistics/$', 'CollectionStatistics', # resource
+)
+
+application = web.application(URLS, globals())
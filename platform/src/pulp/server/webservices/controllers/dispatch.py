@@ -193,6 +193,15 @@ class TaskGroupResource(JSONController):
             raise TaskGroupCancelNotImplemented(task_group_id)
         return self.accepted(results)
 
+# task worker controllers ------------------------------------------------------
+
+class TaskWorkerLaneCollection(JSONController):
+
+    @auth_required(authorization.READ)
+    def GET(self):
+        task_queue = dispatch_factory._task_queue()
+        return self.ok(task_queue.worker_pool.statistics())
+
 # web.py applications ----------------------------------------------------------
 
 # mapped to /v2/tasks/
@@ -222,3 +231,10 @@ TASK_GROUP_URLS = (
 
 task_group_application = web.application(TASK_GROUP_URLS, globals())
 
+# mapped to /v2/task_workers/
+
+TASK_WORKER_URLS = (
+    '/', TaskWorkerLaneCollection,
+)
+
+task_worker_application = web.application(TASK_WORKER_URLS, globals())
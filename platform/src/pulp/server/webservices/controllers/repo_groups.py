@@ -72,17 +72,18 @@ class RepoGroupSearch(SearchController):
         super(RepoGroupSearch, self).__init__(
             managers_factory.repo_group_query_manager().find_by_criteria)
 
+    @staticmethod
+    def _process_group(group):
+        group.update(serialization.link.search_safe_link_obj(group['id']))
+        return group
+
     def GET(self):
-        items = self._get_query_results_from_get()
-        for item in items:
-            item.update(serialization.link.search_safe_link_obj(item['id']))
-        return self.ok(items)
+        items = self._get_query_cursor_from_get()
+        return self.ok_stream(items, self._process_group)
 
     def POST(self):
-        items = self._get_query_results_from_post()
-        for item in items:
-            item.update(serialization.link.search_safe_link_obj(item['id']))
-        return self.ok(items)
+        items = self._get_query_cursor_from_post()
+        return self.ok_stream(items, self._process_group)
 
 # repo group resource ----------------------------------------------------------
 
@@ -851,22 +851,36 @@ class RepoSync(JSONController):
         call_requests = [sync_call_request]
 
         repo_publish_manager = manager_factory.repo_publish_manager()
+        publish_weight = pulp_config.config.getint('tasks', 'publish_weight')
         auto_publish_tags = [resource_tag(dispatch_constants.RESOURCE_REPOSITORY_TYPE, repo_id),
                              action_tag('auto_publish'), action_tag('publish')]
         auto_distributors = repo_publish_manager.auto_distributors(repo_id)
+        auto_distributor_ids = sorted(d['id'] for d in auto_distributors)
 
-        for distributor in auto_distributors:
-            distributor_id = distributor['id']
-            publish_call_request = CallRequest(repo_publish_manager.publish,
+        # the distributors publish concurrently: each publish only reads the
+        # repo and updates its own distributor; no more than the configured
+        # number run at once, as each publish waits on the one started that
+        # many places before it
+        concurrency = max(1, pulp_config.config.getint('tasks', 'auto_publish_concurrency'))
+        publish_call_requests = []
+
+        for distributor_id in auto_distributor_ids:
+            publish_call_request = CallRequest(repo_publish_manager.auto_publish,
                                                [repo_id, distributor_id],
+                                               weight=publish_weight,
                                                tags=auto_publish_tags,
                                                archive=True)
-            publish_call_request.updates_resource(dispatch_constants.RESOURCE_REPOSITORY_TYPE, repo_id)
+            publish_call_request.reads_resource(dispatch_constants.RESOURCE_REPOSITORY_TYPE, repo_id)
+            publish_call_request.updates_resource(dispatch_constants.RESOURCE_REPOSITORY_DISTRIBUTOR_TYPE, distributor_id)
             publish_call_request.add_life_cycle_callback(dispatch_constants.CALL_ENQUEUE_LIFE_CYCLE_CALLBACK,
                                                          repo_publish_manager.prep_publish)
             publish_call_request.depends_on(sync_call_request)
+            if len(publish_call_requests) >= concurrency:
+                publish_call_request.depends_on(publish_call_requests[-concurrency])
+
+            publish_call_requests.append(publish_call_request)
 
-            call_requests.append(publish_call_request)
+        call_requests.extend(publish_call_requests)
 
         # this raises an exception that is handled by the middleware,
         # so no return is needed
@@ -1062,11 +1076,11 @@ class RepoUnitAdvancedSearch(JSONController):
         manager = manager_factory.repo_unit_association_query_manager()
         if criteria.type_ids is not None and len(criteria.type_ids) == 1:
             type_id = criteria.type_ids[0]
-            units = manager.get_units_by_type(repo_id, type_id, criteria=criteria)
+            units = manager.get_units_by_type_iter(repo_id, type_id, criteria=criteria)
         else:
-            units = manager.get_units_across_types(repo_id, criteria=criteria)
+            units = manager.get_units_across_types_iter(repo_id, criteria=criteria)
 
-        return self.ok(units)
+        return self.ok_stream(units)
 
 # -- web.py application -------------------------------------------------------
 
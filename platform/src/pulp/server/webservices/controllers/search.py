@@ -39,7 +39,7 @@ class SearchController(JSONController):
         example, '/v2/sometype/search/?field=id&field=display_name' will
         return the fields 'id' and 'display_name'.
         """
-        return self.ok(self._get_query_results_from_get())
+        return self.ok_stream(self._get_query_cursor_from_get())
 
     @auth_required(READ)
     def POST(self):
@@ -56,13 +56,37 @@ class SearchController(JSONController):
         @rtype:     list
         """
 
-        return self.ok(self._get_query_results_from_post())
+        return self.ok_stream(self._get_query_cursor_from_post())
 
     def _get_query_results_from_get(self, ignore_fields=None, is_user_search=False):
         """
         Looks for query parameters that define a Criteria, and returns the
         results of a search based on that Criteria.
 
+        @see: L{_get_query_cursor_from_get} for the parameters
+
+        @return:    list of documents from the DB that match the given criteria
+                    for the collection associated with this controller
+        @rtype:     list
+        """
+        return list(self._get_query_cursor_from_get(ignore_fields, is_user_search))
+
+    def _get_query_results_from_post(self, is_user_search=False):
+        """
+        Looks for a Criteria passed as a POST parameter on key 'criteria', and
+        returns the results of a search based on that Criteria.
+
+        @return:    list of documents from the DB that match the given criteria
+                    for the collection associated with this controller
+        @rtype:     list
+        """
+        return list(self._get_query_cursor_from_post(is_user_search))
+
+    def _get_query_cursor_from_get(self, ignore_fields=None, is_user_search=False):
+        """
+        Looks for query parameters that define a Criteria, and returns the
+        results of a search based on that Criteria without reading them.
+
         @param ignore_fields:   Field names to ignore. All other fields will be
                                 used in an attempt to generate a Criteria
                                 instance, which will fail if unexpected field
@@ -74,9 +98,9 @@ class SearchController(JSONController):
                                 
         @type is_user_search
  
-        @return:    list of documents from the DB that match the given criteria
-                    for the collection associated with this controller
-        @rtype:     list
+        @return:    documents from the DB that match the given criteria for the
+                    collection associated with this controller
+        @rtype:     iterable, such as L{pymongo.cursor.Cursor}
         """
         input = web.input(field=[])
         if ignore_fields:
@@ -94,16 +118,17 @@ class SearchController(JSONController):
             input['fields'] = fields
 
         criteria = Criteria.from_client_input(input)
-        return list(self.query_method(criteria))
+        return self.query_method(criteria)
 
-    def _get_query_results_from_post(self, is_user_search=False):
+    def _get_query_cursor_from_post(self, is_user_search=False):
         """
-        Looks for a Criteria passed as a POST parameter on ket 'criteria', and
-        returns the results of a search based on that Criteria.
+        Looks for a Criteria passed as a POST parameter on key 'criteria', and
+        returns the results of a search based on that Criteria without reading
+        them.
 
-        @return:    list of documents from the DB that match the given criteria
-                    for the collection associated with this controller
-        @rtype:     list
+        @return:    documents from the DB that match the given criteria for the
+                    collection associated with this controller
+        @rtype:     iterable, such as L{pymongo.cursor.Cursor}
         """
         try:
             criteria_param = self.params()['criteria']
@@ -115,4 +140,4 @@ class SearchController(JSONController):
                 criteria.fields.append('id')
             if is_user_search and 'login' not in criteria.fields and u'login' not in criteria.fields:
                 criteria.fields.append('login')
-        return list(self.query_method(criteria))
\ No newline at end of file
+        return self.query_method(criteria)
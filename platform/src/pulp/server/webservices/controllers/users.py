@@ -58,11 +58,23 @@ class UsersCollection(JSONController):
         @rtype  list of User instances
         """
         for user in users:
-            user.pop('password', None)
-            user.update(serialization.link.search_safe_link_obj(user['login']))
+            UsersCollection._process_user(user)
 
         return users
 
+    @staticmethod
+    def _process_user(user):
+        """
+        Apply standard processing to a single user being returned to a client.
+        @see: L{_process_users}
+
+        @return the same user that was passed in, modified in-place
+        @rtype  User
+        """
+        user.pop('password', None)
+        user.update(serialization.link.search_safe_link_obj(user['login']))
+        return user
+
 
     @auth_required(READ)
     def GET(self):
@@ -165,10 +177,8 @@ class UserSearch(SearchController):
             managers.user_query_manager().find_by_criteria)
 
     def GET(self):
-        users = self._get_query_results_from_get(is_user_search=True)
-        UsersCollection._process_users(users)
-
-        return self.ok(users)
+        users = self._get_query_cursor_from_get(is_user_search=True)
+        return self.ok_stream(users, UsersCollection._process_user)
 
 
     @auth_required(READ)
@@ -185,10 +195,8 @@ class UserSearch(SearchController):
         @return:    list of matching users
         @rtype:     list
         """
-        users = self._get_query_results_from_post(is_user_search=True)
-        UsersCollection._process_users(users)
-
-        return self.ok(users)
+        users = self._get_query_cursor_from_post(is_user_search=True)
+        return self.ok_stream(users, UsersCollection._process_user)
 
 
 
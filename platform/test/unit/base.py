@@ -41,7 +41,7 @@ from pulp.client.extensions.exceptions import ExceptionHandler
 from pulp.common.config import Config
 
 from pulp.server import config
-from pulp.server.auth import authorization
+from pulp.server.auth import authorization, permission_cache
 from pulp.server.db import connection
 from pulp.server.db.model.auth import User
 from pulp.server.dispatch import constants as dispatch_constants
@@ -95,6 +95,8 @@ class PulpServerTests(unittest.TestCase):
         self._mocks = {}
         self.config = PulpServerTests.CONFIG # shadow for simplicity
         self.clean()
+        # tests remove users and permissions directly from the database
+        permission_cache.invalidate()
 
     def tearDown(self):
         super(PulpServerTests, self).tearDown()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+from pulp.client.extensions.extensions import PulpCliSection
+
+def initialize(context):
+    # Adds to the section created by mext1
+    parent = context.cli.find_section('section-1')
+    parent.add_subsection(PulpCliSection('section-2a', 'Section 2a'))
+
+    section = PulpCliSection('section-2', 'Section 2')
+    context.cli.add_section(section)
@@ -25,6 +25,7 @@ import mock
 from pulp.plugins.loader import api as plugin_api
 from pulp.plugins.loader import exceptions as plugin_exceptions
 from pulp.plugins.model import SyncReport, PublishReport, ApplicabilityReport
+from pulp.plugins.profiler import Profiler
 
 # -- constants ----------------------------------------------------------------
 
@@ -223,6 +224,8 @@ def install():
             mock.Mock(side_effect=lambda i,u,o,c,x: sorted(u))
         profiler.unit_applicable = \
             mock.Mock(side_effect=lambda i,u,c,x: ApplicabilityReport(u, False, 'mocked'))
+        profiler.units_applicable = \
+            mock.Mock(side_effect=lambda i,u,c,x,p=profiler: Profiler.units_applicable.im_func(p,i,u,c,x))
 
 def reset():
     """
@@ -87,7 +87,9 @@ class ApplicabilityManagerTests(base.PulpServerTests):
         profiler, cfg = plugins.get_profiler_by_type('rpm')
         call = 0
         args = [c[0] for c in profiler.unit_applicable.call_args_list]
-        for id in self.CONSUMER_IDS:
+        # consumers with the same profiles are evaluated once
+        self.assertEquals(len(args), 2)
+        for id in self.CONSUMER_IDS[:1]:
             for unit in units[0:2]:
                 self.assertEquals(args[call][0].id, id)
                 self.assertEquals(args[call][0].profiles, {'rpm':self.PROFILE})
@@ -96,6 +98,59 @@ class ApplicabilityManagerTests(base.PulpServerTests):
                 self.assertEquals(args[call][3].__class__, ProfilerConduit)
                 call += 1
 
+    def test_applicability_batched(self):
+        # Setup
+        self.populate()
+        # Test
+        units = [
+            {'type_id':'rpm', 'unit_key':{'name':'zsh'}},
+            {'type_id':'mock-type', 'unit_key':{'name':'abc'}},
+            {'type_id':'rpm', 'unit_key':{'name':'ksh'}},
+        ]
+        manager = factory.consumer_applicability_manager()
+        applicability = manager.units_applicable(self.CRITERIA, units)
+        # verify
+        profiler, cfg = plugins.get_profiler_by_type('rpm')
+        self.assertEquals(profiler.units_applicable.call_count, 1)
+        args = profiler.units_applicable.call_args[0]
+        self.assertEquals([c.id for c in args[0]], self.CONSUMER_IDS[:1])
+        for consumer in args[0]:
+            self.assertEquals(consumer.profiles, {'rpm':self.PROFILE})
+        self.assertEquals(args[1], [units[0], units[2]])
+        profiler, cfg = plugins.get_profiler_by_type('mock-type')
+        self.assertEquals(profiler.units_applicable.call_count, 1)
+        # reports are in the order of the requested units
+        for id in self.CONSUMER_IDS:
+            self.assertEquals([r.unit for r in applicability[id]], units)
+
+    def test_applicability_distinct_profiles(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        manager.update(self.CONSUMER_IDS[1], 'rpm', [1,2,4])
+        # Test
+        units = [
+            {'type_id':'rpm', 'unit_key':{'name':'zsh'}},
+        ]
+        manager = factory.consumer_applicability_manager()
+        applicability = manager.units_applicable(self.CRITERIA, units)
+        # verify
+        profiler, cfg = plugins.get_profiler_by_type('rpm')
+        args = profiler.units_applicable.call_args[0]
+        self.assertEquals([c.id for c in args[0]], self.CONSUMER_IDS)
+        self.assertEquals(args[0][1].profiles, {'rpm':[1,2,4]})
+        for id in self.CONSUMER_IDS:
+            self.assertEquals([r.unit for r in applicability[id]], units)
+
+    def test_applicability_no_units(self):
+        # Setup
+        self.populate()
+        # Test
+        manager = factory.consumer_applicability_manager()
+        applicability = manager.units_applicable(self.CRITERIA, [])
+        # verify
+        self.assertEquals(applicability, {})
+
     def test_profiler_exception(self):
         # Setup
         self.populate()
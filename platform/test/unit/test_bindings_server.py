@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import errno
+import httplib
+import mock
+import socket
+import unittest
+
+from M2Crypto import SSL
+
+from pulp.bindings import exceptions
+from pulp.bindings import server
+from pulp.bindings.server import ConnectionPool, HTTPSServerWrapper, PulpConnection
+
+# -- utilities ----------------------------------------------------------------
+
+def mock_connection(status=200, body='{}', will_close=False, error=None):
+    response = mock.Mock()
+    response.status = status
+    response.will_close = will_close
+    response.read.return_value = body
+
+    connection = mock.Mock()
+    connection.sock = mock.Mock()
+    if error is not None:
+        connection.getresponse.side_effect = error
+    else:
+        connection.getresponse.return_value = response
+    return connection
+
+# -- tests --------------------------------------------------------------------
+
+class HTTPSServerWrapperTests(unittest.TestCase):
+
+    def setUp(self):
+        super(HTTPSServerWrapperTests, self).setUp()
+        server._POOLS.clear()
+        self.pulp_connection = PulpConnection('localhost', username='admin', password='admin')
+        self.wrapper = self.pulp_connection.server_wrapper
+
+    def tearDown(self):
+        super(HTTPSServerWrapperTests, self).tearDown()
+        server._POOLS.clear()
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_connection_reused(self, mock_https):
+        connection = mock_connection(body='{"a" : 1}')
+        mock_https.return_value = connection
+
+        status, body = self.wrapper.request('GET', '/pulp/api/v2/tasks/', None)
+        self.wrapper.request('GET', '/pulp/api/v2/tasks/', None)
+
+        self.assertEqual(200, status)
+        self.assertEqual({'a' : 1}, body)
+        self.assertEqual(1, mock_https.call_count)
+        self.assertEqual(2, connection.request.call_count)
+        self.assertFalse(connection.close.called)
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_pool_shared(self, mock_https):
+        mock_https.return_value = mock_connection()
+        other = HTTPSServerWrapper(PulpConnection('localhost', username='admin', password='admin'))
+
+        self.wrapper.request('GET', '/pulp/api/v2/tasks/', None)
+        other.request('GET', '/pulp/api/v2/tasks/', None)
+
+        self.assertTrue(self.wrapper.pool is other.pool)
+        self.assertEqual(1, mock_https.call_count)
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_connection_will_close(self, mock_https):
+        first = mock_connection(will_close=True)
+        second = mock_connection()
+        mock_https.side_effect = [first, second]
+
+        self.wrapper.request('GET', '/pulp/api/v2/tasks/', None)
+        self.wrapper.request('GET', '/pulp/api/v2/tasks/', None)
+
+        self.assertTrue(first.close.called)
+        self.assertEqual(2, mock_https.call_count)
+        self.assertEqual(1, second.request.call_count)
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_stale_connection_retried(self, mock_https):
+        first = mock_connection()
+        second = mock_connection(body='"retried"')
+        mock_https.side_effect = [first, second]
+        self.wrapper.request('GET', '/pulp/api/v2/tasks/', None)
+
+        # the server has since closed the idle connection
+        first.getresponse.side_effect = httplib.BadStatusLine('')
+        status, body = self.wrapper.request('GET', '/pulp/api/v2/tasks/', None)
+
+        self.assertEqual('retried', body)
+        self.assertTrue(first.close.called)
+        self.assertEqual(2, mock_https.call_count)
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_stale_connection_unsent_request_retried(self, mock_https):
+        first = mock_connection()
+        second = mock_connection(body='"retried"')
+        mock_https.side_effect = [first, second]
+        self.wrapper.request('POST', '/pulp/api/v2/repositories/', '{}')
+
+        first.request.side_effect = socket.error(errno.EPIPE, 'Broken pipe')
+        status, body = self.wrapper.request('POST', '/pulp/api/v2/repositories/', '{}')
+
+        self.assertEqual('retried', body)
+        self.assertEqual(2, mock_https.call_count)
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_stale_connection_sent_request_not_retried(self, mock_https):
+        first = mock_connection()
+        mock_https.side_effect = [first, mock_connection()]
+        self.wrapper.request('POST', '/pulp/api/v2/repositories/', '{}')
+
+        # the request may have reached the server before the connection reset
+        first.getresponse.side_effect = socket.error(errno.ECONNRESET, 'Connection reset by peer')
+        self.assertRaises(socket.error, self.wrapper.request, 'POST', '/pulp/api/v2/repositories/', '{}')
+
+        self.assertTrue(first.close.called)
+        self.assertEqual(1, mock_https.call_count)
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_stale_connection_idempotent_request_retried(self, mock_https):
+        first = mock_connection()
+        second = mock_connection(body='"retried"')
+        mock_https.side_effect = [first, second]
+        self.wrapper.request('DELETE', '/pulp/api/v2/repositories/repo/', None)
+
+        first.getresponse.side_effect = socket.error(errno.ECONNRESET, 'Connection reset by peer')
+        status, body = self.wrapper.request('DELETE', '/pulp/api/v2/repositories/repo/', None)
+
+        self.assertEqual('retried', body)
+        self.assertEqual(2, mock_https.call_count)
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_new_connection_failure_not_retried(self, mock_https):
+        mock_https.return_value = mock_connection(error=httplib.BadStatusLine(''))
+
+        self.assertRaises(httplib.BadStatusLine, self.wrapper.request, 'GET', '/pulp/api/v2/tasks/', None)
+        self.assertEqual(1, mock_https.call_count)
+        self.assertEqual(None, self.wrapper.pool.idle_connection(None))
+
+    @mock.patch('M2Crypto.httpslib.HTTPSConnection')
+    def test_expired_certificate(self, mock_https):
+        mock_https.return_value = mock_connection(error=SSL.SSLError('sslv3 alert certificate expired'))
+
+        self.assertRaises(exceptions.PermissionsException, self.wrapper.request, 'GET', '/pulp/api/v2/tasks/', None)
+
+
+class ConnectionPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        super(ConnectionPoolTests, self).setUp()
+        self.pool = ConnectionPool('localhost', 443)
+
+    def test_idle_connection_by_certificate(self):
+        basic = mock.Mock()
+        cert = mock.Mock()
+        self.pool.release(None, basic, False)
+        self.pool.release('/tmp/cert.pem', cert, False)
+
+        self.assertTrue(self.pool.idle_connection(None) is basic)
+        self.assertEqual(None, self.pool.idle_connection(None))
+        self.assertTrue(self.pool.idle_connection('/tmp/cert.pem') is cert)
+
+    def test_ssl_session_kept(self):
+        connection = mock.Mock()
+        connection.get_session.return_value = 'session'
+        self.pool.release('/tmp/cert.pem', connection, True)
+
+        self.assertTrue(connection.close.called)
+        self.assertEqual('session', self.pool._ssl_sessions['/tmp/cert.pem'])
+
+    def test_max_idle_connections(self):
+        connections = [mock.Mock() for i in range(ConnectionPool.MAX_IDLE_CONNECTIONS + 1)]
+        for c in connections:
+            self.pool.release(None, c, False)
+
+        self.assertTrue(connections[-1].close.called)
+        self.assertFalse(connections[0].close.called)
+
+    def test_close(self):
+        connection = mock.Mock()
+        self.pool.release(None, connection, False)
+        self.pool.close()
+
+        self.assertTrue(connection.close.called)
+        self.assertEqual(None, self.pool.idle_connection(None))
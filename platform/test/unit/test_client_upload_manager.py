@@ -11,6 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import hashlib
 import math
 import mock
 import os
@@ -232,6 +233,120 @@ class UploadManagerTests(unittest.TestCase):
         tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
         self.assertEqual(rpm_size, tracker.offset)
 
+    def test_upload_checksums(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.initialize()
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1', {'k' : 'v'}, 'm-1')
+
+        # Test
+        self.upload_manager.upload(upload_id)
+
+        # Verify
+        for single_call_args in self.mock_upload_bindings.upload_segment.call_args_list:
+            data, checksum = single_call_args[0][2:4]
+            self.assertEqual(hashlib.sha256(data).hexdigest(), checksum)
+
+    def test_upload_parallel(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.concurrency = 4
+        self.upload_manager.initialize()
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1', {'k' : 'v'}, 'm-1')
+
+        mock_callback = mock.Mock()
+
+        # Test
+        self.upload_manager.upload(upload_id, mock_callback.update_status)
+
+        # Verify
+        rpm_size = os.path.getsize(TEST_RPM_FILENAME)
+        num_upload_calls = int(math.ceil(float(rpm_size) / float(self.upload_manager.chunk_size)))
+
+        self.assertEqual(num_upload_calls, self.mock_upload_bindings.upload_segment.call_count)
+        self.assertEqual(num_upload_calls, mock_callback.update_status.call_count)
+        self.assertEqual(rpm_size, mock_callback.update_status.call_args[0][0])
+
+        # Every segment was sent exactly once with the file's contents
+        f = open(TEST_RPM_FILENAME, 'r')
+        contents = f.read()
+        f.close()
+        offsets = []
+        for single_call_args in self.mock_upload_bindings.upload_segment.call_args_list:
+            offset, data = single_call_args[0][1:3]
+            self.assertEqual(contents[offset:offset + self.upload_manager.chunk_size], data)
+            offsets.append(offset)
+        self.assertEqual(range(0, rpm_size, self.upload_manager.chunk_size), sorted(offsets))
+
+        tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
+        self.assertEqual(rpm_size, tracker.offset)
+        self.assertEqual([[0, rpm_size]], tracker.completed_ranges)
+        self.assertEqual(True, tracker.is_finished_uploading)
+        self.assertEqual(False, tracker.is_running)
+
+    def test_upload_resume(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.initialize()
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1', {'k' : 'v'}, 'm-1')
+
+        tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
+        tracker.add_completed_range(0, 100)
+        tracker.add_completed_range(200, 300)
+
+        # Test
+        self.upload_manager.upload(upload_id)
+
+        # Verify
+        offsets = [c[0][1] for c in self.mock_upload_bindings.upload_segment.call_args_list]
+        self.assertTrue(0 not in offsets)
+        self.assertTrue(100 in offsets)
+        self.assertTrue(200 not in offsets)
+        self.assertTrue(300 in offsets)
+
+        rpm_size = os.path.getsize(TEST_RPM_FILENAME)
+        self.assertEqual([[0, rpm_size]], tracker.completed_ranges)
+
+    def test_upload_segment_failure(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.concurrency = 4
+        self.upload_manager.initialize()
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1', {'k' : 'v'}, 'm-1')
+
+        def upload_segment(upload_id, offset, data, checksum):
+            if offset == 300:
+                raise NotFoundException({})
+            return Response(200, {})
+        self.mock_upload_bindings.upload_segment.side_effect = upload_segment
+
+        # Test
+        self.assertRaises(NotFoundException, self.upload_manager.upload, upload_id)
+
+        # Verify
+        tracker = upload_util.UploadTracker.load(self.upload_manager._tracker_filename(upload_id))
+        self.assertEqual(False, tracker.is_finished_uploading)
+        self.assertEqual(False, tracker.is_running)
+        self.assertTrue(tracker.offset <= 300)
+        for start, end in tracker.completed_ranges:
+            self.assertTrue(end <= 300 or start >= 400)
+
+    def test_load_offset_tracker(self):
+        # Setup
+        filename = self.upload_manager._tracker_filename('old')
+        tracker = upload_util.UploadTracker(filename)
+        tracker.upload_id = 'old'
+        tracker.offset = 500
+        del tracker.completed_ranges # as saved before ranges were tracked
+        tracker.save()
+
+        # Test
+        loaded = upload_util.UploadTracker.load(filename)
+
+        # Verify
+        self.assertEqual([[0, 500]], loaded.completed_ranges)
+        self.assertEqual([(500, 100)], loaded.missing_ranges(600, 1000))
+
     def test_upload_concurrent_upload(self):
         # Setup
         self.upload_manager.initialize()
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import unittest
+
+from pulp.common import profiles
+
+ZSH = {'name':'zsh', 'version':'1.0', 'release':'1', 'epoch':0, 'arch':'x86_64'}
+KSH = {'name':'ksh', 'version':'2.0', 'release':'1', 'epoch':0, 'arch':'x86_64'}
+BASH = {'name':'bash', 'version':'4.2', 'release':'3', 'epoch':0, 'arch':'x86_64'}
+
+
+class ProfileHashTests(unittest.TestCase):
+
+    def test_order(self):
+        self.assertEqual(profiles.profile_hash([ZSH, KSH]), profiles.profile_hash([KSH, ZSH]))
+
+    def test_changed(self):
+        self.assertNotEqual(profiles.profile_hash([ZSH, KSH]), profiles.profile_hash([ZSH, BASH]))
+
+    def test_round_trip(self):
+        # profiles come back from the database and json with unicode strings
+        unicode_zsh = dict((unicode(k), isinstance(v, str) and unicode(v) or v) for k, v in ZSH.items())
+        self.assertEqual(profiles.profile_hash([ZSH]), profiles.profile_hash([unicode_zsh]))
+
+    def test_dict(self):
+        self.assertEqual(profiles.profile_hash({'a':1, 'b':2}), profiles.profile_hash({'b':2, 'a':1}))
+
+
+class ProfileDeltaTests(unittest.TestCase):
+
+    def test_delta(self):
+        old = [ZSH, KSH]
+        new = [KSH, BASH]
+
+        added, removed = profiles.profile_delta(old, new)
+
+        self.assertEqual([BASH], added)
+        self.assertEqual([ZSH], removed)
+        updated = profiles.apply_delta(old, added, removed)
+        self.assertEqual(profiles.profile_hash(new), profiles.profile_hash(updated))
+
+    def test_no_delta(self):
+        self.assertEqual(None, profiles.profile_delta({'a':1}, {'a':2}))
+        self.assertRaises(ValueError, profiles.apply_delta, {'a':1}, [], [])
+
+    def test_apply_duplicates(self):
+        updated = profiles.apply_delta([ZSH], [ZSH, KSH], [])
+
+        self.assertEqual([ZSH, KSH], updated)
@@ -105,6 +105,44 @@ class SingleRepoUnitsMixinTests(unittest.TestCase):
         # Test
         self.assertRaises(mixins.DistributorConduitException, self.mixin.get_units)
 
+    @mock.patch('pulp.plugins.types.database.type_definition')
+    @mock.patch('pulp.server.managers.repo.unit_association_query.RepoUnitAssociationQueryManager.get_units_iter')
+    def test_get_units_iter(self, mock_query_call, mock_type_def_call):
+        # Setup
+        mock_query_call.return_value = iter([
+            {'unit_type_id' : 'type-1', 'metadata' : {'m' : 'm1', 'k1' : 'v1'}},
+            {'unit_type_id' : 'type-1', 'metadata' : {'m' : 'm1', 'k1' : 'v2'}},
+        ])
+
+        mock_type_def_call.return_value = {
+            'id' : 'mock-type-def',
+            'unit_key' : ['k1']
+        }
+
+        fake_criteria = 'fake-criteria'
+
+        # Test
+        units = self.mixin.get_units_iter(criteria=fake_criteria, batch_size=10)
+
+        # Verify
+        self.assertEqual(0, mock_query_call.call_count) # nothing happens until consumed
+        units = list(units)
+        self.assertEqual(2, len(units))
+        self.assertEqual('v2', units[1].unit_key['k1'])
+        self.assertEqual(1, mock_query_call.call_count)
+        self.assertEqual(mock_query_call.call_args[0][0], self.repo_id)
+        self.assertEqual(mock_query_call.call_args[1]['criteria'], fake_criteria)
+        self.assertEqual(mock_query_call.call_args[1]['batch_size'], 10)
+        self.assertEqual(1, mock_type_def_call.call_count)
+
+    @mock.patch('pulp.server.managers.repo.unit_association_query.RepoUnitAssociationQueryManager.get_units_iter')
+    def test_get_units_iter_server_error(self, mock_query_call):
+        # Setup
+        mock_query_call.side_effect = Exception()
+
+        # Test
+        self.assertRaises(mixins.DistributorConduitException, list, self.mixin.get_units_iter())
+
 class MultipleRepoUnitsMixinTests(unittest.TestCase):
 
     def setUp(self):
@@ -146,6 +184,36 @@ class MultipleRepoUnitsMixinTests(unittest.TestCase):
         # Test
         self.assertRaises(mixins.ImporterConduitException, self.mixin.get_units, 'foo')
 
+    @mock.patch('pulp.plugins.types.database.type_definition')
+    @mock.patch('pulp.server.managers.repo.unit_association_query.RepoUnitAssociationQueryManager.get_units_iter')
+    def test_get_units_iter(self, mock_query_call, mock_type_def_call):
+        # Setup
+        mock_query_call.return_value = iter([
+            {'unit_type_id' : 'type-1', 'metadata' : {'m' : 'm1', 'k1' : 'v1'}},
+        ])
+
+        mock_type_def_call.return_value = {
+            'id' : 'mock-type-def',
+            'unit_key' : ['k1']
+        }
+
+        # Test
+        repo_id = 'mr-repo'
+        units = list(self.mixin.get_units_iter(repo_id))
+
+        # Verify
+        self.assertEqual(1, len(units))
+        self.assertEqual(mock_query_call.call_args[0][0], repo_id)
+        self.assertEqual(mock_query_call.call_args[1]['batch_size'], mixins.GET_UNITS_BATCH_SIZE)
+
+    @mock.patch('pulp.server.managers.repo.unit_association_query.RepoUnitAssociationQueryManager.get_units_iter')
+    def test_get_units_iter_server_error(self, mock_query_call):
+        # Setup
+        mock_query_call.side_effect = Exception()
+
+        # Test
+        self.assertRaises(mixins.ImporterConduitException, list, self.mixin.get_units_iter('foo'))
+
 class ImporterScratchPadMixinTests(unittest.TestCase):
 
     def setUp(self):
@@ -387,6 +455,79 @@ class AddUnitMixinTests(unittest.TestCase):
         # Test
         self.assertRaises(mixins.ImporterConduitException, self.mixin.save_unit, None)
 
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.request_content_unit_file_path')
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.get_content_unit_ids')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.update_content_unit')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.add_content_units')
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.associate_all_by_ids')
+    def test_save_units(self, mock_associate, mock_add, mock_update, mock_get, mock_path):
+        # Setup
+        existing = self.mixin.init_unit('t', {'k' : 'v1'}, {'m' : 'm1'}, '/bar')
+        new_1 = self.mixin.init_unit('t', {'k' : 'v2'}, {'m' : 'm2'}, '/bar')
+        new_2 = self.mixin.init_unit('t', {'k' : 'v3'}, {'m' : 'm3'}, '/bar')
+        other_type = self.mixin.init_unit('u', {'k' : 'v1'}, {'m' : 'm4'}, '/bar')
+
+        def get_ids(type_id, unit_keys):
+            if type_id == 't':
+                return ('existing',), ({'k' : 'v1'},)
+            return (), ()
+        mock_get.side_effect = get_ids
+
+        def add_units(type_id, units_metadata):
+            return ['%s-%s' % (type_id, u['k']) for u in units_metadata]
+        mock_add.side_effect = add_units
+
+        # Test
+        saved = self.mixin.save_units([existing, new_1, new_2, other_type])
+
+        # Verify
+        self.assertEqual(4, len(saved))
+        self.assertEqual(existing.id, 'existing')
+        self.assertEqual(new_1.id, 't-v2')
+        self.assertEqual(new_2.id, 't-v3')
+        self.assertEqual(other_type.id, 'u-v1')
+
+        self.assertEqual(2, mock_get.call_count) # one per type
+        self.assertEqual(1, mock_update.call_count)
+        self.assertEqual(2, mock_add.call_count) # one per type
+        self.assertEqual(2, mock_associate.call_count) # one per type
+        self.assertEqual(3, self.mixin._added_count)
+        self.assertEqual(1, self.mixin._updated_count)
+
+        associated = dict([(c[0][1], sorted(c[0][2])) for c in mock_associate.call_args_list])
+        self.assertEqual(associated['t'], ['existing', 't-v2', 't-v3'])
+        self.assertEqual(associated['u'], ['u-v1'])
+
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.request_content_unit_file_path')
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.get_content_unit_ids')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.add_content_units')
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.associate_all_by_ids')
+    def test_save_units_duplicate_in_batch(self, mock_associate, mock_add, mock_get, mock_path):
+        # Setup
+        unit_1 = self.mixin.init_unit('t', {'k' : 'v'}, {'m' : 'm1'}, '/bar')
+        unit_2 = self.mixin.init_unit('t', {'k' : 'v'}, {'m' : 'm1'}, '/bar')
+        mock_get.return_value = ((), ())
+        mock_add.return_value = ['new-unit-id']
+
+        # Test
+        self.mixin.save_units([unit_1, unit_2])
+
+        # Verify
+        self.assertEqual(1, len(mock_add.call_args[0][1]))
+        self.assertEqual(unit_1.id, 'new-unit-id')
+        self.assertEqual(unit_2.id, 'new-unit-id')
+        self.assertEqual(['new-unit-id'], mock_associate.call_args[0][2])
+        self.assertEqual(1, self.mixin._added_count)
+
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.get_content_unit_ids')
+    def test_save_units_with_error(self, mock_get):
+        # Setup
+        mock_get.side_effect = Exception()
+        unit = Unit('t', {'k' : 'v'}, {'m' : 'm1'}, None)
+
+        # Test
+        self.assertRaises(mixins.ImporterConduitException, self.mixin.save_units, [unit])
+
     @mock.patch('pulp.server.managers.content.cud.ContentManager.link_referenced_content_units')
     def test_link_unit(self, mock_link):
         # Setup
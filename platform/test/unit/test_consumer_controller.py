@@ -823,6 +823,46 @@ class TestProfiles(base.PulpWebserviceTests):
         self.assertEqual(body['content_type'], self.TYPE_1)
         self.assertEqual(body['profile'], self.PROFILE_1)
 
+    def test_post_hash(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        profile = manager.create(self.CONSUMER_ID, self.TYPE_1, [self.PROFILE_1])
+        # Test
+        path = '/v2/consumers/%s/profiles/' % self.CONSUMER_ID
+        body = dict(content_type=self.TYPE_1, profile_hash=profile['profile_hash'])
+        status, body = self.post(path, body)
+        # Verify
+        self.assertEqual(status, 201)
+        self.assertEqual(body['profile_hash'], profile['profile_hash'])
+        self.assertFalse('profile' in body)
+        # Test
+        body = dict(content_type=self.TYPE_1, profile_hash='stale')
+        status, body = self.post(path, body)
+        # Verify
+        self.assertEqual(status, 409)
+
+    def test_post_delta(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        profile = manager.create(self.CONSUMER_ID, self.TYPE_1, [self.PROFILE_1])
+        # Test
+        path = '/v2/consumers/%s/profiles/' % self.CONSUMER_ID
+        delta = dict(base_hash=profile['profile_hash'], added=[self.PROFILE_2], removed=[])
+        body = dict(content_type=self.TYPE_1, delta=delta)
+        status, body = self.post(path, body)
+        # Verify
+        self.assertEqual(status, 201)
+        profile = manager.get_profile(self.CONSUMER_ID, self.TYPE_1)
+        self.assertEqual(profile['profile'], [self.PROFILE_1, self.PROFILE_2])
+        self.assertEqual(body['profile_hash'], profile['profile_hash'])
+        # Test
+        body = dict(content_type=self.TYPE_1, delta=delta)
+        status, body = self.post(path, body)
+        # Verify
+        self.assertEqual(status, 409)
+
 
 class TestApplicability(base.PulpWebserviceTests):
 
@@ -17,12 +17,19 @@ import traceback
 import unittest
 
 from base import PulpAsyncServerTests
+import mock_agent
+import mock_plugins
+
+from pulp.plugins.loader import api as plugin_api
 
 from pulp.server import exceptions as pulp_exceptions
+from pulp.server.auth import principal
 from pulp.server.db.model.criteria import Criteria
-from pulp.server.db.model.consumer import Consumer, ConsumerGroup
+from pulp.server.db.model.auth import User
+from pulp.server.db.model.consumer import Bind, Consumer, ConsumerGroup, ConsumerHistoryEvent
+from pulp.server.db.model.repository import Repo, RepoDistributor
 from pulp.server.managers import factory as managers_factory
-from pulp.server.managers.consumer.group import cud
+from pulp.server.managers.consumer.group import cud, fanout
 
 
 class ConsumerGroupManagerInstantiationTests(unittest.TestCase):
@@ -215,3 +222,163 @@ class ConsumerGroupMembershipTests(ConsumerGroupTests):
         self.assertTrue(consumer_2['id'] in group['consumer_ids'])
 
 
+class ConsumerGroupContentTests(ConsumerGroupTests):
+
+    GROUP_ID = 'content_group'
+
+    def setUp(self):
+        super(ConsumerGroupContentTests, self).setUp()
+        plugin_api._create_manager()
+        mock_plugins.install()
+        mock_agent.install()
+
+    def tearDown(self):
+        super(ConsumerGroupContentTests, self).tearDown()
+        mock_plugins.reset()
+
+    def populate(self, consumer_ids, missing_ids=()):
+        for consumer_id in consumer_ids:
+            self._create_consumer(consumer_id)
+        self.manager.create_consumer_group(self.GROUP_ID,
+                                           consumer_ids=list(consumer_ids) + list(missing_ids))
+
+    def test_install_content(self):
+        consumer_ids = ['consumer-%d' % i for i in range(15)]
+        self.populate(consumer_ids)
+        units = [{'type_id': 'rpm', 'unit_key': {'name': 'zsh'}}]
+
+        report = self.manager.install_content(self.GROUP_ID, units, {})
+
+        self.assertEqual(15, report['total'])
+        self.assertEqual(15, report['succeeded'])
+        self.assertEqual(0, report['failed'])
+        for consumer_id in consumer_ids:
+            self.assertEqual(fanout.CONSUMER_SUCCEEDED, report['consumers'][consumer_id]['state'])
+        # consumers with the same (empty) profiles share one translation
+        self.assertEqual(1, mock_plugins.MOCK_PROFILER_RPM.install_units.call_count)
+
+    def test_install_content_partial_failure(self):
+        self.populate(['consumer-1', 'consumer-2'], missing_ids=['missing'])
+        units = [{'type_id': 'rpm', 'unit_key': {'name': 'zsh'}}]
+
+        report = self.manager.install_content(self.GROUP_ID, units, {})
+
+        self.assertEqual(3, report['total'])
+        self.assertEqual(2, report['succeeded'])
+        self.assertEqual(1, report['failed'])
+        status = report['consumers']['missing']
+        self.assertEqual(fanout.CONSUMER_FAILED, status['state'])
+        self.assertTrue(status['error'] is not None)
+
+    def test_update_and_uninstall_content(self):
+        self.populate(['consumer-1', 'consumer-2'])
+        units = [{'type_id': 'mock-type', 'unit_key': {'name': 'monster'}}]
+
+        update = self.manager.update_content(self.GROUP_ID, units, {})
+        uninstall = self.manager.uninstall_content(self.GROUP_ID, units, {})
+
+        self.assertEqual(2, update['succeeded'])
+        self.assertEqual(2, uninstall['succeeded'])
+        self.assertEqual(1, mock_plugins.MOCK_PROFILER.update_units.call_count)
+        self.assertEqual(1, mock_plugins.MOCK_PROFILER.uninstall_units.call_count)
+
+    def test_translate_units_by_bindings(self):
+        # consumers with the same (empty) profiles but bound to different
+        # repositories must not share a translation
+        for repo_id in ('repo-1', 'repo-2'):
+            managers_factory.repo_manager().create_repo(repo_id)
+            managers_factory.repo_distributor_manager().add_distributor(
+                repo_id, 'mock-distributor', {}, True, distributor_id='dist-1')
+        consumer_ids = ['consumer-1', 'consumer-2', 'consumer-3']
+        self.populate(consumer_ids)
+        bind_manager = managers_factory.consumer_bind_manager()
+        bind_manager.bind('consumer-1', 'repo-1', 'dist-1')
+        bind_manager.bind('consumer-2', 'repo-2', 'dist-1')
+        bind_manager.bind('consumer-3', 'repo-1', 'dist-1')
+
+        def install_units(consumer, units, options, config, conduit):
+            return [{'type_id': 'rpm', 'unit_key': {'name': r}}
+                    for r in conduit.get_bindings(consumer.id)]
+        mock_plugins.MOCK_PROFILER_RPM.install_units.side_effect = install_units
+        units = [{'type_id': 'rpm', 'unit_key': {'name': 'zsh'}}]
+
+        try:
+            manager = managers_factory.consumer_agent_manager()
+            translated, failed = manager.translate_units('install', consumer_ids, units, {})
+        finally:
+            mock_plugins.MOCK_PROFILER_RPM.install_units.side_effect = None
+            Bind.get_collection().remove(safe=True)
+            RepoDistributor.get_collection().remove(safe=True)
+            Repo.get_collection().remove(safe=True)
+
+        self.assertEqual({}, failed)
+        self.assertEqual([{'type_id': 'rpm', 'unit_key': {'name': 'repo-1'}}], translated['consumer-1'][1])
+        self.assertEqual([{'type_id': 'rpm', 'unit_key': {'name': 'repo-2'}}], translated['consumer-2'][1])
+        self.assertEqual(translated['consumer-1'][1], translated['consumer-3'][1])
+        # consumer-3 shares the translation of consumer-1
+        self.assertEqual(2, mock_plugins.MOCK_PROFILER_RPM.install_units.call_count)
+
+    def test_bind_originator(self):
+        # the bindings are made on the fan out threads, but are recorded in
+        # the consumers' history as made by the user calling the manager
+        managers_factory.repo_manager().create_repo('repo-1')
+        managers_factory.repo_distributor_manager().add_distributor(
+            'repo-1', 'mock-distributor', {}, True, distributor_id='dist-1')
+        consumer_ids = ['consumer-%d' % i for i in range(3)]
+        self.populate(consumer_ids)
+        principal.set_principal(User('group-admin', 'password'))
+
+        try:
+            self.manager.bind(self.GROUP_ID, 'repo-1', 'dist-1')
+            events = list(ConsumerHistoryEvent.get_collection().find({'type': 'repo_bound'}))
+        finally:
+            principal.clear_principal()
+            ConsumerHistoryEvent.get_collection().remove(safe=True)
+            Bind.get_collection().remove(safe=True)
+            RepoDistributor.get_collection().remove(safe=True)
+            Repo.get_collection().remove(safe=True)
+
+        self.assertEqual(3, len(events))
+        for event in events:
+            self.assertEqual('group-admin', event['originator'])
+
+
+class FanOutTests(unittest.TestCase):
+
+    def test_fan_out(self):
+        consumer_ids = ['consumer-%d' % i for i in range(25)]
+        report = fanout.GroupOperationReport(consumer_ids)
+
+        def call(consumer_id):
+            if consumer_id == 'consumer-3':
+                raise ValueError('failed')
+            return consumer_id.upper()
+
+        fanout.fan_out(consumer_ids, call, report, num_threads=4)
+
+        self.assertEqual(24, report.report['succeeded'])
+        self.assertEqual(1, report.report['failed'])
+        self.assertEqual('CONSUMER-0', report.results['consumer-0'])
+        self.assertTrue(isinstance(report.errors['consumer-3'], ValueError))
+        self.assertEqual('failed', report.report['consumers']['consumer-3']['error'])
+
+    def test_fan_out_principal(self):
+        consumer_ids = ['consumer-%d' % i for i in range(5)]
+        report = fanout.GroupOperationReport(consumer_ids)
+        caller = {'login': 'group-admin'}
+        principal.set_principal(caller)
+
+        try:
+            fanout.fan_out(consumer_ids, lambda c: principal.get_principal(), report, num_threads=2)
+        finally:
+            principal.clear_principal()
+
+        for consumer_id in consumer_ids:
+            self.assertTrue(report.results[consumer_id] is caller)
+
+    def test_fan_out_empty(self):
+        report = fanout.GroupOperationReport([])
+
+        fanout.fan_out([], lambda c: None, report)
+
+        self.assertEqual({'total': 0, 'succeeded': 0, 'failed': 0, 'consumers': {}}, report.report)
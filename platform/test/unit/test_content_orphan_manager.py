@@ -17,14 +17,18 @@ import string
 import tempfile
 import traceback
 
+import mock
+
 import base
 
 from pulp.server import exceptions as pulp_exceptions
 from pulp.plugins.types import database as content_type_db
 from pulp.plugins.types.model import TypeDefinition
 from pulp.server.db.model.repository import RepoContentUnit
+from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.managers import factory as manager_factory
-from pulp.server.managers.content.orphan import OrphanManager
+from pulp.server.managers.content import orphan as orphan_module
+from pulp.server.managers.content.orphan import OrphanManager, OrphanedFileRemover
 
 import mock_plugins
 
@@ -149,6 +153,29 @@ class OrphanManagerTests(base.PulpServerTests):
                           self.orphan_manager.get_orphan,
                           PHONY_TYPE_1.id, 'non-existent')
 
+    def test_generate_orphans_batched(self):
+        self.mock(orphan_module, 'ORPHAN_BATCH_SIZE', 2)
+        units = [gen_content_unit(PHONY_TYPE_1.id, self.content_root) for i in range(5)]
+        associate_content_unit_with_repo(units[0])
+        associate_content_unit_with_repo(units[3])
+        orphans = self.orphan_manager.generate_orphans_by_type(PHONY_TYPE_1.id)
+        self.assertFalse(isinstance(orphans, list))
+        orphan_ids = set(o['_id'] for o in orphans)
+        self.assertEqual(set([units[1]['_id'], units[2]['_id'], units[4]['_id']]), orphan_ids)
+
+    def test_generate_orphans_fields(self):
+        gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        orphans = list(self.orphan_manager.generate_all_orphans(fields=['_storage_path']))
+        self.assertEqual(1, len(orphans))
+        self.assertEqual(set(['_id', '_storage_path']), set(orphans[0].keys()))
+
+    def test_get_associated_orphan(self):
+        unit = gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        associate_content_unit_with_repo(unit)
+        self.assertRaises(pulp_exceptions.MissingResource,
+                          self.orphan_manager.get_orphan,
+                          PHONY_TYPE_1.id, unit['_id'])
+
     def test_associated_unit(self):
         unit = gen_content_unit(PHONY_TYPE_1.id, self.content_root)
         associate_content_unit_with_repo(unit)
@@ -186,3 +213,50 @@ class OrphanManagerTests(base.PulpServerTests):
         self.assertTrue(len(orphans) == 0)
         self.assertTrue(self.number_of_files_in_content_root() == 0)
 
+    def test_delete_by_id_missing(self):
+        json_obj = {'content_type_id': PHONY_TYPE_1.id,
+                    'unit_id': 'non-existent'}
+        self.assertRaises(pulp_exceptions.MissingResource,
+                          self.orphan_manager.delete_orphans_by_id, [json_obj])
+
+    def test_delete_by_type_batched(self):
+        self.mock(orphan_module, 'ORPHAN_BATCH_SIZE', 2)
+        units = [gen_content_unit(PHONY_TYPE_1.id, self.content_root) for i in range(5)]
+        associate_content_unit_with_repo(units[2])
+        self.orphan_manager.delete_orphans_by_type(PHONY_TYPE_1.id)
+        orphans = self.orphan_manager.list_all_orphans()
+        self.assertEqual(0, len(orphans))
+        self.assertEqual(1, self.number_of_files_in_content_root())
+        self.assertTrue(os.path.exists(units[2]['_storage_path']))
+
+    def test_delete_progress(self):
+        context = dispatch_factory.context()
+        self.mock(context, 'report_progress')
+        gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        gen_content_unit(PHONY_TYPE_2.id, self.content_root)
+        self.orphan_manager.delete_all_orphans()
+        progress = context.report_progress.call_args[0][0]
+        self.assertEqual({'units_deleted': 1, 'files_deleted': 1}, progress[PHONY_TYPE_1.id])
+        self.assertEqual({'units_deleted': 1, 'files_deleted': 1}, progress[PHONY_TYPE_2.id])
+
+# file remover tests -----------------------------------------------------------
+
+class OrphanedFileRemoverTests(base.PulpServerTests):
+
+    def test_remove(self):
+        delete_file = mock.Mock()
+        remover = OrphanedFileRemover(delete_file, num_threads=3)
+        paths = ['/tmp/orphan-%d' % i for i in range(10)]
+        for path in paths:
+            remover.add(path)
+        remover.finish()
+        self.assertEqual(10, remover.deleted)
+        self.assertEqual(set(paths), set(c[0][0] for c in delete_file.call_args_list))
+
+    def test_error(self):
+        delete_file = mock.Mock(side_effect=OSError())
+        remover = OrphanedFileRemover(delete_file, num_threads=1)
+        remover.add('/tmp/orphan-1')
+        remover.add('/tmp/orphan-2')
+        remover.finish()
+        self.assertEqual(2, remover.deleted)
@@ -12,6 +12,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import hashlib
 import os
 import shutil
 
@@ -20,7 +21,7 @@ import mock_plugins
 
 from   pulp.plugins.model import Repository
 from   pulp.server.db.model.repository import Repo, RepoImporter
-from   pulp.server.exceptions import MissingResource, PulpDataException, PulpExecutionException
+from   pulp.server.exceptions import InvalidValue, MissingResource, PulpDataException, PulpExecutionException
 import pulp.server.managers.factory as manager_factory
 
 class ContentUploadManagerTests(base.PulpServerTests):
@@ -99,6 +100,41 @@ class ContentUploadManagerTests(base.PulpServerTests):
 
         self.assertEqual(expected_size, found_size)
 
+    def test_save_data_out_of_order(self):
+
+        # Test
+        upload_id = self.upload_manager.initialize_upload()
+
+        self.upload_manager.save_data(upload_id, 6, 'ghi')
+        self.upload_manager.save_data(upload_id, 0, 'abc')
+        self.upload_manager.save_data(upload_id, 3, 'def')
+
+        # Verify
+        written = self.upload_manager.read_upload(upload_id)
+        self.assertEqual(written, 'abcdefghi')
+
+    def test_save_data_checksum(self):
+
+        # Test
+        upload_id = self.upload_manager.initialize_upload()
+        self.upload_manager.save_data(upload_id, 0, 'abc', hashlib.sha256('abc').hexdigest())
+
+        # Verify
+        self.assertEqual('abc', self.upload_manager.read_upload(upload_id))
+
+    def test_save_data_checksum_mismatch(self):
+
+        # Test
+        upload_id = self.upload_manager.initialize_upload()
+        try:
+            self.upload_manager.save_data(upload_id, 0, 'abc', hashlib.sha256('abd').hexdigest())
+            self.fail('Expected exception')
+        except InvalidValue, e:
+            self.assertTrue('checksum' in e.property_names)
+
+        # Verify
+        self.assertEqual('', self.upload_manager.read_upload(upload_id))
+
     def test_save_no_init(self):
 
         # Test
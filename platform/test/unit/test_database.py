@@ -15,8 +15,10 @@
 import logging
 
 import base
+import mock
 
 from pulp.server.db import connection
+from pulp.server.db.model import base as model_base
 
 logging.root.setLevel(logging.ERROR)
 qpid = logging.getLogger('qpid.messaging')
@@ -29,6 +31,61 @@ class TestDatabase(base.PulpServerTests):
     def setUp(self):
         base.PulpServerTests.setUp(self)
         logging.root.setLevel(logging.ERROR)
+        model_base.reset_collections()
+
+    def tearDown(self):
+        base.PulpServerTests.tearDown(self)
+        TestModel.get_collection().drop()
+        model_base.reset_collections()
 
     def test_database_name(self):
         self.assertEquals(connection._database.name, self.config.get("database", "name"))
+
+    def test_collection_registry(self):
+        collection_1 = TestModel.get_collection()
+        collection_2 = TestModel.get_collection()
+        self.assertTrue(collection_1 is collection_2)
+
+        indices = collection_1.index_information()
+        self.assertTrue('field_1_-1' in indices)
+        self.assertTrue('field_2_-1' in indices)
+
+        stats = model_base.collection_statistics()['TestModel']
+        self.assertEqual(stats['collection'], 'test_registry')
+        self.assertEqual(stats['hits'], 1)
+
+    @mock.patch.object(model_base.Model, '_get_collection_from_db')
+    def test_collection_registry_provisions_once(self, mock_get):
+        mock_get.return_value = mock.Mock()
+
+        for i in range(3):
+            TestModel.get_collection()
+
+        self.assertEqual(1, mock_get.call_count)
+
+        # re-verifying the indices provisions the collection again
+        TestModel.ensure_indices()
+        self.assertEqual(2, mock_get.call_count)
+
+    def test_collection_registry_reinitialized_database(self):
+        collection_1 = TestModel.get_collection()
+        connection.initialize()
+        collection_2 = TestModel.get_collection()
+        self.assertFalse(collection_1 is collection_2)
+
+    def test_provision_collections(self):
+        model_base.provision_collections()
+        stats = model_base.collection_statistics()
+        self.assertTrue('TestModel' in stats)
+        self.assertEqual(stats['TestModel']['hits'], 0)
+
+    def test_no_collection(self):
+        self.assertTrue(model_base.Model.get_collection() is None)
+        self.assertTrue(model_base.Model.ensure_indices() is None)
+
+
+class TestModel(model_base.Model):
+
+    collection_name = 'test_registry'
+    unique_indices = ('field_1',)
+    search_indices = ('field_2',)
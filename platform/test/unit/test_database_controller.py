@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import base
+
+from pulp.server.db.model.auth import User
+
+class CollectionStatisticsControllerTests(base.PulpWebserviceTests):
+
+    def test_get(self):
+        # Setup
+        User.get_collection()
+        User.get_collection()
+
+        # Test
+        status, body = self.get('/v2/database/collection_statistics/')
+
+        # Verify
+        self.assertEqual(200, status)
+        self.assertEqual('users', body['User']['collection'])
+        self.assertTrue(body['User']['hits'] >= 1)
+        self.assertTrue('provision_time' in body['User'])
+        self.assertTrue('time_saved' in body['User'])
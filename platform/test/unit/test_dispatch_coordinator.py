@@ -55,6 +55,7 @@ class CoordinatorTests(base.PulpServerTests):
         self.coordinator = None
         dispatch_factory._task_queue = self._task_queue_factory
         self._task_queue_factory = None
+        self.coordinator.resource_locks.clear()
         self.collection.drop()
         self.collection = None
 
@@ -204,7 +205,7 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
 
         task_resources = coordinator.resource_dict_to_task_resources(resources)
         coordinator.set_task_id_on_task_resources(task_id, task_resources)
-        self.collection.insert(task_resources, safe=True)
+        self.coordinator.resource_locks.acquire(task_id, task_resources)
 
         response, blockers, reasons, task_resources = self.coordinator._find_conflicts(resources)
 
@@ -227,7 +228,7 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
         }
         existing_task_resources = coordinator.resource_dict_to_task_resources(existing_resources)
         coordinator.set_task_id_on_task_resources(task_id, existing_task_resources)
-        self.collection.insert(existing_task_resources, safe=True)
+        self.coordinator.resource_locks.acquire(task_id, existing_task_resources)
 
         # delete on content unit is postponed by read
 
@@ -270,8 +271,8 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
         coordinator.set_task_id_on_task_resources(task_1, task_1_resources)
         task_2_resources = coordinator.resource_dict_to_task_resources(bind_2_resources)
         coordinator.set_task_id_on_task_resources(task_2, task_2_resources)
-        self.collection.insert(task_1_resources, safe=True)
-        self.collection.insert(task_2_resources, safe=True)
+        self.coordinator.resource_locks.acquire(task_1, task_1_resources)
+        self.coordinator.resource_locks.acquire(task_2, task_2_resources)
 
         # deleting the repository should be postponed by both binds
 
@@ -299,7 +300,7 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
         }
         deletion_task_resources = coordinator.resource_dict_to_task_resources(deletion_resources)
         coordinator.set_task_id_on_task_resources(task_id, deletion_task_resources)
-        self.collection.insert(deletion_task_resources, safe=True)
+        self.coordinator.resource_locks.acquire(task_id, deletion_task_resources)
 
         # a cds sync should be rejected by the deletion
 
@@ -318,6 +319,81 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
         self.assertTrue(task_id in blockers)
         self.assertTrue(reasons)
 
+    def test_released(self):
+        task_id = 'cds_deletion'
+        cds_id = 'less_than_awesome_cds'
+        deletion_resources = {
+            dispatch_constants.RESOURCE_CDS_TYPE: {
+                cds_id: dispatch_constants.RESOURCE_DELETE_OPERATION
+            }
+        }
+        deletion_task_resources = coordinator.resource_dict_to_task_resources(deletion_resources)
+        coordinator.set_task_id_on_task_resources(task_id, deletion_task_resources)
+        self.coordinator.resource_locks.acquire(task_id, deletion_task_resources)
+        self.coordinator.resource_locks.release(task_id)
+
+        resources = {
+            dispatch_constants.RESOURCE_CDS_TYPE: {
+                cds_id: dispatch_constants.RESOURCE_UPDATE_OPERATION
+            }
+        }
+
+        response, blockers, reasons, task_resources = self.coordinator._find_conflicts(resources)
+
+        self.assertTrue(response is dispatch_constants.CALL_ACCEPTED_RESPONSE)
+        self.assertFalse(blockers)
+        self.assertFalse(reasons)
+
+# resource lock table tests ----------------------------------------------------
+
+class ResourceLockTableTests(CoordinatorTests):
+
+    def setUp(self):
+        super(ResourceLockTableTests, self).setUp()
+        self.lock_table = coordinator.ResourceLockTable()
+        resources = {
+            dispatch_constants.RESOURCE_REPOSITORY_TYPE: {
+                'my_repo': dispatch_constants.RESOURCE_UPDATE_OPERATION,
+            },
+            dispatch_constants.RESOURCE_CONTENT_UNIT_TYPE: {
+                'my_content_unit': dispatch_constants.RESOURCE_READ_OPERATION,
+            }
+        }
+        self.task_resources = coordinator.resource_dict_to_task_resources(resources)
+        coordinator.set_task_id_on_task_resources('my_task', self.task_resources)
+
+    def tearDown(self):
+        super(ResourceLockTableTests, self).tearDown()
+        self.lock_table = None
+
+    def test_acquire(self):
+        self.lock_table.acquire('my_task', self.task_resources)
+        holders = self.lock_table.find(dispatch_constants.RESOURCE_REPOSITORY_TYPE, 'my_repo')
+        self.assertEqual(holders, [('my_task', dispatch_constants.RESOURCE_UPDATE_OPERATION)])
+        self.assertEqual(self.lock_table.find(dispatch_constants.RESOURCE_REPOSITORY_TYPE, 'other_repo'), [])
+
+    def test_acquire_mirrored(self):
+        self.lock_table.acquire('my_task', self.task_resources)
+        # the mirror write is unacknowledged, but ordered before this query
+        self.assertEqual(self.collection.find({'task_id': 'my_task'}).count(), 2)
+
+    def test_release(self):
+        self.lock_table.acquire('my_task', self.task_resources)
+        self.lock_table.acquire('other_task', self.task_resources)
+        self.lock_table.release('my_task')
+        holders = self.lock_table.find(dispatch_constants.RESOURCE_REPOSITORY_TYPE, 'my_repo')
+        self.assertEqual(holders, [('other_task', dispatch_constants.RESOURCE_UPDATE_OPERATION)])
+        self.assertEqual(self.collection.find({'task_id': 'my_task'}).count(), 0)
+
+    def test_release_unknown(self):
+        self.lock_table.release('not_a_task')
+
+    def test_clear(self):
+        self.lock_table.acquire('my_task', self.task_resources)
+        self.lock_table.clear()
+        self.assertEqual(self.lock_table.find(dispatch_constants.RESOURCE_REPOSITORY_TYPE, 'my_repo'), [])
+        self.assertEqual(self.collection.count(), 0)
+
 # call execution tests ---------------------------------------------------------
 
 def dummy_call(progress, success, failure):
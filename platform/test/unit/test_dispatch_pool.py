@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import threading
+import time
+
+import base
+
+from pulp.common.tags import action_tag
+from pulp.server.dispatch import constants as dispatch_constants
+from pulp.server.dispatch.call import CallRequest
+from pulp.server.dispatch.pool import WorkerLane, WorkerPool
+from pulp.server.dispatch.task import Task
+
+# test utilities ---------------------------------------------------------------
+
+def call():
+    pass
+
+
+class BlockingTarget(object):
+    """
+    Callable that blocks its worker until released.
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.started.set()
+        self.release.wait(5.0)
+
+
+def wait_for_completed(lane, count, timeout=5.0):
+    deadline = time.time() + timeout
+    while lane.statistics()['completed'] < count and time.time() < deadline:
+        time.sleep(0.01)
+
+# worker lane tests ------------------------------------------------------------
+
+class WorkerLaneTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(WorkerLaneTests, self).setUp()
+        self.lane = WorkerLane('test', 1)
+
+    def tearDown(self):
+        super(WorkerLaneTests, self).tearDown()
+        self.lane.shutdown()
+
+    def test_submit(self):
+        done = threading.Event()
+        self.lane.submit(done.set)
+        done.wait(5.0)
+        self.assertTrue(done.isSet())
+
+    def test_workers_reused(self):
+        threads = []
+        for i in range(3):
+            self.lane.submit(lambda: threads.append(threading.currentThread()))
+        wait_for_completed(self.lane, 3)
+        self.assertEqual(3, len(threads))
+        self.assertEqual(1, len(set(threads)))
+
+    def test_bounded(self):
+        target_1 = BlockingTarget()
+        target_2 = BlockingTarget()
+        self.lane.submit(target_1)
+        self.lane.submit(target_2)
+        target_1.started.wait(5.0)
+        stats = self.lane.statistics()
+        self.assertEqual(1, stats['workers'])
+        self.assertEqual(1, stats['busy_workers'])
+        self.assertEqual(1, stats['queue_depth'])
+        self.assertFalse(target_2.started.isSet())
+        target_1.release.set()
+        target_2.started.wait(5.0)
+        self.assertTrue(target_2.started.isSet())
+        target_2.release.set()
+
+    def test_exception(self):
+        def fail():
+            raise RuntimeError('fail')
+        done = threading.Event()
+        self.lane.submit(fail)
+        self.lane.submit(done.set)
+        done.wait(5.0)
+        self.assertTrue(done.isSet())
+
+    def test_statistics(self):
+        self.lane.submit(lambda: time.sleep(0.1))
+        wait_for_completed(self.lane, 1)
+        stats = self.lane.statistics()
+        self.assertEqual('test', stats['name'])
+        self.assertEqual(1, stats['submitted'])
+        self.assertEqual(1, stats['completed'])
+        self.assertEqual(0, stats['queue_depth'])
+        self.assertTrue(stats['average_execution_time'] >= 0.1)
+        self.assertTrue(stats['max_execution_time'] >= 0.1)
+        self.assertTrue(stats['average_wait_time'] >= 0.0)
+
+# worker pool tests ------------------------------------------------------------
+
+class WorkerPoolTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(WorkerPoolTests, self).setUp()
+        self.pool = WorkerPool(1, 2)
+
+    def tearDown(self):
+        super(WorkerPoolTests, self).tearDown()
+        self.pool.shutdown()
+
+    def test_lane_name(self):
+        sync_task = Task(CallRequest(call, tags=[action_tag('sync')]))
+        publish_task = Task(CallRequest(call, tags=[action_tag('publish')]))
+        create_task = Task(CallRequest(call, tags=[action_tag('create')]))
+        self.assertEqual(dispatch_constants.WORKER_LANE_LONG_RUNNING, self.pool.lane_name(sync_task))
+        self.assertEqual(dispatch_constants.WORKER_LANE_LONG_RUNNING, self.pool.lane_name(publish_task))
+        self.assertEqual(dispatch_constants.WORKER_LANE_SHORT_RUNNING, self.pool.lane_name(create_task))
+
+    def test_task_run(self):
+        task = Task(CallRequest(call))
+        task.run(self.pool)
+        self.assertTrue(task.wait_for_state(dispatch_constants.CALL_COMPLETE_STATES, 5.0))
+        lane = self.pool.lanes[dispatch_constants.WORKER_LANE_SHORT_RUNNING]
+        wait_for_completed(lane, 1)
+        self.assertEqual(1, lane.statistics()['completed'])
+
+    def test_task_cancel_waiting_for_worker(self):
+        blocker = BlockingTarget()
+        canceled_calls = []
+        sync_tags = [action_tag('sync')]
+        running_task = Task(CallRequest(blocker, tags=sync_tags))
+        waiting_task = Task(CallRequest(lambda: canceled_calls.append(1), tags=sync_tags))
+        running_task.run(self.pool)
+        blocker.started.wait(5.0)
+        self.assertTrue(blocker.started.isSet())
+        waiting_task.run(self.pool)
+        # the long running lane's only worker is busy
+        self.assertEqual(dispatch_constants.CALL_WAITING_STATE, waiting_task.call_report.state)
+        self.assertTrue(waiting_task.cancel())
+        self.assertEqual(dispatch_constants.CALL_CANCELED_STATE, waiting_task.call_report.state)
+        blocker.release.set()
+        self.assertTrue(running_task.wait_for_state(dispatch_constants.CALL_COMPLETE_STATES, 5.0))
+        lane = self.pool.lanes[dispatch_constants.WORKER_LANE_LONG_RUNNING]
+        wait_for_completed(lane, 2)
+        self.assertEqual(dispatch_constants.CALL_CANCELED_STATE, waiting_task.call_report.state)
+        self.assertEqual([], canceled_calls)
+
+    def test_statistics(self):
+        stats = self.pool.statistics()
+        self.assertEqual(2, len(stats))
+        self.assertEqual(set(dispatch_constants.WORKER_LANES), set(s['name'] for s in stats))
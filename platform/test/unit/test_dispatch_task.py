@@ -12,6 +12,7 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import datetime
+import threading
 import traceback
 import types
 
@@ -151,6 +152,22 @@ class TaskTests(base.PulpServerTests):
         for h in hooks:
             self.assertTrue(h.call_count == 1)
 
+    def test_wait_for_state(self):
+        thread = threading.Thread(target=self.task._run)
+        thread.start()
+        reached = self.task.wait_for_state(dispatch_constants.CALL_COMPLETE_STATES, 5.0)
+        thread.join()
+        self.assertTrue(reached)
+        self.assertTrue(self.call_report.state in dispatch_constants.CALL_COMPLETE_STATES)
+
+    def test_wait_for_state_already_reached(self):
+        reached = self.task.wait_for_state([dispatch_constants.CALL_WAITING_STATE])
+        self.assertTrue(reached)
+
+    def test_wait_for_state_timeout(self):
+        reached = self.task.wait_for_state(dispatch_constants.CALL_COMPLETE_STATES, 0.1)
+        self.assertFalse(reached)
+
 # run failure testing ----------------------------------------------------------
 
 class FailTests(base.PulpServerTests):
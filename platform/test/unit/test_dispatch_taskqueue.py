@@ -224,6 +224,41 @@ class TaskQueueControlFlowTests(TaskQueueTests):
         self.assertTrue(task_1 in task_list)
         self.assertFalse(task_2 in task_list)
 
+    def test_get_ready_tasks_weights(self):
+        task_1 = self.gen_task()
+        task_1.call_request.weight = 2
+        task_2 = self.gen_task()
+        task_2.call_request.weight = 0
+        task_3 = self.gen_task()
+        task_3.call_request.weight = 1
+        for t in (task_1, task_2, task_3):
+            self.queue.enqueue(t)
+        task_list = self.queue._get_ready_tasks()
+        # enqueue order is preserved across the different weights
+        self.assertEqual([task_1.id, task_2.id], [t.id for t in task_list])
+
+    def test_get_ready_tasks_unblocked(self):
+        task_1 = self.gen_task()
+        task_2 = self.gen_task()
+        task_2.blocking_tasks.add(task_1.id)
+        self.queue.enqueue(task_1)
+        self.queue.enqueue(task_2)
+        self.queue.dequeue(task_1)
+        task_list = self.queue._get_ready_tasks()
+        self.assertTrue(task_2 in task_list)
+        self.assertEqual(0, len(task_2.blocking_tasks))
+
+    def test_cancel_waiting_task(self):
+        task_1 = self.gen_task()
+        task_2 = self.gen_task()
+        self.queue.enqueue(task_1)
+        self.queue.enqueue(task_2)
+        self.queue.cancel(task_1)
+        self.assertEqual(0, self.queue._TaskQueue__running_weight)
+        task_list = self.queue._get_ready_tasks()
+        self.assertFalse(task_1 in task_list)
+        self.assertTrue(task_2 in task_list)
+
     def test_run_ready_task(self):
         task = self.gen_async_task()
         self.queue.enqueue(task)
@@ -285,6 +320,48 @@ class TaskQueueControlFlowTests(TaskQueueTests):
         self.queue.dequeue(task_1)
         self.assertFalse(task_1.id in task_2.blocking_tasks)
 
+# task queue dispatcher tests --------------------------------------------------
+
+class TaskQueueDispatchTests(TaskQueueTests):
+
+    def setUp(self):
+        super(TaskQueueDispatchTests, self).setUp()
+        # a long interval ensures the dispatcher is only woken up by events
+        self.queue = TaskQueue(2, dispatch_interval=60)
+        self.queue.start()
+
+    def tearDown(self):
+        self.queue.stop()
+        super(TaskQueueDispatchTests, self).tearDown()
+
+    def test_dispatch_on_enqueue(self):
+        task = self.gen_task()
+        self.queue.enqueue(task)
+        self.assertTrue(task.wait_for_state(dispatch_constants.CALL_COMPLETE_STATES, 5.0))
+
+    def test_dispatch_on_complete(self):
+        task_1 = self.gen_async_task()
+        task_1.call_request.weight = 2
+        task_2 = self.gen_task()
+        task_2.call_request.weight = 2
+        self.queue.enqueue(task_1)
+        self.queue.enqueue(task_2)
+        self.assertTrue(task_1.wait_for_state([dispatch_constants.CALL_RUNNING_STATE], 5.0))
+        self.assertTrue(task_2.call_report.state in dispatch_constants.CALL_READY_STATES)
+        task_1._succeeded()
+        self.assertTrue(task_2.wait_for_state(dispatch_constants.CALL_COMPLETE_STATES, 5.0))
+
+    def test_dispatch_on_unblock(self):
+        task_1 = self.gen_async_task()
+        task_2 = self.gen_task()
+        task_2.blocking_tasks.add(task_1.id)
+        self.queue.enqueue(task_1)
+        self.queue.enqueue(task_2)
+        self.assertTrue(task_1.wait_for_state([dispatch_constants.CALL_RUNNING_STATE], 5.0))
+        self.assertFalse(task_2.wait_for_state(dispatch_constants.CALL_COMPLETE_STATES, 0.2))
+        task_1._succeeded()
+        self.assertTrue(task_2.wait_for_state(dispatch_constants.CALL_COMPLETE_STATES, 5.0))
+
 # task queue query tests -------------------------------------------------------
 
 class TaskQueueQueryTests(TaskQueueTests):
@@ -14,21 +14,35 @@
 from email.parser import Parser
 import smtplib
 import unittest
-import dummy_threading
 
 import mock
 
 from pulp.server.compat import json
 from pulp.server.config import config
-from pulp.server.event import data, mail
+from pulp.server.event import data, delivery, mail
 from pulp.server.managers import factory
 
 
-class TestSendEmail(unittest.TestCase):
+class EmailNotifierTests(unittest.TestCase):
+    def setUp(self):
+        # deliveries are made by a queue retrying immediately and without
+        # connections left open by other tests
+        self.queue = delivery.DeliveryQueue(1, 2, 0)
+        self.patcher = mock.patch('pulp.server.event.delivery._QUEUE', self.queue)
+        self.patcher.start()
+        mail._CONNECTIONS.clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+        mail._CONNECTIONS.clear()
+
+
+class TestSendEmail(EmailNotifierTests):
     @mock.patch('smtplib.SMTP')
     def test_basic(self, mock_smtp):
         # send a message
-        mail._send_email('hello', 'stuff', 'someone@some.domain')
+        undelivered = mail._send_emails([('hello', 'stuff', 'someone@some.domain')])
+        self.assertEqual([], undelivered)
         mock_smtp.assert_called_once_with(host=config.get('email', 'host'),
             port=config.getint('email', 'port'))
 
@@ -50,19 +64,46 @@ class TestSendEmail(unittest.TestCase):
     @mock.patch('logging.Logger.error')
     def test_connect_failure(self, mock_error, mock_smtp):
         mock_smtp.side_effect = smtplib.SMTPConnectError(123, 'aww crap')
-        mail._send_email('hello', 'stuff', 'someone@some.domain')
+        messages = [('hello', 'stuff', 'someone@some.domain')]
+        undelivered = mail._send_emails(messages)
         self.assertTrue(mock_error.called)
+        # retried by the delivery queue
+        self.assertEqual(messages, undelivered)
 
     @mock.patch('smtplib.SMTP')
     @mock.patch('logging.Logger.error')
     def test_send_failure(self, mock_error, mock_smtp):
         mock_smtp.return_value.sendmail.side_effect = smtplib.SMTPRecipientsRefused(['someone@some.domain'])
-        mail._send_email('hello', 'stuff', 'someone@some.domain')
+        undelivered = mail._send_emails([('hello', 'stuff', 'someone@some.domain')])
         self.assertTrue(mock_error.called)
+        # not retried
+        self.assertEqual([], undelivered)
 
+    @mock.patch('smtplib.SMTP')
+    @mock.patch('logging.Logger.error')
+    def test_disconnected(self, mock_error, mock_smtp):
+        sent = []
+        def sendmail(from_address, to_address, message):
+            if sent:
+                raise smtplib.SMTPServerDisconnected()
+            sent.append(to_address)
+        mock_smtp.return_value.sendmail.side_effect = sendmail
+        messages = [('hello', 'stuff', 'user%d@some.domain' % i) for i in range(3)]
+        undelivered = mail._send_emails(messages)
+        self.assertTrue(mock_error.called)
+        self.assertEqual(messages[1:], undelivered)
+
+    @mock.patch('smtplib.SMTP')
+    def test_connection_reused(self, mock_smtp):
+        mail._send_emails([('hello', 'stuff', 'user1@some.domain')])
+        mail._send_emails([('hello', 'stuff', 'user2@some.domain')])
+        self.assertEqual(1, mock_smtp.call_count)
+        self.assertEqual(2, mock_smtp.return_value.sendmail.call_count)
 
-class TestHandleEvent(unittest.TestCase):
+
+class TestHandleEvent(EmailNotifierTests):
     def setUp(self):
+        super(TestHandleEvent, self).setUp()
         self.notifier_config = {
             'subject': 'hello',
             'addresses': ['user1@some.domain', 'user2@some.domain']
@@ -70,23 +111,23 @@ class TestHandleEvent(unittest.TestCase):
         self.event = mock.MagicMock()
         self.event.payload = 'stuff'
 
-    # don't actually spawn a thread
-    @mock.patch('threading.Thread', new=dummy_threading.Thread)
     @mock.patch('ConfigParser.SafeConfigParser.getboolean', return_value=False)
     @mock.patch('smtplib.SMTP')
     def test_email_disabled(self, mock_smtp, mock_getbool):
         mail.handle_event(self.notifier_config, self.event)
+        self.queue.wait(5)
         self.assertFalse(mock_smtp.called)
 
-    # don't actually spawn a thread
-    @mock.patch('threading.Thread', new=dummy_threading.Thread)
     @mock.patch('ConfigParser.SafeConfigParser.getboolean', return_value=True)
     @mock.patch('smtplib.SMTP')
     def test_email_enabled(self, mock_smtp, mock_getbool):
         mail.handle_event(self.notifier_config, self.event)
+        self.queue.wait(5)
 
         #verify
-        self.assertEqual(mock_smtp.call_count, 2)
+        self.assertEqual(mock_smtp.call_count, 1)
+        mock_sendmail = mock_smtp.return_value.sendmail
+        self.assertEqual(mock_sendmail.call_count, 2)
         mock_sendmail = mock_smtp.return_value.sendmail
         self.assertEqual(mock_sendmail.call_args[0][0],
             config.get('email', 'from'))
@@ -100,10 +141,11 @@ class TestHandleEvent(unittest.TestCase):
         self.assertTrue(message.get('To', None) in self.notifier_config['addresses'])
 
 
-class TestSystem(unittest.TestCase):
+class TestSystem(EmailNotifierTests):
     # test integration with the event system
 
     def setUp(self):
+        super(TestSystem, self).setUp()
         self.notifier_config = {
             'subject': 'hello',
             'addresses': ['user1@some.domain', 'user2@some.domain']
@@ -114,8 +156,6 @@ class TestSystem(unittest.TestCase):
             'notifier_config' : self.notifier_config,
         }
 
-    # don't actually spawn a thread
-    @mock.patch('threading.Thread', new=dummy_threading.Thread)
     # don't actually send any email
     @mock.patch('smtplib.SMTP')
     # act as if the config has email enabled
@@ -128,8 +168,9 @@ class TestSystem(unittest.TestCase):
         event = data.Event(data.TYPE_REPO_SYNC_FINISHED, 'stuff')
         factory.initialize()
         factory.event_fire_manager()._do_fire(event)
+        self.queue.wait(5)
 
         # verify that the mail event handler was called and processed something
-        self.assertTrue(mock_smtp.return_value.sendmail.call_count, 2)
+        self.assertEqual(mock_smtp.return_value.sendmail.call_count, 2)
 
 
@@ -157,4 +157,17 @@ class EventResourceControllerTests(base.PulpWebserviceTests):
         self.assertEqual(200, status)
 
         updated = EventListener.get_collection().find_one({'_id' : ObjectId(created['_id'])})
-        self.assertEqual(updated['event_types'], new_event_types)
\ No newline at end of file
+        self.assertEqual(updated['event_types'], new_event_types)
+
+
+class EventDeliveryStatisticsControllerTests(base.PulpWebserviceTests):
+
+    def test_get(self):
+        # Test
+        status, body = self.get('/v2/events/delivery_statistics/')
+
+        # Verify
+        self.assertEqual(200, status)
+        self.assertTrue('queued' in body)
+        self.assertTrue('in_progress' in body)
+        self.assertTrue('notifiers' in body)
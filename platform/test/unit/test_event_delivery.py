@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import threading
+import unittest
+
+import mock
+
+from pulp.server.event import delivery
+
+
+class DeliveryQueueTests(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = delivery.DeliveryQueue(1, 3, 0)
+        self.sent = []
+
+    def send(self, items):
+        self.sent.append(list(items))
+
+    def test_deliver(self):
+        # Test
+        self.queue.put(delivery.Delivery('type-1', 'a', self.send))
+        self.queue.put(delivery.Delivery('type-1', 'b', self.send))
+
+        # Verify
+        self.assertTrue(self.queue.wait(5))
+        self.assertEqual([['a'], ['b']], self.sent)
+
+        stats = self.queue.statistics()
+        self.assertEqual(0, stats['queued'])
+        self.assertEqual(0, stats['in_progress'])
+        self.assertEqual(2, stats['notifiers']['type-1']['delivered'])
+        self.assertEqual(0, stats['notifiers']['type-1']['failed'])
+        latency = stats['notifiers']['type-1']['latency']
+        self.assertTrue(latency['max'] >= latency['average'] > 0)
+
+    def test_batch(self):
+        # Setup
+        gate = threading.Event()
+        self.queue.put(delivery.Delivery('type-1', 'blocking', lambda items: gate.wait() and None))
+
+        # Test
+        for item in range(5):
+            self.queue.put(delivery.Delivery('type-2', item, self.send, batch_key='k', batch_size=2))
+        self.queue.put(delivery.Delivery('type-2', 'other', self.send, batch_key='o', batch_size=2))
+        gate.set()
+
+        # Verify
+        self.assertTrue(self.queue.wait(5))
+        self.assertEqual([[0, 1], [2, 3], [4], ['other']], self.sent)
+
+    def test_retry(self):
+        # Setup
+        def send(items):
+            self.sent.append(items)
+            if len(self.sent) < 3:
+                raise delivery.DeliveryFailed('unavailable')
+
+        # Test
+        self.queue.put(delivery.Delivery('type-1', 'a', send))
+
+        # Verify
+        self.assertTrue(self.queue.wait(5))
+        self.assertEqual(3, len(self.sent))
+        stats = self.queue.statistics()['notifiers']['type-1']
+        self.assertEqual(1, stats['delivered'])
+        self.assertEqual(2, stats['retried'])
+
+    def test_retry_delay(self):
+        # Setup
+        queue = delivery.DeliveryQueue(1, 3, 10)
+        d = delivery.Delivery('type-1', 'a', mock.Mock(side_effect=Exception()))
+
+        # Test
+        queue.put(d)
+
+        # Verify
+        self.assertFalse(queue.wait(.5))
+        self.assertEqual(1, d.attempts)
+        self.assertEqual(1, queue.statistics()['queued'])
+
+    def test_partial_retry(self):
+        # Setup
+        def send(items):
+            self.sent.append(list(items))
+            return [i for i in items if i == 'b']
+
+        gate = threading.Event()
+        self.queue.put(delivery.Delivery('type-1', 'blocking', lambda items: gate.wait() and None))
+
+        # Test
+        for item in ('a', 'b'):
+            self.queue.put(delivery.Delivery('type-2', item, send, batch_key='k', batch_size=2))
+        gate.set()
+
+        # Verify
+        self.assertTrue(self.queue.wait(5))
+        self.assertEqual([['a', 'b'], ['b'], ['b']], self.sent)
+        stats = self.queue.statistics()['notifiers']['type-2']
+        self.assertEqual(1, stats['delivered'])
+        self.assertEqual(2, stats['retried'])
+        self.assertEqual(1, stats['failed'])
+
+    def test_rejected(self):
+        # Setup
+        send = mock.Mock(side_effect=delivery.DeliveryRejected('refused'))
+
+        # Test
+        self.queue.put(delivery.Delivery('type-1', 'a', send))
+
+        # Verify
+        self.assertTrue(self.queue.wait(5))
+        self.assertEqual(1, send.call_count)
+        stats = self.queue.statistics()['notifiers']['type-1']
+        self.assertEqual(0, stats['delivered'])
+        self.assertEqual(0, stats['retried'])
+        self.assertEqual(1, stats['failed'])
+
+
+class ConnectionPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        self.connect = mock.Mock(side_effect=lambda endpoint: mock.Mock())
+        self.close = mock.Mock()
+        self.pool = delivery.ConnectionPool(self.connect, self.close)
+
+    def test_reuse(self):
+        # Test
+        connection, reused = self.pool.get('a')
+        self.pool.release('a', connection)
+        connection_2, reused_2 = self.pool.get('a')
+        connection_3, reused_3 = self.pool.get('a')
+
+        # Verify
+        self.assertFalse(reused)
+        self.assertTrue(reused_2)
+        self.assertTrue(connection is connection_2)
+        self.assertFalse(reused_3)
+        self.assertEqual(2, self.connect.call_count)
+
+    def test_endpoints(self):
+        # Test
+        connection, reused = self.pool.get('a')
+        self.pool.release('a', connection)
+        connection_2, reused_2 = self.pool.get('b')
+
+        # Verify
+        self.assertFalse(reused_2)
+        self.assertTrue(connection is not connection_2)
+
+    def test_expired(self):
+        # Setup
+        self.pool.keep_alive = 0
+        connection, reused = self.pool.get('a')
+        self.pool.release('a', connection)
+
+        # Test
+        connection_2, reused_2 = self.pool.get('a')
+
+        # Verify
+        self.assertFalse(reused_2)
+        self.close.assert_called_once_with(connection)
+
+    def test_clear(self):
+        # Setup
+        connection, reused = self.pool.get('a')
+        self.pool.release('a', connection)
+
+        # Test
+        self.pool.clear()
+
+        # Verify
+        self.close.assert_called_once_with(connection)
+        self.assertFalse(self.pool.get('a')[1])
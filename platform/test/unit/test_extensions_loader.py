@@ -13,7 +13,9 @@
 
 # Python
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from pulp.client.extensions import loader
@@ -32,6 +34,9 @@ PARTIAL_FAIL_SET = TEST_DIRS_ROOT + '/partial_fail_set'
 # Contains 1 plugin which fails the initial import step
 PARTIAL_FAIL_SET_2 = TEST_DIRS_ROOT + '/partial_fail_set_2'
 
+# Contains 3 plugins, one of which (mext2) adds to the section created by mext1
+MANIFEST_SET = TEST_DIRS_ROOT + '/manifest_set'
+
 # Not meant to be loaded as a base directory, each should be loaded individually
 # through _load_pack to verify the proper exception case is raised
 INDIVIDUAL_FAIL_DIR = TEST_DIRS_ROOT + '/individual_fail_extensions'
@@ -140,3 +145,107 @@ class ExtensionLoaderTests(unittest.TestCase):
         mod = __import__('no_init_function')
 
         self.assertRaises(loader.NoInitFunction, loader._load_pack, INDIVIDUAL_FAIL_DIR, mod, self.context)
+
+
+class ExtensionManifestTests(unittest.TestCase):
+
+    def setUp(self):
+        super(ExtensionManifestTests, self).setUp()
+
+        # Copied so the tests can modify the packs
+        self.working_dir = tempfile.mkdtemp(prefix='extensions-manifest-')
+        self.extensions_dir = os.path.join(self.working_dir, 'extensions')
+        shutil.copytree(MANIFEST_SET, self.extensions_dir)
+        self.manifest_filename = os.path.join(self.working_dir, 'manifest')
+
+        self.cli, self.context = self._context()
+
+    def tearDown(self):
+        super(ExtensionManifestTests, self).tearDown()
+        shutil.rmtree(self.working_dir)
+
+    def _context(self):
+        prompt = PulpPrompt()
+        cli = PulpCli(prompt)
+        return cli, ClientContext(None, None, None, prompt, None, cli=cli)
+
+    def _load(self, args):
+        cli, context = self._context()
+        loader.load_extensions(self.extensions_dir, context, self.manifest_filename, args)
+        return sorted(cli.root_section.subsections.keys())
+
+    def test_manifest_written(self):
+        # Test
+        loader.load_extensions(self.extensions_dir, self.context, self.manifest_filename, [])
+
+        # Verify
+        self.assertTrue(os.path.exists(self.manifest_filename))
+        signature = loader._extensions_signature(self.extensions_dir)
+        manifest = loader._read_manifest(self.manifest_filename, self.extensions_dir, signature)
+        packs = [(p['name'], p['names']) for p in manifest['packs']]
+        self.assertEqual([('mext1', ['section-1']),
+                          ('mext3', ['section-3']),
+                          ('mext2', ['section-1', 'section-2'])], packs)
+
+    def test_load_single_pack(self):
+        # Setup
+        self._load([])
+
+        # Test
+        sections = self._load(['section-3', 'command'])
+
+        # Verify
+        self.assertEqual(['section-3'], sections)
+
+    def test_load_with_owner(self):
+        # Setup
+        self._load([])
+
+        # Test
+        sections = self._load(['section-2'])
+
+        # Verify
+        self.assertEqual(['section-1', 'section-2'], sections)
+
+    def test_load_contributors(self):
+        # Setup
+        self._load([])
+
+        # Test
+        cli, context = self._context()
+        loader.load_extensions(self.extensions_dir, context, self.manifest_filename, ['section-1'])
+
+        # Verify
+        self.assertTrue(cli.find_section('section-1').find_subsection('section-2a') is not None)
+        self.assertTrue(cli.find_section('section-3') is None)
+
+    def test_load_unknown_name(self):
+        # Setup
+        self._load([])
+
+        # Test
+        sections = self._load(['foo'])
+
+        # Verify
+        self.assertEqual(['section-1', 'section-2', 'section-3'], sections)
+
+    def test_no_manifest(self):
+        # Test
+        sections = self._load(['section-3'])
+
+        # Verify
+        self.assertEqual(['section-1', 'section-2', 'section-3'], sections)
+        self.assertTrue(os.path.exists(self.manifest_filename))
+
+    def test_stale_manifest(self):
+        # Setup
+        self._load([])
+        init_filename = os.path.join(self.extensions_dir, 'mext3', '__init__.py')
+        mtime = os.stat(init_filename).st_mtime
+        os.utime(init_filename, (mtime + 10, mtime + 10))
+
+        # Test
+        sections = self._load(['section-3'])
+
+        # Verify
+        self.assertEqual(['section-1', 'section-2', 'section-3'], sections)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the License
+# (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied, including implied
+# warranties of MERCHANTABILITY, NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR
+# PURPOSE. You should have received a copy of GPLv2 along with this software;
+# if not, see http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import mock
+
+import base
+
+from pulp.server.db import connection
+from pulp.server.db.migrate import utils, validate
+from pulp.server.db.model.base import Model
+
+# -- test model ---------------------------------------------------------------
+
+class MigrateTestModel(Model):
+
+    collection_name = 'test_migrate'
+
+    def __init__(self, name, count=0):
+        super(MigrateTestModel, self).__init__()
+        self.name = name
+        self.count = count
+        self.enabled = True
+
+# -- tests --------------------------------------------------------------------
+
+class MigrateUtilsTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(MigrateUtilsTests, self).setUp()
+        self.collection = connection.get_collection('test_migrate')
+        for i in range(10):
+            doc = {'_id' : i, 'name' : 'doc-%d' % i}
+            if i % 2:
+                doc['flag'] = 'odd'
+            self.collection.insert(doc, safe=True)
+
+    def tearDown(self):
+        super(MigrateUtilsTests, self).tearDown()
+        self.collection.drop()
+        connection.get_collection(utils.CHECKPOINT_COLLECTION).drop()
+
+    def test_add_field_with_default_value(self):
+        utils.add_field_with_default_value(self.collection, 'flag', 'even')
+
+        for doc in self.collection.find():
+            expected = doc['_id'] % 2 and 'odd' or 'even'
+            self.assertEqual(expected, doc['flag'])
+
+    def test_delete_field(self):
+        utils.delete_field(self.collection, 'flag')
+
+        self.assertEqual(0, self.collection.find({'flag' : {'$exists' : True}}).count())
+        self.assertEqual(10, self.collection.find({'name' : {'$exists' : True}}).count())
+
+    def test_change_field_type_with_default_value(self):
+        self.collection.update({'_id' : 1}, {'$set' : {'flag' : True}}, safe=True)
+
+        utils.change_field_type_with_default_value(self.collection, 'flag', bool, False)
+
+        self.assertEqual(True, self.collection.find_one({'_id' : 1})['flag'])
+        self.assertEqual(False, self.collection.find_one({'_id' : 3})['flag'])
+        self.assertFalse('flag' in self.collection.find_one({'_id' : 2}))
+
+    def test_change_field_type_scanned(self):
+        self.collection.update({'_id' : 1}, {'$set' : {'flag' : [1]}}, safe=True)
+
+        utils.change_field_type_with_default_value(self.collection, 'flag', list, [])
+
+        self.assertEqual([1], self.collection.find_one({'_id' : 1})['flag'])
+        self.assertEqual([], self.collection.find_one({'_id' : 3})['flag'])
+
+    def test_add_field_with_calculated_value(self):
+        utils.add_field_with_calculated_value(self.collection, 'index', lambda m: m['_id'] % 3, batch_size=4)
+
+        for doc in self.collection.find():
+            self.assertEqual(doc['_id'] % 3, doc['index'])
+        self.assertEqual(None, utils.get_checkpoint(self.collection, 'index'))
+
+    def test_add_field_with_calculated_value_resumed(self):
+        calls = []
+        def callback(model):
+            calls.append(model['_id'])
+            if len(calls) == 6:
+                raise ValueError()
+            return model['_id'] * 2
+
+        self.assertRaises(ValueError, utils.add_field_with_calculated_value,
+                          self.collection, 'double', callback, 4)
+        # the first batch was completed and recorded
+        self.assertEqual(3, utils.get_checkpoint(self.collection, 'double'))
+
+        calls[:] = []
+        utils.add_field_with_calculated_value(self.collection, 'double', lambda m: calls.append(m['_id']) or m['_id'] * 2)
+
+        self.assertEqual(range(4, 10), calls)
+        for doc in self.collection.find():
+            self.assertEqual(doc['_id'] * 2, doc['double'])
+        self.assertEqual(None, utils.get_checkpoint(self.collection, 'double'))
+
+    def test_iterate_batches(self):
+        batches = list(utils.iterate_batches(self.collection, {'flag' : 'odd'}, fields=['name'], batch_size=2))
+
+        self.assertEqual([[1, 3], [5, 7], [9]], [[d['_id'] for d in b] for b in batches])
+        self.assertFalse('flag' in batches[0][0])
+
+
+class ValidateModelTests(base.PulpServerTests):
+
+    def tearDown(self):
+        super(ValidateModelTests, self).tearDown()
+        MigrateTestModel.get_collection().drop()
+
+    def test_valid(self):
+        collection = MigrateTestModel.get_collection()
+        for i in range(5):
+            collection.save(MigrateTestModel('model-%d' % i, i), safe=True)
+
+        errors = validate._validate_model('MigrateTestModel', collection, MigrateTestModel(''))
+
+        self.assertEqual(0, errors)
+
+    def test_invalid(self):
+        collection = MigrateTestModel.get_collection()
+        for i in range(5):
+            collection.save(MigrateTestModel('model-%d' % i, i), safe=True)
+        collection.update({'name' : 'model-0'}, {'$unset' : {'enabled' : 1}}, safe=True)
+        collection.update({'name' : 'model-1'}, {'$set' : {'enabled' : 'yes'}}, safe=True)
+        collection.update({'name' : 'model-2'}, {'$set' : {'count' : 'two'}}, safe=True)
+
+        errors = validate._validate_model('MigrateTestModel', collection, MigrateTestModel(''))
+
+        self.assertEqual(3, errors)
+
+    def test_values(self):
+        collection = MigrateTestModel.get_collection()
+        collection.save(MigrateTestModel('a'), safe=True)
+        collection.save(MigrateTestModel('b'), safe=True)
+
+        errors = validate._validate_model('MigrateTestModel', collection, MigrateTestModel(''),
+                                          values={'name' : [u'a']})
+
+        self.assertEqual(1, errors)
@@ -12,14 +12,22 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import mock
+
 import base
 
 from pulp.server.managers import factory as manager_factory
+from pulp.server.managers.auth import password
 
 class PasswordManagerTests(base.PulpServerTests):
     def setUp(self):
         super(PasswordManagerTests, self).setUp()
         self.password_manager = manager_factory.password_manager()
+        password._VERIFIED_CACHE.clear()
+
+    def tearDown(self):
+        super(PasswordManagerTests, self).tearDown()
+        password._VERIFIED_CACHE.clear()
 
     def test_unicode_password(self):
         password = u"some password"
@@ -35,3 +43,55 @@ class PasswordManagerTests(base.PulpServerTests):
         password = "some password"
         hashed = self.password_manager.hash_password(password)
         self.assertTrue(self.password_manager.check_password(hashed, password))
+
+    def test_check_password_wrong(self):
+        hashed = self.password_manager.hash_password("some password")
+        self.assertFalse(self.password_manager.check_password(hashed, "other password"))
+        self.assertFalse(self.password_manager.check_password(hashed, "other password"))
+        self.assertEqual(0, len(password._VERIFIED_CACHE))
+
+    def test_check_password_cached(self):
+        hashed = self.password_manager.hash_password("some password")
+        self.assertTrue(self.password_manager.check_password(hashed, "some password", "user"))
+        with mock.patch.object(self.password_manager, 'pbkdf_sha256') as mock_pbkdf:
+            self.assertTrue(self.password_manager.check_password(hashed, "some password", "user"))
+            self.assertFalse(mock_pbkdf.called)
+            # the cache entry only matches the same login, password and saved entry
+            mock_pbkdf.return_value = 'not the hash'
+            self.assertFalse(self.password_manager.check_password(hashed, "some password", "other"))
+            self.assertFalse(self.password_manager.check_password(hashed, "other password", "user"))
+            rehashed = self.password_manager.hash_password("some password")
+            self.assertFalse(self.password_manager.check_password(rehashed, "some password", "user"))
+
+    def test_check_password_expired(self):
+        hashed = self.password_manager.hash_password("some password")
+        self.assertTrue(self.password_manager.check_password(hashed, "some password", "user"))
+        with mock.patch('time.time') as mock_time:
+            mock_time.return_value = 2 ** 40
+            with mock.patch.object(self.password_manager, 'pbkdf_sha256') as mock_pbkdf:
+                mock_pbkdf.return_value = 'not the hash'
+                self.assertFalse(self.password_manager.check_password(hashed, "some password", "user"))
+
+    def test_check_password_cache_disabled(self):
+        hashed = self.password_manager.hash_password("some password")
+        with mock.patch.object(password, 'VERIFIED_CACHE_TTL', 0):
+            self.assertTrue(self.password_manager.check_password(hashed, "some password", "user"))
+        self.assertEqual(0, len(password._VERIFIED_CACHE))
+
+    def test_check_password_cache_bounded(self):
+        hashed = self.password_manager.hash_password("some password")
+        with mock.patch.object(password, 'VERIFIED_CACHE_MAX_ENTRIES', 2):
+            for login in ('a', 'b', 'c'):
+                self.assertTrue(self.password_manager.check_password(hashed, "some password", login))
+            self.assertTrue(len(password._VERIFIED_CACHE) <= 2)
+
+    def test_invalidate_verified(self):
+        hashed = self.password_manager.hash_password("some password")
+        self.password_manager.check_password(hashed, "some password", "user")
+        self.password_manager.check_password(hashed, "some password", "other")
+        self.password_manager.invalidate_verified("user")
+        self.assertEqual(1, len(password._VERIFIED_CACHE))
+        with mock.patch.object(self.password_manager, 'pbkdf_sha256') as mock_pbkdf:
+            mock_pbkdf.return_value = 'not the hash'
+            self.assertFalse(self.password_manager.check_password(hashed, "some password", "user"))
+            self.assertTrue(self.password_manager.check_password(hashed, "some password", "other"))
@@ -18,9 +18,10 @@ import string
 
 from pulp.server.auth import principal
 from pulp.server.auth import authorization
+from pulp.server.auth import permission_cache
 from pulp.server.managers import factory as manager_factory
 
-from pulp.server.db.model.auth import Role
+from pulp.server.db.model.auth import Permission, PermissionsGeneration, Role
 
 
 # -- test cases ---------------------------------------------------------------
@@ -155,4 +156,54 @@ class RoleManagerTests(base.PulpServerTests):
         self.assertTrue(self.user_query_manager.is_authorized(r, u['login'], o))
         
 
+    def test_unnormalized_resource_ignored(self):
+        u = self._create_user()
+        r = self._create_resource()
+        o = authorization.READ
+        self.permission_manager.grant(r.rstrip('/'), u['login'], [o])
+        self.assertFalse(self.user_query_manager.is_authorized(r, u['login'], o))
+
+    def test_user_permissions_revoked_on_delete(self):
+        u = self._create_user()
+        r = self._create_resource()
+        o = authorization.READ
+        self.permission_manager.grant(r, u['login'], [o])
+        self.assertTrue(self.user_query_manager.is_authorized(r, u['login'], o))
+        self.permission_manager.revoke_all_permissions_from_user(u['login'])
+        self.assertFalse(self.user_query_manager.is_authorized(r, u['login'], o))
+
+    def test_superuser_role_membership(self):
+        u = self._create_user()
+        r = self._create_resource()
+        o = authorization.DELETE
+        self.assertFalse(self.user_query_manager.is_superuser(u['login']))
+        self.role_manager.add_user_to_role(self.role_manager.super_user_role, u['login'])
+        self.assertTrue(self.user_query_manager.is_superuser(u['login']))
+        self.assertTrue(self.user_query_manager.is_authorized(r, u['login'], o))
+
+    def test_local_change_keeps_cache(self):
+        u = self._create_user()
+        r = self._create_resource()
+        o = authorization.READ
+        self.assertFalse(self.user_query_manager.is_authorized(r, u['login'], o))
+        generation = permission_cache._CACHE._generation
+        self.permission_manager.grant(r, u['login'], [o])
+        # the cache was updated in place rather than discarded
+        self.assertTrue(permission_cache._CACHE._tree is not None)
+        self.assertTrue(permission_cache._CACHE._generation > generation)
+        self.assertTrue(self.user_query_manager.is_authorized(r, u['login'], o))
 
+    def test_other_process_change(self):
+        u = self._create_user()
+        r = self._create_resource()
+        o = authorization.READ
+        self.assertFalse(self.user_query_manager.is_authorized(r, u['login'], o))
+
+        # simulate another process granting the permission
+        Permission.get_collection().save(Permission(r, {u['login'] : [o]}), safe=True)
+        PermissionsGeneration.get_collection().update({'_id' : PermissionsGeneration.DOCUMENT_ID},
+                                                      {'$inc' : {'generation' : 1}},
+                                                      upsert=True, safe=True)
+        permission_cache._CACHE._last_check = 0
+
+        self.assertTrue(self.user_query_manager.is_authorized(r, u['login'], o))
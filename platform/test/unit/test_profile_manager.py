@@ -15,9 +15,11 @@
 import base
 import pymongo
 
+from pulp.common import profiles as profile_utils
 from pulp.server.db.model.consumer import Consumer, UnitProfile
 from pulp.server.exceptions import MissingResource
 from pulp.server.managers import factory
+from pulp.server.managers.consumer.profile import ProfileHashMismatch
 
 # -- test cases ---------------------------------------------------------------
 
@@ -185,4 +187,62 @@ class ProfileManagerTests(base.PulpServerTests):
         collection = UnitProfile.get_collection()
         cursor = collection.find({'consumer_id':self.CONSUMER_ID})
         profiles = list(cursor)
-        self.assertEquals(len(profiles), 0)
\ No newline at end of file
+        self.assertEquals(len(profiles), 0)
+
+    def test_hash(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        # Test
+        p = manager.update(self.CONSUMER_ID, self.TYPE_1, self.PROFILE_1)
+        # Verify
+        self.assertEquals(p['profile_hash'], profile_utils.profile_hash(self.PROFILE_1))
+        manager.verify(self.CONSUMER_ID, self.TYPE_1, p['profile_hash'])
+        self.assertRaises(
+            ProfileHashMismatch,
+            manager.verify,
+            self.CONSUMER_ID,
+            self.TYPE_1,
+            profile_utils.profile_hash(self.PROFILE_2))
+        self.assertRaises(
+            ProfileHashMismatch,
+            manager.verify,
+            self.CONSUMER_ID,
+            self.TYPE_2,
+            p['profile_hash'])
+
+    def test_update_delta(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        old = [self.PROFILE_1, self.PROFILE_3]
+        new = [self.PROFILE_2, self.PROFILE_3]
+        p = manager.update(self.CONSUMER_ID, self.TYPE_1, old)
+        # Test
+        added, removed = profile_utils.profile_delta(old, new)
+        new_hash = profile_utils.profile_hash(new)
+        manager.update_delta(self.CONSUMER_ID, self.TYPE_1, p['profile_hash'], added, removed, new_hash)
+        # Verify
+        p = manager.get_profile(self.CONSUMER_ID, self.TYPE_1)
+        self.assertEquals(p['profile_hash'], new_hash)
+        self.assertEquals(profile_utils.profile_hash(p['profile']), new_hash)
+        self.assertEquals(sorted(p['profile']), sorted(new))
+
+    def test_update_delta_stale(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        old = [self.PROFILE_1]
+        manager.update(self.CONSUMER_ID, self.TYPE_1, [self.PROFILE_3])
+        # Test
+        self.assertRaises(
+            ProfileHashMismatch,
+            manager.update_delta,
+            self.CONSUMER_ID,
+            self.TYPE_1,
+            profile_utils.profile_hash(old),
+            [self.PROFILE_2],
+            [self.PROFILE_1])
+        # Verify
+        p = manager.get_profile(self.CONSUMER_ID, self.TYPE_1)
+        self.assertEquals(p['profile'], [self.PROFILE_3])
@@ -1131,7 +1131,7 @@ class RepoUnitAssociationQueryTests(RepoControllersTests):
         """
 
         # Setup
-        self.association_query_mock.get_units_by_type.return_value = []
+        self.association_query_mock.get_units_by_type_iter.return_value = []
 
         query = {
             'type_ids' : ['rpm'],
@@ -1158,10 +1158,10 @@ class RepoUnitAssociationQueryTests(RepoControllersTests):
         # Verify
         self.assertEqual(200, status)
 
-        self.assertEqual(0, self.association_query_mock.get_units_across_types.call_count)
-        self.assertEqual(1, self.association_query_mock.get_units_by_type.call_count)
+        self.assertEqual(0, self.association_query_mock.get_units_across_types_iter.call_count)
+        self.assertEqual(1, self.association_query_mock.get_units_by_type_iter.call_count)
 
-        criteria = self.association_query_mock.get_units_by_type.call_args[1]['criteria']
+        criteria = self.association_query_mock.get_units_by_type_iter.call_args[1]['criteria']
         self.assertTrue(isinstance(criteria, UnitAssociationCriteria))
         self.assertEqual(query['type_ids'], criteria.type_ids)
         self.assertEqual(query['filters']['association'], criteria.association_filters)
@@ -1180,7 +1180,7 @@ class RepoUnitAssociationQueryTests(RepoControllersTests):
         """
 
         # Setup
-        self.association_query_mock.get_units_across_types.return_value = []
+        self.association_query_mock.get_units_across_types_iter.return_value = []
 
         query = {'type_ids' : ['rpm', 'errata']}
 
@@ -1190,9 +1190,9 @@ class RepoUnitAssociationQueryTests(RepoControllersTests):
         # Verify
         self.assertEqual(200, status)
 
-        self.assertEqual(0, self.association_query_mock.get_units_by_type.call_count)
-        self.assertEqual(1, self.association_query_mock.get_units_across_types.call_count)
-        self.assertTrue(isinstance(self.association_query_mock.get_units_across_types.call_args[1]['criteria'], UnitAssociationCriteria))
+        self.assertEqual(0, self.association_query_mock.get_units_by_type_iter.call_count)
+        self.assertEqual(1, self.association_query_mock.get_units_across_types_iter.call_count)
+        self.assertTrue(isinstance(self.association_query_mock.get_units_across_types_iter.call_args[1]['criteria'], UnitAssociationCriteria))
 
     def test_post_missing_query(self):
         # Test
@@ -19,7 +19,7 @@ import mock_plugins
 
 from pulp.common import dateutils
 from pulp.plugins.model import PublishReport
-from pulp.server.db.model.repository import Repo, RepoDistributor, RepoPublishResult
+from pulp.server.db.model.repository import Repo, RepoDistributor, RepoPublishResult, RepoSyncResult
 import pulp.server.managers.repo.cud as repo_manager
 import pulp.server.managers.repo.distributor as distributor_manager
 import pulp.server.managers.repo.publish as publish_manager
@@ -46,6 +46,7 @@ class RepoSyncManagerTests(base.PulpServerTests):
         Repo.get_collection().remove()
         RepoDistributor.get_collection().remove()
         RepoPublishResult.get_collection().remove()
+        RepoSyncResult.get_collection().remove()
 
     @mock.patch('pulp.server.managers.event.fire.EventFireManager.fire_repo_publish_started')
     @mock.patch('pulp.server.managers.event.fire.EventFireManager.fire_repo_publish_finished')
@@ -276,7 +277,7 @@ class RepoSyncManagerTests(base.PulpServerTests):
         # Cleanup
         mock_plugins.MOCK_DISTRIBUTOR.publish_repo.side_effect = None
 
-    def _test_auto_publish_for_repo(self):
+    def test_auto_publish_for_repo(self):
         """
         Tests automatically publishing for a repo that has both auto and non-auto
         distributors configured.
@@ -294,6 +295,38 @@ class RepoSyncManagerTests(base.PulpServerTests):
         self.assertEqual(1, mock_plugins.MOCK_DISTRIBUTOR.publish_repo.call_count)
         self.assertEqual(0, mock_plugins.MOCK_DISTRIBUTOR_2.publish_repo.call_count)
 
+    def test_auto_publish_for_repo_timing(self):
+        """
+        Tests that all auto distributors are published and their timing is
+        recorded on the latest sync history entry.
+        """
+
+        # Setup
+        self.repo_manager.create_repo('publish-me')
+        self.distributor_manager.add_distributor('publish-me', 'mock-distributor', {}, True, 'auto-1')
+        self.distributor_manager.add_distributor('publish-me', 'mock-distributor-2', {}, True, 'auto-2')
+        sync_result_coll = RepoSyncResult.get_collection()
+        for completed in ('2012-01-01T00:00:00Z', '2012-01-02T00:00:00Z'):
+            sync_result_coll.save(RepoSyncResult('publish-me', 'imp', 'mock-importer', completed, completed,
+                                                 RepoSyncResult.RESULT_SUCCESS), safe=True)
+
+        # Test
+        timings = self.publish_manager.auto_publish_for_repo('publish-me')
+
+        # Verify
+        self.assertEqual(1, mock_plugins.MOCK_DISTRIBUTOR.publish_repo.call_count)
+        self.assertEqual(1, mock_plugins.MOCK_DISTRIBUTOR_2.publish_repo.call_count)
+        self.assertEqual(['auto-1', 'auto-2'], sorted(timings.keys()))
+
+        latest = sync_result_coll.find_one({'completed' : '2012-01-02T00:00:00Z'})
+        self.assertEqual(['auto-1', 'auto-2'], sorted(latest['auto_publish'].keys()))
+        for timing in latest['auto_publish'].values():
+            self.assertEqual(RepoPublishResult.RESULT_SUCCESS, timing['result'])
+            self.assertTrue(timing['started'] is not None)
+            self.assertTrue(timing['completed'] is not None)
+        previous = sync_result_coll.find_one({'completed' : '2012-01-01T00:00:00Z'})
+        self.assertEqual({}, previous['auto_publish'])
+
     def test_auto_publish_no_repo(self):
         """
         Tests that calling auto publish on a repo that doesn't exist or one that
@@ -106,6 +106,41 @@ class RepoSyncConduitTests(base.PulpServerTests):
         db_unit = self.query_manager.get_content_unit_by_id(TYPE_1_DEF.id, unit_1.id)
         self.assertTrue(db_unit is not None)
 
+    def test_save_remove_units(self):
+        """
+        Tests saving and removing units in bulk through the conduit.
+        """
+
+        # Setup
+        units = []
+        for i in range(0, 5):
+            unit_key = {'key-1' : 'unit_%d' % i}
+            units.append(self.conduit.init_unit(TYPE_1_DEF.id, unit_key, {}, '/foo/bar'))
+
+        # Test - save_units
+        self.conduit.save_units(units)
+
+        #   Verify the units were created and associated
+        for u in units:
+            self.assertTrue(u.id is not None)
+        associated_units = list(RepoContentUnit.get_collection().find({'repo_id' : 'repo-1'}))
+        self.assertEqual(5, len(associated_units))
+        repo = Repo.get_collection().find_one({'id' : 'repo-1'})
+        self.assertEqual(5, repo['content_unit_count'])
+
+        # Test - remove_units
+        self.conduit.remove_units(units[:3])
+
+        #   Verify
+        associated_units = list(RepoContentUnit.get_collection().find({'repo_id' : 'repo-1'}))
+        self.assertEqual(2, len(associated_units))
+        repo = Repo.get_collection().find_one({'id' : 'repo-1'})
+        self.assertEqual(2, repo['content_unit_count'])
+
+        report = self.conduit.build_success_report('summary', 'details')
+        self.assertEqual(5, report.added_count)
+        self.assertEqual(3, report.removed_count)
+
     def test_build_reports(self):
         """
         Tests that the conduit correctly inserts the count values into the report.
@@ -150,3 +185,12 @@ class RepoSyncConduitTests(base.PulpServerTests):
 
         # Test
         self.assertRaises(ImporterConduitException, self.conduit.remove_unit, None)
+
+    def test_remove_units_with_error(self):
+        # Setup
+        self.conduit._association_manager = mock.Mock()
+        self.conduit._association_manager.unassociate_all_by_ids.side_effect = Exception()
+        unit = self.conduit.init_unit(TYPE_1_DEF.id, {'key-1' : 'unit_1'}, {}, None)
+
+        # Test
+        self.assertRaises(ImporterConduitException, self.conduit.remove_units, [unit])
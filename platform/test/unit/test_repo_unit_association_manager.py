@@ -418,6 +418,57 @@ class RepoUnitAssociationManagerTests(base.PulpServerTests):
 
         mock_call.assert_called_once_with(self.repo_id, 2)
 
+    @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_unit_count')
+    def test_associate_all_existing_associations(self, mock_call):
+        """
+        Makes sure units already associated by the same owner are not
+        associated again and units associated by another owner are not
+        counted again.
+        """
+        self.manager.associate_unit_by_id(self.repo_id, 'type-1', 'foo', OWNER_TYPE_USER, 'admin')
+        self.manager.associate_unit_by_id(self.repo_id, 'type-1', 'bar', OWNER_TYPE_USER, 'admin2')
+        mock_call.reset_mock()
+
+        self.manager.associate_all_by_ids(
+            self.repo_id, 'type-1', ['foo', 'bar', 'baz'], OWNER_TYPE_USER, 'admin')
+
+        mock_call.assert_called_once_with(self.repo_id, 1)
+
+        unit_coll = RepoContentUnit.get_collection()
+        self.assertEqual(1, unit_coll.find({'repo_id' : self.repo_id, 'unit_id' : 'foo'}).count())
+        self.assertEqual(2, unit_coll.find({'repo_id' : self.repo_id, 'unit_id' : 'bar'}).count())
+        self.assertEqual(1, unit_coll.find({'repo_id' : self.repo_id, 'unit_id' : 'baz'}).count())
+
+    @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_unit_count')
+    def test_associate_all_batches(self, mock_call):
+        self.mock(association_manager, 'ASSOCIATION_BATCH_SIZE', 2)
+        ids = ['unit-%d' % i for i in range(5)]
+
+        self.manager.associate_all_by_ids(self.repo_id, 'type-1', ids, OWNER_TYPE_USER, 'admin')
+
+        mock_call.assert_called_once_with(self.repo_id, 5)
+        repo_units = list(RepoContentUnit.get_collection().find({'repo_id' : self.repo_id}))
+        self.assertEqual(sorted(ids), sorted([u['unit_id'] for u in repo_units]))
+
+    def test_associate_all_invalid_owner_type(self):
+        self.assertRaises(exceptions.InvalidValue, self.manager.associate_all_by_ids, self.repo_id, 'type-1', ['unit-1'], 'bad-owner', 'irrelevant')
+
+    @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_unit_count')
+    def test_unassociate_all_batches(self, mock_call):
+        self.mock(association_manager, 'ASSOCIATION_BATCH_SIZE', 2)
+        ids = ['unit-%d' % i for i in range(5)]
+        self.manager.associate_all_by_ids(self.repo_id, 'type-1', ids, OWNER_TYPE_USER, 'admin')
+        self.manager.associate_unit_by_id(self.repo_id, 'type-1', 'unit-0', OWNER_TYPE_USER, 'admin2')
+        mock_call.reset_mock()
+
+        self.manager.unassociate_all_by_ids(self.repo_id, 'type-1', ids, OWNER_TYPE_USER, 'admin', notify_plugins=False)
+
+        # unit-0 is still associated through admin2
+        mock_call.assert_called_once_with(self.repo_id, -4)
+        repo_units = list(RepoContentUnit.get_collection().find({'repo_id' : self.repo_id}))
+        self.assertEqual(1, len(repo_units))
+        self.assertEqual('admin2', repo_units[0]['owner_id'])
+
     def test_unassociate_all(self):
         """
         Tests unassociating multiple units in a single call.
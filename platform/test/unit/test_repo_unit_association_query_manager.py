@@ -597,6 +597,179 @@ class UnitAssociationQueryTests(base.PulpServerTests):
         for u in units:
             self.assertTrue(u['metadata']['key_1'] != 'aardvark')
 
+    def test_get_units_across_types_batched_lookup(self):
+        # Setup
+        self.mock(association_query_manager, 'UNIT_LOOKUP_BATCH_SIZE', 2)
+        type_collections = {}
+        original_collection = database.type_units_collection
+
+        def _wrapped_collection(type_id):
+            collection = original_collection(type_id)
+            spy = mock.MagicMock(wraps=collection)
+            type_collections.setdefault(type_id, []).append(spy)
+            return spy
+
+        self.mock(association_query_manager.types_db, 'type_units_collection', _wrapped_collection)
+
+        # Test
+        units = self.manager.get_units_across_types('repo-1')
+
+        # Verify
+        self.assertEqual(len(units), self.repo_1_count)
+        for u in units:
+            self._assert_unit_integrity(u)
+        self._assert_default_sort(units)
+
+        # One collection lookup per type, one find per chunk, no find_one calls
+        self.assertEqual(set(['alpha', 'beta', 'gamma']), set(type_collections.keys()))
+        for type_id, collections in type_collections.items():
+            self.assertEqual(1, len(collections))
+            self.assertEqual(0, collections[0].find_one.call_count)
+            expected_finds = (len(self.units[type_id]) + 1) / 2
+            self.assertEqual(expected_finds, collections[0].find.call_count)
+
+    def test_get_units_across_types_duplicates_not_shared(self):
+        # Test
+        units = self.manager.get_units_across_types('repo-1', UnitAssociationCriteria(type_ids=['gamma']))
+
+        # Verify
+        self.assertEqual(2 * len(self.units['gamma']), len(units))
+        metadata_ids = set([id(u['metadata']) for u in units])
+        self.assertEqual(len(units), len(metadata_ids))
+
+    def test_get_units_by_type_association_sort_unit_filter(self):
+        # Test
+        criteria = UnitAssociationCriteria(association_sort=[('created', association_manager.SORT_ASCENDING)],
+                                           unit_filters={'md_2' : 0})
+        units = self.manager.get_units_by_type('repo-1', 'alpha', criteria)
+
+        # Verify
+        self.assertEqual(len(self.units['alpha']), len(units))
+        for i in range(0, len(units) - 1):
+            self.assertTrue(units[i]['created'] <= units[i+1]['created'])
+
+        for u in units:
+            if u['unit_id'] in ('aardvark', 'apple'):
+                self.assertEqual(0, u['metadata']['md_2'])
+            else:
+                self.assertTrue(u['metadata'] is None)
+
+    def test_get_units_across_types_iter(self):
+        # Setup
+        self.mock(association_query_manager, 'UNIT_MERGE_BATCH_SIZE', 2)
+
+        # Test
+        units_iter = self.manager.get_units_across_types_iter('repo-1')
+
+        # Verify
+        self.assertFalse(isinstance(units_iter, list))
+        units = list(units_iter)
+        self.assertEqual(self.repo_1_count, len(units))
+        for u in units:
+            self._assert_unit_integrity(u)
+        self._assert_default_sort(units)
+
+    def test_get_units_by_type_iter(self):
+        # Test
+        criteria = UnitAssociationCriteria(unit_sort=[('key_1', association_manager.SORT_DESCENDING)])
+        units_iter = self.manager.get_units_by_type_iter('repo-1', 'alpha', criteria)
+
+        # Verify
+        self.assertFalse(isinstance(units_iter, list))
+        units = list(units_iter)
+        expected = self.manager.get_units_by_type('repo-1', 'alpha', criteria)
+        self.assertEqual([u['unit_id'] for u in expected], [u['unit_id'] for u in units])
+        for u in units:
+            self._assert_unit_integrity(u)
+
+    # -- get_units_iter tests -------------------------------------------------
+
+    def test_get_units_iter(self):
+        # Test
+        units_iter = self.manager.get_units_iter('repo-1', batch_size=2)
+
+        # Verify
+        self.assertFalse(isinstance(units_iter, list))
+        units = list(units_iter)
+        self.assertEqual(self.repo_1_count, len(units))
+        for u in units:
+            self._assert_unit_integrity(u)
+        self._assert_default_sort(units)
+
+        expected = self.manager.get_units_across_types('repo-1')
+        self.assertEqual([(u['unit_type_id'], u['unit_id']) for u in expected],
+                         [(u['unit_type_id'], u['unit_id']) for u in units])
+
+    def test_get_units_iter_batched_lookup(self):
+        # Setup
+        finds = []
+        original_collection = database.type_units_collection
+
+        def _wrapped_collection(type_id):
+            collection = original_collection(type_id)
+            spy = mock.MagicMock(wraps=collection)
+            finds.append(spy.find)
+            return spy
+
+        self.mock(association_query_manager.types_db, 'type_units_collection', _wrapped_collection)
+
+        # Test
+        units_iter = self.manager.get_units_iter('repo-1', batch_size=3)
+        first = units_iter.next()
+
+        # Verify - only the first batch has been looked up
+        self.assertEqual('alpha', first['unit_type_id'])
+        self.assertEqual(1, len(finds))
+
+        remaining = list(units_iter)
+        self.assertEqual(self.repo_1_count - 1, len(remaining))
+
+    def test_get_units_iter_filter_type(self):
+        # Test
+        criteria = UnitAssociationCriteria(type_ids=['alpha', 'beta'])
+        units = list(self.manager.get_units_iter('repo-1', criteria, batch_size=2))
+
+        # Verify
+        expected_count = reduce(lambda x, y: x + len(self.units[y]), ['alpha', 'beta'], 0)
+        self.assertEqual(expected_count, len(units))
+        for u in units:
+            self.assertTrue(u['unit_type_id'] in ['alpha', 'beta'])
+
+    def test_get_units_iter_unit_filter(self):
+        # Test
+        criteria = UnitAssociationCriteria(type_ids=['alpha'], unit_filters={'md_2' : 0},
+                                           unit_fields=['md_2'])
+        units = list(self.manager.get_units_iter('repo-1', criteria, batch_size=2))
+
+        # Verify
+        self.assertEqual(['aardvark', 'apple'], sorted([u['unit_id'] for u in units]))
+        for u in units:
+            self.assertEqual(0, u['metadata']['md_2'])
+            self.assertFalse('md_1' in u['metadata'])
+
+    def test_get_units_iter_limit_skip(self):
+        # Test
+        criteria = UnitAssociationCriteria(limit=3, skip=1)
+        units = list(self.manager.get_units_iter('repo-1', criteria, batch_size=2))
+
+        # Verify
+        expected = self.manager.get_units_across_types('repo-1')[1:4]
+        self.assertEqual([u['unit_id'] for u in expected], [u['unit_id'] for u in units])
+
+    def test_get_units_iter_remove_duplicates(self):
+        # Test
+        criteria = UnitAssociationCriteria(remove_duplicates=True)
+        units = list(self.manager.get_units_iter('repo-1', criteria, batch_size=1))
+
+        # Verify
+        self.assertEqual(self.repo_1_count_no_dupes, len(units))
+
+        # The user associations for gamma are older and should be kept
+        gamma_units = [u for u in units if u['unit_type_id'] == 'gamma']
+        self.assertEqual(len(self.units['gamma']), len(gamma_units))
+        for u in gamma_units:
+            self.assertEqual(OWNER_TYPE_USER, u['owner_type'])
+
     def test_remove_duplicates(self):
         # Setup
         def unit(unit_type_id, unit_id, created):
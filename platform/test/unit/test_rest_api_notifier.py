@@ -11,17 +11,31 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import errno
 import httplib
 import mock
-import time
+import socket
+import threading
 import unittest
 from pulp.server.compat import json
 
-from pulp.server.event import rest_api
+from pulp.server.event import delivery, rest_api
 from pulp.server.event.data import Event
 
 class RestApiNotifierTests(unittest.TestCase):
 
+    def setUp(self):
+        # deliveries are made by a queue retrying immediately and without
+        # connections left open by other tests
+        self.queue = delivery.DeliveryQueue(1, 2, 0)
+        self.patcher = mock.patch('pulp.server.event.delivery._QUEUE', self.queue)
+        self.patcher.start()
+        rest_api._CONNECTIONS.clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+        rest_api._CONNECTIONS.clear()
+
     @mock.patch('pulp.server.event.rest_api._create_connection')
     def test_handle_event(self, mock_create):
         # Setup
@@ -43,7 +57,7 @@ class RestApiNotifierTests(unittest.TestCase):
 
         # Test
         rest_api.handle_event(notifier_config, event)
-        time.sleep(.5) # handle works in a thread so give it a bit to finish
+        self.queue.wait(5) # handle works in a thread so give it a bit to finish
 
         # Verify
         self.assertEqual(1, mock_create.call_count)
@@ -80,11 +94,207 @@ class RestApiNotifierTests(unittest.TestCase):
 
         # Test
         rest_api.handle_event(notifier_config, event) # should not error
-        time.sleep(.5)
+        self.queue.wait(5)
+
+        # Verify
+        self.assertEqual(1, mock_create.call_count)
+        self.assertEqual(1, mock_connection.request.call_count)
+
+    @mock.patch('pulp.server.event.rest_api._create_connection')
+    def test_handle_event_server_error(self, mock_create):
+        # Setup
+        notifier_config = {'url' : 'https://localhost/api/'}
+
+        mock_connection = mock.Mock()
+        mock_response = mock.Mock()
+
+        mock_response.status = httplib.SERVICE_UNAVAILABLE
+
+        mock_connection.getresponse.return_value = mock_response
+        mock_create.return_value = mock_connection
+
+        # Test
+        rest_api.handle_event(notifier_config, Event('type-1', {'k1' : 'v1'}))
+        self.queue.wait(5)
+
+        # Verify
+        self.assertEqual(2, mock_connection.request.call_count)
+        stats = self.queue.statistics()['notifiers'][rest_api.TYPE_ID]
+        self.assertEqual(1, stats['retried'])
+        self.assertEqual(1, stats['failed'])
+
+    @mock.patch('pulp.server.event.rest_api._create_connection')
+    def test_handle_event_keep_alive(self, mock_create):
+        # Setup
+        notifier_config = {'url' : 'http://localhost/api/'}
+
+        mock_connection = mock.Mock()
+        mock_response = mock.Mock()
+
+        mock_response.status = httplib.OK
+        mock_response.will_close = False
+
+        mock_connection.getresponse.return_value = mock_response
+        mock_create.return_value = mock_connection
+
+        # Test
+        rest_api.handle_event(notifier_config, Event('type-1', {'k1' : 'v1'}))
+        self.queue.wait(5)
+        rest_api.handle_event(notifier_config, Event('type-1', {'k1' : 'v2'}))
+        self.queue.wait(5)
 
         # Verify
         self.assertEqual(1, mock_create.call_count)
+        self.assertEqual(2, mock_connection.request.call_count)
+        self.assertFalse(mock_connection.close.called)
+
+    @mock.patch('pulp.server.event.rest_api._create_connection')
+    def test_handle_event_stale_connection(self, mock_create):
+        # Setup
+        notifier_config = {'url' : 'http://localhost/api/'}
+
+        stale_connection = mock.Mock()
+        stale_connection.request.side_effect = httplib.BadStatusLine('')
+        rest_api._CONNECTIONS.release(('http:', 'localhost'), stale_connection)
+
+        mock_connection = mock.Mock()
+        mock_response = mock.Mock()
+        mock_response.status = httplib.OK
+        mock_connection.getresponse.return_value = mock_response
+        mock_create.return_value = mock_connection
+
+        # Test
+        rest_api.handle_event(notifier_config, Event('type-1', {'k1' : 'v1'}))
+        self.queue.wait(5)
+
+        # Verify
+        self.assertTrue(stale_connection.close.called)
+        self.assertEqual(1, mock_connection.request.call_count)
+        stats = self.queue.statistics()['notifiers'][rest_api.TYPE_ID]
+        self.assertEqual(0, stats['retried'])
+        self.assertEqual(1, stats['delivered'])
+
+    @mock.patch('pulp.server.event.rest_api._create_connection')
+    def test_handle_event_stale_connection_no_response(self, mock_create):
+        # Setup
+        notifier_config = {'url' : 'http://localhost/api/'}
+
+        stale_connection = mock.Mock()
+        stale_connection.getresponse.side_effect = httplib.BadStatusLine('')
+        rest_api._CONNECTIONS.release(('http:', 'localhost'), stale_connection)
+
+        mock_connection = mock.Mock()
+        mock_response = mock.Mock()
+        mock_response.status = httplib.OK
+        mock_connection.getresponse.return_value = mock_response
+        mock_create.return_value = mock_connection
+
+        # Test
+        rest_api.handle_event(notifier_config, Event('type-1', {'k1' : 'v1'}))
+        self.queue.wait(5)
+
+        # Verify
+        self.assertEqual(1, mock_connection.request.call_count)
+        stats = self.queue.statistics()['notifiers'][rest_api.TYPE_ID]
+        self.assertEqual(0, stats['retried'])
+        self.assertEqual(1, stats['delivered'])
+
+    @mock.patch('pulp.server.event.rest_api._create_connection')
+    def test_handle_event_reused_connection_reset(self, mock_create):
+        # Setup
+        notifier_config = {'url' : 'http://localhost/api/'}
+
+        # the events may have been received before the connection was reset
+        reset_connection = mock.Mock()
+        reset_connection.getresponse.side_effect = socket.error(errno.ECONNRESET, 'Connection reset by peer')
+        rest_api._CONNECTIONS.release(('http:', 'localhost'), reset_connection)
+
+        mock_connection = mock.Mock()
+        mock_response = mock.Mock()
+        mock_response.status = httplib.OK
+        mock_connection.getresponse.return_value = mock_response
+        mock_create.return_value = mock_connection
+
+        # Test
+        rest_api.handle_event(notifier_config, Event('type-1', {'k1' : 'v1'}))
+        self.queue.wait(5)
+
+        # Verify: the delivery is not resent right away but left to the queue
+        self.assertTrue(reset_connection.close.called)
+        stats = self.queue.statistics()['notifiers'][rest_api.TYPE_ID]
+        self.assertEqual(1, stats['retried'])
+        self.assertEqual(1, stats['delivered'])
+
+    @mock.patch('pulp.server.event.rest_api._create_connection')
+    def test_handle_event_no_content(self, mock_create):
+        # Setup
+        notifier_config = {'url' : 'https://localhost/api/'}
+
+        mock_connection = mock.Mock()
+        mock_response = mock.Mock()
+
+        mock_response.status = httplib.NO_CONTENT
+
+        mock_connection.getresponse.return_value = mock_response
+        mock_create.return_value = mock_connection
+
+        # Test
+        rest_api.handle_event(notifier_config, Event('type-1', {'k1' : 'v1'}))
+        self.queue.wait(5)
+
+        # Verify
+        self.assertEqual(1, mock_connection.request.call_count)
+        stats = self.queue.statistics()['notifiers'][rest_api.TYPE_ID]
+        self.assertEqual(1, stats['delivered'])
+        self.assertEqual(0, stats['failed'])
+
+    @mock.patch('pulp.server.event.rest_api._create_connection')
+    def test_handle_event_batch(self, mock_create):
+        # Setup
+        notifier_config = {'url' : 'http://localhost/api/', 'batch_size' : 2}
+
+        mock_connection = mock.Mock()
+        mock_response = mock.Mock()
+        mock_response.status = httplib.OK
+        mock_connection.getresponse.return_value = mock_response
+        mock_create.return_value = mock_connection
+
+        # hold the single delivery worker until both events are queued
+        gate = threading.Event()
+        self.queue.put(delivery.Delivery('blocking', None, lambda items: gate.wait() and None))
+
+        events = [Event('type-1', {'k1' : 'v1'}), Event('type-1', {'k1' : 'v2'})]
+
+        # Test
+        for event in events:
+            rest_api.handle_event(notifier_config, event)
+        gate.set()
+        self.queue.wait(5)
+
+        # Verify
+        self.assertEqual(1, mock_connection.request.call_count)
+        body = json.loads(mock_connection.request.call_args[1]['body'])
+        expected = [{'event_type' : e.event_type, 'payload' : e.payload} for e in events]
+        self.assertEqual(expected, body)
+
+    def test_send_post_batch(self):
+        # Setup
+        notifier_config = {'url' : 'http://localhost/api/', 'batch_size' : 10}
+        events = [{'event_type' : 'type-1', 'payload' : i} for i in range(3)]
+
+        mock_connection = mock.Mock()
+        mock_response = mock.Mock()
+        mock_response.status = httplib.OK
+        mock_connection.getresponse.return_value = mock_response
+
+        # Test
+        with mock.patch('pulp.server.event.rest_api._create_connection', return_value=mock_connection):
+            rest_api._send_post(notifier_config, events)
+
+        # Verify
         self.assertEqual(1, mock_connection.request.call_count)
+        body = mock_connection.request.call_args[1]['body']
+        self.assertEqual(events, json.loads(body))
 
     @mock.patch('pulp.server.event.rest_api._create_connection')
     def test_handle_event_missing_url(self, mock_create):
@@ -109,4 +319,5 @@ class RestApiNotifierTests(unittest.TestCase):
 
         # Test HTTP
         conn = rest_api._create_connection('http', 'foo')
-        self.assertTrue(isinstance(conn, httplib.HTTPConnection))
\ No newline at end of file
+        self.assertTrue(isinstance(conn, httplib.HTTPConnection))
+        self.assertEqual(rest_api.CONNECTION_TIMEOUT, conn.timeout)
\ No newline at end of file
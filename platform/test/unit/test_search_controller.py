@@ -17,6 +17,8 @@ import mock
 
 from pulp.server.db.model.criteria import Criteria
 import pulp.server.exceptions as exceptions
+from pulp.server.compat import json
+from pulp.server.webservices.controllers import base
 from pulp.server.webservices.controllers.search import SearchController
 
 class TestGetQueryResultsFromPost(unittest.TestCase):
@@ -68,3 +70,52 @@ class TestGetQueryResultsFromGet(unittest.TestCase):
         self.controller._get_query_results_from_get()
         self.assertTrue('id' in self.mock_query_method.call_args[0][0].fields)
 
+    @mock.patch('web.input', return_value={'field':[]})
+    def test_cursor_not_read(self, mock_input):
+        cursor = mock.MagicMock()
+        self.mock_query_method.return_value = cursor
+        result = self.controller._get_query_cursor_from_get()
+        self.assertTrue(result is cursor)
+        self.assertFalse(cursor.__iter__.called)
+
+
+class TestOkStream(unittest.TestCase):
+    def setUp(self):
+        self.controller = SearchController(mock.MagicMock())
+
+    def _body(self, items, process=None):
+        return ''.join(self.controller.ok_stream(items, process))
+
+    @mock.patch('pulp.server.webservices.http.header')
+    @mock.patch('pulp.server.webservices.http.status_ok')
+    def test_empty(self, mock_status, mock_header):
+        self.assertEqual([], json.loads(self._body([])))
+        mock_header.assert_called_once_with('Content-Type', 'application/json')
+
+    @mock.patch('pulp.server.webservices.http.header')
+    @mock.patch('pulp.server.webservices.http.status_ok')
+    def test_chunks(self, mock_status, mock_header):
+        items = [{'id' : i} for i in range(base.STREAM_CHUNK_SIZE * 2 + 1)]
+        chunks = list(self.controller.ok_stream(iter(items)))
+        self.assertEqual(items, json.loads(''.join(chunks)))
+        # opening bracket, three chunks of documents, closing bracket
+        self.assertEqual(5, len(chunks))
+
+    @mock.patch('pulp.server.webservices.http.header')
+    @mock.patch('pulp.server.webservices.http.status_ok')
+    def test_process(self, mock_status, mock_header):
+        def process(item):
+            item['processed'] = True
+            return item
+        body = self._body([{'id' : 'a'}, {'id' : 'b'}], process)
+        self.assertEqual([{'id' : 'a', 'processed' : True}, {'id' : 'b', 'processed' : True}],
+                         json.loads(body))
+
+    @mock.patch('pulp.server.webservices.http.header')
+    @mock.patch('pulp.server.webservices.http.status_ok')
+    def test_query_error_raised(self, mock_status, mock_header):
+        # errors reading the first document are raised before the response starts
+        def cursor():
+            raise exceptions.PulpDataException()
+            yield
+        self.assertRaises(exceptions.PulpDataException, self.controller.ok_stream, cursor())
@@ -16,7 +16,7 @@ import base
 
 import pulp.plugins.types.database as types_db
 from pulp.plugins.types.model import TypeDefinition
-from pulp.server.db.model.content import ContentType
+from pulp.server.db.model.content import ContentType, ContentTypesGeneration
 import pulp.server.db.connection as pulp_db
 
 # -- constants -----------------------------------------------------------------
@@ -260,6 +260,123 @@ class TypesDatabaseTests(base.PulpServerTests):
         # Verify
         self.assertTrue(indexes is None)
 
+    # -- cache tests ---------------------------------------------------------
+
+    def test_cached_definitions(self):
+        """
+        Tests the type definitions are only loaded from the database once.
+        """
+
+        # Setup
+        types_db.update_database([DEF_1, DEF_2])
+        types_db.all_type_definitions()
+
+        find_calls = []
+        collection = ContentType.get_collection()
+        original_find = collection.find
+
+        def find(*args, **kwargs):
+            find_calls.append(args)
+            return original_find(*args, **kwargs)
+
+        collection.find = find
+
+        # Test
+        try:
+            type_ids = types_db.all_type_ids()
+            type_def = types_db.type_definition(DEF_1.id)
+            unit_key = types_db.type_units_unit_key(DEF_2.id)
+        finally:
+            del collection.find
+
+        # Verify
+        self.assertEqual(0, len(find_calls))
+        self.assertEqual(2, len(type_ids))
+        self.assertEqual(DEF_1.id, type_def['id'])
+        self.assertEqual(DEF_2.unit_key, unit_key)
+
+    def test_cached_definitions_copied(self):
+        """
+        Tests changes to a returned definition are not reflected in the cache.
+        """
+
+        # Setup
+        types_db.update_database([DEF_1])
+
+        # Test
+        types_db.type_definition(DEF_1.id)['display_name'] = 'changed'
+        types_db.all_type_definitions()[0]['display_name'] = 'changed'
+
+        # Verify
+        self.assertEqual(DEF_1.display_name, types_db.type_definition(DEF_1.id)['display_name'])
+
+    def test_cache_invalidated_on_update(self):
+        """
+        Tests types added or removed in this process are immediately visible.
+        """
+
+        # Setup
+        types_db.update_database([DEF_1])
+        self.assertEqual([DEF_1.id], types_db.all_type_ids())
+
+        # Test
+        types_db.update_database([DEF_2])
+        self.assertEqual(2, len(types_db.all_type_ids()))
+
+        types_db.clean()
+
+        # Verify
+        self.assertEqual(0, len(types_db.all_type_ids()))
+
+    def test_cache_generation_changed(self):
+        """
+        Tests a change made by another process is picked up once the
+        generation check interval elapses.
+        """
+
+        # Setup
+        types_db.update_database([DEF_1])
+        self.assertEqual(1, len(types_db.all_type_ids()))
+
+        # Simulate another process adding a type
+        ContentType.get_collection().save(ContentType(DEF_2.id, DEF_2.display_name,
+            DEF_2.description, DEF_2.unit_key, DEF_2.search_indexes,
+            DEF_2.referenced_types), safe=True)
+        generation = ContentTypesGeneration.get_collection()
+        generation.update({'_id' : ContentTypesGeneration.DOCUMENT_ID},
+                          {'$inc' : {'generation' : 1}}, safe=True)
+
+        # Test - still within the check interval
+        self.assertEqual(1, len(types_db.all_type_ids()))
+
+        # Test - the interval elapses
+        types_db._CACHE._last_check = 0
+        self.assertEqual(2, len(types_db.all_type_ids()))
+
+    def test_cache_miss_checks_generation(self):
+        """
+        Tests looking up a type that is not cached checks the generation
+        without waiting for the interval.
+        """
+
+        # Setup
+        types_db.update_database([DEF_1])
+        self.assertTrue(types_db.type_definition(DEF_2.id) is None)
+
+        ContentType.get_collection().save(ContentType(DEF_2.id, DEF_2.display_name,
+            DEF_2.description, DEF_2.unit_key, DEF_2.search_indexes,
+            DEF_2.referenced_types), safe=True)
+        generation = ContentTypesGeneration.get_collection()
+        generation.update({'_id' : ContentTypesGeneration.DOCUMENT_ID},
+                          {'$inc' : {'generation' : 1}}, safe=True)
+
+        # Test
+        type_def = types_db.type_definition(DEF_2.id)
+
+        # Verify
+        self.assertTrue(type_def is not None)
+        self.assertEqual(DEF_2.id, type_def['id'])
+
     # -- utility method tests ------------------------------------------------
 
     def test_create_or_update_type_collection(self):
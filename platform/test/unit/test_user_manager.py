@@ -143,6 +143,32 @@ class UserManagerTests(base.PulpServerTests):
         self.assertTrue(user['password'] is not None)
         self.assertNotEqual(changed_password, user['password'])
 
+    @mock.patch('pulp.server.managers.auth.password.PasswordManager.invalidate_verified')
+    def test_update_password_invalidates_verified(self, mock_invalidate):
+        # Setup
+        login = 'login-test'
+        self.user_manager.create_user(login, 'some password')
+
+        # Test
+        self.user_manager.update_user(login, delta={'name' : 'some name'})
+        self.assertFalse(mock_invalidate.called)
+        self.user_manager.update_user(login, delta={'password' : 'some other password'})
+
+        # Verify
+        mock_invalidate.assert_called_once_with(login)
+
+    @mock.patch('pulp.server.managers.auth.password.PasswordManager.invalidate_verified')
+    def test_delete_invalidates_verified(self, mock_invalidate):
+        # Setup
+        login = 'login-test'
+        self.user_manager.create_user(login, 'some password')
+
+        # Test
+        self.user_manager.delete_user(login)
+
+        # Verify
+        mock_invalidate.assert_called_once_with(login)
+
     @mock.patch('pulp.server.db.connection.PulpCollection.query')
     def test_find_by_criteria(self, mock_query):
         criteria = Criteria()
@@ -0,0 +1,75 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the wall clock time spent authorizing a REST call (i.e.
+UserQueryManager.is_authorized as called by the auth_required decorator)
+for a non super user on a deep resource path, with the permission cache
+reloaded from the database on every check and in the steady state.
+"""
+
+import time
+from optparse import OptionParser
+
+from pulp.server.auth import authorization, permission_cache
+from pulp.server.db import connection
+from pulp.server.managers import factory as manager_factory
+
+
+def time_checks(login, resource, checks, reload):
+    user_query_manager = manager_factory.user_query_manager()
+    start = time.time()
+    for i in range(checks):
+        if reload:
+            permission_cache.invalidate()
+        if not user_query_manager.is_authorized(resource, login, authorization.EXECUTE):
+            raise Exception('Authorization failed for [%s]' % login)
+    return time.time() - start
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.add_option('--database', default='pulp_benchmark',
+                      help='scratch database to use; dropped on completion')
+    parser.add_option('--checks', default=500, type='int',
+                      help='number of authorizations to time')
+    parser.add_option('--repos', default=100, type='int',
+                      help='number of repositories the user has permissions on')
+    options, args = parser.parse_args()
+
+    connection.initialize(name=options.database)
+    manager_factory.initialize()
+
+    login = 'benchmark-user'
+    try:
+        manager_factory.role_manager().ensure_super_user_role()
+        manager_factory.user_manager().create_user(login, 'benchmark-password')
+        permission_manager = manager_factory.permission_manager()
+        for i in range(options.repos):
+            permission_manager.grant('/v2/repositories/repo-%d/' % i, login,
+                                     [authorization.READ, authorization.EXECUTE])
+        resource = '/v2/repositories/repo-0/actions/sync/'
+
+        reloaded = time_checks(login, resource, options.checks, True)
+        cached = time_checks(login, resource, options.checks, False)
+    finally:
+        connection._connection.drop_database(options.database)
+
+    print '%10s %12s' % ('cache', 'ms/request')
+    print '%10s %12.3f' % ('reloaded', reloaded * 1000 / options.checks)
+    print '%10s %12.3f' % ('steady', cached * 1000 / options.checks)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the CPU time spent authenticating a REST call that uses HTTP basic
+auth (i.e. check_username_password as called by the auth_required decorator),
+with the verified credentials cache disabled and enabled.
+"""
+
+import time
+from optparse import OptionParser
+
+from pulp.server.auth.authentication import check_username_password
+from pulp.server.db import connection
+from pulp.server.managers import factory as manager_factory
+from pulp.server.managers.auth import password
+
+
+def time_checks(login, plain_password, checks):
+    start = time.clock()
+    for i in range(checks):
+        if check_username_password(login, plain_password) is None:
+            raise Exception('Authentication failed for [%s]' % login)
+    return time.clock() - start
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.add_option('--database', default='pulp_benchmark',
+                      help='scratch database to use; dropped on completion')
+    parser.add_option('--checks', default=200, type='int',
+                      help='number of authentications to time')
+    options, args = parser.parse_args()
+
+    connection.initialize(name=options.database)
+    manager_factory.initialize()
+
+    login = 'benchmark-user'
+    plain_password = 'benchmark-password'
+    try:
+        manager_factory.user_manager().create_user(login, plain_password)
+
+        ttl = password.VERIFIED_CACHE_TTL
+        password.VERIFIED_CACHE_TTL = 0
+        try:
+            uncached = time_checks(login, plain_password, options.checks)
+        finally:
+            password.VERIFIED_CACHE_TTL = ttl
+        cached = time_checks(login, plain_password, options.checks)
+    finally:
+        connection._connection.drop_database(options.database)
+
+    print '%10s %16s' % ('cache', 'cpu ms/request')
+    print '%10s %16.3f' % ('disabled', uncached * 1000 / options.checks)
+    print '%10s %16.3f' % ('enabled', cached * 1000 / options.checks)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the requests per second made through the client bindings against a
+running Pulp server for a task polling workload (repeated GETs of the task
+list, as done by the CLI status loops) and a chunked upload workload (PUTs of
+upload segments), with connection reuse disabled and enabled.
+"""
+
+import time
+from optparse import OptionParser
+
+from pulp.bindings import server
+from pulp.bindings.bindings import Bindings
+from pulp.bindings.server import ConnectionPool, PulpConnection
+
+
+def poll_tasks(bindings, requests, segment_size):
+    for i in range(requests):
+        bindings.tasks.get_all_tasks()
+
+
+def upload_segments(bindings, requests, segment_size):
+    upload_id = bindings.uploads.initialize_upload().response_body['upload_id']
+    try:
+        data = 'x' * segment_size
+        for i in range(requests):
+            bindings.uploads.upload_segment(upload_id, i * segment_size, data)
+    finally:
+        bindings.uploads.delete_upload(upload_id)
+
+
+def requests_per_second(options, workload, max_idle):
+    server._POOLS.clear()
+    ConnectionPool.MAX_IDLE_CONNECTIONS = max_idle
+    connection = PulpConnection(options.host, options.port,
+                                username=options.username, password=options.password,
+                                cert_filename=options.cert)
+    start = time.time()
+    workload(Bindings(connection), options.requests, options.segment_size)
+    return options.requests / (time.time() - start)
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.add_option('--host', default='localhost', help='Pulp server host')
+    parser.add_option('--port', default=443, type='int', help='Pulp server port')
+    parser.add_option('--username', default='admin', help='login for basic auth')
+    parser.add_option('--password', default='admin', help='password for basic auth')
+    parser.add_option('--cert', default=None,
+                      help='client certificate to authenticate with instead of a password')
+    parser.add_option('--requests', default=200, type='int',
+                      help='number of requests made by each workload')
+    parser.add_option('--segment-size', default=64 * 1024, type='int',
+                      help='size in bytes of each uploaded segment')
+    options, args = parser.parse_args()
+    if options.cert:
+        options.username = options.password = None
+
+    max_idle = ConnectionPool.MAX_IDLE_CONNECTIONS
+    print '%10s %12s %12s' % ('workload', 'new conns', 'keep-alive')
+    for name, workload in (('poll', poll_tasks), ('upload', upload_segments)):
+        disabled = requests_per_second(options, workload, 0)
+        enabled = requests_per_second(options, workload, max_idle)
+        print '%10s %10.1f/s %10.1f/s' % (name, disabled, enabled)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the time taken by pulp-admin to start up (load its configuration and
+extensions and build the CLI) for a few common commands, with every extension
+pack loaded and with only the packs named in the extensions manifest loaded.
+Each measurement is taken in a new process so module imports are included.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+COMMANDS = (
+    ['repo', 'list'],
+    ['rpm', 'repo', 'list'],
+    ['tasks', 'list'],
+    ['login'],
+)
+
+
+def load(config_filename, extensions_dir, manifest_filename, args):
+    """
+    Runs in the child process; prints the seconds taken to build the CLI.
+    """
+    start = time.time()
+
+    from pulp.bindings.bindings import Bindings
+    from pulp.bindings.server import PulpConnection
+    from pulp.client.extensions import loader
+    from pulp.client.extensions.core import ClientContext, PulpCli, PulpPrompt
+    from pulp.common.config import Config
+
+    prompt = PulpPrompt()
+    config = Config(config_filename)
+    context = ClientContext(Bindings(PulpConnection('localhost')), config, None, prompt, None)
+    context.cli = PulpCli(context)
+    loader.load_extensions(extensions_dir, context, manifest_filename or None, args)
+
+    print time.time() - start
+
+
+def time_startup(options, manifest_filename, args):
+    times = []
+    for i in range(options.runs):
+        output = subprocess.Popen([sys.executable, __file__, '--child',
+                                   '--config', options.config,
+                                   '--extensions-dir', options.extensions_dir,
+                                   '--manifest', manifest_filename] + args,
+                                  stdout=subprocess.PIPE).communicate()[0]
+        times.append(float(output.strip().splitlines()[-1]))
+    return min(times)
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.disable_interspersed_args()
+    parser.add_option('--config', default='/etc/pulp/admin/admin.conf',
+                      help='admin client configuration file')
+    parser.add_option('--extensions-dir', default='/usr/lib/pulp/admin/extensions',
+                      help='directory containing the admin extension packs')
+    parser.add_option('--runs', default=5, type='int',
+                      help='number of times each command is timed; the best time is reported')
+    parser.add_option('--child', action='store_true', default=False, help='internal use')
+    parser.add_option('--manifest', default='', help='internal use')
+    options, args = parser.parse_args()
+
+    if options.child:
+        load(options.config, options.extensions_dir, options.manifest, args)
+        return
+
+    working_dir = tempfile.mkdtemp(prefix='cli-startup-')
+    manifest_filename = os.path.join(working_dir, 'manifest')
+    try:
+        # Populate the manifest
+        time_startup(options, manifest_filename, [])
+
+        print '%-20s %10s %10s' % ('command', 'all packs', 'manifest')
+        for command in COMMANDS:
+            all_packs = time_startup(options, '', command)
+            manifest = time_startup(options, manifest_filename, command)
+            print '%-20s %8.0fms %8.0fms' % (' '.join(command), all_packs * 1000, manifest * 1000)
+    finally:
+        shutil.rmtree(working_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the throughput of the coordinator's resource conflict detection as
+the number of resources held by queued tasks grows. Each iteration checks a
+repository bind against the held resources, then acquires and releases its
+own resources, which is the accounting done for every call the coordinator
+runs. The equivalent $or query against the task resource collection is timed
+alongside for comparison.
+"""
+
+import time
+from optparse import OptionParser
+
+from pulp.server.db import connection
+from pulp.server.db.model.dispatch import TaskResource
+from pulp.server.dispatch import constants as dispatch_constants
+from pulp.server.dispatch import coordinator
+
+
+def bind_resources(repo_id, consumer_id):
+    return {dispatch_constants.RESOURCE_REPOSITORY_TYPE: {repo_id: dispatch_constants.RESOURCE_READ_OPERATION},
+            dispatch_constants.RESOURCE_CONSUMER_TYPE: {consumer_id: dispatch_constants.RESOURCE_UPDATE_OPERATION}}
+
+
+def populate(coordinator_instance, held):
+    for i in range(held):
+        task_id = 'held-%d' % i
+        task_resources = coordinator.resource_dict_to_task_resources(
+            bind_resources('repo-%d' % (i % 10), 'consumer-%d' % i))
+        coordinator.set_task_id_on_task_resources(task_id, task_resources)
+        coordinator_instance.resource_locks.acquire(task_id, task_resources)
+
+
+def time_lock_table(coordinator_instance, iterations):
+    start = time.time()
+    for i in range(iterations):
+        task_id = 'proposed-%d' % i
+        response, blocking, reasons, task_resources = coordinator_instance._find_conflicts(
+            bind_resources('repo-%d' % (i % 10), 'new-consumer-%d' % i))
+        coordinator.set_task_id_on_task_resources(task_id, task_resources)
+        coordinator_instance.resource_locks.acquire(task_id, task_resources)
+        coordinator_instance.resource_locks.release(task_id)
+    return time.time() - start
+
+
+def time_or_query(iterations):
+    collection = TaskResource.get_collection()
+    start = time.time()
+    for i in range(iterations):
+        task_resources = coordinator.resource_dict_to_task_resources(
+            bind_resources('repo-%d' % (i % 10), 'new-consumer-%d' % i))
+        or_query = coordinator.filter_dicts(task_resources, ('resource_type', 'resource_id'))
+        list(collection.find({'$or': or_query}))
+    return time.time() - start
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.add_option('--database', default='pulp_benchmark',
+                      help='scratch database to use; dropped on completion')
+    parser.add_option('--iterations', default=1000, type='int',
+                      help='number of conflict checks to time at each size')
+    options, args = parser.parse_args()
+
+    connection.initialize(name=options.database)
+
+    print '%8s %16s %16s' % ('held', 'lock table/s', '$or query/s')
+    try:
+        for held in (10, 100, 1000, 10000):
+            coordinator_instance = coordinator.Coordinator()
+            coordinator_instance.resource_locks.clear()
+            populate(coordinator_instance, held)
+            lock_table_time = time_lock_table(coordinator_instance, options.iterations)
+            or_query_time = time_or_query(options.iterations)
+            print '%8d %16.0f %16.0f' % (held,
+                                         options.iterations / lock_table_time,
+                                         options.iterations / or_query_time)
+    finally:
+        connection._connection.drop_database(options.database)
+
+
+if __name__ == '__main__':
+    main()
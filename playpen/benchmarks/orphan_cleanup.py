@@ -0,0 +1,99 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the wall time needed by the orphan manager to find and to delete the
+orphaned units of a content type as the number of units grows, with half of
+the units associated with a repository. Each orphaned unit has a file on disk
+that is deleted along with it.
+"""
+
+import os
+import resource
+import shutil
+import tempfile
+import time
+from optparse import OptionParser
+
+from pulp.plugins.types import database as types_db
+from pulp.plugins.types.model import TypeDefinition
+from pulp.server.db import connection
+from pulp.server.db.model.repository import RepoContentUnit
+from pulp.server.managers.content.orphan import OrphanManager
+
+TYPE_ID = 'bench_orphan'
+
+# -- setup --------------------------------------------------------------------
+
+def populate(storage_dir, num_units):
+    types_db.update_database([TypeDefinition(TYPE_ID, TYPE_ID, TYPE_ID, ['name'], [], [])])
+    units_collection = types_db.type_units_collection(TYPE_ID)
+    association_collection = RepoContentUnit.get_collection()
+    for i in range(num_units):
+        unit_id = '%s-%d' % (TYPE_ID, i)
+        unit_dir = os.path.join(storage_dir, str(i % 100))
+        if not os.path.exists(unit_dir):
+            os.makedirs(unit_dir)
+        path = os.path.join(unit_dir, unit_id)
+        open(path, 'w').close()
+        units_collection.insert({'_id' : unit_id, 'name' : unit_id, '_storage_path' : path,
+                                 'description' : 'x' * 256}, safe=True)
+        if i % 2:
+            association = RepoContentUnit('bench', unit_id, TYPE_ID, 'importer', 'bench')
+            association_collection.insert(association, safe=True)
+
+
+def max_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.add_option('--database', default='pulp_benchmark',
+                      help='scratch database to populate; dropped on completion')
+    parser.add_option('--sizes', default='10000,100000,1000000',
+                      help='comma separated list of numbers of units')
+    options, args = parser.parse_args()
+
+    connection.initialize(name=options.database)
+    manager = OrphanManager()
+
+    print '%10s %10s %12s %12s %14s' % ('units', 'orphans', 'find (s)', 'delete (s)', 'max rss (MB)')
+    try:
+        for size in [int(s) for s in options.sizes.split(',')]:
+            storage_dir = tempfile.mkdtemp(prefix='orphan-benchmark-')
+            try:
+                populate(storage_dir, size)
+
+                start = time.time()
+                orphans = 0
+                for orphan in manager.generate_orphans_by_type(TYPE_ID):
+                    orphans += 1
+                find_time = time.time() - start
+
+                start = time.time()
+                manager.delete_orphans_by_type(TYPE_ID)
+                delete_time = time.time() - start
+
+                print '%10d %10d %12.3f %12.3f %14d' % (size, orphans, find_time, delete_time, max_rss())
+            finally:
+                shutil.rmtree(storage_dir)
+                types_db.type_units_collection(TYPE_ID).drop()
+                RepoContentUnit.get_collection().remove(safe=True)
+    finally:
+        connection._connection.drop_database(options.database)
+
+
+if __name__ == '__main__':
+    main()
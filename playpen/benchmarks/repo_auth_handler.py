@@ -0,0 +1,128 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the per-request overhead of the repo auth OID validation handler for
+a client downloading packages from a protected repository, as the number of
+protected repositories grows. The "cold" column clears the handler's caches
+before every request, which approximates the handler re-reading its
+configuration, listings and CA and re-verifying the client certificate on
+each request; the "warm" column is the steady state of a running server.
+
+Requires a CA certificate and a client entitlement certificate signed by it
+whose download URL extensions permit the protected path (see --path).
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from ConfigParser import SafeConfigParser
+from optparse import OptionParser
+
+from pulp_rpm.repo_auth import oid_validation
+from pulp_rpm.repo_auth.protected_repo_utils import ProtectedRepoListingFile, ProtectedRepoUtils
+from pulp_rpm.repo_auth.repo_cert_utils import RepoCertUtils
+
+
+def read_file(filename):
+    f = open(filename, 'r')
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+def create_config(working_dir):
+    config = SafeConfigParser()
+    config.add_section('main')
+    config.set('main', 'enabled', 'true')
+    config.set('main', 'log_failed_cert', 'false')
+    config.add_section('repos')
+    config.set('repos', 'cert_location', os.path.join(working_dir, 'content'))
+    config.set('repos', 'global_cert_location', os.path.join(working_dir, 'global'))
+    config.set('repos', 'protected_repo_listing_file', os.path.join(working_dir, 'pulp-protected-repos'))
+    config.add_section('crl')
+    config.set('crl', 'location', os.path.join(working_dir, 'crl'))
+    return config
+
+
+def environ(cert_pem, uri):
+    class Errors:
+        def write(self, *args, **kwargs):
+            pass
+    return {'mod_ssl.var_lookup': lambda *args: cert_pem,
+            'REQUEST_URI': uri,
+            'wsgi.errors': Errors()}
+
+
+def clear_caches():
+    oid_validation._FILE_CACHE.clear()
+    oid_validation._VERIFICATION_CACHE.clear()
+    oid_validation._DOWNLOAD_URL_CACHE.clear()
+    oid_validation._VALIDATOR_CACHE.clear()
+
+
+def time_requests(config, cert_pem, uri, requests, cold):
+    start = time.time()
+    for i in range(requests):
+        if cold:
+            clear_caches()
+        if not oid_validation.authenticate(environ(cert_pem, uri), config):
+            raise Exception('Request to [%s] was denied' % uri)
+    return time.time() - start
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.add_option('--ca', help='PEM encoded CA certificate')
+    parser.add_option('--cert', help='PEM encoded client certificate signed by the CA')
+    parser.add_option('--path', default='repos/pulp/pulp/fedora-14/x86_64',
+                      help='relative path of the protected repository the client cert is entitled to')
+    parser.add_option('--requests', default=1000, type='int',
+                      help='number of requests to time at each size')
+    options, args = parser.parse_args()
+    if not options.ca or not options.cert:
+        parser.error('--ca and --cert are required')
+
+    ca_pem = read_file(options.ca)
+    cert_pem = read_file(options.cert)
+    uri = '/pulp/repos/%s/Packages/pulp-0.1-1.noarch.rpm' % options.path.strip('/')
+
+    working_dir = tempfile.mkdtemp(prefix='repo-auth-benchmark-')
+    try:
+        config = create_config(working_dir)
+        RepoCertUtils(config).write_consumer_cert_bundle('protected', {'ca': ca_pem, 'cert': cert_pem})
+        ProtectedRepoUtils(config).add_protected_repo(options.path, 'protected')
+
+        print '%8s %14s %14s %14s' % ('repos', 'cold ms/req', 'warm ms/req', 'warm req/s')
+        for repos in (1, 100, 1000, 10000):
+            listing_file = ProtectedRepoListingFile(config.get('repos', 'protected_repo_listing_file'))
+            listing_file.load()
+            for i in range(len(listing_file.listings), repos):
+                listing_file.add_protected_repo_path('repos/other/repo-%d' % i, 'other-%d' % i)
+            listing_file.save()
+            cold = time_requests(config, cert_pem, uri, options.requests, True)
+            clear_caches()
+            warm = time_requests(config, cert_pem, uri, options.requests, False)
+            print '%8d %14.3f %14.3f %14.0f' % (repos,
+                                                cold * 1000 / options.requests,
+                                                warm * 1000 / options.requests,
+                                                options.requests / warm)
+    finally:
+        shutil.rmtree(working_dir)
+
+
+if __name__ == '__main__':
+    main()
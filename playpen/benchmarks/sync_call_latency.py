@@ -0,0 +1,72 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the latency added by the dispatch subsystem to synchronous calls
+(i.e. the execute_sync_ok path used by the REST API) on an otherwise idle
+server. Each call does no work, so the reported times are the overhead of
+enqueueing the task, dispatching it and waiting for it to complete.
+"""
+
+import time
+from optparse import OptionParser
+
+from pulp.server.db import connection
+from pulp.server.dispatch import factory as dispatch_factory
+from pulp.server.dispatch.call import CallRequest
+from pulp.server.managers import factory as manager_factory
+
+
+def noop():
+    return None
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.add_option('--database', default='pulp_benchmark',
+                      help='scratch database to use; dropped on completion')
+    parser.add_option('--calls', default=200, type='int',
+                      help='number of synchronous calls to time')
+    options, args = parser.parse_args()
+
+    connection.initialize(name=options.database)
+    manager_factory.initialize()
+    dispatch_factory.initialize()
+
+    coordinator = dispatch_factory.coordinator()
+    latencies = []
+    try:
+        for i in range(options.calls):
+            start = time.time()
+            coordinator.execute_call_synchronously(CallRequest(noop))
+            latencies.append(time.time() - start)
+    finally:
+        dispatch_factory.finalize()
+        connection._connection.drop_database(options.database)
+
+    latencies.sort()
+    print '%8s %10s %10s %10s' % ('calls', 'p50', 'p90', 'max')
+    print '%8d %9.1fms %9.1fms %9.1fms' % (len(latencies),
+                                          percentile(latencies, 0.5) * 1000,
+                                          percentile(latencies, 0.9) * 1000,
+                                          latencies[-1] * 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the database queries and wall time needed to retrieve all units in a
+repository through the unit association query manager, compared against
+looking up each unit's metadata with its own query.
+"""
+
+import time
+from optparse import OptionParser
+
+from pymongo.collection import Collection
+
+from pulp.plugins.types import database as types_db
+from pulp.plugins.types.model import TypeDefinition
+from pulp.server.db import connection
+from pulp.server.db.model.criteria import UnitAssociationCriteria
+from pulp.server.db.model.repository import RepoContentUnit
+from pulp.server.managers.repo.unit_association_query import RepoUnitAssociationQueryManager
+
+TYPE_IDS = ('bench_rpm', 'bench_srpm')
+
+# -- query counting -----------------------------------------------------------
+
+class QueryCounter(object):
+    """
+    Counts calls to find and find_one on every collection while installed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._originals = {}
+
+    def install(self):
+        for name in ('find', 'find_one'):
+            original = getattr(Collection, name)
+            self._originals[name] = original
+            setattr(Collection, name, self._counting(original))
+
+    def uninstall(self):
+        for name, original in self._originals.items():
+            setattr(Collection, name, original)
+
+    def _counting(self, method):
+        counter = self
+        def counted(*args, **kwargs):
+            counter.count += 1
+            return method(*args, **kwargs)
+        return counted
+
+# -- setup --------------------------------------------------------------------
+
+def populate(repo_id, num_units):
+    types_db.update_database([TypeDefinition(t, t, t, ['name'], [], []) for t in TYPE_IDS])
+    association_collection = RepoContentUnit.get_collection()
+    for i in range(num_units):
+        type_id = TYPE_IDS[i % len(TYPE_IDS)]
+        unit_id = '%s-%d' % (type_id, i)
+        types_db.type_units_collection(type_id).insert(
+            {'_id' : unit_id, 'name' : unit_id, 'description' : 'x' * 256}, safe=True)
+        association = RepoContentUnit(repo_id, unit_id, type_id, 'importer', 'bench')
+        association_collection.insert(association, safe=True)
+
+
+def per_association_lookup(repo_id):
+    units = list(RepoContentUnit.get_collection().find({'repo_id' : repo_id}))
+    for u in units:
+        type_collection = types_db.type_units_collection(u['unit_type_id'])
+        u['metadata'] = type_collection.find_one({'_id' : u['unit_id']})
+    return units
+
+
+def measure(counter, call):
+    counter.count = 0
+    start = time.time()
+    units = call()
+    return len(units), counter.count, time.time() - start
+
+# -- main ---------------------------------------------------------------------
+
+def main():
+    parser = OptionParser(description=__doc__.strip())
+    parser.add_option('--database', default='pulp_benchmark',
+                      help='scratch database to populate; dropped on completion')
+    parser.add_option('--sizes', default='1000,10000,40000',
+                      help='comma separated list of repository sizes')
+    options, args = parser.parse_args()
+
+    connection.initialize(name=options.database)
+    manager = RepoUnitAssociationQueryManager()
+    counter = QueryCounter()
+
+    print '%10s %22s %22s' % ('units', 'batched (queries/s)', 'per unit (queries/s)')
+    try:
+        for size in [int(s) for s in options.sizes.split(',')]:
+            repo_id = 'bench-%d' % size
+            populate(repo_id, size)
+
+            counter.install()
+            try:
+                criteria = UnitAssociationCriteria()
+                n, batched_queries, batched_time = measure(
+                    counter, lambda: manager.get_units_across_types(repo_id, criteria))
+                n, serial_queries, serial_time = measure(
+                    counter, lambda: per_association_lookup(repo_id))
+            finally:
+                counter.uninstall()
+
+            print '%10d %12d %8.3fs %12d %8.3fs' % (n, batched_queries, batched_time,
+                                                    serial_queries, serial_time)
+    finally:
+        connection._connection.drop_database(options.database)
+
+
+if __name__ == '__main__':
+    main()
@@ -28,5 +28,4 @@ def copy_units(import_conduit, units):
         units = import_conduit.get_source_units(criteria=criteria)
 
     # Associate to the new repository
-    for u in units:
-        import_conduit.associate_unit(u)
+    import_conduit.associate_units(units)
@@ -235,15 +235,18 @@ class PuppetModuleSyncRun(object):
         self.progress_report.update_progress()
 
         # Add new units
+        new_modules = []
         for key in new_unit_keys:
             module = modules_by_key[key]
             try:
-                self._add_new_module(downloader, module)
-                self.progress_report.modules_finished_count += 1
+                new_modules.append((module, self._add_new_module(downloader, module)))
             except Exception:
                 self.progress_report.add_failed_module(module, sys.exc_info()[2])
+                self.progress_report.update_progress()
 
-            self.progress_report.update_progress()
+        # Save the new units and associate them to the repository together
+        if new_modules:
+            self._save_new_modules(new_modules)
 
         # Remove missing units if the configuration indicates to do so
         if self._should_remove_missing():
@@ -253,17 +256,50 @@ class PuppetModuleSyncRun(object):
                 s = unit_key_str(unit_key)
                 existing_units_by_key[s] = u
 
-            for key in remove_unit_keys:
-                doomed = existing_units_by_key[key]
-                self.sync_conduit.remove_unit(doomed)
+            doomed = [existing_units_by_key[key] for key in remove_unit_keys]
+            self.sync_conduit.remove_units(doomed)
+
+    def _save_new_modules(self, new_modules):
+        """
+        Saves the units for the downloaded modules and associates them to the
+        repository in a single batch. If the batch cannot be saved, the units
+        are saved one at a time so that a module that cannot be saved is
+        reported as failed without losing the others.
+
+        :param new_modules: list of (module, unit) tuples for each downloaded
+                            module
+        :type  new_modules: list
+        """
+        try:
+            self.sync_conduit.save_units([unit for module, unit in new_modules])
+        except Exception:
+            _LOG.exception('Exception saving modules for repository <%s>; saving them individually' % self.repo.id)
+        else:
+            self.progress_report.modules_finished_count += len(new_modules)
+            self.progress_report.update_progress()
+            return
+
+        for module, unit in new_modules:
+            try:
+                self.sync_conduit.save_unit(unit)
+                self.progress_report.modules_finished_count += 1
+            except Exception:
+                self.progress_report.add_failed_module(module, sys.exc_info()[2])
+
+            self.progress_report.update_progress()
 
     def _add_new_module(self, downloader, module):
         """
-        Performs the tasks for downloading and saving a new unit in Pulp.
+        Performs the tasks for downloading a new unit into Pulp's storage. The
+        unit is not saved by this call; the caller is expected to save the
+        returned unit.
 
         :param downloader: downloader instance to use for retrieving the unit
         :param module: module instance to download
         :type  module: Module
+
+        :return: initialized unit for the downloaded module
+        :rtype:  pulp.plugins.model.Unit
         """
         # Initialize the unit in Pulp
         type_id = constants.TYPE_PUPPET_MODULE
@@ -281,13 +317,12 @@ class PuppetModuleSyncRun(object):
 
                 # Copy them to the final location
                 shutil.copy(downloaded_filename, unit.storage_path)
-
-            # Save the unit and associate it to the repository
-            self.sync_conduit.save_unit(unit)
         finally:
             # Clean up the temporary module
             downloader.cleanup_module(module)
 
+        return unit
+
     def _module_exists(self, filename):
         """
         Determines if the module at the given filename is already downloaded.
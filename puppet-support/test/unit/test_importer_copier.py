@@ -37,7 +37,7 @@ class CopierTests(unittest.TestCase):
         self.assertTrue(isinstance(call_args[1]['criteria'], UnitAssociationCriteria))
         self.assertEqual(call_args[1]['criteria'].type_ids, [constants.TYPE_PUPPET_MODULE])
 
-        self.assertEqual(len(all_source_units), conduit.associate_unit.call_count)
+        self.assertEqual(1, conduit.associate_units.call_count)
         self._assert_associated_units(conduit, all_source_units)
 
     def test_copy_units_only_specified(self):
@@ -51,10 +51,9 @@ class CopierTests(unittest.TestCase):
         # Verify
         self.assertEqual(0, conduit.get_source_units.call_count)
 
-        self.assertEqual(len(specified_units), conduit.associate_unit.call_count)
+        self.assertEqual(1, conduit.associate_units.call_count)
         self._assert_associated_units(conduit, specified_units)
 
     def _assert_associated_units(self, conduit, units):
-        all_call_args = conduit.associate_unit.call_args_list
-        for unit, call_args in zip(units, all_call_args):
-            self.assertEqual(call_args[0][0], unit)
+        associated_units = conduit.associate_units.call_args[0][0]
+        self.assertEqual(associated_units, units)
@@ -98,6 +98,10 @@ class PuppetModuleSyncRunTests(unittest.TestCase):
         self.assertEqual(report.details['finished_count'], 2)
         self.assertEqual(report.details['error_count'], 0)
 
+        # Units saved to Pulp in a single batch
+        self.assertEqual(1, self.conduit.save_units.call_count)
+        self.assertEqual(2, len(self.conduit.save_units.call_args[0][0]))
+
         # Progress Reporting
         pr = self.run.progress_report
         self.assertEqual(pr.metadata_state, constants.STATE_SUCCESS)
@@ -155,7 +159,8 @@ class PuppetModuleSyncRunTests(unittest.TestCase):
         report = self.run.perform_sync()
 
         # Verify
-        self.assertEqual(1, self.conduit.remove_unit.call_count)
+        self.assertEqual(1, self.conduit.remove_units.call_count)
+        self.assertEqual(1, len(self.conduit.remove_units.call_args[0][0]))
 
     @mock.patch('pulp_puppet.importer.sync.PuppetModuleSyncRun._parse_metadata')
     def test_perform_sync_no_metadata(self, mock_parse):
@@ -271,3 +276,28 @@ class PuppetModuleSyncRunTests(unittest.TestCase):
         self.assertTrue(pr.modules_error_message is None)
         self.assertTrue(pr.modules_exception is None)
         self.assertTrue(pr.modules_traceback is None)
+
+    def test_do_import_save_exception(self):
+        # Setup
+        self.conduit.save_units.side_effect = Exception()
+        def save_unit(unit):
+            if unit.unit_key['name'] == 'valid':
+                raise Exception()
+        self.conduit.save_unit.side_effect = save_unit
+
+        # Test
+        report = self.run.perform_sync()
+
+        # Verify
+
+        # The batch could not be saved so each unit is saved on its own and
+        # only the one that cannot be saved is reported as failed
+        self.assertTrue(report.success_flag)
+        self.assertEqual(2, self.conduit.save_unit.call_count)
+
+        pr = self.run.progress_report
+        self.assertEqual(pr.modules_state, constants.STATE_SUCCESS)
+        self.assertEqual(pr.modules_total_count, 2)
+        self.assertEqual(pr.modules_finished_count, 1)
+        self.assertEqual(pr.modules_error_count, 1)
+        self.assertEqual(len(pr.modules_individual_errors), 1)
@@ -227,6 +227,7 @@ def _upload_manager(context):
     upload_working_dir = context.config['filesystem']['upload_working_dir']
     upload_working_dir = os.path.expanduser(upload_working_dir)
     chunk_size = int(context.config['server']['upload_chunk_size'])
-    upload_manager = upload_lib.UploadManager(upload_working_dir, context.server, chunk_size)
+    concurrency = int(context.config['server'].get('upload_concurrency', upload_lib.DEFAULT_CONCURRENCY))
+    upload_manager = upload_lib.UploadManager(upload_working_dir, context.server, chunk_size, concurrency)
     upload_manager.initialize()
     return upload_manager
@@ -387,23 +387,22 @@ class YumDistributor(Distributor):
         if self.canceled:
             return publish_conduit.build_failure_report(summary, details)
         skip_list = config.get('skip') or []
-        # Determine Content in this repo
-        unfiltered_units = publish_conduit.get_units()
-        # filter compatible units
-        rpm_units = filter(lambda u : u.type_id in [TYPE_ID_RPM, TYPE_ID_SRPM], unfiltered_units)
-        drpm_units = filter(lambda u : u.type_id == TYPE_ID_DRPM, unfiltered_units)
+        # Determine Content in this repo; only the types being published are
+        # loaded rather than every unit in the repository
+        criteria = UnitAssociationCriteria(type_ids=[TYPE_ID_RPM, TYPE_ID_SRPM])
+        rpm_units = publish_conduit.get_units(criteria)
+        criteria = UnitAssociationCriteria(type_ids=[TYPE_ID_DRPM])
+        drpm_units = publish_conduit.get_units(criteria)
         rpm_errors = []
         if 'rpm' not in skip_list:
-            _LOG.info("Publish on %s invoked. %s existing units, %s of which are supported to be published." \
-                    % (repo.id, len(unfiltered_units), len(rpm_units)))
+            _LOG.info("Publish on %s invoked. %s rpm units to be published." % (repo.id, len(rpm_units)))
             # Create symlinks under repo.working_dir
             rpm_status, rpm_errors = self.handle_symlinks(rpm_units, repo.working_dir, progress_callback)
             if not rpm_status:
                 _LOG.error("Unable to publish %s items" % (len(rpm_errors)))
         drpm_errors = []
         if 'drpm' not in skip_list:
-            _LOG.info("Publish on %s invoked. %s existing units, %s of which are supported to be published." \
-                    % (repo.id, len(unfiltered_units), len(drpm_units)))
+            _LOG.info("Publish on %s invoked. %s drpm units to be published." % (repo.id, len(drpm_units)))
             # Create symlinks under repo.working_dir
             drpm_status, drpm_errors = self.handle_symlinks(drpm_units, repo.working_dir, progress_callback)
             if not drpm_status:
@@ -411,7 +410,8 @@ class YumDistributor(Distributor):
         pkg_errors = rpm_errors + drpm_errors
         pkg_units = rpm_units +  drpm_units
         distro_errors = []
-        distro_units = filter(lambda u: u.type_id == TYPE_ID_DISTRO, unfiltered_units)
+        criteria = UnitAssociationCriteria(type_ids=[TYPE_ID_DISTRO])
+        distro_units = publish_conduit.get_units(criteria)
         if 'distribution' not in skip_list:
             # symlink distribution files if any under repo.working_dir
             distro_status, distro_errors = self.symlink_distribution_unit_files(distro_units, repo.working_dir, progress_callback)
@@ -436,8 +436,13 @@ class YumDistributor(Distributor):
             groups_xml_path = comps_util.write_comps_xml(repo, existing_groups, existing_cats)
         metadata_start_time = time.time()
         self.copy_importer_repodata(src_working_dir, repo.working_dir)
+        # metadata is generated from the units published above rather than by
+        # scanning the working directory
+        metadata_units = []
+        if 'rpm' not in skip_list:
+            metadata_units = rpm_units
         metadata_status, metadata_errors = metadata.generate_metadata(
-                repo, publish_conduit, config, progress_callback, groups_xml_path)
+                repo, publish_conduit, config, progress_callback, groups_xml_path, units=metadata_units)
         metadata_end_time = time.time()
         relpath = self.get_repo_relative_path(repo, config)
         if relpath.startswith("/"):
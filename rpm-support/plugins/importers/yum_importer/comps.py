@@ -340,19 +340,15 @@ class ImporterComps(object):
         ###
         # Save the new units
         ###
-        for u in new_group_units.values():
-            sync_conduit.save_unit(u)
-        for u in new_category_units.values():
-            sync_conduit.save_unit(u)
+        sync_conduit.save_units(new_group_units.values())
+        sync_conduit.save_units(new_category_units.values())
         ###
         # Clean up any orphaned units
         ###
         orphaned_group_units = get_orphaned_groups(available_groups, existing_groups)
         orphaned_category_units = get_orphaned_categories(available_categories, existing_categories)
-        for u in orphaned_group_units.values():
-            sync_conduit.remove_unit(u)
-        for u in orphaned_category_units.values():
-            sync_conduit.remove_unit(u)
+        sync_conduit.remove_units(orphaned_group_units.values())
+        sync_conduit.remove_units(orphaned_category_units.values())
         end = time.time()
 
         progress = {
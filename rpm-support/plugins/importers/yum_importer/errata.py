@@ -238,12 +238,10 @@ class ImporterErrata(object):
         orphaned_units = get_orphaned_errata(available_errata, existing_errata)
         new_errata, new_units, sync_conduit = get_new_errata_units(available_errata, existing_errata, sync_conduit)
         # Save the new units
-        for u in new_units.values():
-            sync_conduit.save_unit(u)
+        sync_conduit.save_units(new_units.values())
 
         # clean up any orphaned errata
-        for u in orphaned_units.values():
-            sync_conduit.remove_unit(u)
+        sync_conduit.remove_units(orphaned_units.values())
         # link errata with rpm units
         link_report = link_errata_rpm_units(sync_conduit, new_units)
 
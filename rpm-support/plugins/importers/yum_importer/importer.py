@@ -316,7 +316,7 @@ class YumImporter(Importer):
                 if not os.path.exists(dirpath):
                     os.makedirs(dirpath)
                 os.symlink(u.storage_path, sym_link)
-            import_conduit.associate_unit(u)
+        import_conduit.associate_units(units)
         _LOG.info("%s units from %s have been associated to %s" % (len(units), source_repo.id, dest_repo.id))
 
 
@@ -111,7 +111,7 @@ def get_new_rpms_and_units(available_rpms, existing_units, sync_conduit):
             rpm["pkgpath"] = os.path.dirname(new_units[key].storage_path)
     return new_rpms, new_units
 
-def get_missing_rpms_and_units(available_rpms, existing_units, verify_options={}):
+def get_missing_rpms_and_units(available_rpms, existing_units, verify_options={}, verify_stats=None):
     """
     @param available_rpms dict of available rpms
     @type available_rpms {}
@@ -119,16 +119,22 @@ def get_missing_rpms_and_units(available_rpms, existing_units, verify_options={}
     @param existing_units dict of existing Units
     @type existing_units {key:pulp.server.content.plugins.model.Unit}
 
+    @param verify_stats if specified, the checksum verification stats are added to it
+    @type verify_stats {}
+
     @return a tuple of 2 dictionaries.  First dict is of missing rpms, second dict is of missing units
     @rtype ({}, {})
     """
     missing_rpms = {}
     missing_units = {}
+    existing_files = [(u.storage_path, u.unit_key.get('checksum'), u.unit_key.get('checksumtype'))
+                      for key, u in existing_units.items() if key in available_rpms]
+    add_verify_stats(verify_stats, util.verify_checksums(existing_files, verify_options))
     for key in available_rpms:
         if key in existing_units:
             rpm_path = existing_units[key].storage_path
             if not util.verify_exists(rpm_path, existing_units[key].unit_key.get('checksum'),
-                existing_units[key].unit_key.get('checksumtype'), verify_options):
+                existing_units[key].unit_key.get('checksumtype'), verify_options=verify_options):
                 _LOG.info("Missing an existing unit: %s.  Will add to resync." % (rpm_path))
                 missing_rpms[key] = available_rpms[key]
                 missing_units[key] = existing_units[key]
@@ -173,7 +179,16 @@ def form_report(report):
     ret_val["size_left"] = report.last_progress.size_left
     return ret_val
 
-def verify_download(missing_rpms, new_rpms, new_units, verify_options={}):
+def add_verify_stats(verify_stats, stats):
+    """
+    Adds the stats returned by util.verify_checksums to verify_stats, if specified
+    """
+    if verify_stats is None:
+        return
+    for key, value in stats.items():
+        verify_stats[key] = verify_stats.get(key, 0) + value
+
+def verify_download(missing_rpms, new_rpms, new_units, verify_options={}, verify_stats=None):
     """
     Will verify that intended items have been downloaded.
     Items not downloaded will be removed from passed in dicts
@@ -187,10 +202,16 @@ def verify_download(missing_rpms, new_rpms, new_units, verify_options={}):
     @param new_units
     @type new_units {key:pulp.server.content.plugins.model.Unit}
 
+    @param verify_stats if specified, the checksum verification stats are added to it
+    @type verify_stats {}
+
     @return dict of rpms which have not been downloaded
     @rtype {}
     """
     not_synced = {}
+    downloaded_files = [(os.path.join(rpm["pkgpath"], rpm["filename"]), rpm['checksum'], rpm['checksumtype'])
+                        for rpm in new_rpms.values() + missing_rpms.values()]
+    add_verify_stats(verify_stats, util.verify_checksums(downloaded_files, verify_options))
     for key in new_rpms.keys():
         rpm = new_rpms[key]
         rpm_path = os.path.join(rpm["pkgpath"], rpm["filename"])
@@ -431,6 +452,7 @@ class ImporterRPM(object):
         verify_checksum = config.get("verify_checksum") or False
         verify_size = config.get("verify_size") or False
         verify_options = {"checksum":verify_checksum, "size":verify_size}
+        verify_stats = {'verified' : 0, 'skipped' : 0, 'error' : 0}
         _LOG.info("Begin sync of repo <%s> from feed_url <%s>" % (repo.id, feed_url))
         start_metadata = time.time()
         self.yumRepoGrinder = get_yumRepoGrinder(repo.id, repo.working_dir, config)
@@ -448,14 +470,14 @@ class ImporterRPM(object):
 
         # ----------------- setup items to download and add to grinder ---------------
         # setup rpm items
-        rpm_info = self._setup_rpms(repo, sync_conduit, verify_options, skip_content_types)
+        rpm_info = self._setup_rpms(repo, sync_conduit, verify_options, skip_content_types, verify_stats)
         new_units.update(rpm_info['new_rpm_units'])
         # Sync the new and missing rpms
         self.yumRepoGrinder.addItems(rpm_info['new_rpms'].values())
         self.yumRepoGrinder.addItems(rpm_info['missing_rpms'].values())
 
         # setup drpm items
-        drpm_info = self._setup_drpms(repo, sync_conduit, verify_options, skip_content_types)
+        drpm_info = self._setup_drpms(repo, sync_conduit, verify_options, skip_content_types, verify_stats)
         new_units.update(drpm_info['new_drpm_units'])
         # Sync the new and missing drpms
         self.yumRepoGrinder.addItems(drpm_info['new_drpms'].values())
@@ -496,14 +518,11 @@ class ImporterRPM(object):
             rpms_with_errors = search_for_errors(rpm_info['new_rpms'], rpm_info['missing_rpms'])
             errors.update(rpms_with_errors)
             # Verify we synced what we expected, update the passed in dicts to remove non-downloaded items
-            not_synced = verify_download(rpm_info['missing_rpms'], rpm_info['new_rpms'], new_units, verify_options)
+            not_synced = verify_download(rpm_info['missing_rpms'], rpm_info['new_rpms'], new_units, verify_options,
+                                         verify_stats)
             # Save the new units and remove the orphaned units
-            saved_new_unit_keys = []
-            for key in new_units:
-                if key not in rpms_with_errors:
-                    u = new_units[key]
-                    sync_conduit.save_unit(u)
-                    saved_new_unit_keys.append(key)
+            saved_new_unit_keys = [key for key in new_units if key not in rpms_with_errors]
+            sync_conduit.save_units([new_units[key] for key in saved_new_unit_keys])
 
             for u in rpm_info['orphaned_rpm_units'].values():
                 try:
@@ -565,6 +584,10 @@ class ImporterRPM(object):
             summary["num_resynced_distribution_files"] = len(all_missing_distro_files)
         else:
             _LOG.info("skipping distro summary report")
+        # files whose checksum was computed, and files skipped as they were
+        # unchanged since their checksum was last verified
+        summary["num_checksums_verified"] = verify_stats['verified']
+        summary["num_checksums_skipped"] = verify_stats['skipped']
         end = time.time()
         summary["time_total_sec"] = end - start
 
@@ -581,7 +604,7 @@ class ImporterRPM(object):
         _LOG.info("STATUS: %s; SUMMARY: %s; DETAILS: %s" % (status, summary, details))
         return status, summary, details
 
-    def _setup_rpms(self, repo, sync_conduit, verify_options, skip_content_types):
+    def _setup_rpms(self, repo, sync_conduit, verify_options, skip_content_types, verify_stats=None):
         rpm_info = {'available_rpms' : {}, 'existing_rpm_units' : {}, 'orphaned_rpm_units' : {}, 'new_rpms' : {}, 'new_rpm_units' : {},'missing_rpms' : {}, 'missing_rpm_units' : {}}
         if 'rpm' in skip_content_types:
             _LOG.info("skipping rpm item setup")
@@ -600,13 +623,13 @@ class ImporterRPM(object):
 
         # Determine new and missing items
         rpm_info['new_rpms'], rpm_info['new_rpm_units'] = get_new_rpms_and_units(rpm_info['available_rpms'], rpm_info['existing_rpm_units'], sync_conduit)
-        rpm_info['missing_rpms'], rpm_info['missing_rpm_units'] = get_missing_rpms_and_units(rpm_info['available_rpms'], rpm_info['existing_rpm_units'], verify_options)
+        rpm_info['missing_rpms'], rpm_info['missing_rpm_units'] = get_missing_rpms_and_units(rpm_info['available_rpms'], rpm_info['existing_rpm_units'], verify_options, verify_stats)
         _LOG.info("Repo <%s> %s existing rpm units, %s have been orphaned, %s new rpms, %s missing rpms." % \
                     (repo.id, len(rpm_info['existing_rpm_units']), len(rpm_info['orphaned_rpm_units']), len(rpm_info['new_rpms']), len(rpm_info['missing_rpms'])))
 
         return rpm_info
 
-    def _setup_drpms(self, repo, sync_conduit, verify_options, skip_content_types):
+    def _setup_drpms(self, repo, sync_conduit, verify_options, skip_content_types, verify_stats=None):
         # process deltarpms
         drpm_info = {'available_drpms' : {}, 'existing_drpm_units' : {}, 'orphaned_drpm_units' : {}, 'new_drpms' : {}, 'new_drpm_units' : {}, 'missing_drpms' : {}, 'missing_drpm_units' : {}}
         if 'drpm' in skip_content_types:
@@ -624,7 +647,7 @@ class ImporterRPM(object):
 
         # Determine new and missing items
         drpm_info['new_drpms'], drpm_info['new_drpm_units'] = drpm.get_new_drpms_and_units(drpm_info['available_drpms'], drpm_info['existing_drpm_units'], sync_conduit)
-        drpm_info['missing_drpms'], drpm_info['missing_drpm_units'] = get_missing_rpms_and_units(drpm_info['available_drpms'], drpm_info['existing_drpm_units'], verify_options)
+        drpm_info['missing_drpms'], drpm_info['missing_drpm_units'] = get_missing_rpms_and_units(drpm_info['available_drpms'], drpm_info['existing_drpm_units'], verify_options, verify_stats)
         _LOG.info("Repo <%s> %s existing drpm units, %s have been orphaned, %s new drpms, %s missing drpms." %\
                   (repo.id, len(drpm_info['existing_drpm_units']), len(drpm_info['orphaned_drpm_units']), len(drpm_info['new_drpms']), len(drpm_info['missing_drpms'])))
 
@@ -110,8 +110,96 @@ class RPMErrataProfiler(Profiler):
         return ApplicabilityReport(unit, applicable, summary, details)
 
 
+    def units_applicable(self, consumers, units, config, conduit):
+        """
+        Determine which of the errata are applicable to each of the consumers.
+        Each erratum is looked up once per bound repository and its package
+        list is indexed by name and arch once, each consumer's rpm profile is
+        indexed once, and the pairs are then evaluated against those indexes.
+
+        @param consumers: A list of consumers.
+        @type consumers: list of L{pulp.server.plugins.model.Consumer}
+
+        @param units: A list of content units: { type_id:<str>, unit_key:<dict> }
+        @type units: list
+
+        @param config: plugin configuration
+        @type config: L{pulp.server.plugins.config.PluginCallConfiguration}
+
+        @param conduit: provides access to relevant Pulp functionality
+        @type conduit: L{pulp.plugins.conduits.profile.ProfilerConduit}
+
+        @return: A dict of consumer ID to a list of applicability reports,
+            in the same order as the units.
+        @rtype: dict of: {consumer_id:[L{pulp.plugins.model.ApplicabilityReport}]}
+        """
+        for unit in units:
+            if unit["type_id"] != TYPE_ID_ERRATA:
+                error_msg = _("unit_applicable invoked with type_id [%s], expected [%s]") % (unit["type_id"], TYPE_ID_ERRATA)
+                _LOG.error(error_msg)
+                raise InvalidUnitsRequested([unit], error_msg)
+        unit_keys = [self.form_unit_key_index(u["unit_key"]) for u in units]
+        bindings = dict([(c.id, conduit.get_bindings(c.id)) for c in consumers])
+        repo_errata = {}
+        errata_rpms = {}
+        result = {}
+        for consumer in consumers:
+            lookup = None
+            reports = []
+            for unit, unit_key in zip(units, unit_keys):
+                errata = None
+                for repo_id in bindings[consumer.id]:
+                    if repo_id not in repo_errata:
+                        repo_errata[repo_id] = self.find_errata_in_repo(repo_id, units, conduit)
+                    errata = repo_errata[repo_id].get(unit_key)
+                    if errata is not None:
+                        break
+                if errata is None:
+                    error_msg = _("Unable to find errata with unit_key [%s] in bound repos [%s] to consumer [%s]") % \
+                            (unit["unit_key"], bindings[consumer.id], consumer.id)
+                    _LOG.error(error_msg)
+                    raise InvalidUnitsRequested([unit], error_msg)
+                if unit_key not in errata_rpms:
+                    errata_rpms[unit_key] = [(self.form_lookup_key(r), r) for r in self.get_rpms_from_errata(errata)]
+                if lookup is None:
+                    lookup = self.form_lookup_table(consumer.profiles.get(TYPE_ID_RPM, []))
+                applicable_rpms, upgrade_details = self.rpms_applicable_to_lookup(lookup, errata_rpms[unit_key])
+                # same details as unit_applicable, see translate()
+                details = {"applicable_rpms": self.translate_rpms(applicable_rpms),
+                           "upgrade_details": upgrade_details}
+                reports.append(ApplicabilityReport(unit, bool(applicable_rpms), {}, details))
+            result[consumer.id] = reports
+        return result
+
     # -- Below are helper methods not part of the Profiler interface ----
 
+    def find_errata_in_repo(self, repo_id, units, conduit):
+        """
+        Find which of the requested errata are associated with a repository.
+
+        @param repo_id: repository to search
+        @type repo_id: str
+
+        @param units: A list of errata units: { type_id:<str>, unit_key:<dict> }
+        @type units: list
+
+        @param conduit: provides access to relevant Pulp functionality
+        @type conduit: L{pulp.plugins.conduits.profile.ProfilerConduit}
+
+        @return: dict of unit key index (see form_unit_key_index) to errata
+        @rtype: {(): pulp.plugins.model.Unit}
+        """
+        unit_filters = {"$or": [u["unit_key"] for u in units]}
+        criteria = UnitAssociationCriteria(type_ids=[TYPE_ID_ERRATA], unit_filters=unit_filters)
+        found = {}
+        for errata in conduit.get_units(repo_id, criteria):
+            found.setdefault(self.form_unit_key_index(errata.unit_key), errata)
+        _LOG.info("Found %s of %s errata in repo <%s>" % (len(found), len(units), repo_id))
+        return found
+
+    def form_unit_key_index(self, unit_key):
+        return tuple(sorted(unit_key.items()))
+
     def translate_units(self, units, consumer, conduit):
         """
         Will translate passed in errata unit_keys to a list of dictionaries
@@ -178,14 +266,25 @@ class RPMErrataProfiler(Profiler):
         applicable_rpms, upgrade_details = self.rpms_applicable_to_consumer(consumer, updated_rpms)
         if applicable_rpms:
             _LOG.info("Rpms: <%s> were found to be related to errata <%s> and applicable to consumer <%s>" % (applicable_rpms, errata, consumer.id))
-        # Return as list of name.arch values
+        ret_val = self.translate_rpms(applicable_rpms)
+        _LOG.info("Translated errata <%s> to <%s>" % (errata, ret_val))
+        return ret_val, upgrade_details
+
+    def translate_rpms(self, rpms):
+        """
+        Translates the rpms of an erratum to rpm units identified by name.arch
+
+        @param rpms: list of rpms, which are each a dict of nevra info
+        @type rpms: [{}]
+
+        @rtype [{'unit_key':{'name':name.arch}, 'type_id':'rpm'}]
+        """
         ret_val = []
-        for ar in applicable_rpms:
+        for ar in rpms:
             pkg_name = "%s.%s" % (ar["name"], ar["arch"])
             data = {"unit_key":{"name":pkg_name}, "type_id":TYPE_ID_RPM}
             ret_val.append(data)
-        _LOG.info("Translated errata <%s> to <%s>" % (errata, ret_val))
-        return ret_val, upgrade_details
+        return ret_val
 
     def find_unit_associated_to_consumer(self, unit_type, unit_key, consumer, conduit):
         criteria = UnitAssociationCriteria(type_ids=[unit_type], unit_filters=unit_key)
@@ -244,17 +343,29 @@ class RPMErrataProfiler(Profiler):
                     (consumer.id, TYPE_ID_RPM, consumer.profiles.keys()))
             return applicable_rpms, older_rpms
         lookup = self.form_lookup_table(consumer.profiles[TYPE_ID_RPM])
-        for errata_rpm in errata_rpms:
-            key = self.form_lookup_key(errata_rpm)
-            if lookup.has_key(key):
-                installed_rpm = lookup[key]
-                is_newer = util.is_rpm_newer(errata_rpm, installed_rpm)
-                _LOG.info("Found a match of rpm <%s> installed on consumer, is %s newer than %s, %s" % (key, errata_rpm, installed_rpm, is_newer))
-                if is_newer:
-                    applicable_rpms.append(errata_rpm)
-                    older_rpms[key] = {"installed":installed_rpm, "available":errata_rpm}
-            else:
-                _LOG.info("rpm %s was not found in consumer profile of %s" % (key, consumer.id))
+        keyed_rpms = [(self.form_lookup_key(r), r) for r in errata_rpms]
+        return self.rpms_applicable_to_lookup(lookup, keyed_rpms)
+
+    def rpms_applicable_to_lookup(self, lookup, keyed_rpms):
+        """
+        @param lookup: installed rpms, as returned by form_lookup_table
+        @type lookup: dict
+
+        @param keyed_rpms: errata rpms paired with their lookup key
+        @type keyed_rpms: list of (str, dict)
+
+        @return: same as rpms_applicable_to_consumer
+        @rtype: ([{}], {})
+        """
+        applicable_rpms = []
+        older_rpms = {}
+        for key, errata_rpm in keyed_rpms:
+            installed_rpm = lookup.get(key)
+            if installed_rpm is None:
+                continue
+            if util.is_rpm_newer(errata_rpm, installed_rpm):
+                applicable_rpms.append(errata_rpm)
+                older_rpms[key] = {"installed":installed_rpm, "available":errata_rpm}
         return applicable_rpms, older_rpms
 
     def form_lookup_table(self, rpms):
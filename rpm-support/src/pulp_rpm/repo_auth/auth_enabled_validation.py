@@ -19,10 +19,15 @@ doesn't care at all about repo authentication.
 
 from ConfigParser import SafeConfigParser
 
+from pulp_rpm.repo_auth.cache import FileCache
+
 # This needs to be accessible on both Pulp and the CDS instances, so a
 # separate config file for repo auth purposes is used.
 CONFIG_FILENAME = '/etc/pulp/repo_auth.conf'
 
+# Loaded configuration, reloaded when the file changes
+_FILE_CACHE = FileCache()
+
 
 # -- framework------------------------------------------------------------------
 
@@ -38,6 +43,9 @@ def authenticate(environ):
     return not is_enabled
 
 def _config():
+    return _FILE_CACHE.get(CONFIG_FILENAME, _load_config)
+
+def _load_config(filename):
     config = SafeConfigParser()
-    config.read(CONFIG_FILENAME)
+    config.read(filename)
     return config
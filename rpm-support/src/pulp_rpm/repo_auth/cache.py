@@ -0,0 +1,154 @@
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+'''
+Per-process caches used by the repo auth handlers so that the files they
+depend on (configuration, protected repo listings, CA certificates) are only
+re-read when they change on disk and expensive decisions (certificate chain
+verification) are not repeated on every request.
+'''
+
+import os
+import time
+from threading import Lock
+
+# -- file cache ----------------------------------------------------------------------
+
+def stat_signature(filename):
+    '''
+    Returns a value that changes whenever the file is replaced, rewritten or
+    removed.
+
+    @param filename: absolute path to the file
+    @type  filename: str
+
+    @return: (inode, size, modification time) of the file; None if it does not exist
+    @rtype:  tuple
+    '''
+    try:
+        s = os.stat(filename)
+    except OSError:
+        return None
+    return s.st_ino, s.st_size, s.st_mtime
+
+
+class FileCache:
+    '''
+    Caches the result of loading a file, keyed by the file's path, for as long
+    as the file's stat signature is unchanged.
+    '''
+
+    def __init__(self):
+        self.lock = Lock()
+        self.entries = {} # mapping of (filename, load function) to (signature, value)
+
+    def get(self, filename, load):
+        '''
+        Returns the cached value for the file, calling load to (re)build it if
+        the file has changed since it was last loaded.
+
+        @param filename: absolute path to the file
+        @type  filename: str
+
+        @param load: function that accepts the filename and returns the value
+                     to cache; it is called for missing files as well
+        @type  load: callable
+
+        @return: value returned by load
+        '''
+        key = (filename, load)
+        signature = stat_signature(filename)
+
+        self.lock.acquire()
+        try:
+            entry = self.entries.get(key)
+        finally:
+            self.lock.release()
+
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        value = load(filename)
+
+        self.lock.acquire()
+        try:
+            self.entries[key] = (signature, value)
+        finally:
+            self.lock.release()
+
+        return value
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.entries.clear()
+        finally:
+            self.lock.release()
+
+# -- decision cache ------------------------------------------------------------------
+
+class ExpiringCache:
+    '''
+    Bounded mapping whose entries are discarded after a fixed lifetime. When
+    the cache is full it is emptied rather than tracking usage, which keeps
+    lookups cheap and is sufficient for the working set of a single process.
+    '''
+
+    def __init__(self, max_entries=10000, ttl=None):
+        '''
+        @param max_entries: maximum number of entries held at once
+        @type  max_entries: int
+
+        @param ttl: lifetime of an entry in seconds; None for no expiration
+        @type  ttl: int or float
+        '''
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = Lock()
+        self.entries = {} # mapping of key to (expiration time, value)
+
+    def get(self, key, default=None):
+        self.lock.acquire()
+        try:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires is not None and expires < time.time():
+                del self.entries[key]
+                return default
+            return value
+        finally:
+            self.lock.release()
+
+    def set(self, key, value):
+        expires = None
+        if self.ttl is not None:
+            expires = time.time() + self.ttl
+
+        self.lock.acquire()
+        try:
+            if key not in self.entries and len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            self.entries[key] = (expires, value)
+        finally:
+            self.lock.release()
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.entries.clear()
+        finally:
+            self.lock.release()
+
+    def __len__(self):
+        return len(self.entries)
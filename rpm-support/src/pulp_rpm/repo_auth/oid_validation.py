@@ -26,10 +26,13 @@ The * represents the product ID and is not used as part of this calculation.
 '''
 
 from ConfigParser import SafeConfigParser
+import hashlib
 import re
+import urllib
 
 from pulp_rpm.repo_auth import certificate
-from pulp_rpm.repo_auth.protected_repo_utils import ProtectedRepoUtils
+from pulp_rpm.repo_auth.cache import ExpiringCache, FileCache
+from pulp_rpm.repo_auth.protected_repo_utils import ProtectedRepoListingFile, ProtectedRepoPathTrie
 from pulp_rpm.repo_auth.repo_cert_utils import RepoCertUtils
 
 
@@ -45,6 +48,26 @@ CONFIG_FILENAME = '/etc/pulp/repo_auth.conf'
 # hardcoded until we actually get a use case to make it variable.
 RELATIVE_URL = '/pulp/repos' # no trailing backslash; we take care of normalizing it later
 
+# Seconds a certificate chain verification result is reused before the client
+# certificate is verified against the CA (and any CRLs) again. Changes to the
+# CA certificates themselves take effect immediately.
+VERIFICATION_CACHE_TTL = 60
+
+# -- caches --------------------------------------------------------------------
+
+# Loaded configuration, protected repo listings and CA certificates, reloaded
+# when the underlying file changes
+_FILE_CACHE = FileCache()
+
+# (client cert digest, CA digest) -> chain verification result
+_VERIFICATION_CACHE = ExpiringCache(ttl=VERIFICATION_CACHE_TTL)
+
+# client cert digest -> compiled download URL patterns from its extensions
+_DOWNLOAD_URL_CACHE = ExpiringCache()
+
+# configuration -> validator
+_VALIDATOR_CACHE = ExpiringCache(max_entries=10)
+
 # -- framework -----------------------------------------------------------------
 
 def authenticate(environ, config=None):
@@ -56,22 +79,47 @@ def authenticate(environ, config=None):
     if config is None:
         config = _config()
 
-    validator = OidValidator(config)
+    validator = _VALIDATOR_CACHE.get(id(config))
+    if validator is None or validator.config is not config:
+        validator = OidValidator(config)
+        _VALIDATOR_CACHE.set(id(config), validator)
     valid = validator.is_valid(environ["REQUEST_URI"], cert_pem,
         environ["wsgi.errors"].write)
     return valid
 
 def _config():
+    return _FILE_CACHE.get(CONFIG_FILENAME, _load_config)
+
+def _load_config(filename):
     config = SafeConfigParser()
-    config.read(CONFIG_FILENAME)
+    config.read(filename)
     return config
 
+def _load_protected_repo_trie(filename):
+    f = ProtectedRepoListingFile(filename)
+    f.load()
+    return ProtectedRepoPathTrie(f.listings)
+
+def _load_pem(filename):
+    '''
+    Returns the contents of a PEM file along with their digest, which is used
+    to key the verification results for the certificates in it.
+    '''
+    try:
+        f = open(filename, 'r')
+    except IOError:
+        return None
+    try:
+        contents = f.read()
+    finally:
+        f.close()
+    return contents, hashlib.sha1(contents).hexdigest()
+
 class OidValidator:
 
     def __init__(self, config):
         self.config = config
         self.repo_cert_utils = RepoCertUtils(config)
-        self.protected_repo_utils = ProtectedRepoUtils(config)
 
     def is_valid(self, dest, cert_pem, log_func):
         '''
@@ -94,7 +142,7 @@ class OidValidator:
                 return False
 
             # Make sure the client cert is signed by the correct CA
-            is_valid = self.repo_cert_utils.validate_certificate_pem(cert_pem, repo_bundle['ca'], log_func=log_func)
+            is_valid = self._validate_certificate(cert_pem, repo_bundle['ca'], log_func)
             if not is_valid:
                 log_func('Client certificate did not match the repo consumer CA certificate')
                 return False
@@ -104,7 +152,7 @@ class OidValidator:
 
         # Load the global repo auth cert bundle and check it's CA against the client cert
         # if it didn't already pass the individual auth check
-        global_bundle = self.repo_cert_utils.read_global_cert_bundle(['ca'])
+        global_bundle = self._read_bundle(self.repo_cert_utils.global_cert_bundle_filenames(['ca']))
         if not passes_individual_ca and global_bundle is not None:
 
             # If there is a global repo bundle but no client certificate has been specified,
@@ -113,7 +161,7 @@ class OidValidator:
                 return False
 
             # Make sure the client cert is signed by the correct CA
-            is_valid = self.repo_cert_utils.validate_certificate_pem(cert_pem, global_bundle['ca'], log_func=log_func)
+            is_valid = self._validate_certificate(cert_pem, global_bundle['ca'], log_func)
             if not is_valid:
                 log_func('Client certificate did not match the global repo auth CA certificate')
                 return False
@@ -131,7 +179,8 @@ class OidValidator:
     def _matching_repo_bundle(self, dest):
 
         # Load the path -> repo ID mappings
-        prot_repos = self.protected_repo_utils.read_protected_repo_listings()
+        filename = self.config.get('repos', 'protected_repo_listing_file')
+        prot_repos = _FILE_CACHE.get(filename, _load_protected_repo_trie)
 
         # Extract the repo portion of the URL
         #   Example URL: https://guardian/pulp/repos/my-repo/pulp/fedora-13/i386/repodata/repomd.xml
@@ -139,27 +188,62 @@ class OidValidator:
         repo_url = dest[dest.find(RELATIVE_URL) + len(RELATIVE_URL):]
 
         # If the repo portion of the URL starts with any of the protected relative URLs,
-        # it is considered to be a request against that protected repo
-        repo_id = None
-        for relative_url in prot_repos.keys():
-
-            # Relative URL is inconsistent in Pulp, so a simple "startswith" tends to
-            # break. Changing this to a find helps remove issues where the leading /
-            # is missing, present, or duplicated.
-            if repo_url.find(relative_url) != -1:
-                repo_id = prot_repos[relative_url]
-                break
+        # it is considered to be a request against that protected repo. The request URI
+        # has not been decoded or normalized by the web server at this point, so do it
+        # here to match the file that will actually be served.
+        repo_id = prot_repos.find(urllib.unquote(repo_url))
 
         if not repo_id:
             return None
 
-        bundle = self.repo_cert_utils.read_consumer_cert_bundle(repo_id, ['ca'])
+        return self._read_bundle(self.repo_cert_utils.consumer_cert_bundle_filenames(repo_id, ['ca']))
+
+    def _read_bundle(self, filenames):
+        '''
+        Loads a cert bundle from the given files through the file cache.
+
+        @param filenames: mapping of bundle piece to filename, as returned by
+                          the RepoCertUtils *_filenames calls; may be None
+        @type  filenames: dict {str, str}
+
+        @return: mapping of bundle piece to (PEM contents, digest); None if
+                 the bundle does not exist
+        @rtype:  dict {str, (str, str)}
+        '''
+        if filenames is None:
+            return None
+
+        bundle = None
+        for piece, filename in filenames.items():
+            pem = _FILE_CACHE.get(filename, _load_pem)
+            if pem is not None:
+                bundle = bundle or {}
+                bundle[piece] = pem
         return bundle
 
-    def _check_extensions(self, cert_pem, dest, log_func):
+    def _validate_certificate(self, cert_pem, ca, log_func):
+        '''
+        Verifies the client certificate against a CA, reusing the result of an
+        earlier verification of the same certificate against the same CA.
+
+        @param cert_pem: PEM encoded client certificate
+        @type  cert_pem: str
+
+        @param ca: (PEM contents, digest) of the CA certificates
+        @type  ca: tuple
+
+        @return: true if the certificate was signed by the given CA; false otherwise
+        @rtype:  bool
+        '''
+        ca_pem, ca_digest = ca
+        key = (hashlib.sha1(cert_pem).hexdigest(), ca_digest)
+        is_valid = _VERIFICATION_CACHE.get(key)
+        if is_valid is None:
+            is_valid = bool(self.repo_cert_utils.validate_certificate_pem(cert_pem, ca_pem, log_func=log_func))
+            _VERIFICATION_CACHE.set(key, is_valid)
+        return is_valid
 
-        cert = certificate.Certificate(content=cert_pem)
-        extensions = cert.extensions()
+    def _check_extensions(self, cert_pem, dest, log_func):
 
         # Extract the repo portion of the URL
         repo_dest = dest[dest.find(RELATIVE_URL) + len(RELATIVE_URL) + 1:]
@@ -167,19 +251,38 @@ class OidValidator:
         repo_dest = repo_dest.strip('/')
 
         valid = False
-        for e in extensions:
-            if self._is_download_url_ext(e):
-                oid_url = extensions[e]
-
-                if self._validate_url(oid_url, repo_dest):
-                    valid = True
-                    break
+        for oid_re in self._download_url_patterns(cert_pem):
+            if oid_re.match(repo_dest) is not None:
+                valid = True
+                break
 
         if not valid:
             log_func('Request denied to destination [%s]' % dest)
 
         return valid
 
+    def _download_url_patterns(self, cert_pem):
+        '''
+        Returns the compiled download URL patterns (see _validate_url) found in
+        the certificate's extensions. Parsing the extensions is only done the
+        first time a given certificate is seen.
+
+        @param cert_pem: PEM encoded client certificate
+        @type  cert_pem: str
+
+        @return: list of compiled regular expressions
+        @rtype:  list
+        '''
+        key = hashlib.sha1(cert_pem).hexdigest()
+        patterns = _DOWNLOAD_URL_CACHE.get(key)
+        if patterns is None:
+            cert = certificate.Certificate(content=cert_pem)
+            extensions = cert.extensions()
+            patterns = [re.compile(self._url_pattern(extensions[e]))
+                        for e in extensions if self._is_download_url_ext(e)]
+            _DOWNLOAD_URL_CACHE.set(key, patterns)
+        return patterns
+
     def _is_download_url_ext(self, ext_oid):
         '''
         Tests to see if the given OID corresponds to a download URL value.
@@ -209,7 +312,14 @@ class OidValidator:
         # Should allow any value for the variables:
         #   content/dist/rhel/server/.+?/.+?/os
 
+        return re.match(self._url_pattern(oid_url), dest) is not None
+
+    def _url_pattern(self, oid_url):
+        '''
+        Returns the regular expression equivalent of an OID download URL.
+
+        @rtype:  str
+        '''
         # Remove initial and trailing '/', and substitute the $variables for
         # equivalent regular expressions in oid_url.
-        oid_re = re.sub(r'\$[^/]+(/|$)', '[^/]+/', oid_url.strip('/'))
-        return re.match(oid_re, dest) is not None
+        return re.sub(r'\$[^/]+(/|$)', '[^/]+/', oid_url.strip('/'))
@@ -16,6 +16,7 @@ repo information.
 '''
 
 import os
+import posixpath
 from threading import RLock
 
 # -- constants ----------------------------------------------------------------------
@@ -185,3 +186,60 @@ class ProtectedRepoListingFile:
         @type  relative_path_url: str
         '''
         self.listings.pop(relative_path_url, None) # will not error if key isn't present
+
+
+class ProtectedRepoPathTrie:
+    '''
+    Prefix tree of protected relative paths, keyed by path component, used to
+    find the protected repo a request path falls under without testing the
+    path against every listing.
+    '''
+
+    def __init__(self, listings):
+        '''
+        @param listings: mapping of relative path URL to repo ID
+        @type  listings: dict {str, str}
+        '''
+        self.root = {}
+        for relative_path_url, repo_id in listings.items():
+            node = self.root
+            for component in split_path(relative_path_url):
+                node = node.setdefault(component, {})
+            node[None] = repo_id
+
+    def find(self, path):
+        '''
+        Finds the repo whose relative path is the longest match for the start of
+        the given path.
+
+        @param path: path relative to the repos URL, such as
+                     /my-repo/pulp/fedora-13/i386/repodata/repomd.xml
+        @type  path: str
+
+        @return: ID of the matching protected repo; None if the path is not protected
+        @rtype:  str
+        '''
+        node = self.root
+        repo_id = node.get(None)
+        for component in split_path(path):
+            node = node.get(component)
+            if node is None:
+                break
+            repo_id = node.get(None, repo_id)
+        return repo_id
+
+
+def split_path(path):
+    '''
+    Splits a URL path into its components. Relative paths are inconsistent in
+    Pulp about leading, trailing and duplicated slashes, so those are ignored,
+    and . and .. are resolved the same way the web server does.
+
+    @param path: URL path
+    @type  path: str
+
+    @return: list of path components
+    @rtype:  list of str
+    '''
+    path = posixpath.normpath('/' + path)
+    return [c for c in path.split('/') if c]
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Persistent cache of the checksums computed when verifying the packages in the
+content store. Entries are keyed by the file's path, inode, size, modification
+time and checksum type, so a file that has not changed since it was last
+verified is not read again.
+
+Files missing from the cache are hashed a few at a time by short-lived
+md5sum/sha*sum subprocesses. hashlib on the python 2.6 servers holds the GIL
+while hashing, stalling the other threads of the mod_wsgi daemon the importer
+runs in, and forking the daemon itself (as multiprocessing does) carries its
+sockets and state into the children. The commands are executed with their
+file descriptors closed, so they share nothing with the daemon. Checksum
+types without a command are hashed in the calling thread.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+
+_LOG = logging.getLogger("pulp.plugins." + __name__)
+
+# Default location of the cache database, shared by all repositories
+CHECKSUM_CACHE_PATH = "/var/lib/pulp/cache/yum_importer/checksums.db"
+
+# Size of the reads made when hashing a file
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# Number of subprocesses hashing files at once
+HASH_PROCESSES = 4
+
+# Commands that print the checksum of a file, by checksum type
+HASH_COMMANDS = {
+    'md5' : 'md5sum',
+    'sha1' : 'sha1sum',
+    'sha224' : 'sha224sum',
+    'sha256' : 'sha256sum',
+    'sha384' : 'sha384sum',
+    'sha512' : 'sha512sum',
+}
+
+# Number of entries looked up or stored per database statement
+_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checksums (
+    path TEXT NOT NULL,
+    checksum_type TEXT NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    checksum TEXT NOT NULL,
+    PRIMARY KEY (path, checksum_type)
+)
+"""
+
+# -- hashing -------------------------------------------------------------------------
+
+def file_signature(file_path):
+    """
+    @return: (inode, size, modification time) of the file; None if it does not exist
+    @rtype:  tuple
+    """
+    try:
+        s = os.stat(file_path)
+    except OSError:
+        return None
+    return s.st_ino, s.st_size, s.st_mtime
+
+
+def compute_checksum(file_path, checksum_type, buffer_size=HASH_BUFFER_SIZE):
+    """
+    @return: hex digest of the file's content
+    @rtype:  str
+    """
+    if checksum_type in ['sha', 'SHA']:
+        checksum_type = 'sha1'
+    m = hashlib.new(checksum_type)
+    f = open(file_path, 'rb')
+    try:
+        while True:
+            buffer = f.read(buffer_size)
+            if not buffer:
+                break
+            m.update(buffer)
+    finally:
+        f.close()
+    return m.hexdigest()
+
+
+def _hash_file(args):
+    """
+    Hashes one file; errors are returned rather than raised so that one
+    unreadable file does not abort the others.
+    """
+    file_path, checksum_type, signature = args
+    try:
+        return file_path, checksum_type, signature, compute_checksum(file_path, checksum_type), None
+    except Exception, e:
+        return file_path, checksum_type, signature, None, str(e)
+
+
+def _start_hash(args):
+    """
+    Starts hashing one file in a subprocess.
+
+    @return: the subprocess; None if there is no command for the checksum
+             type or it could not be executed
+    @rtype:  subprocess.Popen
+    """
+    file_path, checksum_type, signature = args
+    if checksum_type in ['sha', 'SHA']:
+        checksum_type = 'sha1'
+    command = HASH_COMMANDS.get(checksum_type.lower())
+    if command is None:
+        return None
+    try:
+        return subprocess.Popen([command, '--', file_path], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, close_fds=True)
+    except OSError, e:
+        _LOG.debug("Unable to run %s: %s" % (command, e))
+        return None
+
+
+def _finish_hash(args, process):
+    """
+    Waits for a subprocess started by _start_hash; the result is the same as
+    the one of _hash_file.
+    """
+    file_path, checksum_type, signature = args
+    output, error = process.communicate()
+    fields = output.split()
+    if process.returncode != 0 or not fields:
+        return file_path, checksum_type, signature, None, error.strip() or output.strip()
+    # the checksum is escaped with a backslash for file names containing one
+    return file_path, checksum_type, signature, fields[0].lstrip('\\'), None
+
+# -- cache ---------------------------------------------------------------------------
+
+class ChecksumCache:
+    """
+    Checksums of files in the content store, stored in a sqlite database.
+    Failures to read or write the database are logged and treated as cache
+    misses, so verification never depends on the cache being usable.
+    """
+
+    def __init__(self, path=CHECKSUM_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        self._lock.acquire()
+        try:
+            if not self._initialized:
+                cache_dir = os.path.dirname(self.path)
+                if not os.path.exists(cache_dir):
+                    os.makedirs(cache_dir)
+        finally:
+            self._lock.release()
+        connection = sqlite3.connect(self.path, timeout=30)
+        # paths are stored and returned as they were given, as byte strings
+        connection.text_factory = str
+        if not self._initialized:
+            connection.execute(_SCHEMA)
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def lookup(self, files):
+        """
+        @param files: list of (path, checksum type, signature) of the files
+        @type  files: list of tuple
+
+        @return: mapping of (path, checksum type) to checksum for the files
+                 whose cached signature matches
+        @rtype:  dict
+        """
+        found = {}
+        try:
+            connection = self._connect()
+        except (OSError, sqlite3.Error), e:
+            _LOG.warn("Unable to read checksum cache <%s>: %s" % (self.path, e))
+            return found
+        try:
+            for i in range(0, len(files), _BATCH_SIZE):
+                batch = files[i:i + _BATCH_SIZE]
+                signatures = dict(((p, t), s) for p, t, s in batch)
+                clause = " OR ".join(["(path = ? AND checksum_type = ?)"] * len(batch))
+                params = []
+                for p, t, s in batch:
+                    params.extend([p, t])
+                rows = connection.execute(
+                    "SELECT path, checksum_type, inode, size, mtime, checksum FROM checksums WHERE " + clause,
+                    params)
+                for path, checksum_type, inode, size, mtime, checksum in rows:
+                    if signatures.get((path, checksum_type)) == (inode, size, mtime):
+                        found[(path, checksum_type)] = str(checksum)
+        except sqlite3.Error, e:
+            _LOG.warn("Unable to read checksum cache <%s>: %s" % (self.path, e))
+        finally:
+            connection.close()
+        return found
+
+    def store(self, entries):
+        """
+        @param entries: list of (path, checksum type, signature, checksum)
+        @type  entries: list of tuple
+        """
+        if not entries:
+            return
+        try:
+            connection = self._connect()
+        except (OSError, sqlite3.Error), e:
+            _LOG.warn("Unable to update checksum cache <%s>: %s" % (self.path, e))
+            return
+        try:
+            for i in range(0, len(entries), _BATCH_SIZE):
+                rows = [(p, t, s[0], s[1], s[2], c) for p, t, s, c in entries[i:i + _BATCH_SIZE]]
+                connection.executemany("INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?, ?)", rows)
+                connection.commit()
+        except sqlite3.Error, e:
+            _LOG.warn("Unable to update checksum cache <%s>: %s" % (self.path, e))
+        finally:
+            connection.close()
+
+    def checksum(self, file_path, checksum_type):
+        """
+        Returns the checksum of a single file, from the cache if the file has
+        not changed since it was last hashed.
+
+        @return: checksum of the file; None if the file does not exist
+        @rtype:  str or None
+        """
+        checksums, stats = self.checksums([(file_path, checksum_type)], num_processes=1)
+        return checksums.get((file_path, checksum_type))
+
+    def checksums(self, files, num_processes=HASH_PROCESSES):
+        """
+        Returns the checksums of the given files. Files that changed since
+        they were last hashed, or were never hashed, are hashed in
+        subprocesses and the cache is updated.
+
+        @param files: list of (path, checksum type)
+        @type  files: list of tuple
+
+        @param num_processes: number of files hashed at once
+        @type  num_processes: int
+
+        @return: tuple of a mapping of (path, checksum type) to checksum for
+                 the files that exist and could be read, and a dict of the
+                 number of files 'verified' (hashed), 'skipped' (unchanged)
+                 and in 'error'
+        @rtype:  tuple
+        """
+        stats = {'verified' : 0, 'skipped' : 0, 'error' : 0}
+        signed = []
+        for file_path, checksum_type in set(files):
+            signature = file_signature(file_path)
+            if signature is not None:
+                signed.append((file_path, checksum_type, signature))
+
+        checksums = self.lookup(signed)
+        stats['skipped'] = len(checksums)
+        misses = [f for f in signed if (f[0], f[1]) not in checksums]
+
+        entries = []
+        for file_path, checksum_type, signature, checksum, error in _hash_files(misses, num_processes):
+            if error is not None:
+                _LOG.error("Unable to compute checksum of <%s>: %s" % (file_path, error))
+                stats['error'] += 1
+                continue
+            checksums[(file_path, checksum_type)] = checksum
+            stats['verified'] += 1
+            # only cache the checksum if the file was not modified while it
+            # was being read
+            if file_signature(file_path) == signature:
+                entries.append((file_path, checksum_type, signature, checksum))
+        self.store(entries)
+        return checksums, stats
+
+
+def _hash_files(files, num_processes=HASH_PROCESSES):
+    """
+    @return: list of the results of _hash_file for each of the files
+    """
+    results = []
+    running = []
+    for f in files:
+        process = _start_hash(f)
+        if process is None:
+            results.append(_hash_file(f))
+            continue
+        running.append((f, process))
+        if len(running) >= num_processes:
+            results.append(_finish_hash(*running.pop(0)))
+    for f, process in running:
+        results.append(_finish_hash(f, process))
+    return results
+
+# -- public --------------------------------------------------------------------------
+
+_CACHE = ChecksumCache()
+
+
+def get_checksum_cache():
+    """
+    @return: the checksum cache shared by all repositories
+    @rtype:  ChecksumCache
+    """
+    return _CACHE
@@ -19,7 +19,7 @@ import subprocess
 import threading
 import signal
 import time
-from pulp_rpm.yum_plugin import util
+from pulp_rpm.yum_plugin import repodata, util
 from pulp.common.util import encode_unicode, decode_unicode
 
 _LOG = util.getLogger(__name__)
@@ -30,6 +30,14 @@ __yum_lock = threading.Lock()
 CREATE_REPO_PROCESS_LOOKUP = {}
 CREATE_REPO_PROCESS_LOOKUP_LOCK = threading.Lock()
 
+# In memory lookup table of cancel events for metadata being generated without
+# createrepo, keyed by repo_dir; guarded by CREATE_REPO_PROCESS_LOOKUP_LOCK
+REPODATA_CANCEL_LOOKUP = {}
+
+# Metadata types generated by createrepo (or generate_repodata); any other
+# types found in existing metadata are carried over with modifyrepo
+BASE_METADATA_TYPES = ['primary', 'primary_db', 'filelists_db', 'filelists', 'other', 'other_db', 'group', 'group_gz']
+
 class CreateRepoError(Exception):
     pass
 
@@ -46,9 +54,12 @@ def set_progress(type_id, status, progress_callback):
     if progress_callback:
         progress_callback(type_id, status)
 
-def generate_metadata(repo, publish_conduit, config, progress_callback=None, groups_xml_path=None):
+def generate_metadata(repo, publish_conduit, config, progress_callback=None, groups_xml_path=None,
+                      units=None):
     """
-      build all the necessary info and invoke createrepo to generate metadata
+      build all the necessary info and invoke createrepo to generate metadata;
+      if the package units are given, the metadata is generated from them
+      without createrepo (see generate_repodata)
 
       @param repo: metadata describing the repository
       @type  repo: L{pulp.server.content.plugins.data.Repository}
@@ -62,6 +73,10 @@ def generate_metadata(repo, publish_conduit, config, progress_callback=None, gro
       @param groups_xml_path: path to the package groups/package category comps info
       @type groups_xml_path: str
 
+      @param units: package units published in the repository, available under
+                    the repository working directory at their relative paths
+      @type units: [AssociatedUnit]
+
       @return True on success, False on error
       @rtype bool
     """
@@ -84,11 +99,16 @@ def generate_metadata(repo, publish_conduit, config, progress_callback=None, gro
         # If no value for groups_xml_path, fallback to whatever is in repomd.xml
         if groups_xml_path is None:
             groups_xml_path = __get_groups_xml_info(repo_dir)
-    _LOG.info("Running createrepo with groups file <%s>, this may take a few minutes to complete." % (groups_xml_path))
     start = time.time()
     try:
         set_progress("metadata", metadata_progress_status, progress_callback)
-        create_repo(repo_dir, groups=groups_xml_path, checksum_type=checksum_type, skip_metadata_types=skip_metadata_types)
+        if units is not None and native_metadata_available():
+            _LOG.info("Generating metadata for %s packages with groups file <%s>" % (len(units), groups_xml_path))
+            generate_repodata(repo_dir, units, groups=groups_xml_path, checksum_type=checksum_type,
+                              skip_metadata_types=skip_metadata_types)
+        else:
+            _LOG.info("Running createrepo with groups file <%s>, this may take a few minutes to complete." % (groups_xml_path))
+            create_repo(repo_dir, groups=groups_xml_path, checksum_type=checksum_type, skip_metadata_types=skip_metadata_types)
     except CreateRepoError, cre:
         metadata_progress_status = {"state" : "FAILED"}
         set_progress("metadata", metadata_progress_status, progress_callback)
@@ -100,7 +120,7 @@ def generate_metadata(repo, publish_conduit, config, progress_callback=None, gro
         errors.append(ce)
         return False, errors
     end = time.time()
-    _LOG.info("Createrepo finished in %s seconds" % (end - start))
+    _LOG.info("Metadata generation finished in %s seconds" % (end - start))
     metadata_progress_status = {"state" : "FINISHED"}
     set_progress("metadata", metadata_progress_status, progress_callback)
     return True, []
@@ -247,30 +267,7 @@ def create_repo(dir, groups=None, checksum_type="sha256", skip_metadata_types=[]
         if not backup_repo_dir:
             _LOG.info("Nothing further to check; we got our fresh metadata")
             return
-        #check if presto metadata exist in the backup
-        repodata_file = os.path.join(backup_repo_dir, "repomd.xml")
-        ftypes = util.get_repomd_filetypes(repodata_file)
-        base_ftypes = ['primary', 'primary_db', 'filelists_db', 'filelists', 'other', 'other_db', 'group', 'group_gz']
-        for ftype in ftypes:
-            if ftype in base_ftypes:
-                # no need to process these again
-                continue
-            if ftype in skip_metadata_types and not skip_metadata_types[ftype]:
-                _LOG.info("mdtype %s part of skip metadata; skipping" % ftype)
-                continue
-            filetype_path = os.path.join(backup_repo_dir, os.path.basename(util.get_repomd_filetype_path(repodata_file, ftype)))
-            # modifyrepo uses filename as mdtype, rename to type.<ext>
-            renamed_filetype_path = os.path.join(os.path.dirname(filetype_path), \
-                                         ftype + '.' + '.'.join(os.path.basename(filetype_path).split('.')[1:]))
-            os.rename(filetype_path,  renamed_filetype_path)
-            if renamed_filetype_path.endswith('.gz'):
-                # if file is gzipped, decompress before passing to modifyrepo
-                data = gzip.open(renamed_filetype_path).read().decode("utf-8", "replace")
-                renamed_filetype_path = '.'.join(renamed_filetype_path.split('.')[:-1])
-                open(renamed_filetype_path, 'w').write(data.encode("UTF-8"))
-            if os.path.isfile(renamed_filetype_path):
-                _LOG.info("Modifying repo for %s metadata" % ftype)
-                modify_repo(current_repo_dir, renamed_filetype_path)
+        restore_custom_metadata(backup_repo_dir, current_repo_dir, skip_metadata_types)
     finally:
         if backup_repo_dir:
             shutil.rmtree(backup_repo_dir)
@@ -280,14 +277,140 @@ def create_repo(dir, groups=None, checksum_type="sha256", skip_metadata_types=[]
         finally:
             CREATE_REPO_PROCESS_LOOKUP_LOCK.release()
 
+def restore_custom_metadata(backup_repo_dir, current_repo_dir, skip_metadata_types=[]):
+    """
+    Adds the metadata types from a backup of the repodata that were not
+    generated again (presto, updateinfo, etc.) to the current repodata with
+    modifyrepo.
+
+    @param backup_repo_dir: backup of the previous repodata directory
+    @type backup_repo_dir: str
+
+    @param current_repo_dir: newly generated repodata directory
+    @type current_repo_dir: str
+
+    @param skip_metadata_types: metadata types not to carry over
+    @type skip_metadata_types: list
+    """
+    #check if presto metadata exist in the backup
+    repodata_file = os.path.join(backup_repo_dir, "repomd.xml")
+    ftypes = util.get_repomd_filetypes(repodata_file)
+    for ftype in ftypes:
+        if ftype in BASE_METADATA_TYPES:
+            # no need to process these again
+            continue
+        if ftype in skip_metadata_types and not skip_metadata_types[ftype]:
+            _LOG.info("mdtype %s part of skip metadata; skipping" % ftype)
+            continue
+        filetype_path = os.path.join(backup_repo_dir, os.path.basename(util.get_repomd_filetype_path(repodata_file, ftype)))
+        # modifyrepo uses filename as mdtype, rename to type.<ext>
+        renamed_filetype_path = os.path.join(os.path.dirname(filetype_path), \
+                                     ftype + '.' + '.'.join(os.path.basename(filetype_path).split('.')[1:]))
+        os.rename(filetype_path,  renamed_filetype_path)
+        if renamed_filetype_path.endswith('.gz'):
+            # if file is gzipped, decompress before passing to modifyrepo
+            data = gzip.open(renamed_filetype_path).read().decode("utf-8", "replace")
+            renamed_filetype_path = '.'.join(renamed_filetype_path.split('.')[:-1])
+            open(renamed_filetype_path, 'w').write(data.encode("UTF-8"))
+        if os.path.isfile(renamed_filetype_path):
+            _LOG.info("Modifying repo for %s metadata" % ftype)
+            modify_repo(current_repo_dir, renamed_filetype_path)
+
+def native_metadata_available():
+    """
+    @return True if the modules needed by generate_repodata (those of
+            createrepo and yum-metadata-parser) can be imported
+    @rtype bool
+    """
+    try:
+        import sqlitecachec
+        from createrepo import yumbased
+    except ImportError:
+        _LOG.warn("createrepo modules not available; metadata will be generated by running createrepo")
+        return False
+    return True
+
+def generate_repodata(dir, units, groups=None, checksum_type="sha256", skip_metadata_types=[],
+                      cache_dir=repodata.PACKAGE_XML_CACHE_DIR):
+    """
+    Generates the metadata for the given package units directly, rather than
+    running createrepo over the repository directory. The metadata of each
+    package is cached (see L{repodata.PackageXMLCache}), so only packages
+    that were not published before are read. As with create_repo, metadata
+    types not generated here are carried over from the existing repodata.
+
+    @param dir: repository directory; the units must be available under it
+                at their relative paths
+    @type dir: str
+
+    @param units: package units to include in the metadata
+    @type units: [AssociatedUnit]
+
+    @param cache_dir: location of the package metadata cache
+    @type cache_dir: str
+    """
+    canceled = threading.Event()
+    CREATE_REPO_PROCESS_LOOKUP_LOCK.acquire()
+    try:
+        if CREATE_REPO_PROCESS_LOOKUP.has_key(dir) or REPODATA_CANCEL_LOOKUP.has_key(dir):
+            raise CreateRepoAlreadyRunningError()
+        REPODATA_CANCEL_LOOKUP[dir] = canceled
+    finally:
+        CREATE_REPO_PROCESS_LOOKUP_LOCK.release()
+
+    current_repo_dir = encode_unicode(os.path.join(dir, "repodata"))
+    new_repo_dir = encode_unicode(os.path.join(dir, ".repodata"))
+    backup_repo_dir = None
+    try:
+        if os.path.exists(new_repo_dir):
+            _LOG.debug("clean up any stale dirs")
+            shutil.rmtree(new_repo_dir)
+        writer = repodata.RepodataWriter(dir, checksum_type, repodata.PackageXMLCache(cache_dir), canceled)
+        try:
+            errors = writer.write(units, new_repo_dir, groups)
+        except repodata.RepodataCanceled:
+            _LOG.warn("metadata generation on %s was canceled" % (dir))
+            raise CancelException()
+        except Exception, e:
+            _LOG.exception("metadata generation on %s failed" % (dir))
+            raise CreateRepoError(str(e))
+        for relpath, msg in errors:
+            _LOG.error("Package %s not included in metadata for %s: %s" % (relpath, dir, msg))
+        _LOG.info("Generated metadata for %s packages on %s; %s packages were read" %
+                  (len(units) - len(errors), dir, writer.rendered))
+
+        if os.path.exists(current_repo_dir):
+            backup_repo_dir = os.path.join(dir, "repodata.old")
+            if os.path.exists(backup_repo_dir):
+                shutil.rmtree(backup_repo_dir)
+            os.rename(current_repo_dir, backup_repo_dir)
+        os.rename(new_repo_dir, current_repo_dir)
+
+        if backup_repo_dir:
+            restore_custom_metadata(backup_repo_dir, current_repo_dir, skip_metadata_types)
+    finally:
+        if os.path.exists(new_repo_dir):
+            shutil.rmtree(new_repo_dir)
+        if backup_repo_dir and os.path.exists(backup_repo_dir):
+            shutil.rmtree(backup_repo_dir)
+        CREATE_REPO_PROCESS_LOOKUP_LOCK.acquire()
+        try:
+            del REPODATA_CANCEL_LOOKUP[dir]
+        finally:
+            CREATE_REPO_PROCESS_LOOKUP_LOCK.release()
+
 def cancel_createrepo(repo_dir):
     """
     Method will lookup a createrepo process associated to 'repo_dir'
     If a createrepo process is running we will send a SIGKILL to it and return True
+    If metadata is being generated by generate_repodata it is canceled and True is returned
     Else we return False to denote no process was found
     """
     CREATE_REPO_PROCESS_LOOKUP_LOCK.acquire()
     try:
+        if REPODATA_CANCEL_LOOKUP.has_key(repo_dir):
+            REPODATA_CANCEL_LOOKUP[repo_dir].set()
+            return True
         if CREATE_REPO_PROCESS_LOOKUP.has_key(repo_dir):
             handle = CREATE_REPO_PROCESS_LOOKUP[repo_dir]
             try:
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Generates yum repository metadata (primary, filelists and other XML, their
+sqlite databases and repomd.xml) for a list of package units without running
+createrepo over the repository directory.
+
+The XML describing each package is rendered with createrepo's own package
+class, which needs the package's header and checksum, and is then stored in a
+cache keyed by the package's checksum. Subsequent publishes of the same
+package, in any repository, reuse the cached XML, so only packages that were
+not published before are read from disk. The metadata files are streamed from
+the cache, so memory use does not depend on the size of the repository.
+"""
+
+import bz2
+import gzip
+import hashlib
+import os
+import shutil
+import time
+
+from pulp.common.util import encode_unicode
+from pulp_rpm.yum_plugin import util
+
+_LOG = util.getLogger(__name__)
+
+# Version of the cached package XML; bump it when the rendering changes so
+# that stale fragments are not reused
+PACKAGE_XML_CACHE_VERSION = 1
+
+# Default location of the package XML cache, shared by all repositories
+PACKAGE_XML_CACHE_DIR = "/var/lib/pulp/cache/yum_distributor/package_xml"
+
+# Metadata types generated for the packages, in the order of the fragments
+# stored in the cache, with the opening and closing tags of each document
+PACKAGE_METADATA_TYPES = ('primary', 'filelists', 'other')
+
+_DOCUMENT_HEADERS = {
+    'primary' : '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<metadata xmlns="http://linux.duke.edu/metadata/common" '
+                'xmlns:rpm="http://linux.duke.edu/metadata/rpm" packages="%d">\n',
+    'filelists' : '<?xml version="1.0" encoding="UTF-8"?>\n'
+                  '<filelists xmlns="http://linux.duke.edu/metadata/filelists" packages="%d">\n',
+    'other' : '<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<otherdata xmlns="http://linux.duke.edu/metadata/other" packages="%d">\n',
+}
+
+_DOCUMENT_FOOTERS = {
+    'primary' : '</metadata>\n',
+    'filelists' : '</filelists>\n',
+    'other' : '</otherdata>\n',
+}
+
+# Separates the fragments of a package in its cache file; cannot occur in XML
+_FRAGMENT_SEPARATOR = '\0'
+
+# Version of the sqlite databases generated by yum-metadata-parser
+_DATABASE_VERSION = 10
+
+
+class RepodataCanceled(Exception):
+    pass
+
+
+class RepodataError(Exception):
+    pass
+
+# -- package xml cache ---------------------------------------------------------------
+
+class PackageXMLCache:
+    """
+    On-disk cache of the primary, filelists and other XML fragments rendered
+    for each package. Entries are written atomically so the cache can be
+    shared by concurrent publishes.
+    """
+
+    def __init__(self, cache_dir=PACKAGE_XML_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def key(self, unit, relpath, checksum_type):
+        """
+        Returns the cache key for a package unit published at the given path
+        with the given metadata checksum type; None if the unit's checksum is
+        not known, in which case its XML cannot be cached.
+
+        @param unit: package unit
+        @type  unit: AssociatedUnit
+
+        @param relpath: path of the package relative to the repository
+        @type  relpath: str
+
+        @param checksum_type: checksum type used in the repository metadata
+        @type  checksum_type: str
+
+        @rtype: str or None
+        """
+        checksum = unit.unit_key.get('checksum')
+        if not checksum:
+            return None
+        parts = [str(PACKAGE_XML_CACHE_VERSION), unit.unit_key.get('checksumtype') or '',
+                 checksum, checksum_type, relpath]
+        return hashlib.sha256(encode_unicode(u'\0'.join([unicode(p) for p in parts]))).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def contains(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        """
+        @return: XML fragments for each of PACKAGE_METADATA_TYPES; None if the
+                 key is not in the cache
+        @rtype:  list of str or None
+        """
+        try:
+            f = open(self.path(key), 'rb')
+        except IOError:
+            return None
+        try:
+            fragments = f.read().split(_FRAGMENT_SEPARATOR)
+        finally:
+            f.close()
+        if len(fragments) != len(PACKAGE_METADATA_TYPES):
+            return None
+        return fragments
+
+    def put(self, key, fragments):
+        path = self.path(key)
+        util.create_dirs(os.path.dirname(path))
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        f = open(tmp_path, 'wb')
+        try:
+            f.write(_FRAGMENT_SEPARATOR.join(fragments))
+        finally:
+            f.close()
+        os.rename(tmp_path, path)
+
+# -- package xml rendering -----------------------------------------------------------
+
+class PackageXMLRenderer:
+    """
+    Renders the XML fragments for a package from the package file using
+    createrepo's package class, exactly as createrepo itself would.
+    """
+
+    def __init__(self, repo_dir, checksum_type):
+        # imported here so that the rest of the plugin loads without createrepo
+        import rpmUtils.transaction
+        from createrepo import yumbased
+        self._yumbased = yumbased
+        self.repo_dir = repo_dir
+        self.checksum_type = checksum_type
+        self.ts = rpmUtils.transaction.initReadOnlyTransaction()
+
+    def render(self, relpath):
+        """
+        @param relpath: path of the package relative to the repository directory
+        @type  relpath: str
+
+        @return: XML fragments for each of PACKAGE_METADATA_TYPES
+        @rtype:  list of str
+        """
+        localpath = encode_unicode(os.path.join(self.repo_dir, relpath))
+        external_data = {'_cachedir' : None,
+                         '_baseurl' : None,
+                         '_reldir' : encode_unicode(self.repo_dir),
+                         '_packagenumber' : 0,
+                         '_collapse_libc_requires' : True}
+        po = self._yumbased.CreateRepoPackage(self.ts, localpath, sumtype=self.checksum_type,
+                                              external_data=external_data)
+        fragments = [po.xml_dump_primary_metadata(),
+                     po.xml_dump_filelists_metadata(),
+                     po.xml_dump_other_metadata()]
+        return [encode_unicode(f) for f in fragments]
+
+# -- repodata writer -----------------------------------------------------------------
+
+class RepodataWriter:
+    """
+    Writes the package metadata of a repository into a repodata directory.
+    """
+
+    def __init__(self, repo_dir, checksum_type, cache=None, canceled=None):
+        """
+        @param repo_dir: repository directory in which the packages are found
+        @type  repo_dir: str
+
+        @param checksum_type: checksum type used in the metadata
+        @type  checksum_type: str
+
+        @param cache: package XML cache; defaults to the shared cache
+        @type  cache: PackageXMLCache
+
+        @param canceled: event set when the generation should be stopped
+        @type  canceled: threading.Event
+        """
+        self.repo_dir = repo_dir
+        self.checksum_type = checksum_type
+        self.cache = cache or PackageXMLCache()
+        self.canceled = canceled
+        self._renderer = None
+        self.rendered = 0
+
+    def write(self, units, repodata_dir, groups_xml_path=None):
+        """
+        Generates the metadata for the package units, which must already be
+        available under the repository directory at their relative paths.
+
+        @param units: package units to include
+        @type  units: list of AssociatedUnit
+
+        @param repodata_dir: directory to write the metadata into; created if
+                             it does not exist
+        @type  repodata_dir: str
+
+        @param groups_xml_path: optional comps file to include as group metadata
+        @type  groups_xml_path: str
+
+        @return: list of (relative path, error message) of the packages that
+                 could not be included
+        @rtype:  list
+        """
+        util.create_dirs(repodata_dir)
+        keys, errors = self._prepare(units)
+
+        records = []
+        for mdtype in PACKAGE_METADATA_TYPES:
+            index = PACKAGE_METADATA_TYPES.index(mdtype)
+            filename = os.path.join(repodata_dir, '%s.xml.gz' % mdtype)
+            self._write_document(filename, mdtype, keys, index)
+            records.append(self._record(mdtype, filename))
+            records.append(self._database_record(mdtype, filename, records[-1]['checksum']))
+
+        if groups_xml_path:
+            records.extend(self._group_records(groups_xml_path, repodata_dir))
+
+        self._write_repomd(repodata_dir, records)
+        return errors
+
+    def _check_canceled(self):
+        if self.canceled is not None and self.canceled.isSet():
+            raise RepodataCanceled()
+
+    def _prepare(self, units):
+        """
+        Ensures the XML of every unit is in the cache, rendering it for the
+        units that are not.
+
+        @return: tuple of the cache keys (or rendered fragments, for units
+                 that cannot be cached) of the included units and the errors
+                 for the units that could not be rendered
+        """
+        keys = []
+        errors = []
+        for u in units:
+            self._check_canceled()
+            relpath = util.get_relpath_from_unit(u)
+            key = self.cache.key(u, relpath, self.checksum_type)
+            if key is not None and self.cache.contains(key):
+                keys.append(key)
+                continue
+            try:
+                fragments = self._render(relpath)
+            except Exception, e:
+                _LOG.exception('Unable to generate metadata for package <%s>' % relpath)
+                errors.append((relpath, str(e)))
+                continue
+            if key is None:
+                keys.append(fragments)
+            else:
+                self.cache.put(key, fragments)
+                keys.append(key)
+        return keys, errors
+
+    def _render(self, relpath):
+        if self._renderer is None:
+            self._renderer = PackageXMLRenderer(self.repo_dir, self.checksum_type)
+        self.rendered += 1
+        return self._renderer.render(relpath)
+
+    def _write_document(self, filename, mdtype, keys, index):
+        f = gzip.open(filename, 'wb')
+        try:
+            f.write(_DOCUMENT_HEADERS[mdtype] % len(keys))
+            for key in keys:
+                self._check_canceled()
+                if isinstance(key, list):
+                    fragments = key
+                else:
+                    fragments = self.cache.get(key)
+                    if fragments is None:
+                        raise RepodataError('Package metadata missing from cache: %s' % key)
+                f.write(fragments[index])
+            f.write(_DOCUMENT_FOOTERS[mdtype])
+        finally:
+            f.close()
+
+    def _record(self, mdtype, filename, open_filename=None):
+        """
+        @return: repomd.xml data record for a metadata file; the open checksum
+                 is calculated on the uncompressed content of gzip files
+        @rtype:  dict
+        """
+        record = {'type' : mdtype,
+                  'location' : 'repodata/%s' % os.path.basename(filename),
+                  'checksum' : self._checksum(open(filename, 'rb')),
+                  'timestamp' : int(os.stat(filename).st_mtime),
+                  'size' : os.stat(filename).st_size}
+        if filename.endswith('.gz'):
+            record['open-checksum'] = self._checksum(gzip.open(filename, 'rb'))
+        return record
+
+    def _database_record(self, mdtype, filename, checksum):
+        """
+        Generates the sqlite database for a metadata file with yum's metadata
+        parser, the same way createrepo does, and compresses it.
+        """
+        import sqlitecachec
+
+        repodata_dir = os.path.dirname(filename)
+        parser = sqlitecachec.RepodataParserSqlite(repodata_dir, 'pulp', None)
+        if mdtype == 'primary':
+            parser.getPrimary(filename, checksum)
+        elif mdtype == 'filelists':
+            parser.getFilelists(filename, checksum)
+        else:
+            parser.getOtherdata(filename, checksum)
+
+        database = os.path.join(repodata_dir, '%s.sqlite' % mdtype)
+        os.rename(filename + '.sqlite', database)
+        compressed = database + '.bz2'
+        self._bzip(database, compressed)
+        record = self._record('%s_db' % mdtype, compressed)
+        record['open-checksum'] = self._checksum(open(database, 'rb'))
+        record['database_version'] = _DATABASE_VERSION
+        os.unlink(database)
+        return record
+
+    def _group_records(self, groups_xml_path, repodata_dir):
+        group_file = os.path.join(repodata_dir, os.path.basename(groups_xml_path))
+        if os.path.abspath(group_file) != os.path.abspath(groups_xml_path):
+            shutil.copyfile(groups_xml_path, group_file)
+        group_gz_file = group_file + '.gz'
+        src = open(group_file, 'rb')
+        try:
+            dst = gzip.open(group_gz_file, 'wb')
+            try:
+                shutil.copyfileobj(src, dst)
+            finally:
+                dst.close()
+        finally:
+            src.close()
+        return [self._record('group', group_file), self._record('group_gz', group_gz_file)]
+
+    def _write_repomd(self, repodata_dir, records):
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<repomd xmlns="http://linux.duke.edu/metadata/repo" '
+                 'xmlns:rpm="http://linux.duke.edu/metadata/rpm">',
+                 '  <revision>%d</revision>' % int(time.time())]
+        for r in records:
+            lines.append('  <data type="%s">' % r['type'])
+            lines.append('    <location href="%s"/>' % r['location'])
+            lines.append('    <checksum type="%s">%s</checksum>' % (self.checksum_type, r['checksum']))
+            lines.append('    <timestamp>%d</timestamp>' % r['timestamp'])
+            lines.append('    <size>%d</size>' % r['size'])
+            if 'open-checksum' in r:
+                lines.append('    <open-checksum type="%s">%s</open-checksum>' %
+                             (self.checksum_type, r['open-checksum']))
+            if 'database_version' in r:
+                lines.append('    <database_version>%d</database_version>' % r['database_version'])
+            lines.append('  </data>')
+        lines.append('</repomd>')
+
+        repomd = os.path.join(repodata_dir, 'repomd.xml')
+        tmp = repomd + '.tmp'
+        f = open(tmp, 'w')
+        try:
+            f.write('\n'.join(lines) + '\n')
+        finally:
+            f.close()
+        os.rename(tmp, repomd)
+
+    def _checksum(self, f, buffer_size=65536):
+        # createrepo uses 'sha' for sha1
+        hash_name = self.checksum_type
+        if hash_name == 'sha':
+            hash_name = 'sha1'
+        h = hashlib.new(hash_name)
+        try:
+            while True:
+                data = f.read(buffer_size)
+                if not data:
+                    break
+                h.update(data)
+        finally:
+            f.close()
+        return h.hexdigest()
+
+    def _bzip(self, src_filename, dst_filename, buffer_size=65536):
+        src = open(src_filename, 'rb')
+        try:
+            dst = bz2.BZ2File(dst_filename, 'wb')
+            try:
+                while True:
+                    data = src.read(buffer_size)
+                    if not data:
+                        break
+                    dst.write(data)
+            finally:
+                dst.close()
+        finally:
+            src.close()
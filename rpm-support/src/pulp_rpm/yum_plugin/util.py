@@ -22,6 +22,7 @@ import logging
 import gettext
 import rpmUtils
 from M2Crypto import X509
+from pulp_rpm.yum_plugin import checksum_cache
 _ = gettext.gettext
 
 LOG_PREFIX_NAME="pulp.plugins"
@@ -205,14 +206,36 @@ def verify_exists(file_path, checksum=None, checksum_type="sha256", size=None, v
             cleanup_file(file_path)
             return False
     verify_checksum = verify_options.get("checksum") or False
-    # compute checksum
+    # compute checksum; files unchanged since they were last verified are
+    # not read again
     if verify_checksum and checksum is not None:
-        computed_checksum = get_file_checksum(filename=file_path, hashtype=checksum_type)
+        computed_checksum = checksum_cache.get_checksum_cache().checksum(file_path, checksum_type)
         if computed_checksum != checksum:
             cleanup_file(file_path)
             return False
     return True
 
+def verify_checksums(files, verify_options={}):
+    """
+    Computes up front, in a pool of processes, the checksums of the files
+    that verify_exists will check so that it finds them in the checksum cache.
+    Files unchanged since they were last verified are not read.
+
+    @param files list of (file path, checksum, checksum type)
+    @type files list
+
+    @param verify_options dict of checksum of size verify options
+    @type size dict
+
+    @return number of files 'verified' (read), 'skipped' (unchanged) and in 'error'
+    @rtype dict
+    """
+    if not verify_options.get("checksum"):
+        return {'verified' : 0, 'skipped' : 0, 'error' : 0}
+    to_verify = [(path, checksum_type) for path, checksum, checksum_type in files if checksum is not None]
+    checksums, stats = checksum_cache.get_checksum_cache().checksums(to_verify)
+    return stats
+
 def cleanup_file(file_path):
     try:
         os.remove(file_path)
@@ -24,12 +24,22 @@ def get_profiler_conduit(type_id=None, existing_units=None, repo_bindings=[]):
     def get_bindings(consumer_id=None):
         return repo_bindings
 
+    def matches(unit, unit_filters):
+        # supports the field equality and $or filters used by the profilers
+        for key, value in unit_filters.items():
+            if key == "$or":
+                if not [f for f in value if matches(unit, f)]:
+                    return False
+            elif unit.unit_key.get(key) != value:
+                return False
+        return True
+
     def get_units(repo_id, criteria=None):
         ret_val = []
         if existing_units:
             for u in existing_units:
                 if criteria:
-                    if u.type_id in criteria.type_ids:
+                    if u.type_id in criteria.type_ids and matches(u, criteria.unit_filters):
                         ret_val.append(u)
                 else:
                     ret_val.append(u)
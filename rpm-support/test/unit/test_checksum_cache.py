@@ -0,0 +1,128 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import hashlib
+import mock
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)) + "/../../../src/")
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)) + "/../../common")
+
+from pulp_rpm.yum_plugin import checksum_cache, util
+
+import rpm_support_base
+
+class TestChecksumCache(rpm_support_base.PulpRPMTests):
+
+    def setUp(self):
+        super(TestChecksumCache, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = checksum_cache.ChecksumCache(os.path.join(self.temp_dir, "cache", "checksums.db"))
+        self.files = []
+        for i in range(4):
+            path = os.path.join(self.temp_dir, "file-%s" % i)
+            f = open(path, "w")
+            f.write("content %s" % i)
+            f.close()
+            self.files.append(path)
+
+    def tearDown(self):
+        super(TestChecksumCache, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def expected(self, path, checksum_type="sha256"):
+        return hashlib.new(checksum_type, open(path).read()).hexdigest()
+
+    def test_checksums(self):
+        files = [(p, "sha256") for p in self.files]
+
+        checksums, stats = self.cache.checksums(files, num_processes=2)
+
+        self.assertEquals({'verified' : 4, 'skipped' : 0, 'error' : 0}, stats)
+        for p in self.files:
+            self.assertEquals(self.expected(p), checksums[(p, "sha256")])
+
+        # unchanged files are not read again
+        checksums, stats = self.cache.checksums(files, num_processes=2)
+
+        self.assertEquals({'verified' : 0, 'skipped' : 4, 'error' : 0}, stats)
+        for p in self.files:
+            self.assertEquals(self.expected(p), checksums[(p, "sha256")])
+
+    def test_checksum_type(self):
+        self.cache.checksums([(self.files[0], "sha256")])
+
+        self.assertEquals(self.expected(self.files[0], "sha1"), self.cache.checksum(self.files[0], "sha"))
+
+    def test_hash_command_unavailable(self):
+        files = [(p, "sha256") for p in self.files]
+        commands = {"sha256" : os.path.join(self.temp_dir, "missing-sha256sum")}
+
+        with mock.patch.dict(checksum_cache.HASH_COMMANDS, commands):
+            checksums, stats = self.cache.checksums(files, num_processes=2)
+
+        self.assertEquals({'verified' : 4, 'skipped' : 0, 'error' : 0}, stats)
+        for p in self.files:
+            self.assertEquals(self.expected(p), checksums[(p, "sha256")])
+
+    def test_modified_file(self):
+        self.cache.checksums([(p, "sha256") for p in self.files])
+        f = open(self.files[0], "w")
+        f.write("modified content")
+        f.close()
+        # make sure the modification time changes as well as the size
+        os.utime(self.files[0], (time.time() + 10, time.time() + 10))
+
+        checksums, stats = self.cache.checksums([(p, "sha256") for p in self.files])
+
+        self.assertEquals(1, stats['verified'])
+        self.assertEquals(3, stats['skipped'])
+        self.assertEquals(self.expected(self.files[0]), checksums[(self.files[0], "sha256")])
+
+    def test_missing_file(self):
+        missing = os.path.join(self.temp_dir, "missing")
+
+        checksums, stats = self.cache.checksums([(missing, "sha256")])
+
+        self.assertEquals({}, checksums)
+        self.assertEquals(None, self.cache.checksum(missing, "sha256"))
+
+    def test_unusable_cache(self):
+        cache = checksum_cache.ChecksumCache(os.path.join(self.files[0], "checksums.db"))
+
+        checksums, stats = cache.checksums([(self.files[1], "sha256")])
+
+        self.assertEquals(self.expected(self.files[1]), checksums[(self.files[1], "sha256")])
+
+    def test_verify_exists(self):
+        patcher = mock.patch("pulp_rpm.yum_plugin.checksum_cache._CACHE", self.cache)
+        patcher.start()
+        try:
+            files = [(p, self.expected(p), "sha256") for p in self.files]
+            verify_options = {"checksum" : True}
+            stats = util.verify_checksums(files, verify_options)
+            self.assertEquals(4, stats['verified'])
+
+            with mock.patch("pulp_rpm.yum_plugin.checksum_cache.compute_checksum") as compute:
+                for path, checksum, checksum_type in files:
+                    self.assertTrue(util.verify_exists(path, checksum, checksum_type, verify_options=verify_options))
+                self.assertFalse(compute.called)
+                self.assertFalse(util.verify_exists(self.files[0], "invalid", "sha256", verify_options=verify_options))
+            self.assertFalse(os.path.exists(self.files[0]))
+        finally:
+            patcher.stop()
@@ -20,6 +20,7 @@ import tempfile
 import unittest
 import yum
 from pulp.plugins.model import Consumer, Repository, Unit
+from pulp.plugins.profiler import InvalidUnitsRequested
 from pulp.server.managers import factory
 from pulp.server.managers.consumer.cud import ConsumerManager
 
@@ -222,6 +223,54 @@ class TestErrataProfiler(rpm_support_base.PulpRPMTests):
         report = prof.unit_applicable(self.test_consumer, example_errata, None, conduit)
         self.assertFalse(report.applicable)
 
+    def test_units_applicable(self):
+        errata_obj = self.get_test_errata_object()
+        errata_unit = Unit(TYPE_ID_ERRATA, {"id":errata_obj["id"]}, errata_obj, None)
+        existing_units = [errata_unit]
+        test_repo = profiler_mocks.get_repo("test_repo_id")
+        conduit = profiler_mocks.get_profiler_conduit(existing_units=existing_units, repo_bindings=[test_repo])
+        example_errata = {"unit_key":errata_unit.unit_key, "type_id":TYPE_ID_ERRATA}
+        consumers = [self.test_consumer, self.test_consumer_i386, self.test_consumer_been_updated]
+
+        prof = RPMErrataProfiler()
+        result = prof.units_applicable(consumers, [example_errata], None, conduit)
+        self.assertEqual(len(result), 3)
+        self.assertTrue(result[self.consumer_id][0].applicable)
+        self.assertEqual(len(result[self.consumer_id][0].details["applicable_rpms"]), 2)
+        self.assertFalse(result[self.consumer_id_i386][0].applicable)
+        self.assertFalse(result[self.consumer_id_been_updated][0].applicable)
+        # the bound repository is searched once for all consumers
+        self.assertEqual(conduit.get_units.call_count, 1)
+
+    def test_units_applicable_matches_single(self):
+        errata_obj = self.get_test_errata_object()
+        errata_unit = Unit(TYPE_ID_ERRATA, {"id":errata_obj["id"]}, errata_obj, None)
+        unrelated_obj = self.get_test_errata_object_unrelated()
+        unrelated_unit = Unit(TYPE_ID_ERRATA, {"id":unrelated_obj["id"]}, unrelated_obj, None)
+        existing_units = [errata_unit, unrelated_unit]
+        test_repo = profiler_mocks.get_repo("test_repo_id")
+        conduit = profiler_mocks.get_profiler_conduit(existing_units=existing_units, repo_bindings=[test_repo])
+        units = [{"unit_key":u.unit_key, "type_id":TYPE_ID_ERRATA} for u in existing_units]
+
+        prof = RPMErrataProfiler()
+        result = prof.units_applicable([self.test_consumer], units, None, conduit)
+        for unit, report in zip(units, result[self.consumer_id]):
+            single = prof.unit_applicable(self.test_consumer, unit, None, conduit)
+            self.assertEqual(report.unit, unit)
+            self.assertEqual(report.applicable, single.applicable)
+            self.assertEqual(report.details, single.details)
+
+    def test_units_applicable_not_found(self):
+        errata_obj = self.get_test_errata_object()
+        errata_unit = Unit(TYPE_ID_ERRATA, {"id":errata_obj["id"]}, errata_obj, None)
+        test_repo = profiler_mocks.get_repo("test_repo_id")
+        conduit = profiler_mocks.get_profiler_conduit(existing_units=[], repo_bindings=[test_repo])
+        example_errata = {"unit_key":errata_unit.unit_key, "type_id":TYPE_ID_ERRATA}
+
+        prof = RPMErrataProfiler()
+        self.assertRaises(InvalidUnitsRequested, prof.units_applicable,
+                          [self.test_consumer], [example_errata], None, conduit)
+
     def test_install_units(self):
         errata_obj = self.get_test_errata_object()
         errata_unit = Unit(TYPE_ID_ERRATA, {"id":errata_obj["id"]}, errata_obj, None)
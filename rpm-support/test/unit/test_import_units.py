@@ -147,15 +147,14 @@ class TestImportUnits(rpm_support_base.PulpRPMTests):
         dest_repo.working_dir = os.path.join(self.working_dir, dest_repo.id)
         specific_units = []
         #  We need to test that:
-        #   1) associate_unit was called on each unit type
+        #   1) associate_units was called with each unit
         #   2) symlinks were created in the dest_repo working dir
         importer.import_units(source_repo, dest_repo, import_conduit, config, specific_units)
         #
-        #  Test that we called import_conduit.associate_unit for each source_unit
-        #  We convert the mock call_list to extract the unit argument per call
+        #  Test that we called import_conduit.associate_units with each source_unit
         #  Assume only one argument to import_conduit.associate_units()
         #
-        associated_units = [mock_call[0][0] for mock_call in import_conduit.associate_unit.call_args_list]
+        associated_units = import_conduit.associate_units.call_args[0][0]
         self.assertEqual(len(associated_units), len(source_units))
         for u in associated_units:
             self.assertTrue(u in source_units)
@@ -175,15 +174,14 @@ class TestImportUnits(rpm_support_base.PulpRPMTests):
         dest_repo.working_dir = os.path.join(self.working_dir, dest_repo.id)
         specific_units = [source_units[0], source_units[1]]
         #  We need to test that:
-        #   1) associate_unit was called on each unit of specific_units
+        #   1) associate_units was called with each unit of specific_units
         #   2) symlinks were created in the dest_repo working dir
         importer.import_units(source_repo, dest_repo, import_conduit, config, specific_units)
         #
-        #  Test that we called import_conduit.associate_unit for each specific_unit
-        #  We convert the mock call_list to extract the unit argument per call
+        #  Test that we called import_conduit.associate_units with each specific_unit
         #  Assume only one argument to import_conduit.associate_units()
         #
-        associated_units = [mock_call[0][0] for mock_call in import_conduit.associate_unit.call_args_list]
+        associated_units = import_conduit.associate_units.call_args[0][0]
         self.assertEqual(len(associated_units), len(specific_units))
         for u in associated_units:
             self.assertTrue(u in specific_units)
@@ -271,7 +269,7 @@ class TestImportDependencies(rpm_support_base.PulpRPMTests):
         # Test
         result = importer.import_units(repoA, repoB, conduit, config, units)
         # Verify
-        associated_units = [mock_call[0][0] for mock_call in conduit.associate_unit.call_args_list]
+        associated_units = conduit.associate_units.call_args[0][0]
         self.assertEqual(len(associated_units), len(units))
         for u in associated_units:
             self.assertTrue(u in units)
@@ -296,7 +294,7 @@ class TestImportDependencies(rpm_support_base.PulpRPMTests):
         # Test
         result = importer.import_units(repoA, repoB, conduit, config, units)
         # Verify
-        associated_units = [mock_call[0][0] for mock_call in conduit.associate_unit.call_args_list]
+        associated_units = conduit.associate_units.call_args[0][0]
         self.assertEqual(len(associated_units), len(existing_units))
         for u in associated_units:
             self.assertTrue(u in units)
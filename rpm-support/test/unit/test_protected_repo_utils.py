@@ -16,7 +16,7 @@ from ConfigParser import SafeConfigParser
 import os
 import unittest
 
-from pulp_rpm.repo_auth.protected_repo_utils import ProtectedRepoListingFile, ProtectedRepoUtils
+from pulp_rpm.repo_auth.protected_repo_utils import ProtectedRepoListingFile, ProtectedRepoPathTrie, ProtectedRepoUtils
 
 # -- constants -----------------------------------------------------------------------
 
@@ -154,3 +154,32 @@ class TestProtectedRepoListingFile(unittest.TestCase):
 
         # Verify
         self.assertEqual(1, len(f.listings))
+
+class TestProtectedRepoPathTrie(unittest.TestCase):
+
+    def setUp(self):
+        listings = {
+            'path-1' : 'repo-1',
+            '/path-1/sub/' : 'repo-1-sub',
+            'path-2/fedora/16' : 'repo-2',
+        }
+        self.trie = ProtectedRepoPathTrie(listings)
+
+    def test_find(self):
+        self.assertEqual('repo-1', self.trie.find('/path-1/repodata/repomd.xml'))
+        self.assertEqual('repo-2', self.trie.find('/path-2/fedora/16/foo.rpm'))
+
+    def test_find_longest_match(self):
+        self.assertEqual('repo-1-sub', self.trie.find('/path-1/sub/foo.rpm'))
+
+    def test_find_slashes(self):
+        self.assertEqual('repo-1', self.trie.find('path-1/foo.rpm'))
+        self.assertEqual('repo-2', self.trie.find('//path-2//fedora/16/foo.rpm'))
+
+    def test_find_dot_segments(self):
+        self.assertEqual('repo-2', self.trie.find('/other/../path-2/./fedora/16/foo.rpm'))
+
+    def test_find_not_protected(self):
+        self.assertEqual(None, self.trie.find('/path-10/foo.rpm'))
+        self.assertEqual(None, self.trie.find('/path-2/fedora/17/foo.rpm'))
+        self.assertEqual(None, self.trie.find('/'))
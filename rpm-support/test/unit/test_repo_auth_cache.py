@@ -0,0 +1,99 @@
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pulp_rpm.repo_auth.cache import ExpiringCache, FileCache
+
+# -- test cases ----------------------------------------------------------------------
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'cached')
+        self.cache = FileCache()
+        self.loads = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def load(self, filename):
+        self.loads.append(filename)
+        if not os.path.exists(filename):
+            return None
+        f = open(filename, 'r')
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def write(self, contents):
+        f = open(self.filename, 'w')
+        f.write(contents)
+        f.close()
+
+    def test_cached(self):
+        self.write('one')
+        self.assertEqual('one', self.cache.get(self.filename, self.load))
+        self.assertEqual('one', self.cache.get(self.filename, self.load))
+        self.assertEqual(1, len(self.loads))
+
+    def test_changed(self):
+        self.write('one')
+        self.cache.get(self.filename, self.load)
+        self.write('three')
+        self.assertEqual('three', self.cache.get(self.filename, self.load))
+        self.assertEqual(2, len(self.loads))
+
+    def test_missing(self):
+        self.assertEqual(None, self.cache.get(self.filename, self.load))
+        self.assertEqual(None, self.cache.get(self.filename, self.load))
+        self.assertEqual(1, len(self.loads))
+        self.write('one')
+        self.assertEqual('one', self.cache.get(self.filename, self.load))
+
+    def test_removed(self):
+        self.write('one')
+        self.cache.get(self.filename, self.load)
+        os.remove(self.filename)
+        self.assertEqual(None, self.cache.get(self.filename, self.load))
+
+
+class TestExpiringCache(unittest.TestCase):
+
+    def test_get_set(self):
+        cache = ExpiringCache()
+        self.assertEqual(None, cache.get('a'))
+        cache.set('a', False)
+        self.assertEqual(False, cache.get('a'))
+
+    def test_expired(self):
+        cache = ExpiringCache(ttl=0.01)
+        cache.set('a', 1)
+        time.sleep(0.02)
+        self.assertEqual(None, cache.get('a'))
+        self.assertEqual(0, len(cache))
+
+    def test_bounded(self):
+        cache = ExpiringCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('b', 3)
+        self.assertEqual(2, len(cache))
+        cache.set('c', 4)
+        self.assertEqual(1, len(cache))
+        self.assertEqual(4, cache.get('c'))
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2012 Red Hat, Inc.
+#
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import gzip
+import mock
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)) + "/../../../src/")
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)) + "/../../plugins/distributors/")
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)) + "/../../common")
+
+from pulp_rpm.yum_plugin import metadata, repodata, util
+
+from pulp.plugins.model import AssociatedUnit
+
+import rpm_support_base
+
+PACKAGES = [
+    ("pulp-dot-2.0-test", "0.1.2", "1.fc11"),
+    ("pulp-test-package", "0.2.1", "1.fc11"),
+    ("pulp-test-package", "0.3.1", "1.fc11"),
+]
+
+def make_unit(name, version, release, checksum=None):
+    filename = "%s-%s-%s.x86_64.rpm" % (name, version, release)
+    unit_key = {"name" : name, "version" : version, "release" : release, "epoch" : "0",
+                "arch" : "x86_64", "checksumtype" : "sha256", "checksum" : checksum or filename}
+    return AssociatedUnit("rpm", unit_key, {"filename" : filename}, filename, None, None, "importer", "yum_importer")
+
+
+class TestPackageXMLCache(rpm_support_base.PulpRPMTests):
+
+    def setUp(self):
+        super(TestPackageXMLCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = repodata.PackageXMLCache(self.cache_dir)
+
+    def tearDown(self):
+        super(TestPackageXMLCache, self).tearDown()
+        shutil.rmtree(self.cache_dir)
+
+    def test_key(self):
+        unit = make_unit(*PACKAGES[0])
+        key = self.cache.key(unit, "a.rpm", "sha256")
+        self.assertEquals(key, self.cache.key(make_unit(*PACKAGES[0]), "a.rpm", "sha256"))
+        self.assertNotEquals(key, self.cache.key(unit, "b/a.rpm", "sha256"))
+        self.assertNotEquals(key, self.cache.key(unit, "a.rpm", "sha"))
+        self.assertNotEquals(key, self.cache.key(make_unit(*PACKAGES[0], checksum="other"), "a.rpm", "sha256"))
+
+    def test_key_without_checksum(self):
+        unit = make_unit(*PACKAGES[0])
+        del unit.unit_key["checksum"]
+        self.assertEquals(None, self.cache.key(unit, "a.rpm", "sha256"))
+
+    def test_put_get(self):
+        key = self.cache.key(make_unit(*PACKAGES[0]), "a.rpm", "sha256")
+        self.assertFalse(self.cache.contains(key))
+        self.assertEquals(None, self.cache.get(key))
+
+        self.cache.put(key, ["<package/>", "<filelist/>", "<other/>"])
+
+        self.assertTrue(self.cache.contains(key))
+        self.assertEquals(["<package/>", "<filelist/>", "<other/>"], self.cache.get(key))
+        self.assertEquals([key], os.listdir(os.path.dirname(self.cache.path(key))))
+
+
+class TestRepodataWriter(rpm_support_base.PulpRPMTests):
+
+    def setUp(self):
+        super(TestRepodataWriter, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = repodata.PackageXMLCache(os.path.join(self.temp_dir, "cache"))
+        self.units = [make_unit(*p) for p in PACKAGES]
+
+    def tearDown(self):
+        super(TestRepodataWriter, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def fragments(self, relpath):
+        return ['<package name="%s"/>\n' % relpath, '<filelist/>\n', '<other/>\n']
+
+    def test_prepare_renders_cache_misses(self):
+        writer = repodata.RepodataWriter(self.temp_dir, "sha256", self.cache)
+        writer._render = mock.Mock(side_effect=self.fragments)
+
+        keys, errors = writer._prepare(self.units)
+
+        self.assertEquals(3, writer._render.call_count)
+        self.assertEquals([], errors)
+        for k in keys:
+            self.assertTrue(self.cache.contains(k))
+
+        # a second publish, with one new package, only renders that package
+        new_unit = make_unit("pulp-test-package", "0.4.1", "1.fc11")
+        writer = repodata.RepodataWriter(self.temp_dir, "sha256", self.cache)
+        writer._render = mock.Mock(side_effect=self.fragments)
+
+        keys, errors = writer._prepare(self.units + [new_unit])
+
+        self.assertEquals(4, len(keys))
+        self.assertEquals(1, writer._render.call_count)
+        writer._render.assert_called_once_with(util.get_relpath_from_unit(new_unit))
+
+    def test_prepare_render_error(self):
+        writer = repodata.RepodataWriter(self.temp_dir, "sha256", self.cache)
+        writer._render = mock.Mock(side_effect=[self.fragments("a"), IOError("missing"), self.fragments("c")])
+
+        keys, errors = writer._prepare(self.units)
+
+        self.assertEquals(2, len(keys))
+        self.assertEquals([(util.get_relpath_from_unit(self.units[1]), "missing")], errors)
+
+    def test_write_document(self):
+        writer = repodata.RepodataWriter(self.temp_dir, "sha256", self.cache)
+        writer._render = mock.Mock(side_effect=self.fragments)
+        keys, errors = writer._prepare(self.units)
+        filename = os.path.join(self.temp_dir, "primary.xml.gz")
+
+        writer._write_document(filename, "primary", keys, 0)
+
+        data = gzip.open(filename).read()
+        self.assertTrue('packages="3"' in data)
+        for u in self.units:
+            self.assertTrue('<package name="%s"/>' % util.get_relpath_from_unit(u) in data)
+        self.assertTrue(data.endswith("</metadata>\n"))
+
+    def test_canceled(self):
+        canceled = threading.Event()
+        canceled.set()
+        writer = repodata.RepodataWriter(self.temp_dir, "sha256", self.cache, canceled)
+        writer._render = mock.Mock(side_effect=self.fragments)
+
+        self.assertRaises(repodata.RepodataCanceled, writer.write, self.units, self.temp_dir)
+        self.assertFalse(writer._render.called)
+
+
+class TestGenerateRepodata(rpm_support_base.PulpRPMTests):
+
+    def setUp(self):
+        super(TestGenerateRepodata, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.abspath(os.path.join(os.path.abspath(os.path.dirname(__file__)), "data"))
+        self.repo_dir = os.path.join(self.temp_dir, "repo")
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        shutil.copytree(os.path.join(self.data_dir, "test_repo_metadata"), self.repo_dir)
+        self.units = [make_unit(*p) for p in PACKAGES]
+
+    def tearDown(self):
+        super(TestGenerateRepodata, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_generate_repodata(self):
+        metadata.generate_repodata(self.repo_dir, self.units, checksum_type="sha256", cache_dir=self.cache_dir)
+
+        repomd = os.path.join(self.repo_dir, "repodata", "repomd.xml")
+        ftypes = util.get_repomd_filetypes(repomd)
+        for ftype in ["primary", "primary_db", "filelists", "filelists_db", "other", "other_db"]:
+            self.assertTrue(ftype in ftypes)
+            path = os.path.join(self.repo_dir, util.get_repomd_filetype_path(repomd, ftype))
+            self.assertTrue(os.path.exists(path))
+        primary = gzip.open(os.path.join(self.repo_dir, util.get_repomd_filetype_path(repomd, "primary"))).read()
+        for u in self.units:
+            self.assertTrue('href="%s"' % util.get_relpath_from_unit(u) in primary)
+        self.assertFalse(os.path.exists(os.path.join(self.repo_dir, "repodata.old")))
+        self.assertFalse(metadata.REPODATA_CANCEL_LOOKUP.has_key(self.repo_dir))
+
+    def test_generate_repodata_uses_cache(self):
+        metadata.generate_repodata(self.repo_dir, self.units, checksum_type="sha256", cache_dir=self.cache_dir)
+
+        # packages already in the cache are not read again
+        renderer = mock.Mock(side_effect=Exception("package read"))
+        patcher = mock.patch("pulp_rpm.yum_plugin.repodata.PackageXMLRenderer", renderer)
+        patcher.start()
+        try:
+            metadata.generate_repodata(self.repo_dir, self.units, checksum_type="sha256", cache_dir=self.cache_dir)
+        finally:
+            patcher.stop()
+
+        self.assertFalse(renderer.called)
+        repomd = os.path.join(self.repo_dir, "repodata", "repomd.xml")
+        self.assertTrue("primary" in util.get_repomd_filetypes(repomd))